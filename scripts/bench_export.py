@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: 2026 Lasath Fernando <devel@lasath.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Benchmark container export/import throughput through the daemon.
+
+Exports a container once per compression algorithm, through the same
+D-Bus fd passing the CLI uses, then imports each archive back under a
+scratch name. Needs a running kapsule-daemon.
+
+To measure a multi-GB container without having one, --fill-gb clones
+the container and writes that much random (incompressible) data into
+the clone first; the clone is what gets exported.
+
+    scripts/bench_export.py dev --fill-gb 4
+    scripts/bench_export.py dev -c zstd -c none --dir /var/tmp
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from kapsule.client import ContainerError, KapsuleClient
+
+COMPRESSIONS = ("none", "gzip", "zstd")
+
+
+def _rate(size: int, seconds: float) -> str:
+    return f"{size / 1e6 / seconds:8.1f} MB/s"
+
+
+async def _wait(client: KapsuleClient, op_path: str) -> None:
+    await client.wait_operation(op_path)
+
+
+async def bench(args: argparse.Namespace) -> int:
+    """Run the benchmark."""
+    async with KapsuleClient() as client:
+        name = args.container
+        if args.fill_gb:
+            name = f"{args.container}-bench"
+            print(
+                f"Cloning {args.container} to {name} "
+                f"and writing {args.fill_gb} GB..."
+            )
+            await _wait(client, await client.clone_container(args.container, name))
+            subprocess.run(
+                ["incus", "exec", name, "--", "dd", "if=/dev/urandom",
+                 "of=/var/tmp/kapsule-bench.bin", "bs=1M",
+                 f"count={args.fill_gb * 1024}", "status=none"],
+                check=True,
+            )
+
+        results: list[tuple[str, int, float, float]] = []
+        try:
+            for compression in args.compression:
+                path = Path(args.dir) / f"{name}.{compression}.tar"
+                fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                try:
+                    started = time.monotonic()
+                    await _wait(client, await client.export_container(
+                        name, fd, compression=compression
+                    ))
+                    exported = time.monotonic() - started
+                finally:
+                    os.close(fd)
+                size = path.stat().st_size
+
+                imported_name = f"{name}-import"
+                fd = os.open(path, os.O_RDONLY)
+                try:
+                    started = time.monotonic()
+                    await _wait(client, await client.import_container(
+                        imported_name, fd
+                    ))
+                    imported = time.monotonic() - started
+                finally:
+                    os.close(fd)
+                    path.unlink()
+                await _wait(client, await client.delete_container(
+                    imported_name, force=True
+                ))
+                results.append((compression, size, exported, imported))
+        finally:
+            if args.fill_gb:
+                await _wait(client, await client.delete_container(name, force=True))
+
+    print(f"\n{'compression':<12} {'archive':>10} {'export':>17} {'import':>17}")
+    for compression, size, exported, imported in results:
+        print(
+            f"{compression:<12} {size / 1e9:8.2f}GB "
+            f"{exported:6.1f}s {_rate(size, exported)} "
+            f"{imported:6.1f}s {_rate(size, imported)}"
+        )
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("container", help="Container to export")
+    parser.add_argument(
+        "-c", "--compression", action="append", choices=COMPRESSIONS,
+        help="Compression to measure (repeatable; default: all)",
+    )
+    parser.add_argument(
+        "--fill-gb", type=int, default=0,
+        help="Benchmark a clone with this many GB of random data added",
+    )
+    parser.add_argument(
+        "--dir", default=tempfile.gettempdir(),
+        help="Where to write archives (needs room for one)",
+    )
+    args = parser.parse_args()
+    args.compression = args.compression or list(COMPRESSIONS)
+    try:
+        return asyncio.run(bench(args))
+    except (ContainerError, subprocess.CalledProcessError) as e:
+        print(f"Benchmark failed: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
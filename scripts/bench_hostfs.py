@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+
+# SPDX-FileCopyrightText: 2026 Lasath Fernando <devel@lasath.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Benchmark mount-table size and mount propagation for the hostfs modes.
+
+For each hostfs mode, starts a fleet of containers carrying the same
+config and devices the ``kapsule-base`` profile would give them, then
+measures:
+
+- the size of each container's mount table (/proc/self/mountinfo), and
+- how long a host mount + unmount takes. A host mount under a path the
+  containers bind recursively with rslave propagation is replicated
+  into every one of their mount namespaces before the syscall returns,
+  so this is the per-mount cost the fleet imposes on the host.
+
+Needs root and the incus CLI; the containers are deleted afterwards.
+
+    sudo scripts/bench_hostfs.py -n 25
+    sudo scripts/bench_hostfs.py --mode scoped --image images:alpine/edge
+"""
+
+from __future__ import annotations
+
+import argparse
+import ctypes
+import ctypes.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from kapsule.daemon.config import HOSTFS_MODES
+from kapsule.daemon.profiles import base_config, base_devices
+
+MNT_DETACH = 2
+
+_libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+
+
+def _mount_tmpfs(target: str) -> None:
+    if _libc.mount(b"kapsule-bench", target.encode(), b"tmpfs", 0, None) != 0:
+        err = ctypes.get_errno()
+        raise OSError(err, f"mount {target}: {os.strerror(err)}")
+
+
+def _umount(target: str) -> None:
+    if _libc.umount2(target.encode(), MNT_DETACH) != 0:
+        err = ctypes.get_errno()
+        raise OSError(err, f"umount {target}: {os.strerror(err)}")
+
+
+def _mount_count(name: str | None = None) -> int:
+    if name is None:
+        return len(Path("/proc/self/mountinfo").read_text().splitlines())
+    out = subprocess.run(
+        ["incus", "exec", name, "--", "cat", "/proc/self/mountinfo"],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return len(out.splitlines())
+
+
+def _mount_latency(directory: str, rounds: int) -> float:
+    """Average seconds for one tmpfs mount + unmount under ``directory``."""
+    target = tempfile.mkdtemp(prefix="kapsule-bench-", dir=directory)
+    try:
+        started = time.perf_counter()
+        for _ in range(rounds):
+            _mount_tmpfs(target)
+            _umount(target)
+        return (time.perf_counter() - started) / rounds
+    finally:
+        os.rmdir(target)
+
+
+def _create_fleet(mode: str, image: str, count: int, names: list[str]) -> None:
+    """Create and start the fleet, adding each name to ``names`` first.
+
+    Names are recorded before their container is created, so the caller
+    can clean up whatever exists if a create or start fails part way.
+    """
+    # JSON is valid YAML, which is what `incus create` reads from stdin
+    spec = json.dumps({
+        "config": base_config(),
+        "devices": base_devices(mode),
+    })
+    for i in range(count):
+        name = f"kapsule-bench-{mode}-{i}"
+        print(f"\r  starting {i + 1}/{count}", end="", flush=True)
+        names.append(name)
+        subprocess.run(
+            ["incus", "create", image, name, "--no-profiles"],
+            input=spec, check=True, capture_output=True, text=True,
+        )
+        subprocess.run(["incus", "start", name], check=True, capture_output=True)
+    print()
+
+
+def _delete_fleet(names: list[str]) -> None:
+    for name in names:
+        subprocess.run(
+            ["incus", "delete", "--force", name], check=False, capture_output=True
+        )
+
+
+def bench_mode(args: argparse.Namespace, mode: str) -> tuple[float, int, float]:
+    """Measure one mode; returns (avg mounts, host mounts, mount latency)."""
+    print(f"{mode}: {args.count} container(s)")
+    names: list[str] = []
+    try:
+        _create_fleet(mode, args.image, args.count, names)
+        per_container = sum(_mount_count(n) for n in names) / len(names)
+        host = _mount_count()
+        latency = _mount_latency(args.mount_dir, args.rounds)
+    finally:
+        _delete_fleet(names)
+    return per_container, host, latency
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "-n", "--count", type=int, default=20,
+        help="Containers to run per mode (default: 20)",
+    )
+    parser.add_argument(
+        "--mode", action="append", choices=HOSTFS_MODES,
+        help="hostfs mode to measure (repeatable; default: all)",
+    )
+    parser.add_argument(
+        "--image", default="images:archlinux", help="Image for the containers"
+    )
+    parser.add_argument(
+        "--rounds", type=int, default=200,
+        help="Host mount/unmount rounds per mode (default: 200)",
+    )
+    parser.add_argument(
+        "--mount-dir", default="/var/tmp",
+        help="Host directory to mount under; must be outside the scoped binds",
+    )
+    args = parser.parse_args()
+    modes = args.mode or list(HOSTFS_MODES)
+    if os.geteuid() != 0:
+        print("Benchmark needs root (it mounts on the host)", file=sys.stderr)
+        return 1
+
+    results: list[tuple[str, float, int, float]] = []
+    try:
+        baseline = _mount_latency(args.mount_dir, args.rounds)
+        for mode in modes:
+            results.append((mode, *bench_mode(args, mode)))
+    except (OSError, subprocess.CalledProcessError) as e:
+        stderr = getattr(e, "stderr", None)
+        print(f"Benchmark failed: {e} {stderr or ''}".rstrip(), file=sys.stderr)
+        return 1
+
+    print(f"\nhost mount+umount without containers: {baseline * 1e6:8.1f} us")
+    print(f"\n{'mode':<8} {'mounts/container':>16} {'host mounts':>12} "
+          f"{'mount+umount':>14}")
+    for mode, per_container, host, latency in results:
+        print(
+            f"{mode:<8} {per_container:16.1f} {host:12d} "
+            f"{latency * 1e6:11.1f} us"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,12 +3,28 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
+import fnmatch
 import functools
 import os
+import subprocess
+import time
+from typing import Annotated
 
 import typer
-
-from kapsule.cli.output import console, print_containers, print_error, print_success
+from rich.live import Live
+
+from kapsule.cli.output import (
+    OperationDisplay,
+    console,
+    err_console,
+    print_containers,
+    print_error,
+    print_images,
+    print_snapshots,
+    print_success,
+    stats_table,
+)
 from kapsule.client import DaemonNotRunning, KapsuleClient
 
 app = typer.Typer(
@@ -29,6 +45,8 @@ def handle_errors(func):
     def wrapper(*args, **kwargs):
         try:
             return func(*args, **kwargs)
+        except typer.Exit:
+            raise
         except DaemonNotRunning as e:
             print_error(str(e))
             raise typer.Exit(1) from None
@@ -38,29 +56,81 @@ def handle_errors(func):
     return wrapper
 
 
+def complete_image(incomplete: str) -> list[str]:
+    """Shell completion for image names, from the daemon's catalog."""
+    async def _complete():
+        async with KapsuleClient() as client:
+            return await client.list_images(incomplete)
+
+    try:
+        images = run_async(_complete())
+    except Exception:
+        # Completion must never print errors into the user's shell
+        return []
+    return [i["image"] for i in images if i["image"].startswith(incomplete)]
+
+
 @app.command()
 @handle_errors
 def create(
     name: str = typer.Argument(..., help="Container name"),
-    image: str = typer.Option("", "--image", "-i", help="Image to use"),
+    image: str = typer.Option(
+        "", "--image", "-i", help="Image to use", autocompletion=complete_image
+    ),
     session_mode: bool = typer.Option(
         False, "--session", help="Enable session mode"
     ),
     dbus_mux: bool = typer.Option(
         False, "--dbus-mux", help="Enable D-Bus multiplexing"
     ),
+    packages: Annotated[list[str] | None, typer.Option(
+        "--package", "-p",
+        help="Install a package (repeatable; cached for later creates)",
+    )] = None,
+    resources: str = typer.Option(
+        "", "--resources", "-r",
+        help="Resource profile: interactive, batch, background, or a configured one",
+    ),
 ):
     """Create a new container."""
     async def _create():
         async with KapsuleClient() as client:
-            await client.create_container(
-                name, image=image, session_mode=session_mode, dbus_mux=dbus_mux
+            op_path = await client.create_container(
+                name,
+                image=image,
+                session_mode=session_mode,
+                dbus_mux=dbus_mux,
+                packages=packages or [],
+                resources=resources,
             )
+            with OperationDisplay() as display:
+                await client.wait_operation(op_path, display)
             print_success(f"Container '{name}' created.")
 
     run_async(_create())
 
 
+@app.command()
+@handle_errors
+def clone(
+    source: str = typer.Argument(..., help="Container to clone"),
+    name: str = typer.Argument(..., help="Name of the new container"),
+    snapshot: str = typer.Option(
+        "", "--snapshot", "-s",
+        help="Snapshot the source under this name first and clone from it",
+    ),
+):
+    """Clone a container (copy-on-write where the storage pool supports it)."""
+    async def _clone():
+        async with KapsuleClient() as client:
+            op_path = await client.clone_container(source, name, snapshot=snapshot)
+            with OperationDisplay() as display:
+                await client.wait_operation(op_path, display)
+            print_success(f"Container '{name}' cloned from '{source}'.")
+
+    run_async(_clone())
+
+
 @app.command("enter")
 @handle_errors
 def enter_container(
@@ -79,6 +149,57 @@ def enter_container(
     run_async(_enter())
 
 
+@app.command()
+@handle_errors
+def run(
+    source: str = typer.Argument(
+        ..., help="Container, container/snapshot or image to start from",
+        autocompletion=complete_image,
+    ),
+    command: Annotated[list[str] | None, typer.Argument(
+        help="Command to run (default: shell)",
+    )] = None,
+    timing: bool = typer.Option(
+        False, "--time", help="Report the setup and teardown overhead"
+    ),
+):
+    """Run a command in a throwaway container: kapsule run IMAGE -- CMD.
+
+    The container is removed when the command exits. Use create and enter
+    for a persistent one.
+    """
+    async def _prepare():
+        async with KapsuleClient() as client:
+            return await client.prepare_run(source, command or [])
+
+    async def _finish(name: str):
+        async with KapsuleClient() as client:
+            await client.finish_run(name)
+
+    started = time.monotonic()
+    success, message, name, exec_args = run_async(_prepare())
+    if not success:
+        print_error(message)
+        raise typer.Exit(1)
+
+    ready = time.monotonic()
+    try:
+        # Output streams straight through the inherited stdio
+        returncode = subprocess.run(exec_args).returncode
+    finally:
+        finished = time.monotonic()
+        run_async(_finish(name))
+
+    if timing:
+        err_console.print(
+            f"[dim]setup {ready - started:.2f}s, "
+            f"command {finished - ready:.2f}s, "
+            f"teardown {time.monotonic() - finished:.2f}s[/dim]"
+        )
+    # Killed by a signal: report it the way a shell would
+    raise typer.Exit(returncode if returncode >= 0 else 128 - returncode)
+
+
 @app.command("list")
 @handle_errors
 def list_containers(
@@ -102,16 +223,101 @@ def list_containers_alias(
     list_containers(all_=all_)
 
 
+@app.command()
+@handle_errors
+def top(
+    interval: float = typer.Option(
+        2.0, "--interval", "-n", min=0.5, help="Seconds between refreshes"
+    ),
+    once: bool = typer.Option(False, "--once", help="Print one sample and exit"),
+):
+    """Show live CPU, memory, disk and process usage per container."""
+    async def _top():
+        async with KapsuleClient() as client:
+            async def _table():
+                stats = await client.get_container_stats()
+                return stats_table(stats, await client.get_idle_reclaimed_bytes())
+
+            # CPU usage is a rate, so it needs two samples
+            await client.get_container_stats()
+            await asyncio.sleep(min(interval, 1.0))
+            if once:
+                console.print(await _table())
+                return
+            with Live(await _table(), console=console, screen=False) as live:
+                while True:
+                    await asyncio.sleep(interval)
+                    live.update(await _table())
+
+    with contextlib.suppress(KeyboardInterrupt):
+        run_async(_top())
+
+
+def _is_pattern(name: str) -> bool:
+    return any(c in name for c in "*?[")
+
+
+async def _select_containers(
+    client: KapsuleClient, names: list[str], all_containers: bool
+) -> list[str]:
+    """Expand --all and glob patterns into container names.
+
+    Plain names are passed through as given, so the daemon reports the
+    ones that don't exist.
+    """
+    if not all_containers and not any(_is_pattern(n) for n in names):
+        return list(names)
+    existing = [c["name"] for c in await client.list_containers()]
+    if all_containers:
+        return existing
+    selected: list[str] = []
+    for name in names:
+        if _is_pattern(name):
+            selected += fnmatch.filter(existing, name)
+        else:
+            selected.append(name)
+    return list(dict.fromkeys(selected))
+
+
+def _check_targets(names: list[str], all_containers: bool) -> None:
+    if not names and not all_containers:
+        print_error("give at least one container name, or --all")
+        raise typer.Exit(2)
+    if names and all_containers:
+        print_error("container names can't be combined with --all")
+        raise typer.Exit(2)
+
+
 @app.command()
 @handle_errors
 def start(
-    name: str = typer.Argument(..., help="Container name"),
+    names: Annotated[list[str] | None, typer.Argument(
+        help="Container names or glob patterns",
+    )] = None,
+    all_containers: bool = typer.Option(
+        False, "--all", "-a", help="Start every container"
+    ),
 ):
-    """Start a container."""
+    """Start one or more containers."""
+    names = names or []
+    _check_targets(names, all_containers)
+
     async def _start():
         async with KapsuleClient() as client:
-            await client.start_container(name)
-            print_success(f"Container '{name}' started.")
+            targets = await _select_containers(client, names, all_containers)
+            if not targets:
+                print_success("No containers to start.")
+                return
+            if len(targets) == 1 and not all_containers:
+                op_path = await client.start_container(targets[0])
+            else:
+                op_path = await client.start_containers(targets)
+            with OperationDisplay() as display:
+                await client.wait_operation(op_path, display)
+            if len(targets) == 1:
+                print_success(f"Container '{targets[0]}' started.")
+            else:
+                print_success(f"{len(targets)} containers started.")
 
     run_async(_start())
 
@@ -119,29 +325,110 @@ def start(
 @app.command()
 @handle_errors
 def stop(
-    name: str = typer.Argument(..., help="Container name"),
+    names: Annotated[list[str] | None, typer.Argument(
+        help="Container names or glob patterns",
+    )] = None,
+    all_containers: bool = typer.Option(
+        False, "--all", "-a", help="Stop every container"
+    ),
     force: bool = typer.Option(False, "--force", "-f", help="Force stop"),
 ):
-    """Stop a container."""
+    """Stop one or more containers."""
+    names = names or []
+    _check_targets(names, all_containers)
+
     async def _stop():
         async with KapsuleClient() as client:
-            await client.stop_container(name, force=force)
-            print_success(f"Container '{name}' stopped.")
+            targets = await _select_containers(client, names, all_containers)
+            if not targets:
+                print_success("No containers to stop.")
+                return
+            if len(targets) == 1 and not all_containers:
+                op_path = await client.stop_container(targets[0], force=force)
+            else:
+                op_path = await client.stop_containers(targets, force=force)
+            with OperationDisplay() as display:
+                await client.wait_operation(op_path, display)
+            if len(targets) == 1:
+                print_success(f"Container '{targets[0]}' stopped.")
+            else:
+                print_success(f"{len(targets)} containers stopped.")
 
     run_async(_stop())
 
 
 @app.command()
 @handle_errors
-def rm(
+def limits(
     name: str = typer.Argument(..., help="Container name"),
+    profile: str = typer.Option(
+        "", "--profile", "-p",
+        help="Resource profile (default: keep the container's current one)",
+    ),
+    overrides: Annotated[list[str] | None, typer.Option(
+        "--set", "-s",
+        help="Override a limit, e.g. memory=8GiB or cpu_priority=2 (repeatable)",
+    )] = None,
+):
+    """Set a container's resource limits (applied live)."""
+    limit_options: dict[str, str] = {}
+    for override in overrides or []:
+        key, sep, value = override.partition("=")
+        if not sep or not key:
+            print_error(f"expected KEY=VALUE, got '{override}'")
+            raise typer.Exit(2)
+        limit_options[key.strip()] = value
+
+    async def _limits():
+        async with KapsuleClient() as client:
+            op_path = await client.set_container_limits(
+                name, profile=profile, limits=limit_options
+            )
+            with OperationDisplay() as display:
+                await client.wait_operation(op_path, display)
+            print_success(f"Resource limits of '{name}' updated.")
+
+    run_async(_limits())
+
+
+@app.command()
+@handle_errors
+def rm(
+    names: Annotated[list[str] | None, typer.Argument(
+        help="Container names or glob patterns",
+    )] = None,
+    all_containers: bool = typer.Option(
+        False, "--all", "-a", help="Remove every container"
+    ),
     force: bool = typer.Option(False, "--force", "-f", help="Force removal"),
+    yes: bool = typer.Option(
+        False, "--yes", "-y", help="Don't ask before removing every container"
+    ),
 ):
-    """Remove a container."""
+    """Remove one or more containers."""
+    names = names or []
+    _check_targets(names, all_containers)
+    if all_containers and force and not yes:
+        typer.confirm(
+            "Force-remove every container, running or not?", abort=True
+        )
+
     async def _rm():
         async with KapsuleClient() as client:
-            await client.delete_container(name, force=force)
-            print_success(f"Container '{name}' removed.")
+            targets = await _select_containers(client, names, all_containers)
+            if not targets:
+                print_success("No containers to remove.")
+                return
+            if len(targets) == 1 and not all_containers:
+                op_path = await client.delete_container(targets[0], force=force)
+            else:
+                op_path = await client.delete_containers(targets, force=force)
+            with OperationDisplay() as display:
+                await client.wait_operation(op_path, display)
+            if len(targets) == 1:
+                print_success(f"Container '{targets[0]}' removed.")
+            else:
+                print_success(f"{len(targets)} containers removed.")
 
     run_async(_rm())
 
@@ -149,11 +436,167 @@ def rm(
 @app.command("remove", hidden=True)
 @handle_errors
 def remove_alias(
-    name: str = typer.Argument(..., help="Container name"),
+    names: Annotated[list[str] | None, typer.Argument(
+        help="Container names or glob patterns",
+    )] = None,
+    all_containers: bool = typer.Option(
+        False, "--all", "-a", help="Remove every container"
+    ),
     force: bool = typer.Option(False, "--force", "-f", help="Force removal"),
+    yes: bool = typer.Option(
+        False, "--yes", "-y", help="Don't ask before removing every container"
+    ),
+):
+    """Remove one or more containers (alias)."""
+    rm(names=names, all_containers=all_containers, force=force, yes=yes)
+
+
+_COMPRESSIONS = ("none", "gzip", "zstd")
+
+
+@app.command("export")
+@handle_errors
+def export_container(
+    name: str = typer.Argument(..., help="Container name"),
+    file: str = typer.Argument(..., help="Archive to write, or - for stdout"),
+    compression: str = typer.Option(
+        "zstd", "--compression", "-c", help="none, gzip or zstd",
+    ),
+):
+    """Export a container (without its snapshots) to an archive."""
+    if compression not in _COMPRESSIONS:
+        print_error(f"unknown compression '{compression}' (none, gzip or zstd)")
+        raise typer.Exit(2)
+    to_stdout = file == "-"
+    out = err_console if to_stdout else console
+
+    async def _export(fd: int):
+        async with KapsuleClient() as client:
+            op_path = await client.export_container(
+                name, fd, compression=compression
+            )
+            with OperationDisplay(out) as display:
+                await client.wait_operation(op_path, display)
+
+    if to_stdout:
+        run_async(_export(1))
+        return
+    fd = os.open(file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        run_async(_export(fd))
+    except BaseException:
+        os.unlink(file)
+        raise
+    finally:
+        os.close(fd)
+    print_success(f"Container '{name}' exported to {file}.")
+
+
+@app.command("import")
+@handle_errors
+def import_container(
+    file: str = typer.Argument(..., help="Archive to read, or - for stdin"),
+    name: str = typer.Argument(..., help="Name of the new container"),
+):
+    """Create a container from an exported archive."""
+    async def _import(fd: int):
+        async with KapsuleClient() as client:
+            op_path = await client.import_container(name, fd)
+            with OperationDisplay() as display:
+                await client.wait_operation(op_path, display)
+
+    if file == "-":
+        run_async(_import(0))
+    else:
+        fd = os.open(file, os.O_RDONLY)
+        try:
+            run_async(_import(fd))
+        finally:
+            os.close(fd)
+    print_success(f"Container '{name}' imported.")
+
+
+snapshot_app = typer.Typer(
+    help="Take, list, restore and delete container snapshots.",
+    no_args_is_help=True,
+)
+app.add_typer(snapshot_app, name="snapshot")
+
+
+@snapshot_app.command("create")
+@handle_errors
+def snapshot_create(
+    name: str = typer.Argument(..., help="Container name"),
+    snapshot: str = typer.Argument(
+        "", help="Snapshot name (default: the current time, subject to retention)"
+    ),
+):
+    """Take a snapshot of a container."""
+    async def _snapshot():
+        async with KapsuleClient() as client:
+            op_path = await client.snapshot_container(name, snapshot)
+            with OperationDisplay() as display:
+                await client.wait_operation(op_path, display)
+
+    run_async(_snapshot())
+
+
+@snapshot_app.command("list")
+@handle_errors
+def snapshot_list(
+    name: str = typer.Argument(..., help="Container name"),
+):
+    """List a container's snapshots."""
+    async def _list():
+        async with KapsuleClient() as client:
+            print_snapshots(name, await client.list_snapshots(name))
+
+    run_async(_list())
+
+
+@snapshot_app.command("restore")
+@handle_errors
+def snapshot_restore(
+    name: str = typer.Argument(..., help="Container name"),
+    snapshot: str = typer.Argument(..., help="Snapshot to roll back to"),
+):
+    """Roll a container back to a snapshot."""
+    async def _restore():
+        async with KapsuleClient() as client:
+            op_path = await client.restore_snapshot(name, snapshot)
+            with OperationDisplay() as display:
+                await client.wait_operation(op_path, display)
+
+    run_async(_restore())
+
+
+@snapshot_app.command("rm")
+@handle_errors
+def snapshot_rm(
+    name: str = typer.Argument(..., help="Container name"),
+    snapshot: str = typer.Argument(..., help="Snapshot to delete"),
 ):
-    """Remove a container (alias)."""
-    rm(name=name, force=force)
+    """Delete a snapshot."""
+    async def _rm():
+        async with KapsuleClient() as client:
+            op_path = await client.delete_snapshot(name, snapshot)
+            with OperationDisplay() as display:
+                await client.wait_operation(op_path, display)
+
+    run_async(_rm())
+
+
+@app.command()
+@handle_errors
+def images(
+    query: str = typer.Argument("", help="Search text, e.g. 'ubuntu 24'"),
+):
+    """Search images available to create containers from."""
+    async def _images():
+        async with KapsuleClient() as client:
+            print_images(await client.list_images(query))
+
+    run_async(_images())
 
 
 @app.command()
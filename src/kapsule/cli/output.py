@@ -1,8 +1,21 @@
 """CLI output formatting using rich."""
 
+from types import TracebackType
+
+from rich import filesize
 from rich.console import Console
+from rich.progress import (
+    BarColumn,
+    Progress,
+    SpinnerColumn,
+    TaskID,
+    TextColumn,
+    TimeRemainingColumn,
+)
 from rich.table import Table
 
+from kapsule.client import OperationHandler
+
 console = Console()
 err_console = Console(stderr=True)
 
@@ -12,6 +25,7 @@ STATUS_COLORS = {
     "Stopped": "red",
     "Starting": "yellow",
     "Stopping": "yellow",
+    "Frozen": "cyan",
 }
 
 
@@ -23,6 +37,95 @@ def print_success(message: str) -> None:
     console.print(f"[green]{message}[/green]")
 
 
+# Message types emitted by the daemon's OperationReporter
+_MESSAGE_STYLES = {
+    0: "",
+    1: "green",
+    2: "yellow",
+    3: "red",
+    4: "dim",
+    5: "cyan",
+}
+
+
+class OperationDisplay(OperationHandler):
+    """Renders an operation's messages and progress bars."""
+
+    def __init__(self, out: Console | None = None) -> None:
+        # stderr when stdout carries data (e.g. ``kapsule export NAME -``)
+        self._console = out or console
+        self._progress: Progress | None = None
+        self._tasks: dict[str, TaskID] = {}
+        self._percent: set[str] = set()
+
+    def __enter__(self) -> "OperationDisplay":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        if self._progress is not None:
+            self._progress.stop()
+            self._progress = None
+
+    def message(self, message_type: int, text: str, indent: int) -> None:
+        style = _MESSAGE_STYLES.get(message_type, "")
+        line = "  " * indent + (f"[{style}]{text}[/{style}]" if style else text)
+        target = self._progress.console if self._progress else self._console
+        target.print(line, highlight=False)
+
+    def progress_started(
+        self, progress_id: str, description: str, total: int, indent: int
+    ) -> None:
+        if self._progress is None:
+            self._progress = Progress(
+                SpinnerColumn(),
+                TextColumn("{task.description}"),
+                BarColumn(),
+                TextColumn("{task.fields[amount]}"),
+                TextColumn("{task.fields[speed]}"),
+                TimeRemainingColumn(),
+                console=self._console,
+                transient=True,
+            )
+            self._progress.start()
+        # A total of 100 means the daemon reports percent; anything else
+        # is an indeterminate byte count.
+        if total == 100:
+            self._percent.add(progress_id)
+        self._tasks[progress_id] = self._progress.add_task(
+            "  " * indent + description,
+            total=total if total > 0 else None,
+            amount="",
+            speed="",
+        )
+
+    def progress_update(self, progress_id: str, current: int, rate: float) -> None:
+        task = self._tasks.get(progress_id)
+        if task is None or self._progress is None:
+            return
+        if progress_id in self._percent:
+            amount = f"{current}%"
+        else:
+            amount = filesize.decimal(current)
+        speed = f"{filesize.decimal(int(rate))}/s" if rate > 0 else ""
+        self._progress.update(task, completed=current, amount=amount, speed=speed)
+
+    def progress_completed(
+        self, progress_id: str, success: bool, message: str
+    ) -> None:
+        task = self._tasks.pop(progress_id, None)
+        self._percent.discard(progress_id)
+        if task is None or self._progress is None:
+            return
+        self._progress.remove_task(task)
+        if message:
+            self.message(1 if success else 3, message, 0)
+
+
 def print_containers(containers: list[dict], show_all: bool = False) -> None:
     if not show_all:
         containers = [c for c in containers if c["status"] == "Running"]
@@ -41,3 +144,85 @@ def print_containers(containers: list[dict], show_all: bool = False) -> None:
         table.add_row(c["name"], f"[{color}]{c['status']}[/{color}]", c["image"])
 
     console.print(table)
+
+
+def print_images(images: list[dict]) -> None:
+    if not images:
+        console.print("[dim]No matching images.[/dim]")
+        return
+
+    table = Table(show_header=True, header_style="bold")
+    table.add_column("Image")
+    table.add_column("Description")
+
+    for i in images:
+        table.add_row(i["image"], i["description"])
+
+    console.print(table)
+
+
+def print_snapshots(name: str, snapshots: list[dict]) -> None:
+    if not snapshots:
+        console.print(f"[dim]No snapshots of {name}.[/dim]")
+        return
+
+    table = Table(show_header=True, header_style="bold")
+    table.add_column("Snapshot")
+    table.add_column("Created")
+    table.add_column("Size", justify="right")
+
+    for s in snapshots:
+        size = filesize.decimal(s["size"]) if s["size"] else ""
+        table.add_row(s["name"], s["created"][:19].replace("T", " "), size)
+
+    console.print(table)
+
+
+_SPARK = " ▁▂▃▄▅▆▇█"
+
+
+def sparkline(values: list[float], width: int = 20) -> str:
+    """Render the last ``width`` percentages as a bar per value."""
+    values = values[-width:]
+    top = max([100.0, *values])
+    return "".join(
+        _SPARK[min(len(_SPARK) - 1, round(v / top * (len(_SPARK) - 1)))]
+        for v in values
+    )
+
+
+def stats_table(stats: list[dict], reclaimed: int = 0) -> Table:
+    """Build the ``kapsule top`` table, busiest container first.
+
+    ``reclaimed`` is the memory the daemon has given back by stopping idle
+    containers, shown below the table when there is any.
+    """
+    table = Table(show_header=True, header_style="bold")
+    if reclaimed:
+        table.caption = (
+            f"{filesize.decimal(reclaimed)} reclaimed from idle containers"
+        )
+    table.add_column("Name")
+    table.add_column("Status")
+    table.add_column("CPU", justify="right")
+    table.add_column("CPU history")
+    table.add_column("Memory", justify="right")
+    table.add_column("Disk", justify="right")
+    table.add_column("Procs", justify="right")
+
+    for c in sorted(stats, key=lambda c: (-c["cpu"], c["name"])):
+        color = STATUS_COLORS.get(c["status"], "white")
+        memory = filesize.decimal(c["memory"]) if c["memory"] else ""
+        if memory and c["memory_limit"]:
+            memory += f" / {filesize.decimal(c['memory_limit'])}"
+        table.add_row(
+            c["name"],
+            f"[{color}]{c['status']}[/{color}]",
+            f"{c['cpu']:.1f}%",
+            sparkline(c["cpu_history"]),
+            memory,
+            filesize.decimal(c["disk"]) if c["disk"] else "",
+            str(c["processes"]) if c["processes"] else "",
+        )
+
+    return table
@@ -1,6 +1,6 @@
 """Kapsule D-Bus client library."""
 
-from .client import KapsuleClient
+from .client import KapsuleClient, OperationHandler
 from .exceptions import (
     ContainerError,
     ContainerNotFound,
@@ -10,6 +10,7 @@ from .exceptions import (
 
 __all__ = [
     "KapsuleClient",
+    "OperationHandler",
     "KapsuleError",
     "DaemonNotRunning",
     "ContainerNotFound",
@@ -2,16 +2,41 @@
 
 from __future__ import annotations
 
+import asyncio
 import os
 
-from dbus_fast import BusType
+from dbus_fast import BusType, Variant
 from dbus_fast.aio import MessageBus
 
-from .exceptions import DaemonNotRunning
+from .exceptions import ContainerError, DaemonNotRunning
 
 BUS_NAME = "org.frostyard.Kapsule"
 OBJ_PATH = "/org/frostyard/Kapsule"
 MANAGER_IFACE = "org.frostyard.Kapsule.Manager"
+OPERATION_IFACE = "org.frostyard.Kapsule.Operation"
+
+
+class OperationHandler:
+    """Receives progress signals of an operation.
+
+    Subclass and override the methods you care about.
+    """
+
+    def message(self, message_type: int, text: str, indent: int) -> None:
+        """A progress message was emitted."""
+
+    def progress_started(
+        self, progress_id: str, description: str, total: int, indent: int
+    ) -> None:
+        """A progress bar started (total is -1 when indeterminate)."""
+
+    def progress_update(self, progress_id: str, current: int, rate: float) -> None:
+        """A progress bar moved (rate is in units per second)."""
+
+    def progress_completed(
+        self, progress_id: str, success: bool, message: str
+    ) -> None:
+        """A progress bar finished."""
 
 
 def _default_bus_type() -> BusType:
@@ -39,7 +64,7 @@ class KapsuleClient:
     async def __aenter__(self):
         try:
             self._bus = await MessageBus(
-                bus_type=self._bus_type
+                bus_type=self._bus_type, negotiate_unix_fd=True
             ).connect()
         except Exception as e:
             raise DaemonNotRunning() from e
@@ -84,6 +109,43 @@ class KapsuleClient:
             "mode": raw[4],
         }
 
+    async def list_images(self, query: str = "") -> list[dict]:
+        """Search the images available on the configured image servers.
+
+        Returns list of dicts with keys: image, os, release, arch, variant,
+        description; best match first.
+        """
+        raw = await self._iface.call_list_images(query)
+        return [
+            {
+                "image": i[0],
+                "os": i[1],
+                "release": i[2],
+                "arch": i[3],
+                "variant": i[4],
+                "description": i[5],
+            }
+            for i in raw
+        ]
+
+    async def get_image_cache(self) -> list[dict]:
+        """Get the local cache state of the configured default images.
+
+        Returns list of dicts with keys: image, state, fingerprint,
+        refreshed_at, error.
+        """
+        raw = await self._iface.call_get_image_cache()
+        return [
+            {
+                "image": e[0],
+                "state": e[1],
+                "fingerprint": e[2],
+                "refreshed_at": e[3],
+                "error": e[4],
+            }
+            for e in raw
+        ]
+
     async def create_container(
         self,
         name: str,
@@ -91,12 +153,101 @@ class KapsuleClient:
         image: str = "",
         session_mode: bool = False,
         dbus_mux: bool = False,
+        packages: list[str] | None = None,
+        resources: str = "",
     ) -> str:
         """Create a container. Returns operation D-Bus path."""
-        return await self._iface.call_create_container(
-            name, image, session_mode, dbus_mux
+        if not packages and not resources:
+            return await self._iface.call_create_container(
+                name, image, session_mode, dbus_mux
+            )
+        options = {
+            "session_mode": Variant("b", session_mode),
+            "dbus_mux": Variant("b", dbus_mux),
+        }
+        if packages:
+            options["packages"] = Variant("as", packages)
+        if resources:
+            options["resources"] = Variant("s", resources)
+        return await self._iface.call_create_container_with_options(
+            name, image, options
+        )
+
+    async def set_container_limits(
+        self,
+        name: str,
+        *,
+        profile: str = "",
+        limits: dict[str, str] | None = None,
+    ) -> str:
+        """Set a container's resource limits. Returns operation D-Bus path."""
+        return await self._iface.call_set_container_limits(
+            name, profile, limits or {}
         )
 
+    async def clone_container(
+        self, source: str, name: str, *, snapshot: str = ""
+    ) -> str:
+        """Clone a container. Returns operation D-Bus path."""
+        return await self._iface.call_clone_container(source, name, snapshot)
+
+    async def snapshot_container(self, name: str, snapshot: str = "") -> str:
+        """Snapshot a container. Returns operation D-Bus path."""
+        return await self._iface.call_snapshot_container(name, snapshot)
+
+    async def get_container_stats(self) -> list[dict]:
+        """Sample resource usage of all containers.
+
+        Returns list of dicts with keys: name, status, cpu, memory,
+        memory_limit, disk, processes, cpu_history.
+        """
+        raw = await self._iface.call_get_container_stats()
+        return [
+            {
+                "name": c[0],
+                "status": c[1],
+                "cpu": c[2],
+                "memory": c[3],
+                "memory_limit": c[4],
+                "disk": c[5],
+                "processes": c[6],
+                "cpu_history": list(c[7]),
+            }
+            for c in raw
+        ]
+
+    async def list_snapshots(self, name: str) -> list[dict]:
+        """List a container's snapshots, oldest first.
+
+        Returns list of dicts with keys: name, created, size.
+        """
+        raw = await self._iface.call_list_snapshots(name)
+        return [{"name": s[0], "created": s[1], "size": s[2]} for s in raw]
+
+    async def restore_snapshot(self, name: str, snapshot: str) -> str:
+        """Restore a container snapshot. Returns operation D-Bus path."""
+        return await self._iface.call_restore_snapshot(name, snapshot)
+
+    async def delete_snapshot(self, name: str, snapshot: str) -> str:
+        """Delete a container snapshot. Returns operation D-Bus path."""
+        return await self._iface.call_delete_snapshot(name, snapshot)
+
+    async def export_container(
+        self, name: str, fd: int, *, compression: str = ""
+    ) -> str:
+        """Export a container to a writable fd. Returns operation D-Bus path.
+
+        The daemon gets its own copy of fd; the caller still closes theirs.
+        """
+        return await self._iface.call_export_container(name, fd, compression)
+
+    async def import_container(self, name: str, fd: int) -> str:
+        """Import a container from a readable fd. Returns operation D-Bus path.
+
+        The daemon gets its own copy of fd; the caller still closes theirs.
+        """
+        return await self._iface.call_import_container(name, fd)
+
     async def delete_container(self, name: str, *, force: bool = False) -> str:
         """Delete a container. Returns operation D-Bus path."""
         return await self._iface.call_delete_container(name, force)
@@ -109,6 +260,55 @@ class KapsuleClient:
         """Stop a container. Returns operation D-Bus path."""
         return await self._iface.call_stop_container(name, force)
 
+    async def delete_containers(
+        self, names: list[str], *, force: bool = False
+    ) -> str:
+        """Delete several containers. Returns operation D-Bus path."""
+        return await self._iface.call_delete_containers(names, force)
+
+    async def start_containers(self, names: list[str]) -> str:
+        """Start several containers. Returns operation D-Bus path."""
+        return await self._iface.call_start_containers(names)
+
+    async def stop_containers(
+        self, names: list[str], *, force: bool = False
+    ) -> str:
+        """Stop several containers. Returns operation D-Bus path."""
+        return await self._iface.call_stop_containers(names, force)
+
+    async def wait_operation(
+        self, op_path: str, handler: OperationHandler | None = None
+    ) -> None:
+        """Wait for an operation to finish, forwarding its signals.
+
+        Raises ContainerError if the operation fails.
+        """
+        introspection = await self._bus.introspect(BUS_NAME, op_path)
+        proxy = self._bus.get_proxy_object(BUS_NAME, op_path, introspection)
+        op = proxy.get_interface(OPERATION_IFACE)
+
+        done = asyncio.get_running_loop().create_future()
+
+        def on_completed(success: bool, message: str) -> None:
+            if not done.done():
+                done.set_result((success, message))
+
+        op.on_completed(on_completed)
+        if handler is not None:
+            op.on_message(handler.message)
+            op.on_progress_started(handler.progress_started)
+            op.on_progress_update(handler.progress_update)
+            op.on_progress_completed(handler.progress_completed)
+
+        # The operation may have finished before we subscribed
+        status = await op.get_status()
+        if status != "running" and not done.done():
+            done.set_result((status == "completed", f"operation {status}"))
+
+        success, message = await done
+        if not success:
+            raise ContainerError(message or "operation failed")
+
     async def prepare_enter(
         self, container_name: str, command: list[str] | None = None
     ) -> tuple[bool, str, list[str]]:
@@ -121,6 +321,20 @@ class KapsuleClient:
         )
         return (result[0], result[1], result[2])
 
+    async def prepare_run(
+        self, source: str, command: list[str] | None = None
+    ) -> tuple[bool, str, str, list[str]]:
+        """Create a throwaway container to run a command in.
+
+        Returns (success, message, container_name, exec_args).
+        """
+        result = await self._iface.call_prepare_run(source, command or [])
+        return (result[0], result[1], result[2], result[3])
+
+    async def finish_run(self, name: str) -> bool:
+        """Destroy a container created by prepare_run()."""
+        return await self._iface.call_finish_run(name)
+
     async def get_config(self) -> dict[str, str]:
         """Get daemon configuration."""
         return await self._iface.call_get_config()
@@ -128,3 +342,7 @@ class KapsuleClient:
     async def get_version(self) -> str:
         """Get daemon version."""
         return await self._iface.get_version()
+
+    async def get_idle_reclaimed_bytes(self) -> int:
+        """Get the memory reclaimed by stopping idle containers."""
+        return await self._iface.get_idle_reclaimed_bytes()
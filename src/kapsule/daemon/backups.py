@@ -0,0 +1,78 @@
+# SPDX-FileCopyrightText: 2026 Lasath Fernando <devel@lasath.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Streaming container export and import.
+
+A container is exported as an Incus backup tarball: Incus compresses the
+root filesystem into a backup in its own storage, and the daemon streams
+that backup to a file descriptor handed over by the caller, then deletes
+it. Imports stream the other way, from the caller's descriptor straight
+into the instance-create request, so the daemon never holds more than
+one chunk of an archive in memory.
+
+Taking a descriptor instead of a path means the daemon reads and writes
+with the caller's permissions: the caller opens the file (or passes a
+pipe, e.g. to ``ssh``), never the daemon.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import secrets
+import stat
+from collections.abc import AsyncIterator
+
+# Compression algorithms offered for exports; imports detect it
+EXPORT_COMPRESSIONS = ("none", "gzip", "zstd")
+DEFAULT_EXPORT_COMPRESSION = "zstd"
+
+EXPORT_BACKUP_PREFIX = "kapsule-export-"
+
+# Bytes moved per read/write on the caller's descriptor
+CHUNK_SIZE = 1024 * 1024
+
+
+def export_backup_name() -> str:
+    """Name for the temporary backup an export streams out."""
+    return f"{EXPORT_BACKUP_PREFIX}{secrets.token_hex(4)}"
+
+
+def fd_size(fd: int) -> int:
+    """Bytes left to read from a descriptor, or -1 if it isn't a file."""
+    try:
+        st = os.fstat(fd)
+        if not stat.S_ISREG(st.st_mode):
+            return -1
+        return max(st.st_size - os.lseek(fd, 0, os.SEEK_CUR), 0)
+    except OSError:
+        return -1
+
+
+async def read_fd(fd: int) -> AsyncIterator[bytes]:
+    """Read a descriptor to the end in chunks, off the event loop.
+
+    Raises:
+        OSError: If a read fails.
+    """
+    while True:
+        chunk = await asyncio.to_thread(os.read, fd, CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+async def write_fd(fd: int, data: bytes) -> None:
+    """Write all of data to a descriptor, off the event loop.
+
+    Raises:
+        OSError: If a write fails (e.g. the reading end of a pipe closed).
+    """
+    await asyncio.to_thread(_write_all, fd, data)
@@ -13,24 +13,95 @@ This module handles configuration with systemd-style layered precedence:
 Configuration options:
 - default_container: Name of the default container to create/enter when none specified
 - default_image: Default image to use when creating new containers
+- warm_pool_size: Number of stopped default containers the daemon keeps
+  ready to claim (daemon-wide, so only read from the system paths by the
+  daemon; 0 disables the pool)
+- prefetch_images: Whether the daemon keeps the configured default images
+  pulled into the local Incus image store (daemon-wide)
+- package_layer_budget_gb: Disk space the daemon may keep in cached
+  package layers before evicting the least recently used (daemon-wide;
+  0 disables package layers)
+- max_parallel_runs: How many ``kapsule run`` containers the daemon
+  creates at the same time; further runs wait for a slot (daemon-wide)
+- max_parallel_bulk_ops: How many containers a bulk start, stop or
+  remove works on at the same time (daemon-wide)
+- snapshot_keep_last, snapshot_max_age_days: Retention for automatically
+  named container snapshots, enforced by the daemon (daemon-wide; 0
+  means no limit, and both default to 0)
+- hostfs_mode: ``full`` mounts the host's whole ``/`` at ``/.kapsule/host``
+  (recursively, so every host mount propagates into every container);
+  ``scoped`` only binds what Kapsule uses plus ``hostfs_paths``
+  (daemon-wide)
+- hostfs_paths: Extra absolute host paths bound under ``/.kapsule/host``
+  in scoped mode, separated by whitespace or commas (daemon-wide)
+- resource_profile: Resource profile (CPU/memory/process/I/O limits) for
+  new containers, e.g. ``interactive``, ``batch`` or ``background``;
+  empty for no limits
+- idle_freeze_minutes, idle_stop_minutes: Freeze, and later stop,
+  containers nobody has entered or had a session in for that long
+  (daemon-wide; 0 disables each, and both default to 0)
+
+Daemon-wide sections:
+- [image_servers]: Image remote name -> simplestreams URL, overriding or
+  extending the built-in ones (e.g. to point ``images`` at a mirror)
+- [image_mirror]: ``listen = host:port`` runs the caching image mirror in
+  the daemon; ``store`` sets its cache directory
+- [resources.NAME]: Defines (or redefines) the resource profile NAME,
+  see ``resources``
 """
 
 import configparser
 import os
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 from typing import NamedTuple
 
+# Default values (used if no config files exist)
+DEFAULT_CONTAINER_NAME = "kapsule"
+DEFAULT_IMAGE = "images:ubuntu/24.04"
+DEFAULT_WARM_POOL_SIZE = 0
+DEFAULT_PREFETCH_IMAGES = True
+DEFAULT_PACKAGE_LAYER_BUDGET_GB = 20
+DEFAULT_MAX_PARALLEL_RUNS = 4
+DEFAULT_MAX_PARALLEL_BULK_OPS = 8
+DEFAULT_SNAPSHOT_KEEP_LAST = 0
+DEFAULT_SNAPSHOT_MAX_AGE_DAYS = 0
+DEFAULT_HOSTFS_MODE = "full"
+DEFAULT_IDLE_FREEZE_MINUTES = 0
+DEFAULT_IDLE_STOP_MINUTES = 0
+DEFAULT_RESOURCE_PROFILE = ""
+
+HOSTFS_MODES = ("full", "scoped")
+
+
+DEFAULT_MIRROR_STORE = "/var/cache/kapsule/image-mirror"
+
+
+class ImageMirrorConfig(NamedTuple):
+    """Settings for running the caching image mirror in the daemon."""
+
+    host: str
+    port: int
+    store: str
+
 
 class KapsuleConfig(NamedTuple):
     """User configuration for Kapsule."""
 
     default_container: str
     default_image: str
-
-
-# Default values (used if no config files exist)
-DEFAULT_CONTAINER_NAME = "kapsule"
-DEFAULT_IMAGE = "images:ubuntu/24.04"
+    warm_pool_size: int = DEFAULT_WARM_POOL_SIZE
+    prefetch_images: bool = DEFAULT_PREFETCH_IMAGES
+    package_layer_budget_gb: int = DEFAULT_PACKAGE_LAYER_BUDGET_GB
+    max_parallel_runs: int = DEFAULT_MAX_PARALLEL_RUNS
+    max_parallel_bulk_ops: int = DEFAULT_MAX_PARALLEL_BULK_OPS
+    snapshot_keep_last: int = DEFAULT_SNAPSHOT_KEEP_LAST
+    snapshot_max_age_days: int = DEFAULT_SNAPSHOT_MAX_AGE_DAYS
+    hostfs_mode: str = DEFAULT_HOSTFS_MODE
+    hostfs_paths: tuple[str, ...] = ()
+    idle_freeze_minutes: int = DEFAULT_IDLE_FREEZE_MINUTES
+    idle_stop_minutes: int = DEFAULT_IDLE_STOP_MINUTES
+    resource_profile: str = DEFAULT_RESOURCE_PROFILE
 
 
 def get_config_paths(home_dir: str | None = None) -> list[Path]:
@@ -90,31 +161,223 @@ def load_config(home_dir: str | None = None) -> KapsuleConfig:
     # Start with hardcoded defaults
     default_container = DEFAULT_CONTAINER_NAME
     default_image = DEFAULT_IMAGE
+    warm_pool_size = DEFAULT_WARM_POOL_SIZE
+    prefetch_images = DEFAULT_PREFETCH_IMAGES
+    package_layer_budget_gb = DEFAULT_PACKAGE_LAYER_BUDGET_GB
+    max_parallel_runs = DEFAULT_MAX_PARALLEL_RUNS
+    max_parallel_bulk_ops = DEFAULT_MAX_PARALLEL_BULK_OPS
+    snapshot_keep_last = DEFAULT_SNAPSHOT_KEEP_LAST
+    snapshot_max_age_days = DEFAULT_SNAPSHOT_MAX_AGE_DAYS
+    hostfs_mode = DEFAULT_HOSTFS_MODE
+    hostfs_paths: tuple[str, ...] = ()
+    idle_freeze_minutes = DEFAULT_IDLE_FREEZE_MINUTES
+    idle_stop_minutes = DEFAULT_IDLE_STOP_MINUTES
+    resource_profile = DEFAULT_RESOURCE_PROFILE
 
     # Read in reverse priority order (lowest first, so higher overrides)
-    for config_path in reversed(get_config_paths(home_dir=home_dir)):
-        if not config_path.exists():
-            continue
-
-        parser = configparser.ConfigParser()
-        try:
-            parser.read(config_path)
-        except configparser.Error:
-            # Skip malformed config files
-            continue
-
+    for parser in _read_layers(reversed(get_config_paths(home_dir=home_dir))):
         if parser.has_section("kapsule"):
             if parser.has_option("kapsule", "default_container"):
                 default_container = parser.get("kapsule", "default_container")
             if parser.has_option("kapsule", "default_image"):
                 default_image = parser.get("kapsule", "default_image")
+            warm_pool_size = _get_int(
+                parser, "warm_pool_size", warm_pool_size, minimum=0
+            )
+            prefetch_images = _get_bool(parser, "prefetch_images", prefetch_images)
+            package_layer_budget_gb = _get_int(
+                parser, "package_layer_budget_gb", package_layer_budget_gb, minimum=0
+            )
+            max_parallel_runs = _get_int(
+                parser, "max_parallel_runs", max_parallel_runs, minimum=1
+            )
+            max_parallel_bulk_ops = _get_int(
+                parser, "max_parallel_bulk_ops", max_parallel_bulk_ops, minimum=1
+            )
+            snapshot_keep_last = _get_int(
+                parser, "snapshot_keep_last", snapshot_keep_last, minimum=0
+            )
+            snapshot_max_age_days = _get_int(
+                parser, "snapshot_max_age_days", snapshot_max_age_days, minimum=0
+            )
+            if parser.has_option("kapsule", "hostfs_mode"):
+                mode = parser.get("kapsule", "hostfs_mode").strip().lower()
+                if mode in HOSTFS_MODES:
+                    hostfs_mode = mode
+            if parser.has_option("kapsule", "hostfs_paths"):
+                hostfs_paths = tuple(dict.fromkeys(
+                    path.rstrip("/")
+                    for path in parser.get("kapsule", "hostfs_paths")
+                    .replace(",", " ").split()
+                    # "/" is what full mode is for
+                    if path.startswith("/") and path.rstrip("/")
+                ))
+            idle_freeze_minutes = _get_int(
+                parser, "idle_freeze_minutes", idle_freeze_minutes, minimum=0
+            )
+            idle_stop_minutes = _get_int(
+                parser, "idle_stop_minutes", idle_stop_minutes, minimum=0
+            )
+            if parser.has_option("kapsule", "resource_profile"):
+                resource_profile = parser.get("kapsule", "resource_profile").strip()
 
     return KapsuleConfig(
         default_container=default_container,
         default_image=default_image,
+        warm_pool_size=warm_pool_size,
+        prefetch_images=prefetch_images,
+        package_layer_budget_gb=package_layer_budget_gb,
+        max_parallel_runs=max_parallel_runs,
+        max_parallel_bulk_ops=max_parallel_bulk_ops,
+        snapshot_keep_last=snapshot_keep_last,
+        snapshot_max_age_days=snapshot_max_age_days,
+        hostfs_mode=hostfs_mode,
+        hostfs_paths=hostfs_paths,
+        idle_freeze_minutes=idle_freeze_minutes,
+        idle_stop_minutes=idle_stop_minutes,
+        resource_profile=resource_profile,
     )
 
 
+def configured_default_images(home_dirs: Iterable[str] = ()) -> list[str]:
+    """Collect every default image that any config layer could resolve to.
+
+    Unlike load_config(), this does not merge: each layer's own
+    ``default_image`` counts, since a user config overriding the system
+    one only applies to that user.
+
+    Args:
+        home_dirs: Home directories whose user configs should be included
+            as well.
+
+    Returns:
+        Distinct image strings, the effective system default first.
+    """
+    paths = get_config_paths()[1:]
+    paths += [
+        Path(home) / ".config" / "kapsule" / "kapsule.conf" for home in home_dirs
+    ]
+
+    images = [load_config().default_image]
+    for parser in _read_layers(paths):
+        if parser.has_option("kapsule", "default_image"):
+            images.append(parser.get("kapsule", "default_image"))
+
+    return list(dict.fromkeys(images))
+
+
+def load_image_servers() -> dict[str, str]:
+    """Load image remote overrides from the ``[image_servers]`` section.
+
+    Returns:
+        Remote name -> simplestreams URL, merged across layers.
+    """
+    servers: dict[str, str] = {}
+    for parser in _read_layers(reversed(get_config_paths())):
+        if parser.has_section("image_servers"):
+            servers.update(parser.items("image_servers"))
+    return servers
+
+
+def load_image_mirror_config() -> ImageMirrorConfig | None:
+    """Load the ``[image_mirror]`` section.
+
+    Returns:
+        Mirror settings, or None if the daemon should not run the mirror
+        (no ``listen`` address, or an invalid one).
+    """
+    listen = ""
+    store = DEFAULT_MIRROR_STORE
+    for parser in _read_layers(reversed(get_config_paths())):
+        if parser.has_option("image_mirror", "listen"):
+            listen = parser.get("image_mirror", "listen")
+        if parser.has_option("image_mirror", "store"):
+            store = parser.get("image_mirror", "store")
+
+    host, sep, port = listen.rpartition(":")
+    if not sep or not port.isdigit():
+        return None
+    return ImageMirrorConfig(host=host or "127.0.0.1", port=int(port), store=store)
+
+
+def load_resource_profiles() -> dict[str, dict[str, str]]:
+    """Load resource profiles from the ``[resources.NAME]`` sections.
+
+    Returns:
+        Profile name -> limit options, merged across layers per profile
+        (the built-in profiles are not included).
+    """
+    profiles: dict[str, dict[str, str]] = {}
+    for parser in _read_layers(reversed(get_config_paths())):
+        for section in parser.sections():
+            prefix, dot, name = section.partition(".")
+            if prefix == "resources" and dot and name:
+                profiles.setdefault(name, {}).update(parser.items(section))
+    return profiles
+
+
+def _get_int(
+    parser: configparser.ConfigParser, option: str, default: int, minimum: int
+) -> int:
+    """Read an integer option from the ``[kapsule]`` section.
+
+    Args:
+        parser: One config layer.
+        option: Option name.
+        default: Value from lower-priority layers, kept if the option is
+            missing or not an integer.
+        minimum: Smaller values are raised to this.
+
+    Returns:
+        The option's value, or ``default``.
+    """
+    try:
+        value = parser.getint("kapsule", option, fallback=default)
+    except ValueError:
+        return default
+    return max(minimum, value)
+
+
+def _get_bool(parser: configparser.ConfigParser, option: str, default: bool) -> bool:
+    """Read a boolean option from the ``[kapsule]`` section.
+
+    Args:
+        parser: One config layer.
+        option: Option name.
+        default: Value from lower-priority layers, kept if the option is
+            missing or not a boolean.
+
+    Returns:
+        The option's value, or ``default``.
+    """
+    try:
+        return parser.getboolean("kapsule", option, fallback=default)
+    except ValueError:
+        return default
+
+
+def _read_layers(paths: Iterable[Path]) -> Iterator[configparser.ConfigParser]:
+    """Parse the config files that exist, in the given order.
+
+    Args:
+        paths: Config file paths.
+
+    Yields:
+        One parser per readable file; malformed files are skipped.
+    """
+    for config_path in paths:
+        if not config_path.exists():
+            continue
+
+        parser = configparser.ConfigParser()
+        try:
+            parser.read(config_path)
+        except configparser.Error:
+            # Skip malformed config files
+            continue
+        yield parser
+
+
 def save_config(config: KapsuleConfig) -> None:
     """Save user configuration to disk.
 
@@ -10,13 +10,33 @@ using the operation decorator for automatic progress reporting.
 
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import logging
 import os
 import pwd
-import subprocess
+import secrets
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
 from typing import TYPE_CHECKING
 
-from .config import load_config
-from .operations import OperationError, OperationReporter, OperationTracker, operation
+from .backups import (
+    DEFAULT_EXPORT_COMPRESSION,
+    EXPORT_COMPRESSIONS,
+    export_backup_name,
+    fd_size,
+    read_fd,
+    write_fd,
+)
+from .config import load_config, load_resource_profiles
+from .enter_cache import EnterCache, enter_fingerprint
+from .operations import (
+    OperationError,
+    OperationReporter,
+    OperationTracker,
+    ProgressBar,
+    operation,
+)
 
 if TYPE_CHECKING:
     from dbus_fast.aio import MessageBus
@@ -24,14 +44,55 @@ if TYPE_CHECKING:
     from .service import KapsuleManagerInterface
 
 # Import Incus client and models from local modules
-import contextlib
-
-from .incus_client import IncusClient, IncusError
-from .models_generated import InstanceSource, InstancesPost
+from .idle import IdleScheduler, RunReaper
+from .image_catalog import ImageCatalog
+from .image_prefetch import ImagePrefetcher
+from .images import copy_source, parse_image_source
+from .incus_client import (
+    ExecResult,
+    FileTreeEntry,
+    IncusClient,
+    IncusError,
+    OperationProgress,
+)
+from .layers import LayerManager, is_layer
+from .models_generated import Instance, InstanceSource, InstancesPost, Operation
+from .profiles import (
+    BASE_PROFILE,
+    SESSION_MODE_KEY,
+    ProfileManager,
+    effective_config,
+    profiles_for,
+)
+from .provisioning import (
+    UserProvisionResult,
+    install_packages,
+    normalize_packages,
+    provision_user,
+)
+from .resources import (
+    NO_LIMITS,
+    RESOURCE_PROFILE_KEY,
+    available_profiles,
+    resolve_limits,
+    with_limits,
+)
+from .snapshots import SnapshotPruner, auto_snapshot_name, take_auto_snapshot
+from .stats import ContainerStats, StatsCollector
+from .templates import TemplateManager, is_template
+from .warm_pool import WarmPool, is_pool_member
+
+logger = logging.getLogger(__name__)
 
 # Config keys for kapsule metadata stored in container config
-KAPSULE_SESSION_MODE_KEY = "user.kapsule.session-mode"
+KAPSULE_SESSION_MODE_KEY = SESSION_MODE_KEY
 KAPSULE_DBUS_MUX_KEY = "user.kapsule.dbus-mux"
+KAPSULE_PTYXIS_PROFILE_KEY = "user.kapsule.ptyxis-profile"
+# UID of the user a `kapsule run` container was created for
+KAPSULE_RUN_OWNER_KEY = "user.kapsule.run.owner"
+
+# Name prefix of ephemeral `kapsule run` containers
+RUN_PREFIX = "kapsule-run-"
 
 # Path to kapsule-dbus-mux binary inside container (via hostfs mount)
 KAPSULE_DBUS_MUX_BIN = "/.kapsule/host/usr/lib/kapsule/kapsule-dbus-mux"
@@ -54,49 +115,254 @@ _ENTER_ENV_SKIP = frozenset({
 })
 
 
-def _base_container_config() -> dict[str, str]:
-    """Base Incus config applied to every new Kapsule container.
+def _is_internal(name: str) -> bool:
+    """Whether an instance is daemon-managed rather than a user's container."""
+    return (
+        is_template(name)
+        or is_pool_member(name)
+        or is_layer(name)
+        or name.startswith(RUN_PREFIX)
+    )
+
+
+# ProgressUpdate carries the current value as a D-Bus int32
+_INT32_MAX = 2**31 - 1
+
+# Human readable names for Incus progress stages
+_PROGRESS_STAGE_LABELS = {
+    "download": "Downloading image",
+    "create_instance_from_image_unpack": "Unpacking image",
+}
+
+
+def _format_bytes(count: float) -> str:
+    """Format a byte count as a short human readable string."""
+    for unit in ("B", "KB", "MB", "GB"):
+        if count < 1000:
+            return f"{count:.1f} {unit}"
+        count /= 1000
+    return f"{count:.1f} TB"
+
+
+class _OperationProgressRelay:
+    """Turns Incus operation progress metadata into progress bars.
+
+    Each progress stage reported by Incus (download, unpack, ...) gets its
+    own bar. Bars track percent when Incus knows the total, otherwise the
+    number of bytes processed; the rate is always in bytes per second.
+    """
+
+    def __init__(self, progress: OperationReporter, name: str):
+        self._progress = progress
+        self._name = name
+        self._stage = ""
+        self._bar: ProgressBar | None = None
+        self._rates: list[int] = []
+
+    def update(self, op: Operation) -> None:
+        """Handle an intermediate operation state."""
+        current = OperationProgress.from_operation(op)
+        if current is None:
+            return
+
+        if current.stage != self._stage or self._bar is None:
+            self.finish(True)
+            self._stage = current.stage
+            label = _PROGRESS_STAGE_LABELS.get(current.stage, current.stage)
+            prefix = current.text.split(":", 1)[0] if current.text else ""
+            if prefix and prefix.lower() not in label.lower():
+                label = f"{label} ({prefix})"
+            total = 100 if current.percent is not None else -1
+            self._bar = self._progress.start_progress(label, total=total)
+
+        value = (
+            current.percent if current.percent is not None
+            else current.processed or 0
+        )
+        self._bar.update(min(value, _INT32_MAX), float(current.speed))
+        if current.speed:
+            self._rates.append(current.speed)
+
+    def finish(self, success: bool) -> None:
+        """Complete the current bar, summarising its throughput."""
+        if self._bar is None:
+            return
+        message = ""
+        if success and self._rates:
+            average = sum(self._rates) / len(self._rates)
+            label = _PROGRESS_STAGE_LABELS.get(self._stage, self._stage)
+            message = f"{label}: average {_format_bytes(average)}/s"
+            logger.info(
+                "%s: %s stage averaged %s/s",
+                self._name, self._stage, _format_bytes(average),
+            )
+        self._bar.complete(success=success, message=message)
+        self._bar = None
+        self._rates = []
+
+
+def _transfer_progress(done: int, total: int, started: float) -> tuple[int, float]:
+    """Progress bar position and rate for a byte stream.
+
+    The position is a percentage when the total is known, otherwise the
+    byte count (capped to fit the signal); the rate is in bytes per second.
+    """
+    elapsed = time.monotonic() - started
+    rate = done / elapsed if elapsed > 0 else 0.0
+    if total > 0:
+        return min(done * 100 // total, 100), rate
+    return min(done, _INT32_MAX), rate
+
+
+def _transfer_summary(verb: str, done: int, started: float) -> str:
+    """One-line size and throughput summary of a finished transfer."""
+    elapsed = max(time.monotonic() - started, 1e-6)
+    rate = done / elapsed
+    logger.info("%s %d bytes in %.1fs (%s/s)", verb, done, elapsed, _format_bytes(rate))
+    return f"{verb} {_format_bytes(done)} in {elapsed:.1f}s ({_format_bytes(rate)}/s)"
+
+
+def _dbus_mux_service_entry(name: str) -> FileTreeEntry:
+    """Build the kapsule-dbus-mux.service unit for a container.
+
+    Args:
+        name: Container name
+
+    Returns:
+        File tree entry installing the unit under /etc/systemd/user.
+    """
+    container_dbus_socket = KAPSULE_DBUS_SOCKET_SYSTEMD.format(container=name)
+    host_dbus_socket = "unix:path=/.kapsule/host%t/bus"
+    mux_listen_socket = "%t/bus"
+
+    service_content = f"""[Unit]
+Description=Kapsule D-Bus Multiplexer
+Documentation=man:kapsule(1)
+After=dbus.service
+Requires=dbus.service
+
+[Service]
+Type=simple
+Environment=RUST_LOG=trace
+ExecStart={KAPSULE_DBUS_MUX_BIN} \\
+    --log-level debug \\
+    --listen {mux_listen_socket} \\
+    --container-bus unix:path={container_dbus_socket} \\
+    --host-bus {host_dbus_socket}
+Restart=on-failure
+RestartSec=1
+
+[Install]
+WantedBy=default.target
+"""
+    return FileTreeEntry(
+        path="/etc/systemd/user/kapsule-dbus-mux.service",
+        type="file",
+        content=service_content,
+    )
+
+
+def _kapsule_mode(config: dict[str, str]) -> str:
+    """Derive the Kapsule mode name from an instance's config.
+
+    Args:
+        config: Instance config dict.
+
+    Returns:
+        "DbusMux", "Session" or "Default".
+    """
+    if config.get(KAPSULE_DBUS_MUX_KEY) == "true":
+        return "DbusMux"
+    if config.get(KAPSULE_SESSION_MODE_KEY) == "true":
+        return "Session"
+    return "Default"
+
+
+def _describe_instance(
+    instance: Instance, name: str = ""
+) -> tuple[str, str, str, str, str]:
+    """Build the D-Bus container tuple for an instance.
+
+    Everything is derived from the instance object itself, so a single
+    ``recursion=1`` listing is enough to describe every container.
+
+    Args:
+        instance: Instance as returned by Incus.
+        name: Fallback name if the instance has none.
 
     Returns:
-        Config dict with security and networking settings.
+        Tuple of (name, status, image, created, mode)
     """
-    return {
-        # In a future version, we might investigate what
-        # we can do with unprivileged containers.
-        "security.privileged": "true",
-        "security.nesting": "true",
-        # Use host networking
-        "raw.lxc": "lxc.net.0.type=none\n",
-    }
+    config = effective_config(instance)
+    image = config.get("image.description", config.get("image.os", "unknown"))
+    return (
+        instance.name or name,
+        instance.status or "Unknown",
+        image,
+        instance.created_at.isoformat() if instance.created_at else "",
+        _kapsule_mode(config),
+    )
 
 
-def _base_container_devices() -> dict[str, dict[str, str]]:
-    """Base Incus devices applied to every new Kapsule container.
+def _enter_exec_args(
+    container_name: str,
+    username: str,
+    command: list[str],
+    env: dict[str, str],
+) -> list[str]:
+    """Build the ``incus exec`` argv for entering a container.
+
+    Args:
+        container_name: Container to enter
+        username: User to log in as
+        command: Command to run inside container (empty for shell)
+        env: Environment variables from the caller
 
     Returns:
-        Devices dict with root disk, GPU passthrough, and host filesystem mount.
+        Full command line to exec on the host.
     """
-    return {
-        # Root disk - required for container storage
-        "root": {
-            "type": "disk",
-            "path": "/",
-            "pool": "default",
-        },
-        # GPU passthrough
-        "gpu": {
-            "type": "gpu",
-        },
-        # Mount the host filesystem at /.kapsule/host
-        "hostfs": {
-            "type": "disk",
-            "source": "/",
-            "path": "/.kapsule/host",
-            "propagation": "rslave",
-            "recursive": "true",
-            "shift": "false",
-        },
-    }
+    # Build environment arguments
+    env_args: list[str] = []
+    whitelist_keys: list[str] = []
+    for key, value in env.items():
+        if key in _ENTER_ENV_SKIP:
+            continue
+        if "\n" in value or "\x00" in value:
+            continue
+        env_args.extend(["--env", f"{key}={value}"])
+        whitelist_keys.append(key)
+
+    # Build the command to run inside the container.
+    #
+    # Always use su -l for consistent behavior whether entering a
+    # shell or running a command. su -l provides:
+    #   - PAM session setup (pam_systemd, etc.)
+    #   - Supplementary group resolution via initgroups()
+    #   - Login shell profile sourcing (.bash_profile, etc.)
+    #
+    # The -w flag whitelists env vars passed via incus exec --env,
+    # preventing su -l from clearing vars like XDG_RUNTIME_DIR
+    # that are needed for PulseAudio/PipeWire socket discovery.
+    whitelist_arg = ",".join(whitelist_keys) if whitelist_keys else ""
+    if command:
+        exec_cmd = [
+            "su", "-l", "-w", whitelist_arg, "-c", " ".join(command),
+            username,
+        ]
+    else:
+        exec_cmd = ["su", "-l", "-w", whitelist_arg, username]
+
+    # Build full incus exec command
+    exec_args = [
+        "incus",
+        "exec",
+        container_name,
+        *env_args,
+        "--",
+        *exec_cmd,
+    ]
+
+    return exec_args
 
 
 class ContainerService:
@@ -121,6 +387,103 @@ class ContainerService:
         self._interface = interface
         self._incus = incus
         self._tracker = OperationTracker()
+        self._enter_cache = EnterCache()
+        daemon_config = load_config()
+        self._profiles = ProfileManager(
+            incus,
+            hostfs_mode=daemon_config.hostfs_mode,
+            hostfs_paths=daemon_config.hostfs_paths,
+        )
+        self._templates = TemplateManager(
+            incus,
+            self._prepare_template,
+            profiles=[BASE_PROFILE],
+        )
+        self._warm_pool = WarmPool(
+            incus,
+            self._create_from_image,
+            size=daemon_config.warm_pool_size,
+            image=daemon_config.default_image,
+        )
+        self._layers = LayerManager(
+            incus,
+            self._templates,
+            self._prepare_template,
+            profiles=[BASE_PROFILE],
+            budget_bytes=daemon_config.package_layer_budget_gb * 1024**3,
+        )
+        self._prefetcher = ImagePrefetcher(
+            incus, enabled=daemon_config.prefetch_images
+        )
+        self._catalog = ImageCatalog()
+        self._run_slots = asyncio.Semaphore(daemon_config.max_parallel_runs)
+        # Run containers still being set up (no exec session yet)
+        self._preparing_runs: set[str] = set()
+        self._run_reaper = RunReaper(
+            incus,
+            is_run=lambda name: name.startswith(RUN_PREFIX),
+            busy=self._preparing_runs.__contains__,
+        )
+        self._bulk_slots = asyncio.Semaphore(daemon_config.max_parallel_bulk_ops)
+        self._pruner = SnapshotPruner(
+            incus,
+            keep_last=daemon_config.snapshot_keep_last,
+            max_age_days=daemon_config.snapshot_max_age_days,
+            skip=_is_internal,
+        )
+        self._idle = IdleScheduler(
+            incus,
+            freeze_minutes=daemon_config.idle_freeze_minutes,
+            stop_minutes=daemon_config.idle_stop_minutes,
+            skip=_is_internal,
+        )
+        self._resource_profiles = available_profiles(load_resource_profiles())
+        self._stats = StatsCollector(incus, skip=_is_internal)
+
+    @property
+    def profiles(self) -> ProfileManager:
+        """Shared Incus profiles (ensured and migrated by the service)."""
+        return self._profiles
+
+    @property
+    def templates(self) -> TemplateManager:
+        """Golden template manager (started by the service)."""
+        return self._templates
+
+    @property
+    def warm_pool(self) -> WarmPool:
+        """Warm pool of default containers (started by the service)."""
+        return self._warm_pool
+
+    @property
+    def package_layers(self) -> LayerManager:
+        """Cached package-set layers (stopped by the service)."""
+        return self._layers
+
+    @property
+    def snapshot_pruner(self) -> SnapshotPruner:
+        """Snapshot retention pruner (started by the service)."""
+        return self._pruner
+
+    @property
+    def idle_scheduler(self) -> IdleScheduler:
+        """Idle container freezer (started by the service)."""
+        return self._idle
+
+    @property
+    def run_reaper(self) -> RunReaper:
+        """Remover of abandoned run containers (started by the service)."""
+        return self._run_reaper
+
+    @property
+    def image_prefetcher(self) -> ImagePrefetcher:
+        """Default image prefetcher (started by the service)."""
+        return self._prefetcher
+
+    @property
+    def image_catalog(self) -> ImageCatalog:
+        """Searchable image server catalog (closed by the service)."""
+        return self._catalog
 
     def set_bus(self, bus: MessageBus) -> None:
         """Set the message bus for operation object export.
@@ -150,6 +513,8 @@ class ContainerService:
         image: str,
         session_mode: bool = False,
         dbus_mux: bool = False,
+        packages: list[str] | None = None,
+        resources: str = "",
     ) -> None:
         """Create a new container.
 
@@ -159,11 +524,24 @@ class ContainerService:
             image: Image to use (e.g., "images:archlinux")
             session_mode: Enable session mode with container D-Bus
             dbus_mux: Enable D-Bus multiplexer (implies session_mode)
+            packages: Extra packages to install with the image's package
+                manager
+            resources: Resource profile to limit the container with;
+                empty for no limits
         """
         # dbus_mux implies session_mode
         if dbus_mux:
             session_mode = True
 
+        try:
+            package_list = normalize_packages(packages or [])
+            limits = (
+                resolve_limits(resources, {}, self._resource_profiles)
+                if resources else {}
+            )
+        except ValueError as e:
+            raise OperationError(str(e)) from e
+
         # Check if container already exists
         if await self._incus.instance_exists(name):
             raise OperationError(f"Container '{name}' already exists")
@@ -171,26 +549,35 @@ class ContainerService:
         progress.info(f"Image: {image}")
 
         # Parse image source
-        instance_source = self._parse_image_source(image)
+        instance_source = parse_image_source(image)
         if instance_source is None:
             raise OperationError(f"Invalid image format: {image}")
 
-        # Build instance config — base settings applied directly
-        instance_config_dict = _base_container_config()
-        if session_mode:
-            instance_config_dict[KAPSULE_SESSION_MODE_KEY] = "true"
+        # Copy a prepared layer or template instead if one is ready
+        layer_source = await self._layers.source_for(image, package_list)
+        template_source = layer_source or await self._templates.source_for(image)
+        if template_source is not None:
+            instance_source = template_source
+
+        # Shared settings come from the profiles; only per-container
+        # keys are set on the instance
+        instance_config_dict: dict[str, str] = {}
         if dbus_mux:
             instance_config_dict[KAPSULE_DBUS_MUX_KEY] = "true"
+        if resources:
+            progress.info(f"Resource profile: {resources}")
+            instance_config_dict.update(limits)
+            instance_config_dict[RESOURCE_PROFILE_KEY] = resources
 
         instance_config = InstancesPost(
             name=name,
-            profiles=[],
+            profiles=profiles_for(session_mode),
             source=instance_source,
             start=True,
             architecture=None,
             config=instance_config_dict,
             description=None,
-            devices=_base_container_devices(),
+            devices=None,
             ephemeral=None,
             instance_type=None,
             restore=None,
@@ -198,22 +585,37 @@ class ContainerService:
             type=None,
         )
 
-        # Create the container
-        progress.info("Downloading image and creating container...")
-        try:
-            operation = await self._incus.create_instance(instance_config, wait=True)
-            if operation.status != "Success":
-                err_msg = operation.err or operation.status
-                raise OperationError(f"Creation failed: {err_msg}")
-        except IncusError as e:
-            raise OperationError(f"Failed to create container: {e}") from e
+        # Create the container, relaying download/unpack progress
+        if layer_source is not None:
+            progress.info("Copying container from cached package layer...")
+        elif template_source is not None:
+            progress.info("Copying container from template...")
+        else:
+            progress.info("Downloading image and creating container...")
+        await self._create_instance(progress, instance_config)
+
+        # Config written by the setup steps below, flushed in one request
+        config_txn = self._incus.config_transaction(name)
+
+        if template_source is None:
+            # Apply host-networking fixups for lxc.net.0.type=none
+            # This masks services that don't work without network interfaces
+            await self._apply_host_network_fixups(progress, name)
+
+            # Restore file capabilities stripped during image extraction
+            await self._fix_file_capabilities(progress, name)
 
-        # Apply host-networking fixups for lxc.net.0.type=none
-        # This masks services that don't work without network interfaces
-        await self._apply_host_network_fixups(progress, name)
+            # Next time, copy a template that already has the fixups
+            self._templates.schedule_build(image)
+        else:
+            progress.dim("Image fixups inherited from template")
 
-        # Restore file capabilities stripped during image extraction
-        await self._fix_file_capabilities(progress, name)
+        if layer_source is not None:
+            progress.dim("Packages inherited from cached layer")
+        elif package_list:
+            await self._install_packages(progress, name, package_list)
+            # Next time, copy a layer that already has them
+            self._layers.schedule_build(image, package_list)
 
         # Set up session mode if enabled
         if session_mode:
@@ -224,18 +626,118 @@ class ContainerService:
             await self._configure_rootless_podman(progress, name)
 
         # Create Ptyxis terminal profile
+        from .ptyxis import create_ptyxis_profile
+        profile_uuid = create_ptyxis_profile(name)
+        if profile_uuid:
+            config_txn.set_config(KAPSULE_PTYXIS_PROFILE_KEY, profile_uuid)
+            progress.dim("Ptyxis profile created")
+
+        try:
+            await config_txn.flush()
+        except IncusError as e:
+            # Non-fatal: only Kapsule's own bookkeeping keys are affected
+            progress.warning(f"Could not save container metadata: {e}")
+
+        progress.success(f"Container '{name}' created successfully")
+
+    @operation(
+        "clone",
+        description="Cloning container: {source} to {name}",
+        target_param="name",
+    )
+    async def clone_container(
+        self,
+        progress: OperationReporter,
+        *,
+        source: str,
+        name: str,
+        snapshot: str = "",
+    ) -> None:
+        """Create a container as a copy of an existing one.
+
+        Incus copies the root filesystem, which on a copy-on-write pool is
+        a subvolume snapshot, along with the source's config and devices.
+        Per-container artifacts (Ptyxis profile, D-Bus mux socket path) are
+        then regenerated for the new name.
+
+        Args:
+            progress: Operation reporter (auto-injected)
+            source: Container to clone
+            name: Name of the new container
+            snapshot: If set, first take a snapshot of the source under
+                this name (kept as a restore point) and clone from it
+        """
+        if _is_internal(source) or not await self._incus.instance_exists(source):
+            raise OperationError(f"Container '{source}' does not exist")
+        if await self._incus.instance_exists(name):
+            raise OperationError(f"Container '{name}' already exists")
+
+        try:
+            source_config = (await self._incus.get_instance(source)).config or {}
+        except IncusError as e:
+            raise OperationError(f"Failed to read container '{source}': {e}") from e
+
+        copy_from = source
+        if snapshot:
+            progress.info(f"Taking snapshot '{snapshot}' of {source}...")
+            try:
+                op = await self._incus.create_snapshot(source, snapshot, wait=True)
+            except IncusError as e:
+                raise OperationError(f"Failed to take snapshot: {e}") from e
+            if op.status != "Success":
+                raise OperationError(f"Snapshot failed: {op.err or op.status}")
+            copy_from = f"{source}/{snapshot}"
+
+        request = InstancesPost(
+            name=name,
+            # None inherits the source's profiles, config and devices
+            profiles=None,
+            source=copy_source(copy_from),
+            start=True,
+            architecture=None,
+            # The source's terminal profile belongs to the source; an
+            # empty value keeps the key from being copied
+            config={KAPSULE_PTYXIS_PROFILE_KEY: ""},
+            description=None,
+            devices=None,
+            ephemeral=None,
+            instance_type=None,
+            restore=None,
+            stateful=None,
+            type=None,
+        )
+        progress.info(f"Copying {copy_from}...")
+        await self._create_instance(progress, request)
+
+        await self._finish_copy(
+            progress, name, source_config.get(KAPSULE_DBUS_MUX_KEY) == "true"
+        )
+        progress.success(f"Container '{name}' cloned from '{source}'")
+
+    async def _finish_copy(
+        self, progress: OperationReporter, name: str, dbus_mux: bool
+    ) -> None:
+        """Regenerate the per-container artifacts of a copied container.
+
+        Args:
+            progress: Operation reporter
+            name: Name of the (running) copy
+            dbus_mux: Whether the original used the D-Bus multiplexer
+        """
+        # The mux socket path and its service are keyed by container name
+        if dbus_mux:
+            await self._setup_session_mode(progress, name, True)
+
         from .ptyxis import create_ptyxis_profile
         profile_uuid = create_ptyxis_profile(name)
         if profile_uuid:
             try:
                 await self._incus.patch_instance_config(
-                    name, {"user.kapsule.ptyxis-profile": profile_uuid}
+                    name, {KAPSULE_PTYXIS_PROFILE_KEY: profile_uuid}
                 )
                 progress.dim("Ptyxis profile created")
-            except Exception:
-                pass  # Non-fatal
-
-        progress.success(f"Container '{name}' created successfully")
+            except IncusError as e:
+                progress.warning(f"Could not save container metadata: {e}")
 
     @operation(
         "delete",
@@ -262,12 +764,6 @@ class ContainerService:
 
         instance = await self._incus.get_instance(name)
 
-        # Clean up Ptyxis profile before deletion
-        profile_uuid = (instance.config or {}).get("user.kapsule.ptyxis-profile")
-        if profile_uuid:
-            from .ptyxis import delete_ptyxis_profile
-            delete_ptyxis_profile(profile_uuid)
-
         is_running = instance.status and instance.status.lower() == "running"
 
         if is_running and not force:
@@ -277,21 +773,11 @@ class ContainerService:
 
         if is_running:
             progress.info("Stopping container...")
-            try:
-                op = await self._incus.stop_instance(name, force=True, wait=True)
-                if op.status != "Success":
-                    raise OperationError(f"Failed to stop: {op.err or op.status}")
-            except IncusError as e:
-                raise OperationError(f"Failed to stop container: {e}") from e
+            await self._stop_instance(name, force=True)
             progress.success("Container stopped")
 
         progress.info("Deleting container...")
-        try:
-            op = await self._incus.delete_instance(name, wait=True)
-            if op.status != "Success":
-                raise OperationError(f"Deletion failed: {op.err or op.status}")
-        except IncusError as e:
-            raise OperationError(f"Failed to delete container: {e}") from e
+        await self._delete_instance(instance)
 
         progress.success(f"Container '{name}' removed successfully")
 
@@ -321,12 +807,7 @@ class ContainerService:
             return
 
         progress.info("Starting container...")
-        try:
-            op = await self._incus.start_instance(name, wait=True)
-            if op.status != "Success":
-                raise OperationError(f"Start failed: {op.err or op.status}")
-        except IncusError as e:
-            raise OperationError(f"Failed to start container: {e}") from e
+        await self._start_instance(name)
 
         progress.success(f"Container '{name}' started successfully")
 
@@ -358,6 +839,29 @@ class ContainerService:
             return
 
         progress.info("Stopping container...")
+        await self._stop_instance(name, force=force)
+
+        progress.success(f"Container '{name}' stopped successfully")
+
+    async def _start_instance(self, name: str) -> None:
+        """Start a container and wait for it.
+
+        Raises:
+            OperationError: If Incus fails to start it.
+        """
+        try:
+            op = await self._incus.start_instance(name, wait=True)
+            if op.status != "Success":
+                raise OperationError(f"Start failed: {op.err or op.status}")
+        except IncusError as e:
+            raise OperationError(f"Failed to start container: {e}") from e
+
+    async def _stop_instance(self, name: str, force: bool) -> None:
+        """Stop a container and wait for it.
+
+        Raises:
+            OperationError: If Incus fails to stop it.
+        """
         try:
             op = await self._incus.stop_instance(name, force=force, wait=True)
             if op.status != "Success":
@@ -365,7 +869,515 @@ class ContainerService:
         except IncusError as e:
             raise OperationError(f"Failed to stop container: {e}") from e
 
-        progress.success(f"Container '{name}' stopped successfully")
+    async def _delete_instance(self, instance: Instance) -> None:
+        """Delete a stopped container and its Ptyxis profile.
+
+        Raises:
+            OperationError: If Incus fails to delete it.
+        """
+        name = instance.name or ""
+        profile_uuid = (instance.config or {}).get(KAPSULE_PTYXIS_PROFILE_KEY)
+        if profile_uuid:
+            from .ptyxis import delete_ptyxis_profile
+            delete_ptyxis_profile(profile_uuid)
+
+        try:
+            op = await self._incus.delete_instance(name, wait=True)
+            if op.status != "Success":
+                raise OperationError(f"Deletion failed: {op.err or op.status}")
+        except IncusError as e:
+            raise OperationError(f"Failed to delete container: {e}") from e
+
+    # -------------------------------------------------------------------------
+    # Bulk Lifecycle
+    # -------------------------------------------------------------------------
+
+    async def _run_bulk(
+        self,
+        progress: OperationReporter,
+        label: str,
+        names: list[str],
+        action: Callable[[Instance], Awaitable[str]],
+    ) -> None:
+        """Apply a lifecycle action to many containers at once.
+
+        At most ``max_parallel_bulk_ops`` containers are worked on at the
+        same time, across all bulk operations. Every container gets its own
+        success or error message, prefixed with its name, and the progress
+        bar counts finished containers. One failing container doesn't stop
+        the others.
+
+        Args:
+            progress: Operation reporter
+            label: Progress bar label, e.g. ``Stopping``
+            names: Container names; duplicates are ignored
+            action: Acts on one container and returns the message to show,
+                raising OperationError on failure
+
+        Raises:
+            OperationError: If any container failed, after all are done.
+        """
+        targets = list(dict.fromkeys(names))
+        if not targets:
+            raise OperationError("No containers given")
+
+        try:
+            instances = {
+                i.name: i for i in await self._incus.list_instances() if i.name
+            }
+        except IncusError as e:
+            raise OperationError(f"Failed to list containers: {e}") from e
+
+        failed: list[str] = []
+        done = 0
+
+        async with progress.track(
+            f"{label} {len(targets)} containers", total=len(targets)
+        ) as bar:
+
+            async def run(name: str) -> None:
+                nonlocal done
+                instance = instances.get(name)
+                try:
+                    if instance is None or _is_internal(name):
+                        raise OperationError("does not exist")
+                    async with self._bulk_slots:
+                        message = await action(instance)
+                except OperationError as e:
+                    failed.append(name)
+                    progress.error(f"{name}: {e}")
+                except Exception as e:
+                    # Unexpected, but must not abort the rest of the batch
+                    logger.exception("%s %s failed", label, name)
+                    failed.append(name)
+                    progress.error(f"{name}: {e}")
+                else:
+                    progress.success(f"{name}: {message}")
+                done += 1
+                bar.update(done)
+
+            await asyncio.gather(*(run(name) for name in targets))
+
+        if failed:
+            raise OperationError(
+                f"{len(failed)} of {len(targets)} containers failed: "
+                + ", ".join(failed)
+            )
+
+    @operation(
+        "start",
+        description="Starting containers",
+        target_param="names",
+    )
+    async def start_containers(
+        self,
+        progress: OperationReporter,
+        *,
+        names: list[str],
+    ) -> None:
+        """Start several containers in parallel.
+
+        Args:
+            progress: Operation reporter (auto-injected)
+            names: Container names
+        """
+        async def start(instance: Instance) -> str:
+            if (instance.status or "").lower() == "running":
+                return "already running"
+            await self._start_instance(instance.name or "")
+            return "started"
+
+        await self._run_bulk(progress, "Starting", names, start)
+
+    @operation(
+        "stop",
+        description="Stopping containers",
+        target_param="names",
+    )
+    async def stop_containers(
+        self,
+        progress: OperationReporter,
+        *,
+        names: list[str],
+        force: bool = False,
+    ) -> None:
+        """Stop several containers in parallel.
+
+        Args:
+            progress: Operation reporter (auto-injected)
+            names: Container names
+            force: Force stop
+        """
+        async def stop(instance: Instance) -> str:
+            if (instance.status or "").lower() != "running":
+                return "not running"
+            await self._stop_instance(instance.name or "", force=force)
+            return "stopped"
+
+        await self._run_bulk(progress, "Stopping", names, stop)
+
+    @operation(
+        "delete",
+        description="Removing containers",
+        target_param="names",
+    )
+    async def delete_containers(
+        self,
+        progress: OperationReporter,
+        *,
+        names: list[str],
+        force: bool = False,
+    ) -> None:
+        """Delete several containers in parallel.
+
+        Args:
+            progress: Operation reporter (auto-injected)
+            names: Container names
+            force: Stop and remove running containers too
+        """
+        async def delete(instance: Instance) -> str:
+            name = instance.name or ""
+            if (instance.status or "").lower() == "running":
+                if not force:
+                    raise OperationError("running (use force to remove anyway)")
+                await self._stop_instance(name, force=True)
+            await self._delete_instance(instance)
+            return "removed"
+
+        await self._run_bulk(progress, "Removing", names, delete)
+
+    # -------------------------------------------------------------------------
+    # Resource Limits
+    # -------------------------------------------------------------------------
+
+    @operation(
+        "set-limits",
+        description="Setting resource limits: {name}",
+        target_param="name",
+    )
+    async def set_container_limits(
+        self,
+        progress: OperationReporter,
+        *,
+        name: str,
+        profile: str = "",
+        limits: dict[str, str] | None = None,
+    ) -> None:
+        """Replace a container's resource limits; applied live by Incus.
+
+        The container ends up with exactly the profile's limits plus the
+        given overrides; limits from an earlier call are not kept.
+
+        Args:
+            progress: Operation reporter (auto-injected)
+            name: Container name
+            profile: Resource profile; empty to keep the container's
+                current one
+            limits: Limit options overriding the profile's
+        """
+        if _is_internal(name) or not await self._incus.instance_exists(name):
+            raise OperationError(f"Container '{name}' does not exist")
+
+        if not profile:
+            instance = await self._incus.get_instance(name)
+            profile = (instance.config or {}).get(RESOURCE_PROFILE_KEY, NO_LIMITS)
+        try:
+            config = resolve_limits(profile, limits or {}, self._resource_profiles)
+        except ValueError as e:
+            raise OperationError(str(e)) from e
+
+        progress.info(f"Resource profile: {profile}")
+        for key, value in sorted(config.items()):
+            progress.dim(f"{key} = {value}")
+        try:
+            await self._incus.rewrite_instance(
+                name, lambda instance: with_limits(instance, profile, config)
+            )
+        except IncusError as e:
+            raise OperationError(f"Failed to set resource limits: {e}") from e
+
+        progress.success(f"Resource limits of '{name}' updated")
+
+    # -------------------------------------------------------------------------
+    # Snapshot Operations
+    # -------------------------------------------------------------------------
+
+    @operation(
+        "snapshot",
+        description="Snapshotting container: {name}",
+        target_param="name",
+    )
+    async def snapshot_container(
+        self,
+        progress: OperationReporter,
+        *,
+        name: str,
+        snapshot: str = "",
+    ) -> None:
+        """Take a snapshot of a container.
+
+        Args:
+            progress: Operation reporter (auto-injected)
+            name: Container name
+            snapshot: Snapshot name; empty to name it after the current
+                time, which makes it subject to the retention policy
+        """
+        existing = await self._snapshot_names(name)
+        auto = not snapshot
+        if auto:
+            snapshot = auto_snapshot_name(existing)
+        elif snapshot in existing:
+            raise OperationError(f"Snapshot '{snapshot}' of '{name}' already exists")
+
+        progress.info(f"Taking snapshot '{snapshot}'...")
+        try:
+            if auto:
+                op = await take_auto_snapshot(self._incus, name, snapshot)
+            else:
+                op = await self._incus.create_snapshot(name, snapshot, wait=True)
+        except IncusError as e:
+            raise OperationError(f"Failed to take snapshot: {e}") from e
+        if op.status != "Success":
+            raise OperationError(f"Snapshot failed: {op.err or op.status}")
+
+        try:
+            for pruned in await self._pruner.prune(name):
+                progress.dim(f"Removed old snapshot '{pruned}'")
+        except IncusError as e:
+            progress.warning(f"Could not apply snapshot retention: {e}")
+
+        progress.success(f"Snapshot '{snapshot}' of '{name}' created")
+
+    @operation(
+        "restore",
+        description="Restoring container {name} to snapshot {snapshot}",
+        target_param="name",
+    )
+    async def restore_snapshot(
+        self,
+        progress: OperationReporter,
+        *,
+        name: str,
+        snapshot: str,
+    ) -> None:
+        """Roll a container back to one of its snapshots.
+
+        A running container is stopped for the restore and started again
+        by Incus.
+
+        Args:
+            progress: Operation reporter (auto-injected)
+            name: Container name
+            snapshot: Snapshot to restore
+        """
+        if snapshot not in await self._snapshot_names(name):
+            raise OperationError(f"Snapshot '{snapshot}' of '{name}' does not exist")
+
+        progress.info(f"Restoring snapshot '{snapshot}'...")
+        try:
+            op = await self._incus.restore_snapshot(name, snapshot, wait=True)
+        except IncusError as e:
+            raise OperationError(f"Failed to restore snapshot: {e}") from e
+        if op.status != "Success":
+            raise OperationError(f"Restore failed: {op.err or op.status}")
+
+        progress.success(f"Container '{name}' restored to '{snapshot}'")
+
+    @operation(
+        "delete_snapshot",
+        description="Deleting snapshot {snapshot} of {name}",
+        target_param="name",
+    )
+    async def delete_snapshot(
+        self,
+        progress: OperationReporter,
+        *,
+        name: str,
+        snapshot: str,
+    ) -> None:
+        """Delete a snapshot of a container.
+
+        Args:
+            progress: Operation reporter (auto-injected)
+            name: Container name
+            snapshot: Snapshot to delete
+        """
+        if snapshot not in await self._snapshot_names(name):
+            raise OperationError(f"Snapshot '{snapshot}' of '{name}' does not exist")
+
+        try:
+            op = await self._incus.delete_snapshot(name, snapshot, wait=True)
+        except IncusError as e:
+            raise OperationError(f"Failed to delete snapshot: {e}") from e
+        if op.status != "Success":
+            raise OperationError(f"Deletion failed: {op.err or op.status}")
+
+        progress.success(f"Snapshot '{snapshot}' of '{name}' deleted")
+
+    async def _snapshot_names(self, name: str) -> list[str]:
+        """Names of a user container's snapshots.
+
+        Raises:
+            OperationError: If there is no such container.
+        """
+        if _is_internal(name) or not await self._incus.instance_exists(name):
+            raise OperationError(f"Container '{name}' does not exist")
+        try:
+            return [s.name or "" for s in await self._incus.list_snapshots(name)]
+        except IncusError as e:
+            raise OperationError(f"Failed to list snapshots: {e}") from e
+
+    # -------------------------------------------------------------------------
+    # Export / Import Operations
+    # -------------------------------------------------------------------------
+
+    @operation(
+        "export",
+        description="Exporting container: {name}",
+        target_param="name",
+    )
+    async def export_container(
+        self,
+        progress: OperationReporter,
+        *,
+        name: str,
+        fd: int,
+        compression: str = DEFAULT_EXPORT_COMPRESSION,
+    ) -> None:
+        """Stream a container's backup tarball to a file descriptor.
+
+        Snapshots are left out. The descriptor is closed when the export
+        ends, successfully or not.
+
+        Args:
+            progress: Operation reporter (auto-injected)
+            name: Container name
+            fd: Writable descriptor (file or pipe) owned by the operation
+            compression: One of EXPORT_COMPRESSIONS
+        """
+        try:
+            if compression not in EXPORT_COMPRESSIONS:
+                raise OperationError(
+                    f"Unknown compression '{compression}' "
+                    f"(choose from {', '.join(EXPORT_COMPRESSIONS)})"
+                )
+            if _is_internal(name) or not await self._incus.instance_exists(name):
+                raise OperationError(f"Container '{name}' does not exist")
+
+            backup = export_backup_name()
+            progress.info(f"Creating backup ({compression})...")
+            try:
+                op = await self._incus.create_backup(
+                    name, backup, compression=compression, wait=True
+                )
+            except IncusError as e:
+                raise OperationError(f"Failed to create backup: {e}") from e
+            if op.status != "Success":
+                raise OperationError(f"Backup failed: {op.err or op.status}")
+
+            try:
+                await self._stream_backup(progress, name, backup, fd)
+            finally:
+                try:
+                    await self._incus.delete_backup(name, backup, wait=True)
+                except IncusError as e:
+                    logger.warning("Could not delete backup %s/%s: %s", name, backup, e)
+        finally:
+            os.close(fd)
+
+        progress.success(f"Container '{name}' exported")
+
+    async def _stream_backup(
+        self, progress: OperationReporter, name: str, backup: str, fd: int
+    ) -> None:
+        """Copy a backup from Incus to a descriptor, reporting progress."""
+        started = time.monotonic()
+        written = 0
+        try:
+            async with self._incus.export_backup(name, backup) as download:
+                total = 100 if download.size > 0 else -1
+                async with progress.track("Exporting", total=total) as bar:
+                    async for chunk in download.chunks:
+                        await write_fd(fd, chunk)
+                        written += len(chunk)
+                        bar.update(
+                            *_transfer_progress(written, download.size, started)
+                        )
+        except IncusError as e:
+            raise OperationError(f"Failed to export backup: {e}") from e
+        except OSError as e:
+            raise OperationError(f"Failed to write export: {e}") from e
+        progress.dim(_transfer_summary("Exported", written, started))
+
+    @operation(
+        "import",
+        description="Importing container: {name}",
+        target_param="name",
+    )
+    async def import_container(
+        self,
+        progress: OperationReporter,
+        *,
+        name: str,
+        fd: int,
+    ) -> None:
+        """Create a container from a backup tarball read from a descriptor.
+
+        The compression is detected by Incus. The container is started and
+        its per-container artifacts are regenerated, as for a clone. The
+        descriptor is closed when the import ends.
+
+        Args:
+            progress: Operation reporter (auto-injected)
+            name: Name of the new container
+            fd: Readable descriptor (file or pipe) owned by the operation
+        """
+        try:
+            if _is_internal(name):
+                raise OperationError(f"'{name}' is reserved for Kapsule's own use")
+            if await self._incus.instance_exists(name):
+                raise OperationError(f"Container '{name}' already exists")
+
+            size = fd_size(fd)
+            started = time.monotonic()
+            read = 0
+            try:
+                async with progress.track(
+                    "Importing", total=100 if size > 0 else -1
+                ) as bar:
+
+                    async def chunks() -> AsyncIterator[bytes]:
+                        nonlocal read
+                        async for chunk in read_fd(fd):
+                            read += len(chunk)
+                            bar.update(*_transfer_progress(read, size, started))
+                            yield chunk
+
+                    op = await self._incus.import_backup(name, chunks(), wait=True)
+            except IncusError as e:
+                raise OperationError(f"Failed to import container: {e}") from e
+            except OSError as e:
+                raise OperationError(f"Failed to read import: {e}") from e
+        finally:
+            os.close(fd)
+        if op.status != "Success":
+            raise OperationError(f"Import failed: {op.err or op.status}")
+        progress.dim(_transfer_summary("Imported", read, started))
+
+        try:
+            instance = await self._incus.get_instance(name)
+            config = instance.config or {}
+            op = await self._incus.start_instance(name, wait=True)
+        except IncusError as e:
+            raise OperationError(f"Failed to start container: {e}") from e
+        if op.status != "Success":
+            raise OperationError(f"Start failed: {op.err or op.status}")
+
+        # The exporting machine's terminal profile doesn't exist here
+        await self._finish_copy(
+            progress, name, config.get(KAPSULE_DBUS_MUX_KEY) == "true"
+        )
+        progress.success(f"Container '{name}' imported")
 
     # -------------------------------------------------------------------------
     # User Setup Operations
@@ -418,100 +1430,28 @@ class ContainerService:
         except IncusError as e:
             raise OperationError(f"Failed to mount home directory: {e}") from e
 
-        # Check if another user already owns this UID and rename it
-        result = subprocess.run(
-            [
-                "incus", "exec", container_name, "--",
-                "bash", "-c", f"getent passwd {uid} | cut -d: -f1",
-            ],
-            capture_output=True,
-            text=True,
+        # Create the user, grant sudo and enable linger in one exec
+        progress.info(f"Provisioning user '{username}' (uid={uid}, gid={gid})")
+        result = await self._provision_user(
+            container_name, uid, gid, username, container_home
         )
-        existing_user = result.stdout.strip()
-        if existing_user and existing_user != username:
+        if result.previous_user:
             progress.info(
-                f"Renaming existing user '{existing_user}' to '{username}'"
-            )
-            subprocess.run(
-                [
-                    "incus", "exec", container_name, "--",
-                    "usermod", "-l", username, "-d", container_home,
-                    "-m", existing_user,
-                ],
-                capture_output=True,
-            )
-            subprocess.run(
-                [
-                    "incus", "exec", container_name, "--",
-                    "groupmod", "-n", username, existing_user,
-                ],
-                capture_output=True,
-            )
-        else:
-            # Create group
-            progress.info(f"Creating group '{username}' (gid={gid})")
-            result = subprocess.run(
-                [
-                    "incus", "exec", container_name, "--",
-                    "groupadd", "-o", "-g", str(gid), username,
-                ],
-                capture_output=True,
-                text=True,
-            )
-            if result.returncode != 0 and "already exists" not in result.stderr:
-                progress.warning(f"groupadd: {result.stderr.strip()}")
-
-            # Create user
-            progress.info(f"Creating user '{username}' (uid={uid})")
-            result = subprocess.run(
-                [
-                    "incus", "exec", container_name, "--",
-                    "useradd", "-o", "-M",
-                    "-u", str(uid),
-                    "-g", str(gid),
-                    "-d", container_home,
-                    "-s", "/bin/bash",
-                    username,
-                ],
-                capture_output=True,
-                text=True,
-            )
-            if result.returncode != 0 and "already exists" not in result.stderr:
-                progress.warning(f"useradd: {result.stderr.strip()}")
-
-        # Configure passwordless sudo
-        progress.info(f"Configuring passwordless sudo for '{username}'")
-        sudoers_content = f"{username} ALL=(ALL) NOPASSWD:ALL\n"
-        sudoers_file = f"/etc/sudoers.d/{username}"
-        try:
-            await self._incus.push_file(
-                container_name,
-                sudoers_file,
-                sudoers_content,
-                uid=0,
-                gid=0,
-                mode="0440",
-            )
-        except IncusError as e:
-            raise OperationError(f"Failed to configure sudo: {e}") from e
-
-        # Check if session mode is enabled
-        instance = await self._incus.get_instance(container_name)
-        instance_config = instance.config or {}
-        session_mode = instance_config.get(KAPSULE_SESSION_MODE_KEY) == "true"
-
-        if session_mode:
-            progress.info(f"Enabling linger for '{username}' (session mode)")
-            result = subprocess.run(
-                [
-                    "incus", "exec", container_name, "--", "loginctl",
-                    "enable-linger", username,
-                ],
-                capture_output=True,
-                text=True,
+                f"Renamed existing user '{result.previous_user}' to '{username}'"
             )
-            if result.returncode != 0:
-                progress.warning(f"loginctl enable-linger: {result.stderr.strip()}")
+        for step in ("group", "user"):
+            outcome = getattr(result, step)
+            if outcome == "failed":
+                progress.warning(f"Could not set up {step}: {result.errors}")
+            else:
+                progress.dim(f"{step.capitalize()} '{username}': {outcome}")
+        if result.sudo == "failed":
+            raise OperationError(f"Failed to configure sudo: {result.errors}")
+        progress.dim(f"Configured passwordless sudo for '{username}'")
+        if result.linger == "failed":
+            progress.warning(f"loginctl enable-linger: {result.errors}")
+        elif result.linger == "enabled":
+            progress.dim(f"Enabled linger for '{username}' (session mode)")
 
         # Mark user as mapped
         user_mapped_key = f"user.kapsule.host-users.{uid}.mapped"
@@ -536,24 +1476,49 @@ class ContainerService:
         Returns:
             List of (name, status, image, created, kapsule_mode) tuples
         """
-        containers = await self._incus.list_containers()
-        result: list[tuple[str, str, str, str, str]] = []
-        for c in containers:
-            # Get kapsule mode from instance config
-            try:
-                instance = await self._incus.get_instance(c.name)
-                config = instance.config or {}
-                if config.get(KAPSULE_DBUS_MUX_KEY) == "true":
-                    mode = "DbusMux"
-                elif config.get(KAPSULE_SESSION_MODE_KEY) == "true":
-                    mode = "Session"
-                else:
-                    mode = "Default"
-            except IncusError:
-                mode = "unknown"
+        # One recursion=1 fetch already carries every instance's config,
+        # so the mode is computed here instead of re-fetching each one.
+        instances = await self._incus.list_instances(recursion=1)
+        return [
+            _describe_instance(instance)
+            for instance in instances
+            if not _is_internal(instance.name or "")
+        ]
 
-            result.append((c.name, c.status, c.image, c.created, mode))
-        return result
+    async def get_container_stats(self) -> list[ContainerStats]:
+        """Sample resource usage of all containers.
+
+        Returns:
+            Stats of every container, sorted by name
+        """
+        try:
+            return await self._stats.stats()
+        except IncusError as e:
+            raise OperationError(f"Failed to read container stats: {e}") from e
+
+    async def list_snapshots(self, name: str) -> list[tuple[str, str, int]]:
+        """List a container's snapshots.
+
+        Args:
+            name: Container name
+
+        Returns:
+            List of (snapshot, created, size_bytes) tuples, oldest first
+        """
+        if _is_internal(name):
+            raise OperationError(f"Container '{name}' not found")
+        try:
+            snapshots = await self._incus.list_snapshots(name)
+        except IncusError as e:
+            raise OperationError(f"Container '{name}' not found: {e}") from e
+        return [
+            (
+                s.name or "",
+                s.created_at.isoformat() if s.created_at else "",
+                s.size or 0,
+            )
+            for s in snapshots
+        ]
 
     async def get_container_info(self, name: str) -> tuple[str, str, str, str, str]:
         """Get container information.
@@ -569,25 +1534,7 @@ class ContainerService:
         except IncusError as e:
             raise OperationError(f"Container '{name}' not found: {e}") from e
 
-        config = instance.config or {}
-
-        # Determine kapsule mode
-        if config.get(KAPSULE_DBUS_MUX_KEY) == "true":
-            mode = "DbusMux"
-        elif config.get(KAPSULE_SESSION_MODE_KEY) == "true":
-            mode = "Session"
-        else:
-            mode = "Default"
-
-        image = config.get("image.description", config.get("image.os", "unknown"))
-
-        return (
-            instance.name or name,
-            instance.status or "Unknown",
-            image,
-            instance.created_at.isoformat() if instance.created_at else "",
-            mode,
-        )
+        return _describe_instance(instance, name)
 
     async def is_user_setup(self, container_name: str, uid: int) -> bool:
         """Check if a user is already set up in a container.
@@ -624,12 +1571,37 @@ class ContainerService:
 
         # Load config using caller's home for XDG paths
         config = load_config(home_dir=home_dir)
+        self._prefetcher.note_home(home_dir)
 
         return {
             "default_container": config.default_container,
             "default_image": config.default_image,
+            "resource_profile": config.resource_profile,
         }
 
+    async def list_images(
+        self, query: str
+    ) -> list[tuple[str, str, str, str, str, str]]:
+        """Search the images offered by the configured image servers.
+
+        Args:
+            query: Search text matched against distro, release,
+                architecture, variant and aliases; empty lists all
+
+        Returns:
+            List of (image, os, release, arch, variant, description) tuples,
+            best match first
+        """
+        return [image[:6] for image in await self._catalog.list_images(query)]
+
+    def image_cache_state(self) -> list[tuple[str, str, str, str, str]]:
+        """Local cache state of the configured default images.
+
+        Returns:
+            List of (image, state, fingerprint, refreshed_at, error) tuples
+        """
+        return list(self._prefetcher.cache_state())
+
     async def prepare_enter(
         self,
         uid: int,
@@ -670,11 +1642,19 @@ class ContainerService:
 
         # Load config for defaults (using caller's home for XDG paths)
         config = load_config(home_dir=home_dir)
+        self._prefetcher.note_home(home_dir)
 
         # Use default container name if not specified
         if not container_name:
             container_name = config.default_container
 
+        # Fast path: nothing changed since this user last entered
+        fingerprint = enter_fingerprint(gid, env)
+        generation = self._incus.instance_generation(container_name)
+        if self._enter_cache.is_ready(container_name, uid, generation, fingerprint):
+            self._idle.touch(container_name)
+            return (True, "", _enter_exec_args(container_name, username, command, env))
+
         # Check if container exists
         container_exists = await self._incus.instance_exists(container_name)
 
@@ -691,19 +1671,13 @@ class ContainerService:
             else:
                 return (False, f"Container '{container_name}' does not exist", [])
 
-        # Check container status
+        # Start the container, or resume it if it was frozen while idle
         instance = await self._incus.get_instance(container_name)
         status = (instance.status or "unknown").lower()
-
-        if status != "running":
-            # Start the container
-            try:
-                op = await self._incus.start_instance(container_name, wait=True)
-                if op.status != "Success":
-                    msg = op.err or op.status
-                    return (False, f"Failed to start container: {msg}", [])
-            except IncusError as e:
-                return (False, f"Failed to start container: {e}", [])
+        try:
+            await self._idle.wake(container_name, status)
+        except IncusError as e:
+            return (False, f"Failed to start container: {e}", [])
 
         # Set up user if needed
         if not await self.is_user_setup(container_name, uid):
@@ -720,71 +1694,205 @@ class ContainerService:
         except OperationError as e:
             return (False, str(e), [])
 
-        # Build environment arguments
-        env_args: list[str] = []
-        whitelist_keys: list[str] = []
-        for key, value in env.items():
-            if key in _ENTER_ENV_SKIP:
-                continue
-            if "\n" in value or "\x00" in value:
-                continue
-            env_args.extend(["--env", f"{key}={value}"])
-            whitelist_keys.append(key)
-
-        # Build the command to run inside the container.
-        #
-        # Always use su -l for consistent behavior whether entering a
-        # shell or running a command. su -l provides:
-        #   - PAM session setup (pam_systemd, etc.)
-        #   - Supplementary group resolution via initgroups()
-        #   - Login shell profile sourcing (.bash_profile, etc.)
-        #
-        # The -w flag whitelists env vars passed via incus exec --env,
-        # preventing su -l from clearing vars like XDG_RUNTIME_DIR
-        # that are needed for PulseAudio/PipeWire socket discovery.
-        whitelist_arg = ",".join(whitelist_keys) if whitelist_keys else ""
-        if command:
-            exec_cmd = [
-                "su", "-l", "-w", whitelist_arg, "-c", " ".join(command),
-                username,
-            ]
+        # Remember the container as ready only if nothing touched it while
+        # we were setting up (including our own writes on a first enter),
+        # so a concurrent stop can't be mistaken for a ready container.
+        if self._incus.instance_generation(container_name) != generation:
+            generation = None
+        self._enter_cache.mark_ready(container_name, uid, generation, fingerprint)
+
+        return (True, "", _enter_exec_args(container_name, username, command, env))
+
+    async def prepare_run(
+        self,
+        uid: int,
+        gid: int,
+        source: str,
+        command: list[str],
+        env: dict[str, str],
+    ) -> tuple[bool, str, str, list[str]]:
+        """Create a throwaway container and prepare a command to run in it.
+
+        The container is an Incus ephemeral instance copied from a local
+        container or snapshot, or created from an image (through its
+        golden template when one is ready). The caller is set up in it
+        exactly like on ``kapsule enter``. Only this setup is bounded by
+        ``max_parallel_runs``; the command itself runs in the caller, which
+        calls finish_run() when it is done. If the caller never does, the
+        run reaper removes the container once its exec session is gone.
+
+        Args:
+            uid: Caller's user ID (from D-Bus credentials)
+            gid: Caller's group ID
+            source: Container, ``<container>/<snapshot>`` or image to
+                start from; empty for the caller's default image
+            command: Command to run inside the container (empty for shell)
+            env: Environment variables from the caller
+
+        Returns:
+            Tuple of (success, message, container_name, command_array)
+        """
+        try:
+            pw_entry = pwd.getpwuid(uid)
+        except KeyError:
+            return (False, f"User with UID {uid} not found", "", [])
+        username = pw_entry.pw_name
+        home_dir = pw_entry.pw_dir
+
+        if not source:
+            source = load_config(home_dir=home_dir).default_image
+            self._prefetcher.note_home(home_dir)
+
+        name = f"{RUN_PREFIX}{secrets.token_hex(4)}"
+        started = time.monotonic()
+        self._preparing_runs.add(name)
+        try:
+            async with self._run_slots:
+                await self._create_run_container(name, source, uid)
+                try:
+                    await self._setup_user_sync(name, uid, gid, username, home_dir)
+                    await self._setup_runtime_symlinks(name, uid, gid, env)
+                except OperationError:
+                    with contextlib.suppress(IncusError):
+                        await self._incus.stop_instance(name, force=True, wait=True)
+                    raise
+        except OperationError as e:
+            return (False, str(e), "", [])
+        finally:
+            self._preparing_runs.discard(name)
+
+        logger.info(
+            "Run container %s from %s ready in %.2fs",
+            name, source, time.monotonic() - started,
+        )
+        return (True, "", name, _enter_exec_args(name, username, command, env))
+
+    async def _create_run_container(self, name: str, source: str, uid: int) -> None:
+        """Create and start the ephemeral container for prepare_run().
+
+        Args:
+            name: Container name
+            source: Container, snapshot or image to start from
+            uid: UID of the user the container is for
+        """
+        instance_source: InstanceSource | None = None
+        from_image = False
+        from_container = False
+        local = source.split("/", 1)[0]
+        if (
+            ":" not in source
+            and not _is_internal(local)
+            and await self._incus.instance_exists(local)
+        ):
+            instance_source = copy_source(source)
+            from_container = True
         else:
-            exec_cmd = ["su", "-l", "-w", whitelist_arg, username]
-
-        # Build full incus exec command
-        exec_args = [
-            "incus",
-            "exec",
-            container_name,
-            *env_args,
-            "--",
-            *exec_cmd,
-        ]
+            instance_source = await self._templates.source_for(source)
+        if instance_source is None:
+            instance_source = parse_image_source(source)
+            from_image = True
+        if instance_source is None:
+            raise OperationError(f"Invalid image format: {source}")
+
+        request = InstancesPost(
+            name=name,
+            # None keeps a copied container's profiles (e.g. session mode)
+            profiles=None if from_container else [BASE_PROFILE],
+            source=instance_source,
+            start=True,
+            architecture=None,
+            config={KAPSULE_RUN_OWNER_KEY: str(uid)},
+            description=None,
+            devices=None,
+            # Incus deletes the container as soon as it stops
+            ephemeral=True,
+            instance_type=None,
+            restore=None,
+            stateful=None,
+            type=None,
+        )
+        try:
+            operation = await self._incus.create_instance(request, wait=True)
+            if operation.status != "Success":
+                err_msg = operation.err or operation.status
+                raise OperationError(f"Creation failed: {err_msg}")
+        except IncusError as e:
+            raise OperationError(f"Failed to create container: {e}") from e
+
+        if from_image:
+            await self._prepare_template(name)
+            self._templates.schedule_build(source)
+
+    async def finish_run(self, uid: int, name: str) -> bool:
+        """Destroy a container created by prepare_run().
+
+        Args:
+            uid: Caller's user ID; only the user the container was created
+                for (or root) may destroy it
+            name: Container name returned by prepare_run()
+
+        Returns:
+            True if the container was destroyed, False if it was already gone.
+        """
+        if not name.startswith(RUN_PREFIX):
+            raise OperationError(f"'{name}' is not a kapsule run container")
+        try:
+            instance = await self._incus.get_instance(name)
+        except IncusError:
+            return False
+        owner = (instance.config or {}).get(KAPSULE_RUN_OWNER_KEY)
+        if uid != 0 and owner != str(uid):
+            raise OperationError(f"Container '{name}' belongs to another user")
 
-        return (True, "", exec_args)
+        try:
+            # Stopping an ephemeral instance deletes it
+            op = await self._incus.stop_instance(name, force=True, wait=True)
+        except IncusError as e:
+            raise OperationError(f"Failed to remove container: {e}") from e
+        if op.status != "Success":
+            raise OperationError(f"Failed to remove container: {op.err or op.status}")
+        return True
 
     async def _create_default_container(self, name: str, image: str) -> None:
         """Create the default container without progress reporting.
 
+        Claims a warm pool container if one is ready for the image; it is
+        left stopped for the caller to start.
+
+        Args:
+            name: Container name
+            image: Image to use
+        """
+        if await self._warm_pool.claim(name, image):
+            return
+        await self._create_from_image(name, image)
+
+    async def _create_from_image(self, name: str, image: str) -> None:
+        """Create and start a container with the base settings.
+
         Args:
             name: Container name
             image: Image to use
         """
         # Parse image source
-        instance_source = self._parse_image_source(image)
+        instance_source = parse_image_source(image)
         if instance_source is None:
             raise OperationError(f"Invalid image format: {image}")
 
-        # Create instance — base settings applied directly
+        template_source = await self._templates.source_for(image)
+        if template_source is not None:
+            instance_source = template_source
+
+        # Create instance — base settings come from the profile
         instance_config = InstancesPost(
             name=name,
-            profiles=None,
+            profiles=[BASE_PROFILE],
             source=instance_source,
             start=True,
             architecture=None,
-            config=_base_container_config(),
+            config=None,
             description=None,
-            devices=_base_container_devices(),
+            devices=None,
             ephemeral=None,
             instance_type=None,
             restore=None,
@@ -800,8 +1908,10 @@ class ContainerService:
         except IncusError as e:
             raise OperationError(f"Failed to create container: {e}") from e
 
-        # Restore file capabilities stripped during image extraction
-        await self._fix_file_capabilities(None, name)
+        if template_source is None:
+            # Restore file capabilities stripped during image extraction
+            await self._fix_file_capabilities(None, name)
+            self._templates.schedule_build(image)
 
     async def _setup_user_sync(
         self,
@@ -838,85 +1948,12 @@ class ContainerService:
         except IncusError as e:
             raise OperationError(f"Failed to mount home directory: {e}") from e
 
-        # Check if another user already owns this UID and rename it
-        result = subprocess.run(
-            [
-                "incus", "exec", container_name, "--",
-                "bash", "-c", f"getent passwd {uid} | cut -d: -f1",
-            ],
-            capture_output=True,
-            text=True,
+        # Create the user, grant sudo and enable linger in one exec
+        result = await self._provision_user(
+            container_name, uid, gid, username, container_home
         )
-        existing_user = result.stdout.strip()
-        if existing_user and existing_user != username:
-            # Rename existing user and its primary group
-            subprocess.run(
-                [
-                    "incus", "exec", container_name, "--",
-                    "usermod", "-l", username, "-d", container_home,
-                    "-m", existing_user,
-                ],
-                capture_output=True,
-            )
-            subprocess.run(
-                [
-                    "incus", "exec", container_name, "--",
-                    "groupmod", "-n", username, existing_user,
-                ],
-                capture_output=True,
-            )
-        else:
-            # Create group
-            subprocess.run(
-                [
-                    "incus", "exec", container_name, "--",
-                    "groupadd", "-o", "-g", str(gid), username,
-                ],
-                capture_output=True,
-            )
-
-            # Create user
-            subprocess.run(
-                [
-                    "incus", "exec", container_name, "--",
-                    "useradd", "-o", "-M",
-                    "-u", str(uid),
-                    "-g", str(gid),
-                    "-d", container_home,
-                    "-s", "/bin/bash",
-                    username,
-                ],
-                capture_output=True,
-            )
-
-        # Configure passwordless sudo
-        sudoers_content = f"{username} ALL=(ALL) NOPASSWD:ALL\n"
-        sudoers_file = f"/etc/sudoers.d/{username}"
-        try:
-            await self._incus.push_file(
-                container_name,
-                sudoers_file,
-                sudoers_content,
-                uid=0,
-                gid=0,
-                mode="0440",
-            )
-        except IncusError as e:
-            raise OperationError(f"Failed to configure sudo: {e}") from e
-
-        # Check if session mode is enabled and enable linger
-        instance = await self._incus.get_instance(container_name)
-        instance_config = instance.config or {}
-        session_mode = instance_config.get(KAPSULE_SESSION_MODE_KEY) == "true"
-
-        if session_mode:
-            subprocess.run(
-                [
-                    "incus", "exec", container_name, "--", "loginctl",
-                    "enable-linger", username,
-                ],
-                capture_output=True,
-            )
+        if result.sudo == "failed":
+            raise OperationError(f"Failed to configure sudo: {result.errors}")
 
         # Mark user as mapped
         user_mapped_key = f"user.kapsule.host-users.{uid}.mapped"
@@ -949,7 +1986,7 @@ class ContainerService:
             env: Environment variables (for WAYLAND_DISPLAY etc)
         """
         instance = await self._incus.get_instance(container_name)
-        instance_config = instance.config or {}
+        instance_config = effective_config(instance)
 
         session_mode = instance_config.get(KAPSULE_SESSION_MODE_KEY) == "true"
 
@@ -957,14 +1994,12 @@ class ContainerService:
         host_runtime_dir = f"/.kapsule/host/run/user/{uid}"
 
         # Ensure container runtime dir exists
-        with contextlib.suppress(IncusError):
-            await self._incus.mkdir(
-                container_name, "/run/user", uid=0, gid=0, mode="0755"
-            )
-        with contextlib.suppress(IncusError):
-            await self._incus.mkdir(
-                container_name, runtime_dir, uid=uid, gid=gid, mode="0700"
-            )
+        entries = [
+            FileTreeEntry(path="/run/user", type="directory", mode="0755"),
+            FileTreeEntry(
+                path=runtime_dir, type="directory", uid=uid, gid=gid, mode="0700"
+            ),
+        ]
 
         # Symlink individual sockets from host runtime dir
         # Format: (item, is_env_var, source_subpath_override)
@@ -990,12 +2025,10 @@ class ContainerService:
                 socket_name = item
 
             source = f"{host_runtime_dir}/{subpath if subpath else socket_name}"
-            target = f"{runtime_dir}/{socket_name}"
-
-            with contextlib.suppress(IncusError):
-                await self._incus.create_symlink(
-                    container_name, target, source, uid=uid, gid=gid
-                )
+            entries.append(FileTreeEntry(
+                path=f"{runtime_dir}/{socket_name}", type="symlink",
+                content=source, uid=uid, gid=gid,
+            ))
 
         # X11: symlink the individual socket from the host's /tmp/.X11-unix/
         # into the container. The host's /tmp is accessible via hostfs.
@@ -1005,29 +2038,26 @@ class ContainerService:
             x11_socket = f"X{display_num}"
             host_x11 = f"/.kapsule/host/tmp/.X11-unix/{x11_socket}"
             container_x11_dir = "/tmp/.X11-unix"
-            with contextlib.suppress(IncusError):
-                await self._incus.mkdir(
-                    container_name, container_x11_dir, uid=0, gid=0, mode="1777",
-                )
-            with contextlib.suppress(IncusError):
-                await self._incus.create_symlink(
-                    container_name, f"{container_x11_dir}/{x11_socket}", host_x11,
-                    uid=0, gid=0,
-                )
+            entries += [
+                FileTreeEntry(path=container_x11_dir, type="directory", mode="1777"),
+                FileTreeEntry(
+                    path=f"{container_x11_dir}/{x11_socket}", type="symlink",
+                    content=host_x11,
+                ),
+            ]
 
         # PulseAudio: create a real pulse/ directory and symlink native inside.
         # PulseAudio refuses to use pulse/ if it's itself a symlink (security check).
         pulse_dir = f"{runtime_dir}/pulse"
-        host_pulse_native = f"{host_runtime_dir}/pulse/native"
-        with contextlib.suppress(IncusError):
-            await self._incus.mkdir(
-                container_name, pulse_dir, uid=uid, gid=gid, mode="0700"
-            )
-        with contextlib.suppress(IncusError):
-            await self._incus.create_symlink(
-                container_name, f"{pulse_dir}/native", host_pulse_native,
-                uid=uid, gid=gid,
-            )
+        entries += [
+            FileTreeEntry(
+                path=pulse_dir, type="directory", uid=uid, gid=gid, mode="0700"
+            ),
+            FileTreeEntry(
+                path=f"{pulse_dir}/native", type="symlink",
+                content=f"{host_runtime_dir}/pulse/native", uid=uid, gid=gid,
+            ),
+        ]
 
         # XAUTHORITY: the env value is a full path (e.g. /run/user/1000/xauth_LAPpeP).
         # Symlink just the basename inside the container's runtime dir to the
@@ -1035,62 +2065,139 @@ class ContainerService:
         xauth_path = env.get("XAUTHORITY", "")
         if xauth_path:
             xauth_basename = os.path.basename(xauth_path)
-            host_xauth = f"{host_runtime_dir}/{xauth_basename}"
-            target_xauth = f"{runtime_dir}/{xauth_basename}"
-            with contextlib.suppress(IncusError):
-                await self._incus.create_symlink(
-                    container_name, target_xauth, host_xauth, uid=uid, gid=gid,
+            entries.append(FileTreeEntry(
+                path=f"{runtime_dir}/{xauth_basename}", type="symlink",
+                content=f"{host_runtime_dir}/{xauth_basename}", uid=uid, gid=gid,
+            ))
+
+        # All of this is best effort: a missing link only disables the
+        # corresponding integration
+        for status in await self._incus.apply_file_tree(container_name, entries):
+            if not status.ok:
+                logger.debug(
+                    "%s: could not set up %s: %s",
+                    container_name, status.path, status.error,
                 )
 
     # -------------------------------------------------------------------------
     # Private Helper Methods
     # -------------------------------------------------------------------------
 
-    def _parse_image_source(self, image: str) -> InstanceSource | None:
-        """Parse an image string into an InstanceSource.
+    async def _provision_user(
+        self,
+        container_name: str,
+        uid: int,
+        gid: int,
+        username: str,
+        container_home: str,
+    ) -> UserProvisionResult:
+        """Run the user provisioning script in a container.
+
+        Linger is enabled for session mode containers so the user's
+        systemd instance keeps running between sessions.
 
         Args:
-            image: Image string like "images:archlinux" or "ubuntu:24.04"
+            container_name: Container name
+            uid: User ID
+            gid: Group ID
+            username: Username
+            container_home: Home directory inside the container
 
         Returns:
-            InstanceSource or None if invalid
+            Per-step outcome of the provisioning.
         """
-        # Map common server aliases to URLs
-        server_map = {
-            "images": "https://images.linuxcontainers.org",
-            "ubuntu": "https://cloud-images.ubuntu.com/releases",
-        }
+        instance = await self._incus.get_instance(container_name)
+        instance_config = effective_config(instance)
+        session_mode = instance_config.get(KAPSULE_SESSION_MODE_KEY) == "true"
+        try:
+            return await provision_user(
+                self._incus,
+                container_name,
+                uid=uid,
+                gid=gid,
+                username=username,
+                container_home=container_home,
+                linger=session_mode,
+            )
+        except IncusError as e:
+            raise OperationError(f"Failed to set up user '{username}': {e}") from e
 
-        if ":" in image:
-            server_alias, image_alias = image.split(":", 1)
-            server_url = server_map.get(server_alias)
-            if not server_url:
-                return None
-        else:
-            server_url = "https://images.linuxcontainers.org"
-            image_alias = image
-
-        return InstanceSource(
-            type="image",
-            protocol="simplestreams",
-            server=server_url,
-            alias=image_alias,
-            allow_inconsistent=None,
-            certificate=None,
-            fingerprint=None,
-            instance_only=None,
-            live=None,
-            mode=None,
-            operation=None,
-            project=None,
-            properties=None,
-            refresh=None,
-            refresh_exclude_older=None,
-            secret=None,
-            secrets=None,
-            source=None,
-            **{"base-image": None},
-        )
+    async def _exec(self, name: str, command: list[str]) -> ExecResult:
+        """Run a provisioning command in a container.
+
+        Failures to reach Incus are reported as a failed command (exit
+        code -1) so callers can treat them like any other non-zero exit.
+
+        Args:
+            name: Container name
+            command: Command and its arguments
+
+        Returns:
+            The command's exit code and output.
+        """
+        try:
+            return await self._incus.exec(name, command)
+        except IncusError as e:
+            return ExecResult(exit_code=-1, stderr=str(e))
+
+    async def _create_instance(
+        self,
+        progress: OperationReporter,
+        request: InstancesPost,
+    ) -> None:
+        """Create an instance, relaying download/unpack/copy progress.
+
+        Args:
+            progress: Operation reporter
+            request: Instance creation request
+        """
+        relay = _OperationProgressRelay(progress, request.name or "")
+        try:
+            operation = await self._incus.create_instance(request)
+            if operation.id:
+                try:
+                    operation = await self._incus.wait_operation(
+                        operation.id, on_update=relay.update
+                    )
+                finally:
+                    relay.finish(operation.status == "Success")
+            if operation.status != "Success":
+                err_msg = operation.err or operation.status
+                raise OperationError(f"Creation failed: {err_msg}")
+        except IncusError as e:
+            raise OperationError(f"Failed to create container: {e}") from e
+
+    async def _install_packages(
+        self,
+        progress: OperationReporter,
+        name: str,
+        packages: list[str],
+    ) -> None:
+        """Install extra packages requested for a new container.
+
+        Args:
+            progress: Operation reporter
+            name: Container name
+            packages: Normalized package names
+        """
+        progress.info(f"Installing packages: {' '.join(packages)}")
+        try:
+            result = await install_packages(self._incus, name, packages)
+        except IncusError as e:
+            raise OperationError(f"Failed to install packages: {e}") from e
+        if result.exit_code != 0:
+            detail = result.stderr.strip() or f"exit code {result.exit_code}"
+            raise OperationError(f"Failed to install packages: {detail}")
+        progress.success("Packages installed")
+
+    async def _prepare_template(self, name: str) -> None:
+        """Apply the image fixups every container needs to a new template.
+
+        Args:
+            name: Template instance name
+        """
+        await self._apply_host_network_fixups(None, name)
+        await self._fix_file_capabilities(None, name)
 
     async def _fix_file_capabilities(
         self,
@@ -1119,12 +2226,8 @@ class ContainerService:
             ("/usr/bin/newgidmap", "cap_setgid+ep"),
         ]
         for binary, cap in caps:
-            result = subprocess.run(
-                ["incus", "exec", name, "--", "setcap", cap, binary],
-                capture_output=True,
-                text=True,
-            )
-            if result.returncode != 0:
+            result = await self._exec(name, ["setcap", cap, binary])
+            if result.exit_code != 0:
                 # Binary or setcap may not exist on every image — not fatal
                 if progress:
                     progress.warning(
@@ -1136,7 +2239,7 @@ class ContainerService:
 
     async def _apply_host_network_fixups(
         self,
-        progress: OperationReporter,
+        progress: OperationReporter | None,
         name: str,
     ) -> None:
         """Apply fixups for containers using host networking (lxc.net.0.type=none).
@@ -1149,12 +2252,15 @@ class ContainerService:
         We mask that service since the host network is already online.
 
         Args:
-            progress: Operation reporter
+            progress: Operation reporter (may be None for silent fixups)
             name: Container name
         """
         # Mask systemd-networkd-wait-online.service by symlinking to /dev/null
         # This is what `systemctl mask` does
-        progress.info("Masking systemd-networkd-wait-online.service (host networking)")
+        if progress:
+            progress.info(
+                "Masking systemd-networkd-wait-online.service (host networking)"
+            )
         try:
             await self._incus.create_symlink(
                 name,
@@ -1165,7 +2271,8 @@ class ContainerService:
             )
         except IncusError as e:
             # Not fatal - some images may not have systemd
-            progress.warning(f"Could not mask systemd-networkd-wait-online: {e}")
+            if progress:
+                progress.warning(f"Could not mask systemd-networkd-wait-online: {e}")
 
     async def _configure_rootless_podman(
         self,
@@ -1200,18 +2307,16 @@ class ContainerService:
 
         # Create the full directory hierarchy – most images don't ship
         # with Podman so /etc/containers/ won't exist yet.
-        for d in (parent_dir, dropin_dir):
-            with contextlib.suppress(IncusError):
-                await self._incus.mkdir(name, d, uid=0, gid=0, mode="0755")
-
-        try:
-            await self._incus.push_file(
-                name, dropin_file, dropin_content,
-                uid=0, gid=0, mode="0644",
-            )
-        except IncusError as e:
+        statuses = await self._incus.apply_file_tree(name, [
+            FileTreeEntry(path=parent_dir, type="directory"),
+            FileTreeEntry(path=dropin_dir, type="directory"),
+            FileTreeEntry(path=dropin_file, type="file", content=dropin_content),
+        ])
+        if not statuses[-1].ok:
             # Not fatal – best-effort config for when Podman is installed later
-            progress.warning(f"Could not configure rootless Podman: {e}")
+            progress.warning(
+                f"Could not configure rootless Podman: {statuses[-1].error}"
+            )
             return
 
         progress.dim("Configured rootless Podman (cgroup_manager=cgroupfs)")
@@ -1255,12 +2360,8 @@ class ContainerService:
         os.chown(kapsule_base_dir, uid, uid)
         os.chown(host_socket_dir, uid, uid)
 
-        # Create systemd user drop-in directory
+        # Create systemd user drop-in directory and file
         dropin_dir = "/etc/systemd/user/dbus.socket.d"
-        with contextlib.suppress(IncusError):
-            await self._incus.mkdir(name, dropin_dir, uid=0, gid=0, mode="0755")
-
-        # Create the drop-in file
         systemd_socket_path = KAPSULE_DBUS_SOCKET_SYSTEMD.format(container=name)
         dropin_content = f"""[Socket]
 # Kapsule: redirect D-Bus session socket to shared path
@@ -1270,80 +2371,46 @@ ListenStream=
 ListenStream={systemd_socket_path}
 """
         dropin_file = f"{dropin_dir}/kapsule.conf"
-        try:
-            await self._incus.push_file(
-                name, dropin_file, dropin_content, uid=0, gid=0, mode="0644"
-            )
-        except IncusError as e:
-            raise OperationError(f"Failed to configure D-Bus socket: {e}") from e
+        entries = [
+            FileTreeEntry(path="/etc/systemd", type="directory"),
+            FileTreeEntry(path="/etc/systemd/user", type="directory"),
+            FileTreeEntry(path=dropin_dir, type="directory"),
+            FileTreeEntry(path=dropin_file, type="file", content=dropin_content),
+        ]
 
         # Set up D-Bus multiplexer if requested
         if dbus_mux:
-            await self._setup_dbus_mux(progress, name)
+            progress.info("Installing kapsule-dbus-mux.service for D-Bus multiplexing")
+            entries.append(_dbus_mux_service_entry(name))
+
+        # Push the drop-in and service file in one round trip
+        failed = {
+            status.path: status.error
+            for status in await self._incus.apply_file_tree(name, entries)
+            if not status.ok
+        }
+        if dropin_file in failed:
+            raise OperationError(
+                f"Failed to configure D-Bus socket: {failed[dropin_file]}"
+            )
+        if dbus_mux:
+            service_file = entries[-1].path
+            if service_file in failed:
+                raise OperationError(
+                    f"Failed to install dbus-mux service: {failed[service_file]}"
+                )
+            progress.info("Enabling kapsule-dbus-mux.service globally")
+            await self._exec(
+                name,
+                [
+                    "systemctl", "--user", "--global",
+                    "enable", "kapsule-dbus-mux.service",
+                ],
+            )
 
         # Reload systemd
         progress.info("Reloading systemd user configuration...")
-        subprocess.run(
-            [
-                "incus", "exec", name, "--", "systemctl", "--user", "--global",
-                "daemon-reload",
-            ],
-            capture_output=True,
+        await self._exec(
+            name, ["systemctl", "--user", "--global", "daemon-reload"]
         )
 
-    async def _setup_dbus_mux(self, progress: OperationReporter, name: str) -> None:
-        """Set up D-Bus multiplexer service in a container.
-
-        Args:
-            progress: Operation reporter
-            name: Container name
-        """
-        progress.info("Installing kapsule-dbus-mux.service for D-Bus multiplexing")
-
-        service_dir = "/etc/systemd/user"
-        with contextlib.suppress(IncusError):
-            await self._incus.mkdir(name, service_dir, uid=0, gid=0, mode="0755")
-
-        container_dbus_socket = KAPSULE_DBUS_SOCKET_SYSTEMD.format(container=name)
-        host_dbus_socket = "unix:path=/.kapsule/host%t/bus"
-        mux_listen_socket = "%t/bus"
-
-        service_content = f"""[Unit]
-Description=Kapsule D-Bus Multiplexer
-Documentation=man:kapsule(1)
-After=dbus.service
-Requires=dbus.service
-
-[Service]
-Type=simple
-Environment=RUST_LOG=trace
-ExecStart={KAPSULE_DBUS_MUX_BIN} \\
-    --log-level debug \\
-    --listen {mux_listen_socket} \\
-    --container-bus unix:path={container_dbus_socket} \\
-    --host-bus {host_dbus_socket}
-Restart=on-failure
-RestartSec=1
-
-[Install]
-WantedBy=default.target
-"""
-
-        service_file = f"{service_dir}/kapsule-dbus-mux.service"
-        try:
-            await self._incus.push_file(
-                name, service_file, service_content, uid=0, gid=0, mode="0644"
-            )
-        except IncusError as e:
-            raise OperationError(
-                f"Failed to install dbus-mux service: {e}"
-            ) from e
-
-        progress.info("Enabling kapsule-dbus-mux.service globally")
-        subprocess.run(
-            [
-                "incus", "exec", name, "--", "systemctl", "--user", "--global",
-                "enable", "kapsule-dbus-mux.service",
-            ],
-            capture_output=True,
-        )
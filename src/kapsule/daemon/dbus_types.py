@@ -18,6 +18,7 @@ from __future__ import annotations
 
 from typing import Annotated
 
+from dbus_fast import Variant
 from dbus_fast.annotations import DBusSignature
 
 
@@ -51,6 +52,9 @@ DBusStrArray = Annotated[list[str], DBusSignature("as")]
 DBusStrDict = Annotated[dict[str, str], DBusSignature("a{ss}")]
 """D-Bus dictionary string->string (signature: a{ss})"""
 
+DBusVariantDict = Annotated[dict[str, Variant], DBusSignature("a{sv}")]
+"""D-Bus dictionary string->variant (signature: a{sv})"""
+
 
 # =============================================================================
 # Kapsule Composite Types
@@ -79,6 +83,21 @@ DBusEnterResult = Annotated[
 ]
 """PrepareEnter result: (success, error_message, command_array)"""
 
+DBusRunResult = Annotated[
+    tuple[bool, str, str, list[str]],
+    DBusSignature("(bssas)"),
+    CppType("Kapsule::RunResult"),
+]
+"""PrepareRun result: (success, error_message, container_name, command_array)"""
+
+DBusContainerStatsList = Annotated[
+    list[tuple[str, str, float, int, int, int, int, list[float]]],
+    DBusSignature("a(ssdtttuad)"),
+    CppType("QList<Kapsule::ContainerStats>"),
+]
+"""Container stats: (name, status, cpu_percent, memory, memory_limit,
+disk, processes, cpu_history)"""
+
 
 __all__ = [
     # Convenience types
@@ -87,7 +106,9 @@ __all__ = [
     # Kapsule composite types
     "DBusContainer",
     "DBusContainerList",
+    "DBusContainerStatsList",
     "DBusEnterResult",
+    "DBusRunResult",
     # Metadata
     "CppType",
 ]
@@ -0,0 +1,97 @@
+# SPDX-FileCopyrightText: 2026 Lasath Fernando <devel@lasath.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Readiness cache for the PrepareEnter fast path.
+
+Entering a container for the first time has to make sure it exists, is
+running, has the caller's user mapped and has the runtime socket links
+in place. Once that has been done, nothing needs to happen again until
+the container changes or the caller's session does (e.g. a different
+Wayland display).
+
+Each entry remembers the instance's change counter in the event-fed
+index (see ``IncusClient.instance_generation``) and a fingerprint of the
+environment the runtime links were built from. Any lifecycle or
+operation event for the container bumps its counter (except exec
+operations, which is how the setup itself runs), so a restart,
+config change, rename or deletion makes the entry stale without this
+module needing to listen to events itself. While the events stream is
+down there is no counter and the cache is simply not used.
+"""
+
+from __future__ import annotations
+
+from typing import NamedTuple
+
+# Caller environment the runtime links in the container depend on
+_FINGERPRINT_ENV_KEYS = ("WAYLAND_DISPLAY", "DISPLAY", "XAUTHORITY")
+
+
+class EnterReadiness(NamedTuple):
+    """What a container was known to be ready for."""
+
+    generation: int
+    fingerprint: tuple[str, ...]
+
+
+def enter_fingerprint(gid: int, env: dict[str, str]) -> tuple[str, ...]:
+    """Fingerprint the parts of an enter request that setup depends on.
+
+    Args:
+        gid: Caller's group ID.
+        env: Environment variables from the caller.
+
+    Returns:
+        A value that changes whenever the runtime links would differ.
+    """
+    return (str(gid), *(env.get(key, "") for key in _FINGERPRINT_ENV_KEYS))
+
+
+class EnterCache:
+    """Containers known to be ready to enter, keyed by (container, uid)."""
+
+    def __init__(self) -> None:
+        self._entries: dict[tuple[str, int], EnterReadiness] = {}
+
+    def is_ready(
+        self,
+        container: str,
+        uid: int,
+        generation: int | None,
+        fingerprint: tuple[str, ...],
+    ) -> bool:
+        """Whether an enter can skip all setup.
+
+        Args:
+            container: Container name.
+            uid: Caller's user ID.
+            generation: Current change counter of the container, or None
+                if it is not known.
+            fingerprint: Result of enter_fingerprint() for this request.
+
+        Returns:
+            True if the container was ready at this generation and for
+            this fingerprint.
+        """
+        if generation is None:
+            return False
+        return self._entries.get((container, uid)) == EnterReadiness(
+            generation, fingerprint
+        )
+
+    def mark_ready(
+        self,
+        container: str,
+        uid: int,
+        generation: int | None,
+        fingerprint: tuple[str, ...],
+    ) -> None:
+        """Record that setup completed for a container and user.
+
+        An unknown generation drops any previous entry instead.
+        """
+        if generation is None:
+            self._entries.pop((container, uid), None)
+            return
+        self._entries[(container, uid)] = EnterReadiness(generation, fingerprint)
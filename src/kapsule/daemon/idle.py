@@ -0,0 +1,389 @@
+# SPDX-FileCopyrightText: 2026 Lasath Fernando <devel@lasath.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Freezing and stopping containers nobody is using.
+
+Once ``kapsule enter`` has started a container it keeps running, with
+its services, caches and RAM, long after the last shell has closed.
+With ``idle_freeze_minutes`` set, the daemon freezes a container after
+it has been idle for that long, which stops all of its CPU use and
+leaves its memory free for the kernel to swap out; with
+``idle_stop_minutes`` set, it stops it after that long, which gives the
+memory back outright. Both are off by default.
+
+A container counts as in use while an ``incus exec`` into it is running
+on the host. That is the command PrepareEnter hands out, so every open
+``kapsule enter`` shell or command keeps its container awake, and so do
+``incus exec`` sessions started by hand. PrepareEnter also marks its
+container as active, and unfreezes or starts it as needed, so an idle
+container comes back on the next enter without the user noticing.
+
+``kapsule run`` containers are tied to the same signal: the client
+removes its container when the command exits, but if the client is
+killed or its terminal goes away first, the container would be left
+running. The daemon removes any that have had no ``incus exec`` session
+for a short grace period.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import os
+import time
+from collections import Counter
+from collections.abc import Callable
+from pathlib import Path
+
+from .incus_client import IncusClient, IncusError
+from .models_generated import Instance
+from .profiles import BASE_PROFILE
+
+logger = logging.getLogger(__name__)
+
+# Time between idle checks (capped by the freeze timeout)
+_CHECK_INTERVAL = 60.0
+
+# Time between checks for abandoned run containers, and how long one may
+# go without an exec session (e.g. between setup and the client's exec)
+_RUN_CHECK_INTERVAL = 30.0
+_RUN_GRACE = 60.0
+
+
+def exec_sessions(proc: Path = Path("/proc")) -> Counter[str]:
+    """Count the ``incus exec`` processes running on the host per instance.
+
+    Args:
+        proc: procfs mount to scan.
+
+    Returns:
+        Number of exec processes by instance name.
+    """
+    sessions: Counter[str] = Counter()
+    for entry in os.scandir(proc):
+        if not entry.name.isdigit():
+            continue
+        try:
+            argv = (Path(entry.path) / "cmdline").read_bytes().split(b"\0")
+        except OSError:
+            # Exited while scanning
+            continue
+        if len(argv) < 3 or os.path.basename(argv[0]) != b"incus":
+            continue
+        if argv[1] != b"exec":
+            continue
+        # The instance is the first argument after "exec" that isn't an
+        # option, which is where PrepareEnter puts it; strip a remote
+        target = next((a for a in argv[2:] if not a.startswith(b"-")), b"")
+        name = target.decode(errors="replace").rpartition(":")[2]
+        if name:
+            sessions[name] += 1
+    return sessions
+
+
+def _format_mib(size: int) -> str:
+    return f"{size / 1024**2:.0f} MiB"
+
+
+class IdleScheduler:
+    """Freezes and then stops containers without active sessions."""
+
+    def __init__(
+        self,
+        incus: IncusClient,
+        *,
+        freeze_minutes: int,
+        stop_minutes: int,
+        skip: Callable[[str], bool],
+        proc: Path = Path("/proc"),
+    ):
+        """Initialize the scheduler.
+
+        Args:
+            incus: Incus client.
+            freeze_minutes: Idle time before a container is frozen (0:
+                never).
+            stop_minutes: Idle time before a container is stopped (0:
+                never).
+            skip: Whether an instance is internal to the daemon and must
+                be left alone.
+            proc: procfs mount to look for exec sessions in.
+        """
+        self._incus = incus
+        self._freeze_after = freeze_minutes * 60.0
+        self._stop_after = stop_minutes * 60.0
+        self._skip = skip
+        self._proc = proc
+        # Monotonic time each container was last seen in use
+        self._last_active: dict[str, float] = {}
+        self._reclaimed = 0
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any idle timeout is configured."""
+        return self._freeze_after > 0 or self._stop_after > 0
+
+    @property
+    def reclaimed_bytes(self) -> int:
+        """Memory given back by stopping idle containers since startup."""
+        return self._reclaimed
+
+    # -------------------------------------------------------------------------
+    # Lifecycle
+    # -------------------------------------------------------------------------
+
+    def start(self) -> None:
+        """Start the periodic idle check."""
+        if not self.enabled:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(
+                self._check_loop(), name="kapsule-idle-check"
+            )
+
+    async def stop(self) -> None:
+        """Stop the periodic idle check."""
+        task = self._task
+        self._task = None
+        if task is not None:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    # -------------------------------------------------------------------------
+    # Activity
+    # -------------------------------------------------------------------------
+
+    def touch(self, name: str, now: float | None = None) -> None:
+        """Record that a container is being entered.
+
+        Args:
+            name: Container name.
+            now: Monotonic time of the enter.
+        """
+        self._last_active[name] = time.monotonic() if now is None else now
+
+    async def wake(self, name: str, status: str) -> None:
+        """Bring a frozen or stopped container back for an enter.
+
+        Args:
+            name: Container name.
+            status: The container's current status, lowercase.
+
+        Raises:
+            IncusError: If the container can't be resumed or started.
+        """
+        self.touch(name)
+        if status == "running":
+            return
+        if status == "frozen":
+            op = await self._incus.unfreeze_instance(name, wait=True)
+        else:
+            op = await self._incus.start_instance(name, wait=True)
+        if op.status != "Success":
+            raise IncusError(op.err or op.status or "unknown error")
+
+    # -------------------------------------------------------------------------
+    # Checks
+    # -------------------------------------------------------------------------
+
+    async def _check_loop(self) -> None:
+        """Check for idle containers periodically until cancelled."""
+        interval = _CHECK_INTERVAL
+        if self._freeze_after > 0:
+            interval = min(interval, self._freeze_after / 2)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.check()
+            except (IncusError, OSError) as e:
+                logger.warning("Idle container check failed: %s", e)
+
+    def _managed(self, instance: Instance) -> bool:
+        name = instance.name
+        return bool(
+            name
+            and not self._skip(name)
+            and BASE_PROFILE in (instance.profiles or [])
+        )
+
+    async def check(self, now: float | None = None) -> list[tuple[str, str]]:
+        """Freeze or stop every container that has been idle long enough.
+
+        Args:
+            now: Monotonic time to measure idleness against.
+
+        Returns:
+            (container, action) pairs for what was done, where action is
+            ``freeze`` or ``stop``.
+
+        Raises:
+            IncusError: If the containers can't be listed.
+        """
+        now = time.monotonic() if now is None else now
+        sessions = await asyncio.to_thread(exec_sessions, self._proc)
+        instances = [i for i in await self._incus.list_instances() if self._managed(i)]
+        names = {i.name for i in instances}
+        for name in list(self._last_active):
+            if name not in names:
+                del self._last_active[name]
+
+        done: list[tuple[str, str]] = []
+        for instance in instances:
+            name = instance.name or ""
+            status = (instance.status or "").lower()
+            if status not in ("running", "frozen"):
+                self._last_active.pop(name, None)
+                continue
+            if sessions[name] or name not in self._last_active:
+                # In use, or running since before we were watching
+                self._last_active[name] = now
+                continue
+            idle = now - self._last_active[name]
+            try:
+                if self._stop_after > 0 and idle >= self._stop_after:
+                    await self._stop_idle(name, status)
+                    done.append((name, "stop"))
+                elif (
+                    self._freeze_after > 0 and idle >= self._freeze_after
+                    and status == "running"
+                ):
+                    await self._freeze_idle(name)
+                    done.append((name, "freeze"))
+            except IncusError as e:
+                logger.warning("Could not suspend idle container %s: %s", name, e)
+        return done
+
+    async def _memory_usage(self, name: str) -> int:
+        state = await self._incus.get_instance_state(name)
+        return (state.memory.usage or 0) if state.memory else 0
+
+    async def _freeze_idle(self, name: str) -> None:
+        usage = await self._memory_usage(name)
+        op = await self._incus.freeze_instance(name, wait=True)
+        if op.status != "Success":
+            raise IncusError(op.err or op.status or "freeze failed")
+        logger.info(
+            "Froze idle container %s (%s now reclaimable)", name, _format_mib(usage)
+        )
+
+    async def _stop_idle(self, name: str, status: str) -> None:
+        usage = await self._memory_usage(name)
+        if status == "frozen":
+            # A frozen container can't run its shutdown sequence
+            op = await self._incus.unfreeze_instance(name, wait=True)
+            if op.status != "Success":
+                raise IncusError(op.err or op.status or "unfreeze failed")
+        op = await self._incus.stop_instance(name, wait=True)
+        if op.status != "Success":
+            raise IncusError(op.err or op.status or "stop failed")
+        self._last_active.pop(name, None)
+        self._reclaimed += usage
+        logger.info(
+            "Stopped idle container %s, reclaiming %s (%s since startup)",
+            name, _format_mib(usage), _format_mib(self._reclaimed),
+        )
+
+
+class RunReaper:
+    """Removes ``kapsule run`` containers whose client has gone away."""
+
+    def __init__(
+        self,
+        incus: IncusClient,
+        *,
+        is_run: Callable[[str], bool],
+        busy: Callable[[str], bool],
+        grace: float = _RUN_GRACE,
+        proc: Path = Path("/proc"),
+    ):
+        """Initialize the reaper.
+
+        Args:
+            incus: Incus client.
+            is_run: Whether an instance is a run container.
+            busy: Whether a run container is still being set up (it has no
+                session yet, but is not abandoned).
+            grace: Seconds a run container may go without a session.
+            proc: procfs mount to look for exec sessions in.
+        """
+        self._incus = incus
+        self._is_run = is_run
+        self._busy = busy
+        self._grace = grace
+        self._proc = proc
+        # Monotonic time each run container was first seen without a session
+        self._unattended: dict[str, float] = {}
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        """Start the periodic check."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(
+                self._check_loop(), name="kapsule-run-reaper"
+            )
+
+    async def stop(self) -> None:
+        """Stop the periodic check."""
+        task = self._task
+        self._task = None
+        if task is not None:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    async def _check_loop(self) -> None:
+        """Check for abandoned run containers periodically until cancelled."""
+        while True:
+            await asyncio.sleep(_RUN_CHECK_INTERVAL)
+            try:
+                await self.check()
+            except (IncusError, OSError) as e:
+                logger.warning("Run container check failed: %s", e)
+
+    async def check(self, now: float | None = None) -> list[str]:
+        """Remove every run container that has been without a session too long.
+
+        Args:
+            now: Monotonic time to measure against.
+
+        Returns:
+            Names of the containers that were removed.
+
+        Raises:
+            IncusError: If the containers can't be listed.
+        """
+        now = time.monotonic() if now is None else now
+        sessions = await asyncio.to_thread(exec_sessions, self._proc)
+        runs = {
+            i.name: (i.status or "").lower()
+            for i in await self._incus.list_instances()
+            if i.name and self._is_run(i.name)
+        }
+        for name in list(self._unattended):
+            if name not in runs:
+                del self._unattended[name]
+
+        removed: list[str] = []
+        for name, status in runs.items():
+            if sessions[name] or self._busy(name) or status == "stopped":
+                self._unattended.pop(name, None)
+                continue
+            since = self._unattended.setdefault(name, now)
+            if now - since < self._grace:
+                continue
+            try:
+                # Run containers are ephemeral, so stopping deletes them
+                op = await self._incus.stop_instance(name, force=True, wait=True)
+                if op.status != "Success":
+                    raise IncusError(op.err or op.status or "stop failed")
+            except IncusError as e:
+                logger.warning("Could not remove run container %s: %s", name, e)
+                continue
+            del self._unattended[name]
+            removed.append(name)
+            logger.info("Removed run container %s, its client is gone", name)
+        return removed
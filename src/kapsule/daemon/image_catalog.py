@@ -0,0 +1,419 @@
+# SPDX-FileCopyrightText: 2026 Lasath Fernando <devel@lasath.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Searchable catalog of the images on the configured image servers.
+
+Finding an image name means reading the image server's simplestreams
+index, which is several megabytes of JSON per server. The daemon does
+that once for everyone: each server's index and product files are
+parsed down to one small entry per container image and cached on disk
+together with the ETag/Last-Modified of the files they came from.
+Clients get results from memory, and stale catalogs are revalidated in
+the background with conditional requests, so an unchanged upstream
+costs one ``304`` per file.
+
+Search matches every query word against an image's distro, release,
+architecture, variant and aliases, by prefix or as a fuzzy subsequence
+(``ubu 24`` finds ``ubuntu/24.04``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import os
+import re
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+import httpx
+from pydantic import BaseModel, ValidationError
+
+from .images import image_servers
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOG_CACHE = "/var/cache/kapsule/catalog"
+
+# How long a catalog is used before it is revalidated upstream
+_CATALOG_TTL = 6 * 3600.0
+
+_INDEX_PATH = "streams/v1/index.json"
+
+# File types that make a simplestreams product usable as a container
+_CONTAINER_FTYPES = frozenset({"squashfs", "root.tar.xz", "lxd_combined.tar.gz"})
+
+
+class CatalogImage(NamedTuple):
+    """One container image offered by an image server."""
+
+    # Image string to create from, e.g. "images:archlinux/current/default"
+    image: str
+    os: str
+    release: str
+    arch: str
+    variant: str
+    description: str
+    # Comma-separated aliases the image can also be created from
+    aliases: str = ""
+
+
+# Just enough of the simplestreams schema to build the catalog
+
+
+class _IndexEntry(BaseModel):
+    datatype: str = ""
+    path: str = ""
+
+
+class _StreamIndex(BaseModel):
+    index: dict[str, _IndexEntry] = {}
+
+
+class _Item(BaseModel):
+    ftype: str = ""
+
+
+class _Version(BaseModel):
+    items: dict[str, _Item] = {}
+
+
+class _Product(BaseModel):
+    aliases: str = ""
+    arch: str = ""
+    os: str = ""
+    release: str = ""
+    release_title: str = ""
+    variant: str = ""
+    versions: dict[str, _Version] = {}
+
+
+class _Products(BaseModel):
+    products: dict[str, _Product] = {}
+
+
+class _Validators(BaseModel):
+    """Conditional request headers for a cached upstream file."""
+
+    etag: str = ""
+    last_modified: str = ""
+
+
+class _CachedProducts(_Validators):
+    images: list[CatalogImage] = []
+
+
+class _CachedRemote(BaseModel):
+    """On-disk cache of one image server's catalog."""
+
+    url: str = ""
+    fetched_at: float = 0.0
+    index: _Validators = _Validators()
+    paths: list[str] = []
+    products: dict[str, _CachedProducts] = {}
+
+
+def parse_products(remote: str, data: bytes) -> list[CatalogImage]:
+    """Turn a simplestreams products file into catalog entries.
+
+    Args:
+        remote: Image remote name, used as the image string prefix.
+        data: Products JSON.
+
+    Returns:
+        One entry per product that can be used for containers.
+    """
+    products = _Products.model_validate_json(data)
+    images: list[CatalogImage] = []
+    for product in products.products.values():
+        aliases = [a for a in product.aliases.split(",") if a]
+        if not aliases:
+            continue
+        ftypes = {
+            item.ftype
+            for version in product.versions.values()
+            for item in version.items.values()
+        }
+        if not ftypes & _CONTAINER_FTYPES:
+            continue
+        description = " ".join(
+            part for part in (product.os, product.release_title or product.release,
+                              product.arch, f"({product.variant})")
+            if part and part != "()"
+        )
+        images.append(CatalogImage(
+            image=f"{remote}:{aliases[0]}",
+            os=product.os,
+            release=product.release,
+            arch=product.arch,
+            variant=product.variant,
+            description=description,
+            aliases=",".join(aliases),
+        ))
+    return images
+
+
+def _words(image: CatalogImage) -> list[str]:
+    """Lower-case words an image can be found by."""
+    text = " ".join((
+        image.image, image.os, image.release, image.arch, image.variant,
+        image.aliases,
+    ))
+    return [w for w in re.split(r"[\s,/:]+", text.lower()) if w]
+
+
+def _subsequence(needle: str, haystack: str) -> bool:
+    """Whether needle's characters appear in haystack in order."""
+    chars = iter(haystack)
+    return all(c in chars for c in needle)
+
+
+def _match_score(token: str, words: list[str]) -> int:
+    """Score how well one query token matches an image (0 = no match)."""
+    best = 0
+    for word in words:
+        if word == token:
+            return 3
+        if word.startswith(token):
+            best = max(best, 2)
+        elif best == 0 and _subsequence(token, word):
+            best = 1
+    return best
+
+
+ImageIndex = list[tuple[CatalogImage, list[str]]]
+
+
+def build_index(images: list[CatalogImage]) -> ImageIndex:
+    """Pair catalog entries with the words they can be found by."""
+    return [(image, _words(image)) for image in images]
+
+
+def search(index: ImageIndex, query: str) -> list[CatalogImage]:
+    """Filter and rank catalog entries by a query.
+
+    Every whitespace-separated query token has to match some field; exact
+    matches rank above prefix matches, which rank above fuzzy ones.
+
+    Args:
+        index: Result of build_index().
+        query: Search text; empty returns everything.
+
+    Returns:
+        Matching entries, best first.
+    """
+    tokens = [t for t in re.split(r"[\s/:]+", query.lower()) if t]
+    if not tokens:
+        return sorted((image for image, _words in index), key=lambda i: i.image)
+
+    scored: list[tuple[int, CatalogImage]] = []
+    for image, words in index:
+        total = 0
+        for token in tokens:
+            score = _match_score(token, words)
+            if not score:
+                break
+            total += score
+        else:
+            scored.append((total, image))
+    scored.sort(key=lambda pair: (-pair[0], pair[1].image))
+    return [image for _score, image in scored]
+
+
+class ImageCatalog:
+    """Cached, searchable catalog of the configured image servers."""
+
+    def __init__(
+        self,
+        cache_dir: str | Path = DEFAULT_CATALOG_CACHE,
+        *,
+        ttl: float = _CATALOG_TTL,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        """Initialize the catalog.
+
+        Args:
+            cache_dir: Directory for the on-disk catalog cache.
+            ttl: Seconds before a remote's catalog is revalidated.
+            transport: Optional httpx transport for upstream requests.
+        """
+        self._cache_dir = Path(cache_dir)
+        self._ttl = ttl
+        self._http = httpx.AsyncClient(
+            transport=transport, follow_redirects=True, timeout=60.0
+        )
+        self._remotes: dict[str, _CachedRemote] = {}
+        self._refreshes: dict[str, asyncio.Task[None]] = {}
+        self._index: ImageIndex = []
+        self._index_key: tuple[tuple[str, float], ...] = ()
+
+    async def close(self) -> None:
+        """Stop background refreshes and close upstream connections."""
+        for task in self._refreshes.values():
+            task.cancel()
+        for task in list(self._refreshes.values()):
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        await self._http.aclose()
+
+    async def list_images(self, query: str = "") -> list[CatalogImage]:
+        """Search the images of every configured server.
+
+        Answers from the cached catalog. A remote that has never been
+        fetched is fetched first; a stale one is revalidated in the
+        background while the cached entries are returned.
+
+        Args:
+            query: Search text; empty lists everything.
+
+        Returns:
+            Matching images, best first.
+        """
+        servers = image_servers()
+        missing = [
+            name for name, url in servers.items()
+            if self._load(name, url) is None
+        ]
+        if missing:
+            await asyncio.gather(*(
+                self._refresh_logged(name, servers[name]) for name in missing
+            ))
+
+        current = [
+            (name, cached) for name in servers
+            if (cached := self._remotes.get(name)) is not None
+        ]
+        for name, cached in current:
+            if time.time() - cached.fetched_at > self._ttl:
+                self._schedule_refresh(name, servers[name])
+
+        key = tuple((name, cached.fetched_at) for name, cached in current)
+        if key != self._index_key:
+            self._index = build_index([
+                image
+                for _name, cached in current
+                for products in cached.products.values()
+                for image in products.images
+            ])
+            self._index_key = key
+        return search(self._index, query)
+
+    # -------------------------------------------------------------------------
+    # Cache
+    # -------------------------------------------------------------------------
+
+    def _cache_file(self, name: str) -> Path:
+        return self._cache_dir / f"{name}.json"
+
+    def _load(self, name: str, url: str) -> _CachedRemote | None:
+        """Get a remote's catalog from memory or disk, if it is for url."""
+        cached = self._remotes.get(name)
+        if cached is None:
+            try:
+                cached = _CachedRemote.model_validate_json(
+                    self._cache_file(name).read_bytes()
+                )
+            except (OSError, ValidationError):
+                return None
+        if cached.url != url:
+            return None
+        self._remotes[name] = cached
+        return cached
+
+    def _save(self, name: str, cached: _CachedRemote) -> None:
+        self._remotes[name] = cached
+        try:
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self._cache_file(name)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(cached.model_dump_json())
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning("Could not write image catalog cache: %s", e)
+
+    # -------------------------------------------------------------------------
+    # Refreshing
+    # -------------------------------------------------------------------------
+
+    def _schedule_refresh(self, name: str, url: str) -> None:
+        task = self._refreshes.get(name)
+        if task is not None and not task.done():
+            return
+        task = asyncio.create_task(self._refresh_logged(name, url))
+        self._refreshes[name] = task
+        task.add_done_callback(lambda _t: self._refreshes.pop(name, None))
+
+    async def _refresh_logged(self, name: str, url: str) -> None:
+        try:
+            await self.refresh(name, url)
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning("Could not refresh image catalog for %s: %s", name, e)
+
+    async def refresh(self, name: str, url: str) -> None:
+        """Revalidate one remote's catalog against its server.
+
+        Args:
+            name: Image remote name.
+            url: Simplestreams base URL of the remote.
+
+        Raises:
+            httpx.HTTPError: If the server can't be reached.
+            ValueError: If the server returns something unusable.
+        """
+        base = url.rstrip("/")
+        previous = self._load(name, url) or _CachedRemote(url=url)
+        cached = _CachedRemote(url=url, fetched_at=time.time())
+
+        data, cached.index = await self._get(f"{base}/{_INDEX_PATH}", previous.index)
+        if data is None:
+            cached.paths = previous.paths
+        else:
+            index = _StreamIndex.model_validate_json(data)
+            cached.paths = [
+                entry.path for entry in index.index.values()
+                if entry.datatype == "image-downloads" and entry.path
+            ]
+
+        for path in cached.paths:
+            old = previous.products.get(path) or _CachedProducts()
+            data, validators = await self._get(f"{base}/{path}", old)
+            if data is None:
+                cached.products[path] = old
+            else:
+                images = await asyncio.to_thread(parse_products, name, data)
+                cached.products[path] = _CachedProducts(
+                    **validators.model_dump(), images=images
+                )
+
+        self._save(name, cached)
+        logger.info(
+            "Image catalog for %s: %d images",
+            name, sum(len(p.images) for p in cached.products.values()),
+        )
+
+    async def _get(
+        self, url: str, validators: _Validators
+    ) -> tuple[bytes | None, _Validators]:
+        """Conditionally fetch a file.
+
+        Returns:
+            The body (None if unchanged) and the validators to store.
+        """
+        headers: dict[str, str] = {}
+        if validators.etag:
+            headers["If-None-Match"] = validators.etag
+        if validators.last_modified:
+            headers["If-Modified-Since"] = validators.last_modified
+        response = await self._http.get(url, headers=headers)
+        if response.status_code == 304:
+            return None, _Validators(
+                etag=validators.etag, last_modified=validators.last_modified
+            )
+        response.raise_for_status()
+        return response.content, _Validators(
+            etag=response.headers.get("ETag", ""),
+            last_modified=response.headers.get("Last-Modified", ""),
+        )
@@ -0,0 +1,479 @@
+# SPDX-FileCopyrightText: 2026 Lasath Fernando <devel@lasath.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Caching simplestreams mirror for image servers.
+
+Every host that creates a container downloads the same image files from
+the upstream image servers. This is a small HTTP server that sits in
+front of them: each upstream is served under its remote name (e.g.
+``http://mirror:8765/images/`` for ``images``), index JSON is revalidated
+against upstream after a short TTL, and every other file is fetched once
+and then served from disk, including byte ranges.
+
+Files are stored content-addressed by SHA-256, so the same image reached
+through two paths or upstreams is kept once. A path map records which
+blob serves which path, along with the upstream ETag used to revalidate
+index files. If an upstream is unreachable, the last copy is served.
+
+Point Kapsule at a mirror with ``[image_servers]`` in ``kapsule.conf``::
+
+    [image_servers]
+    images = http://mirror.example:8765/images
+
+It runs inside the daemon when ``[image_mirror] listen`` is set, or
+standalone::
+
+    python -m kapsule.daemon.image_mirror --listen 0.0.0.0:8765 \\
+        --store /var/cache/kapsule/image-mirror
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import ssl
+import tempfile
+import time
+from collections.abc import AsyncIterator
+from pathlib import Path
+from typing import NamedTuple
+from urllib.parse import unquote, urlsplit
+
+import httpx
+
+from .config import DEFAULT_MIRROR_STORE
+
+logger = logging.getLogger(__name__)
+
+# How long an index file is served before revalidating it upstream
+_INDEX_TTL = 300.0
+
+_CHUNK_SIZE = 64 * 1024
+
+_REASONS = {
+    200: "OK",
+    206: "Partial Content",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    416: "Range Not Satisfiable",
+    502: "Bad Gateway",
+}
+
+
+class MirrorError(Exception):
+    """A request the mirror can't answer, with the HTTP status to send."""
+
+    def __init__(self, status: int, message: str = ""):
+        super().__init__(message or _REASONS.get(status, ""))
+        self.status = status
+
+
+class StoreEntry(NamedTuple):
+    """What the mirror has stored for one upstream path."""
+
+    sha256: str
+    size: int
+    etag: str = ""
+    fetched_at: float = 0.0
+
+
+class MirrorStore:
+    """Content-addressed on-disk store with a path map.
+
+    Layout::
+
+        <root>/blobs/<sha256>   file contents
+        <root>/paths.json       "<upstream>/<path>" -> StoreEntry
+        <root>/tmp/             downloads in progress
+    """
+
+    def __init__(self, root: str | Path):
+        self._root = Path(root)
+        self._blobs = self._root / "blobs"
+        self._tmp = self._root / "tmp"
+        self._map_path = self._root / "paths.json"
+        self._blobs.mkdir(parents=True, exist_ok=True)
+        self._tmp.mkdir(parents=True, exist_ok=True)
+        self._paths: dict[str, StoreEntry] = {}
+        try:
+            raw: dict[str, list[str | int | float]] = json.loads(
+                self._map_path.read_text()
+            )
+        except (OSError, ValueError):
+            raw = {}
+        for key, fields in raw.items():
+            try:
+                entry = StoreEntry(
+                    str(fields[0]), int(fields[1]), str(fields[2]), float(fields[3])
+                )
+            except (IndexError, TypeError, ValueError):
+                continue
+            if self.blob_path(entry).exists():
+                self._paths[key] = entry
+
+    def lookup(self, key: str) -> StoreEntry | None:
+        """Stored entry for a path, if any."""
+        return self._paths.get(key)
+
+    def blob_path(self, entry: StoreEntry) -> Path:
+        """File holding an entry's content."""
+        return self._blobs / entry.sha256
+
+    def record(self, key: str, entry: StoreEntry) -> None:
+        """Point a path at an entry and persist the path map."""
+        self._paths[key] = entry
+        tmp = self._map_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({k: list(v) for k, v in self._paths.items()}))
+        os.replace(tmp, self._map_path)
+
+    async def ingest(
+        self, key: str, chunks: AsyncIterator[bytes], *, etag: str = ""
+    ) -> StoreEntry:
+        """Store a download and point a path at it.
+
+        Args:
+            key: Path map key.
+            chunks: File content.
+            etag: Upstream ETag of the content.
+
+        Returns:
+            The recorded entry.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_name = tempfile.mkstemp(dir=self._tmp)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                async for chunk in chunks:
+                    f.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+            entry = StoreEntry(digest.hexdigest(), size, etag, time.time())
+            os.replace(tmp_name, self.blob_path(entry))
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp_name)
+            raise
+        self.record(key, entry)
+        return entry
+
+
+def _is_index(path: str) -> bool:
+    """Whether a path is simplestreams index data (which changes)."""
+    return path.startswith("streams/") and path.endswith(".json")
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """Parse a single-range ``Range`` header.
+
+    Args:
+        header: Header value, e.g. ``bytes=0-1023``.
+        size: Size of the file.
+
+    Returns:
+        Inclusive (start, end) offsets, or None to send the whole file
+        (no range, or a form this server does not support).
+
+    Raises:
+        MirrorError: 416 if the range can't be satisfied.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if not first:
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length <= 0:
+                raise MirrorError(416)
+            return (max(0, size - length), size - 1)
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        raise MirrorError(416)
+    return (start, min(end, size - 1))
+
+
+class ImageMirror:
+    """HTTP server mirroring one or more simplestreams image servers."""
+
+    def __init__(
+        self,
+        store: MirrorStore,
+        upstreams: dict[str, str],
+        *,
+        index_ttl: float = _INDEX_TTL,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        """Initialize the mirror.
+
+        Args:
+            store: Where mirrored files are kept.
+            upstreams: Remote name -> upstream base URL; each is served
+                under ``/<name>/``.
+            index_ttl: Seconds before index JSON is revalidated upstream.
+            transport: Optional httpx transport for upstream requests.
+        """
+        self._store = store
+        self._upstreams = {name: url.rstrip("/") for name, url in upstreams.items()}
+        self._index_ttl = index_ttl
+        self._http = httpx.AsyncClient(
+            transport=transport, follow_redirects=True, timeout=60.0
+        )
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._server: asyncio.Server | None = None
+
+    @property
+    def port(self) -> int:
+        """Port the mirror is listening on."""
+        if self._server is None:
+            raise RuntimeError("Mirror not started")
+        port: int = self._server.sockets[0].getsockname()[1]
+        return port
+
+    async def start(
+        self, host: str, port: int, ssl_context: ssl.SSLContext | None = None
+    ) -> None:
+        """Start listening.
+
+        Args:
+            host: Address to bind.
+            port: Port to bind (0 picks a free one).
+            ssl_context: Serve HTTPS with this context.
+        """
+        self._server = await asyncio.start_server(
+            self._handle, host, port, ssl=ssl_context
+        )
+        logger.info("Image mirror listening on %s:%d", host, self.port)
+
+    async def stop(self) -> None:
+        """Stop listening and close upstream connections."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        await self._http.aclose()
+
+    # -------------------------------------------------------------------------
+    # Fetching
+    # -------------------------------------------------------------------------
+
+    async def fetch(self, name: str, path: str) -> StoreEntry:
+        """Get a file into the store, downloading it if needed.
+
+        Concurrent requests for the same path share one download.
+
+        Args:
+            name: Upstream name.
+            path: Path below the upstream's base URL.
+
+        Returns:
+            The stored entry.
+
+        Raises:
+            MirrorError: If the file is unknown or can't be fetched.
+        """
+        base = self._upstreams.get(name)
+        if base is None:
+            raise MirrorError(404, f"Unknown upstream {name}")
+
+        key = f"{name}/{path}"
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            entry = self._store.lookup(key)
+            if entry is not None and (
+                not _is_index(path) or time.time() - entry.fetched_at < self._index_ttl
+            ):
+                return entry
+
+            headers = {"If-None-Match": entry.etag} if entry and entry.etag else {}
+            try:
+                async with self._http.stream(
+                    "GET", f"{base}/{path}", headers=headers
+                ) as response:
+                    if response.status_code == 304 and entry is not None:
+                        entry = entry._replace(fetched_at=time.time())
+                        self._store.record(key, entry)
+                        return entry
+                    if response.status_code != 200:
+                        raise MirrorError(
+                            404 if response.status_code == 404 else 502,
+                            f"Upstream returned {response.status_code} for {path}",
+                        )
+                    logger.info("Mirroring %s", key)
+                    return await self._store.ingest(
+                        key,
+                        response.aiter_bytes(_CHUNK_SIZE),
+                        etag=response.headers.get("ETag", ""),
+                    )
+            except httpx.HTTPError as e:
+                if entry is not None:
+                    logger.warning(
+                        "Upstream unreachable, serving cached %s: %s", key, e
+                    )
+                    return entry
+                raise MirrorError(502, f"Upstream unreachable: {e}") from e
+
+    # -------------------------------------------------------------------------
+    # Serving
+    # -------------------------------------------------------------------------
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Answer one HTTP request and close the connection."""
+        try:
+            request_line = (await reader.readline()).decode("latin-1")
+            headers: dict[str, str] = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                key, _, value = line.decode("latin-1").partition(":")
+                headers[key.strip().lower()] = value.strip()
+
+            try:
+                await self._serve(request_line, headers, writer)
+            except MirrorError as e:
+                body = f"{e}\n".encode()
+                self._write_head(writer, e.status, {
+                    "Content-Type": "text/plain",
+                    "Content-Length": str(len(body)),
+                })
+                writer.write(body)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def _serve(
+        self,
+        request_line: str,
+        headers: dict[str, str],
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        """Serve a parsed request."""
+        parts = request_line.split()
+        if len(parts) != 3:
+            raise MirrorError(400)
+        method, target, _version = parts
+        if method not in ("GET", "HEAD"):
+            raise MirrorError(405)
+
+        segments = unquote(urlsplit(target).path).strip("/").split("/")
+        if len(segments) < 2 or any(s in ("", ".", "..") for s in segments):
+            raise MirrorError(404)
+        name, path = segments[0], "/".join(segments[1:])
+
+        entry = await self.fetch(name, path)
+        blob = self._store.blob_path(entry)
+
+        status = 200
+        start, end = 0, entry.size - 1
+        response_headers = {
+            "Accept-Ranges": "bytes",
+            "Content-Type": (
+                "application/json" if path.endswith(".json")
+                else "application/octet-stream"
+            ),
+        }
+        if entry.etag:
+            response_headers["ETag"] = entry.etag
+        if "range" in headers and entry.size > 0:
+            byte_range = parse_range(headers["range"], entry.size)
+            if byte_range is not None:
+                status = 206
+                start, end = byte_range
+                response_headers["Content-Range"] = (
+                    f"bytes {start}-{end}/{entry.size}"
+                )
+        response_headers["Content-Length"] = str(max(0, end - start + 1))
+        self._write_head(writer, status, response_headers)
+
+        if method == "HEAD":
+            return
+        with blob.open("rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                writer.write(chunk)
+                remaining -= len(chunk)
+                await writer.drain()
+
+    @staticmethod
+    def _write_head(
+        writer: asyncio.StreamWriter, status: int, headers: dict[str, str]
+    ) -> None:
+        """Write a response status line and headers."""
+        lines = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}"]
+        lines += [f"{key}: {value}" for key, value in headers.items()]
+        lines.append("Connection: close")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+
+
+async def _run_standalone(args: argparse.Namespace) -> None:
+    """Run the mirror until interrupted."""
+    from .images import SERVER_MAP
+
+    upstreams = dict(SERVER_MAP)
+    for spec in args.upstream:
+        name, sep, url = spec.partition("=")
+        if not sep:
+            raise SystemExit(f"Invalid --upstream {spec!r}, expected NAME=URL")
+        upstreams[name] = url
+
+    ssl_context = None
+    if args.cert:
+        ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        ssl_context.load_cert_chain(args.cert, args.key)
+
+    host, _, port = args.listen.rpartition(":")
+    mirror = ImageMirror(MirrorStore(args.store), upstreams)
+    await mirror.start(host or "127.0.0.1", int(port), ssl_context)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await mirror.stop()
+
+
+def main() -> None:
+    """Standalone entry point."""
+    parser = argparse.ArgumentParser(description="Caching simplestreams mirror")
+    parser.add_argument(
+        "--listen", default="127.0.0.1:8765", help="host:port to listen on"
+    )
+    parser.add_argument(
+        "--store", default=DEFAULT_MIRROR_STORE, help="cache directory"
+    )
+    parser.add_argument(
+        "--upstream", action="append", default=[], metavar="NAME=URL",
+        help="add or override an upstream (default: Kapsule's image servers)",
+    )
+    parser.add_argument("--cert", help="TLS certificate (serves HTTPS)")
+    parser.add_argument("--key", help="TLS private key")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(_run_standalone(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+# SPDX-FileCopyrightText: 2026 Lasath Fernando <devel@lasath.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Background prefetch of the configured default images.
+
+Containers are created from a remote simplestreams source, so a create
+right after an upstream image update has to wait for the full download.
+The prefetcher pulls every configured ``default_image`` (from each
+layer of ``kapsule.conf`` and from the user configs of anyone who has
+used the daemon) into the local Incus image store ahead of time, marked
+for auto-update. Creates then find the image locally and only fetch the
+remote index.
+
+Each pass is repeated on an interval with some jitter, so that machines
+booted together don't all hit the image server at once. Images that are
+already local are refreshed through Incus, which replaces them in place
+when a newer build exists.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import random
+from datetime import UTC, datetime
+from typing import NamedTuple
+
+from .config import configured_default_images
+from .images import pull_source
+from .incus_client import IncusClient, IncusError
+from .models_generated import Image, ImagesPostSource
+
+logger = logging.getLogger(__name__)
+
+# Time between refresh passes, and how far each wait may deviate from it
+_REFRESH_INTERVAL = 6 * 3600.0
+_REFRESH_JITTER = 0.1
+
+
+class ImageCacheEntry(NamedTuple):
+    """Local cache state of one configured image."""
+
+    image: str
+    # "pending", "pulling", "cached" or "failed"
+    state: str
+    fingerprint: str = ""
+    # ISO 8601 time of the last successful pull or refresh
+    refreshed_at: str = ""
+    error: str = ""
+
+
+def _local_image(images: list[Image], source: ImagesPostSource) -> Image | None:
+    """Newest local image pulled from the given remote alias."""
+    matches = [
+        image for image in images
+        if image.update_source is not None
+        and image.update_source.server == source.server
+        and image.update_source.alias == source.alias
+    ]
+    return max(
+        matches,
+        key=lambda image: image.uploaded_at.isoformat() if image.uploaded_at else "",
+        default=None,
+    )
+
+
+class ImagePrefetcher:
+    """Keeps the configured default images in the local image store."""
+
+    def __init__(self, incus: IncusClient, *, enabled: bool = True):
+        """Initialize the prefetcher.
+
+        Args:
+            incus: Incus client.
+            enabled: Whether to prefetch at all.
+        """
+        self._incus = incus
+        self._enabled = enabled
+        self._homes: set[str] = set()
+        self._entries: dict[str, ImageCacheEntry] = {}
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+
+    # -------------------------------------------------------------------------
+    # Lifecycle
+    # -------------------------------------------------------------------------
+
+    def start(self) -> None:
+        """Start the refresh loop."""
+        if not self._enabled:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(
+                self._refresh_loop(), name="kapsule-image-prefetch"
+            )
+
+    async def stop(self) -> None:
+        """Stop the refresh loop."""
+        task = self._task
+        self._task = None
+        if task is not None:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    # -------------------------------------------------------------------------
+    # Configuration
+    # -------------------------------------------------------------------------
+
+    def note_home(self, home_dir: str) -> None:
+        """Include a user's config in the set of images to prefetch.
+
+        A user seen for the first time triggers a pass right away, so
+        their default image is pulled before they first need it.
+
+        Args:
+            home_dir: The user's home directory.
+        """
+        if home_dir in self._homes:
+            return
+        self._homes.add(home_dir)
+        self._wake.set()
+
+    def images(self) -> list[str]:
+        """Images to keep prefetched."""
+        return configured_default_images(sorted(self._homes))
+
+    def cache_state(self) -> list[ImageCacheEntry]:
+        """Cache state of every configured image.
+
+        Returns:
+            One entry per image, in configuration order.
+        """
+        return [
+            self._entries.get(image) or ImageCacheEntry(image, "pending")
+            for image in self.images()
+        ]
+
+    # -------------------------------------------------------------------------
+    # Refreshing
+    # -------------------------------------------------------------------------
+
+    async def _refresh_loop(self) -> None:
+        """Run refresh passes until cancelled."""
+        while True:
+            self._wake.clear()
+            try:
+                await self.refresh()
+            except IncusError as e:
+                logger.warning("Image prefetch pass failed: %s", e)
+
+            delay = _REFRESH_INTERVAL * random.uniform(
+                1 - _REFRESH_JITTER, 1 + _REFRESH_JITTER
+            )
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), delay)
+
+    async def refresh(self) -> None:
+        """Pull or refresh every configured image once.
+
+        Raises:
+            IncusError: If the local image store can't be listed.
+        """
+        local = await self._incus.list_images()
+        for image in self.images():
+            self._entries[image] = await self._refresh_image(image, local)
+
+    async def _refresh_image(self, image: str, local: list[Image]) -> ImageCacheEntry:
+        """Bring one image up to date in the local store.
+
+        Args:
+            image: Image string.
+            local: Current contents of the local image store.
+
+        Returns:
+            The image's new cache state.
+        """
+        source = pull_source(image)
+        if source is None:
+            return ImageCacheEntry(image, "failed", error="Invalid image format")
+
+        previous = self._entries.get(image) or ImageCacheEntry(image, "pending")
+        self._entries[image] = previous._replace(state="pulling")
+        existing = _local_image(local, source)
+        try:
+            if existing is not None and existing.fingerprint and existing.auto_update:
+                logger.debug("Refreshing cached image %s", image)
+                op = await self._incus.refresh_image(existing.fingerprint, wait=True)
+            else:
+                logger.info("Prefetching image %s", image)
+                op = await self._incus.pull_image(source, wait=True)
+            if op.status != "Success":
+                raise IncusError(op.err or op.status or "unknown error")
+            current = _local_image(await self._incus.list_images(), source)
+        except IncusError as e:
+            logger.warning("Failed to prefetch %s: %s", image, e)
+            return previous._replace(state="failed", error=str(e))
+
+        return ImageCacheEntry(
+            image,
+            "cached" if current is not None else "failed",
+            fingerprint=(current.fingerprint or "") if current is not None else "",
+            refreshed_at=datetime.now(UTC).isoformat(),
+            error="" if current is not None else "Image missing after pull",
+        )
@@ -0,0 +1,149 @@
+# SPDX-FileCopyrightText: 2026 Lasath Fernando <devel@lasath.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Image references.
+
+Kapsule accepts images as ``<remote>:<alias>`` strings, the same way the
+``incus`` CLI does (e.g. ``images:archlinux`` or ``ubuntu:24.04``). This
+module turns them into Incus instance sources.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+
+from .config import load_image_servers
+from .models_generated import ImagesPostSource, InstanceSource
+
+# Map common server aliases to URLs (extended by [image_servers] in
+# kapsule.conf, e.g. to point at a caching mirror)
+SERVER_MAP = {
+    "images": "https://images.linuxcontainers.org",
+    "ubuntu": "https://cloud-images.ubuntu.com/releases",
+}
+
+DEFAULT_SERVER = "https://images.linuxcontainers.org"
+
+
+def image_tag(image: str) -> str:
+    """Short tag for an image, usable in instance names.
+
+    Args:
+        image: Image string like "images:ubuntu/24.04".
+
+    Returns:
+        A readable slug plus a digest, unique per image string and at
+        most 39 characters long.
+    """
+    slug = re.sub(r"[^a-z0-9]+", "-", image.lower()).strip("-")[:30].strip("-")
+    digest = hashlib.sha256(image.encode()).hexdigest()[:8]
+    return f"{slug}-{digest}"
+
+
+def image_servers() -> dict[str, str]:
+    """Image remote name -> simplestreams URL, with config overrides."""
+    return {**SERVER_MAP, **load_image_servers()}
+
+
+def parse_image_source(image: str) -> InstanceSource | None:
+    """Parse an image string into an InstanceSource.
+
+    Args:
+        image: Image string like "images:archlinux" or "ubuntu:24.04"
+
+    Returns:
+        InstanceSource or None if invalid
+    """
+    servers = image_servers()
+    if ":" in image:
+        server_alias, image_alias = image.split(":", 1)
+        server_url = servers.get(server_alias)
+        if not server_url:
+            return None
+    else:
+        server_url = servers.get("images", DEFAULT_SERVER)
+        image_alias = image
+
+    return InstanceSource(
+        type="image",
+        protocol="simplestreams",
+        server=server_url,
+        alias=image_alias,
+        allow_inconsistent=None,
+        certificate=None,
+        fingerprint=None,
+        instance_only=None,
+        live=None,
+        mode=None,
+        operation=None,
+        project=None,
+        properties=None,
+        refresh=None,
+        refresh_exclude_older=None,
+        secret=None,
+        secrets=None,
+        source=None,
+        **{"base-image": None},
+    )
+
+
+def copy_source(source: str) -> InstanceSource:
+    """Build an InstanceSource copying a local instance or snapshot.
+
+    Args:
+        source: Instance name, or ``<instance>/<snapshot>``.
+
+    Returns:
+        InstanceSource for a local copy.
+    """
+    return InstanceSource(
+        type="copy",
+        source=source,
+        alias=None,
+        allow_inconsistent=None,
+        certificate=None,
+        fingerprint=None,
+        instance_only=True,
+        live=None,
+        mode=None,
+        operation=None,
+        project=None,
+        properties=None,
+        protocol=None,
+        refresh=None,
+        refresh_exclude_older=None,
+        secret=None,
+        secrets=None,
+        server=None,
+        **{"base-image": None},
+    )
+
+
+def pull_source(image: str) -> ImagesPostSource | None:
+    """Build the source for pulling an image into the local image store.
+
+    Args:
+        image: Image string like "images:archlinux" or "ubuntu:24.04"
+
+    Returns:
+        ImagesPostSource or None if invalid
+    """
+    source = parse_image_source(image)
+    if source is None:
+        return None
+    return ImagesPostSource(
+        type="image",
+        mode="pull",
+        protocol=source.protocol,
+        server=source.server,
+        alias=source.alias,
+        certificate=None,
+        fingerprint=None,
+        image_type="container",
+        name=None,
+        project=None,
+        secret=None,
+        url=None,
+    )
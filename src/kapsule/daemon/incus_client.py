@@ -6,29 +6,61 @@
 
 This module provides a typed async client for the Incus REST API,
 communicating over the Unix socket at /var/lib/incus/unix.socket.
+
+When the events stream is running (see start_events()), instance
+queries are answered from an in-memory index kept up to date by Incus
+lifecycle and operation events instead of hitting the API every time.
 """
 
 from __future__ import annotations
 
-from contextlib import suppress
-from typing import Any, TypeVar
+import asyncio
+import logging
+from collections.abc import AsyncIterable, AsyncIterator, Callable
+from contextlib import asynccontextmanager, suppress
+from typing import Any, Literal, NamedTuple, TypeVar
 
 import httpx
-from pydantic import BaseModel, RootModel
+from pydantic import BaseModel, Field, RootModel, ValidationError
 
 T = TypeVar("T", bound=BaseModel)
 
+from .incus_events import (  # noqa: E402
+    IncusEventStream,
+    LifecycleEvent,
+    instance_name_from_url,
+)
+from .instance_cache import InstanceCache  # noqa: E402
 from .models_generated import (  # noqa: E402
+    Event,
+    Image,
+    ImagesPost,
+    ImagesPostSource,
     Instance,
+    InstanceBackupsPost,
+    InstanceExecPost,
+    InstanceFull,
+    InstancePost,
     InstancePut,
+    InstanceSnapshot,
+    InstanceSnapshotsPost,
     InstancesPost,
+    InstanceState,
     InstanceStatePut,
     Operation,
+    Profile,
+    ProfilePut,
+    ProfilesPost,
     Server,
     ServerPut,
     StoragePool,
     StoragePoolsPost,
 )
+from .operation_waiters import (  # noqa: E402
+    OperationCallback,
+    OperationWaiters,
+    is_operation_final,
+)
 
 
 # List wrapper models for typed API responses
@@ -37,6 +69,21 @@ class InstanceList(RootModel[list[Instance]]):
     pass
 
 
+class InstanceFullList(RootModel[list[InstanceFull]]):
+    """List of InstanceFull objects."""
+    pass
+
+
+class InstanceSnapshotList(RootModel[list[InstanceSnapshot]]):
+    """List of InstanceSnapshot objects."""
+    pass
+
+
+class ImageList(RootModel[list[Image]]):
+    """List of Image objects."""
+    pass
+
+
 class StringList(RootModel[list[str]]):
     """List of string URLs/paths."""
     pass
@@ -65,6 +112,90 @@ class AsyncOperationResponse(BaseModel):
     metadata: Operation | None = None
 
 
+class OperationProgress(BaseModel):
+    """Progress of a running operation (the ``progress`` metadata map).
+
+    Incus publishes transfer progress for image downloads, unpacking,
+    migrations and the like as a map of strings, e.g.
+    ``{"stage": "download", "percent": "45", "speed": "1234567"}``,
+    alongside a human readable ``<stage>_progress`` entry.
+    """
+
+    stage: str = ""
+    percent: int | None = None
+    processed: int | None = None
+    speed: int = 0
+    text: str = ""
+
+    @classmethod
+    def from_operation(cls, op: Operation) -> OperationProgress | None:
+        """Extract progress from an operation's metadata.
+
+        Args:
+            op: Operation as reported by Incus.
+
+        Returns:
+            The progress, or None if the operation reports none.
+        """
+        metadata = op.metadata or {}
+        raw = metadata.get("progress")
+        if not isinstance(raw, dict):
+            return None
+        try:
+            progress = cls.model_validate(raw)
+        except ValidationError:
+            return None
+        text = metadata.get(f"{progress.stage}_progress")
+        if isinstance(text, str):
+            progress.text = text
+        return progress
+
+
+class ExecOperationMetadata(BaseModel):
+    """Metadata of a finished ``record-output`` exec operation."""
+
+    return_: int = Field(-1, alias="return")
+    # Maps file descriptor ("1", "2") to the URL of its recorded log
+    output: dict[str, str] = Field(default_factory=dict)
+
+
+class ExecResult(BaseModel):
+    """Outcome of a command run with IncusClient.exec()."""
+
+    exit_code: int
+    stdout: str = ""
+    stderr: str = ""
+
+
+class FileTreeEntry(BaseModel):
+    """A directory, file or symlink to create with apply_file_tree()."""
+
+    path: str
+    type: Literal["directory", "file", "symlink"]
+    # File content, or the target of a symlink
+    content: str = ""
+    uid: int = 0
+    gid: int = 0
+    # Octal mode; defaults to 0755 for directories and 0644 for files
+    mode: str = ""
+
+
+class FileTreeStatus(BaseModel):
+    """Outcome of applying one FileTreeEntry."""
+
+    path: str
+    ok: bool
+    error: str = ""
+
+
+class BackupDownload(NamedTuple):
+    """An instance backup being streamed from Incus."""
+
+    # Archive size in bytes, or -1 if Incus didn't say
+    size: int
+    chunks: AsyncIterator[bytes]
+
+
 class IncusError(Exception):
     """Error from Incus API."""
 
@@ -73,19 +204,145 @@ class IncusError(Exception):
         self.code = code
 
 
-class ContainerInfo(BaseModel):
-    """Simplified container information."""
+# Lifecycle actions that don't change anything the instance index holds
+_PASSIVE_LIFECYCLE_ACTIONS = frozenset({
+    "instance-console",
+    "instance-console-reset",
+    "instance-console-retrieved",
+    "instance-exec",
+    "instance-file-deleted",
+    "instance-file-pushed",
+    "instance-file-retrieved",
+    "instance-log-deleted",
+    "instance-log-retrieved",
+    "instance-metadata-retrieved",
+})
+
+# Exec operations run a command inside an instance without changing its
+# config or state; they are recognised by these metadata keys (websocket
+# fds while running, exit code and recorded output once done). A command
+# that does stop the instance still shows up as a lifecycle event.
+_EXEC_OPERATION_METADATA_KEYS = frozenset({"fds", "output", "return"})
+
+# While the events stream is up, waiters re-check their operation this
+# often in case an event was missed around a reconnect.
+_OPERATION_RECHECK_INTERVAL = 30.0
+
+# Without the events stream, operations are long-polled in chunks of
+# this many seconds (shorter when the caller wants progress updates).
+_OPERATION_POLL_CHUNK = 30.0
+_OPERATION_PROGRESS_POLL_CHUNK = 1.0
+
+# Attempts at an If-Match guarded instance PUT before giving up
+_MODIFY_ATTEMPTS = 5
+
+logger = logging.getLogger(__name__)
+
+# Applies file tree entries given as groups of six positional arguments
+# (type, path, content, uid, gid, mode) and prints "<index> ok" or
+# "<index> failed <error>" for each. Existing directories are left alone,
+# files are replaced atomically and symlinks are replaced in place.
+_FILE_TREE_SCRIPT = r"""
+apply() {
+    type="$1"; path="$2"; data="$3"; uid="$4"; gid="$5"; mode="$6"
+    case "$type" in
+    directory)
+        [ -d "$path" ] && return 0
+        mkdir -- "$path" && chown "$uid:$gid" -- "$path" \
+            && chmod "${mode:-0755}" -- "$path" ;;
+    file)
+        tmp="$path.kapsule-new"
+        if printf '%s' "$data" > "$tmp" && chown "$uid:$gid" -- "$tmp" \
+            && chmod "${mode:-0644}" -- "$tmp" && mv -f -- "$tmp" "$path"; then
+            return 0
+        fi
+        rm -f -- "$tmp"
+        return 1 ;;
+    symlink)
+        ln -sfn -- "$data" "$path" && chown -h "$uid:$gid" -- "$path" ;;
+    *)
+        echo "unknown entry type: $type"
+        return 1 ;;
+    esac
+}
+
+i=0
+while [ "$#" -ge 6 ]; do
+    if err=$(apply "$1" "$2" "$3" "$4" "$5" "$6" 2>&1); then
+        printf '%s ok\n' "$i"
+    else
+        printf '%s failed %s\n' "$i" "$(printf '%s' "$err" | tr '\n' ' ')"
+    fi
+    i=$((i + 1))
+    shift 6
+done
+"""
 
-    name: str
-    status: str
-    image: str
-    created: str
+class InstanceConfigTransaction:
+    """Config keys and devices to write to an instance together.
+
+    Steps of an operation add the keys and devices they need, and the
+    operation flushes them all with a single PATCH at the end instead of
+    one read-modify-write per step.
+    """
+
+    def __init__(self, client: IncusClient, name: str):
+        self._client = client
+        self._name = name
+        self._config: dict[str, str] = {}
+        self._devices: dict[str, dict[str, str]] = {}
+
+    @property
+    def pending(self) -> bool:
+        """Whether there are changes waiting to be flushed."""
+        return bool(self._config or self._devices)
+
+    def set_config(self, key: str, value: str) -> None:
+        """Queue a config key."""
+        self._config[key] = value
+
+    def add_device(self, device_name: str, device_config: dict[str, str]) -> None:
+        """Queue a device addition (replacing one of the same name)."""
+        self._devices[device_name] = device_config
+
+    async def flush(self) -> None:
+        """Write all queued changes in one request.
+
+        Raises:
+            IncusError: If the update fails; the changes stay queued.
+        """
+        if not self.pending:
+            return
+        await self._client.modify_instance(
+            self._name, config=self._config, devices=self._devices
+        )
+        self._config = {}
+        self._devices = {}
 
 
 # Module-level singleton instance
 _client: IncusClient | None = None
 
 
+def _raise_for_status(response: httpx.Response) -> None:
+    """Convert an HTTP error response to IncusError.
+
+    Raises:
+        IncusError: If the response is an error. A streamed response must
+            have been read first.
+    """
+    if response.status_code < 400:
+        return
+    # Try to parse Incus error response
+    error_msg = response.reason_phrase
+    error_code = response.status_code
+    with suppress(Exception):
+        data = response.json()
+        error_msg = data.get("error", response.reason_phrase)
+        error_code = data.get("error_code", response.status_code)
+    raise IncusError(error_msg, error_code) from None
+
+
 def get_client() -> IncusClient:
     """Get the shared IncusClient instance."""
     global _client
@@ -97,14 +354,33 @@ def get_client() -> IncusClient:
 class IncusClient:
     """Async client for Incus REST API over Unix socket."""
 
-    def __init__(self, socket_path: str = "/var/lib/incus/unix.socket"):
+    def __init__(
+        self,
+        socket_path: str = "/var/lib/incus/unix.socket",
+        *,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        """Initialize the client.
+
+        Args:
+            socket_path: Path to the Incus Unix socket.
+            transport: Optional transport override (used by tests to
+                intercept requests instead of talking to a real socket).
+        """
         self._socket_path = socket_path
+        self._transport = transport
         self._client: httpx.AsyncClient | None = None
+        self._cache = InstanceCache()
+        self._events: IncusEventStream | None = None
+        self._refreshing: dict[str, asyncio.Task[None]] = {}
+        self._waiters = OperationWaiters()
 
     async def _get_client(self) -> httpx.AsyncClient:
         """Get or create the HTTP client."""
         if self._client is None or self._client.is_closed:
-            transport = httpx.AsyncHTTPTransport(uds=self._socket_path)
+            transport = self._transport or httpx.AsyncHTTPTransport(
+                uds=self._socket_path
+            )
             self._client = httpx.AsyncClient(
                 transport=transport,
                 base_url="http://localhost",
@@ -113,7 +389,8 @@ class IncusClient:
         return self._client
 
     async def close(self) -> None:
-        """Close the HTTP client."""
+        """Stop the events stream and close the HTTP client."""
+        await self.stop_events()
         if self._client is not None:
             await self._client.aclose()
             self._client = None
@@ -125,6 +402,9 @@ class IncusClient:
         *,
         response_type: type[T],
         json: dict[str, Any] | None = None,
+        content: AsyncIterable[bytes] | None = None,
+        timeout: float | None = None,
+        headers: dict[str, str] | None = None,
     ) -> T:
         """Make request and handle Incus response format.
 
@@ -144,24 +424,25 @@ class IncusClient:
             path: API path.
             response_type: Pydantic model to deserialize the response into.
             json: Optional JSON body for the request.
+            content: Optional raw body, streamed to Incus as it is produced.
+            timeout: Optional per-request timeout overriding the client's.
+            headers: Optional extra request headers.
 
         Returns:
             A validated instance of response_type.
         """
         client = await self._get_client()
-        response = await client.request(method, path, json=json)
-
-        # Handle HTTP errors and convert to IncusError
-        if response.status_code >= 400:
-            # Try to parse Incus error response
-            error_msg = response.reason_phrase
-            error_code = response.status_code
-            with suppress(Exception):
-                data = response.json()
-                error_msg = data.get("error", response.reason_phrase)
-                error_code = data.get("error_code", response.status_code)
-            raise IncusError(error_msg, error_code) from None
+        if timeout is not None:
+            response = await client.request(
+                method, path, json=json, content=content, headers=headers,
+                timeout=timeout,
+            )
+        else:
+            response = await client.request(
+                method, path, json=json, content=content, headers=headers
+            )
 
+        _raise_for_status(response)
         data = response.json()
 
         if data.get("type") == "error":
@@ -180,6 +461,144 @@ class IncusClient:
             metadata = {}
         return response_type.model_validate(metadata)
 
+    # -------------------------------------------------------------------------
+    # Events stream and instance index
+    # -------------------------------------------------------------------------
+
+    @property
+    def events(self) -> IncusEventStream | None:
+        """The events stream, if start_events() has been called."""
+        return self._events
+
+    def start_events(self) -> IncusEventStream:
+        """Subscribe to the Incus events stream.
+
+        Once connected, a full instance listing seeds the index and later
+        events keep it current. Every reconnect triggers a full resync.
+
+        Returns:
+            The running event stream (for registering more handlers).
+        """
+        if self._events is None:
+            self._events = IncusEventStream(self._socket_path)
+            self._events.add_handler(self._on_event)
+            self._events.add_connect_handler(self._resync_instances)
+            self._events.add_connect_handler(self._recheck_operations)
+            self._events.add_disconnect_handler(self._cache.mark_stale)
+        self._events.start()
+        return self._events
+
+    async def stop_events(self) -> None:
+        """Stop the events stream; queries go back to the REST API."""
+        if self._events is not None:
+            await self._events.stop()
+        self._cache.mark_stale()
+        for task in self._refreshing.values():
+            task.cancel()
+        self._refreshing.clear()
+
+    async def _resync_instances(self) -> None:
+        """Rebuild the instance index from a full listing."""
+        generation = self._cache.generation
+        instances = await self._fetch_instances()
+        for name in self._cache.replace_all(instances, generation):
+            self._schedule_refresh(name)
+
+    async def _recheck_operations(self) -> None:
+        """Resolve waiters whose operations finished while disconnected."""
+        for operation_id in self._waiters.pending():
+            try:
+                op = await self.get_operation(operation_id)
+            except IncusError:
+                continue
+            self._waiters.dispatch(op)
+
+    def _on_event(self, event: Event) -> None:
+        """Update the instance index and waiters from an Incus event."""
+        try:
+            if event.type == "lifecycle":
+                self._on_lifecycle_event(
+                    LifecycleEvent.model_validate(event.metadata or {})
+                )
+            elif event.type == "operation":
+                op = Operation.model_validate(event.metadata or {})
+                self._waiters.dispatch(op)
+                self._on_operation_event(op)
+        except ValidationError:
+            logger.debug("Ignoring unexpected %s event", event.type)
+
+    def _on_lifecycle_event(self, event: LifecycleEvent) -> None:
+        """Handle instance lifecycle events."""
+        if not event.action.startswith("instance-"):
+            return
+        if event.action in _PASSIVE_LIFECYCLE_ACTIONS:
+            return
+        name = instance_name_from_url(event.source)
+        if name is None:
+            return
+
+        if event.action == "instance-deleted":
+            self._cache.remove(name)
+            return
+        if event.action == "instance-renamed" and event.context is not None:
+            old_name = event.context.old_name
+            if old_name:
+                self._cache.remove(old_name)
+
+        self._cache.invalidate(name)
+        self._schedule_refresh(name)
+
+    def _on_operation_event(self, op: Operation) -> None:
+        """Invalidate instances touched by a finished background task.
+
+        Exec operations are skipped: the daemon runs its own setup through
+        them, and counting those as changes would make every enter look
+        stale to the readiness cache.
+        """
+        if op.class_ != "task" or op.status_code is None:
+            return
+        if op.status_code.root < 200:
+            return
+        if _EXEC_OPERATION_METADATA_KEYS & (op.metadata or {}).keys():
+            return
+        for url in (op.resources or {}).get("instances", []):
+            name = instance_name_from_url(url)
+            if name is not None:
+                self._cache.invalidate(name)
+                self._schedule_refresh(name)
+
+    def _schedule_refresh(self, name: str) -> None:
+        """Re-fetch a dirty instance in the background (coalesced)."""
+        if not self._cache.live or name in self._refreshing:
+            return
+        self._refreshing[name] = asyncio.create_task(
+            self._refresh_instance(name), name=f"incus-refresh-{name}"
+        )
+
+    async def _refresh_instance(self, name: str) -> None:
+        """Fetch an instance until its index entry is clean."""
+        try:
+            # Bounded so a constantly changing instance can't spin forever;
+            # anything still dirty is simply fetched on demand.
+            for _ in range(3):
+                if not self._cache.live or name not in self._cache.dirty_names():
+                    return
+                generation = self._cache.name_generation(name)
+                try:
+                    instance = await self._fetch_instance(name)
+                except IncusError as e:
+                    if e.code == 404:
+                        self._cache.forget(name, generation)
+                    else:
+                        logger.debug("Refreshing %s failed: %s", name, e)
+                    continue
+                except httpx.HTTPError as e:
+                    logger.debug("Refreshing %s failed: %s", name, e)
+                    return
+                self._cache.store(instance, generation)
+        finally:
+            self._refreshing.pop(name, None)
+
     # -------------------------------------------------------------------------
     # High-level instance operations
     # -------------------------------------------------------------------------
@@ -198,45 +617,42 @@ class IncusClient:
             # We'd need to fetch each one - not implemented yet
             raise NotImplementedError("recursion=0 not yet supported")
 
-        # With recursion=1, we get full instance objects
+        if recursion == 1:
+            cached = self._cache.snapshot()
+            if cached is not None:
+                return cached
+            generation = self._cache.generation
+            instances = await self._fetch_instances()
+            if self._cache.live:
+                for name in self._cache.replace_all(instances, generation):
+                    self._schedule_refresh(name)
+            return instances
+
         result = await self._request(
             "GET", f"/1.0/instances?recursion={recursion}", response_type=InstanceList
         )
         return result.root
 
-    async def list_containers(self) -> list[ContainerInfo]:
-        """List all containers with simplified info.
-
-        Returns:
-            List of ContainerInfo.
-        """
-        instances = await self.list_instances(recursion=1)
+    async def _fetch_instances(self) -> list[Instance]:
+        """Fetch all instances from the API, bypassing the index."""
+        result = await self._request(
+            "GET", "/1.0/instances?recursion=1", response_type=InstanceList
+        )
+        return result.root
 
-        containers: list[ContainerInfo] = []
-        for inst in instances:
-            # Extract image description from config
-            image_desc = "unknown"
-            if inst.config:
-                image_desc = inst.config.get(
-                    "image.description",
-                    inst.config.get("image.os", "unknown"),
-                )
+    async def list_instances_with_state(self) -> list[InstanceFull]:
+        """List all instances with their runtime state, in one request.
 
-            # Format created timestamp
-            created = ""
-            if inst.created_at:
-                created = inst.created_at.isoformat()
-
-            containers.append(
-                ContainerInfo(
-                    name=inst.name or "",
-                    status=inst.status or "Unknown",
-                    image=image_desc,
-                    created=created,
-                )
-            )
+        Uses ``recursion=2``, so the result is never served from the
+        index (state changes without events).
 
-        return containers
+        Returns:
+            List of InstanceFull objects.
+        """
+        result = await self._request(
+            "GET", "/1.0/instances?recursion=2", response_type=InstanceFullList
+        )
+        return result.root
 
     async def get_instance(self, name: str) -> Instance:
         """Get a single instance by name.
@@ -246,11 +662,68 @@ class IncusClient:
 
         Returns:
             Instance object.
+
+        Raises:
+            IncusError: If the instance does not exist (code 404).
+        """
+        if self._cache.is_authoritative(name):
+            instance = self._cache.get(name)
+            if instance is None:
+                raise IncusError("Instance not found", 404)
+            return instance
+
+        generation = self._cache.name_generation(name)
+        try:
+            instance = await self._fetch_instance(name)
+        except IncusError as e:
+            if e.code == 404:
+                self._cache.forget(name, generation)
+            raise
+        self._cache.store(instance, generation)
+        return instance
+
+    def instance_generation(self, name: str) -> int | None:
+        """Change counter of an instance in the event-fed index.
+
+        The counter moves whenever an event (or one of our own writes)
+        touches the instance, so callers can cache derived state and
+        notice when it may be stale without asking Incus.
+
+        Args:
+            name: Instance name.
+
+        Returns:
+            The counter, or None if the index can't vouch for the
+            instance right now (events down or a refresh pending).
         """
+        if self._events is None or not self._events.connected:
+            return None
+        if not self._cache.is_authoritative(name):
+            return None
+        return self._cache.name_generation(name)
+
+    async def _fetch_instance(self, name: str) -> Instance:
+        """Fetch a single instance from the API, bypassing the index."""
         return await self._request(
             "GET", f"/1.0/instances/{name}", response_type=Instance
         )
 
+    async def get_instance_state(self, name: str) -> InstanceState:
+        """Get the runtime state of an instance (status, disk, memory...).
+
+        Args:
+            name: Instance name.
+
+        Returns:
+            InstanceState object.
+
+        Raises:
+            IncusError: If the instance does not exist (code 404).
+        """
+        return await self._request(
+            "GET", f"/1.0/instances/{name}/state", response_type=InstanceState
+        )
+
     async def is_available(self) -> bool:
         """Check if Incus is available and responding.
 
@@ -283,6 +756,8 @@ class IncusClient:
             response_type=AsyncOperationResponse,
             json=instance.model_dump(exclude_none=True),
         )
+        if instance.name:
+            self._cache.invalidate(instance.name)
 
         operation = response.metadata
         if operation is None:
@@ -290,6 +765,8 @@ class IncusClient:
 
         if wait and operation.id:
             operation = await self.wait_operation(operation.id)
+            if instance.name:
+                self._cache.invalidate(instance.name)
 
         return operation
 
@@ -306,20 +783,89 @@ class IncusClient:
             "GET", f"/1.0/operations/{operation_id}", response_type=Operation
         )
 
-    async def wait_operation(self, operation_id: str, timeout: int = 60) -> Operation:
+    async def wait_operation(
+        self,
+        operation_id: str,
+        timeout: float | None = None,
+        on_update: OperationCallback | None = None,
+    ) -> Operation:
         """Wait for an operation to complete.
 
+        While the events stream is connected, the wait is resolved from
+        operation events and holds no HTTP connection open. Otherwise the
+        operation is long-polled in bounded chunks.
+
         Args:
             operation_id: Operation UUID.
-            timeout: Timeout in seconds.
+            timeout: Deadline in seconds, or None to wait indefinitely.
+            on_update: Called with intermediate operation states (e.g. to
+                report download progress from the operation metadata).
 
         Returns:
             Operation object with final status.
+
+        Raises:
+            IncusError: If the deadline passes first.
         """
-        return await self._request(
-            "GET", f"/1.0/operations/{operation_id}/wait?timeout={timeout}",
-            response_type=Operation,
-        )
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        future = self._waiters.register(operation_id, on_update)
+        try:
+            while True:
+                remaining = None if deadline is None else deadline - loop.time()
+                if remaining is not None and remaining <= 0:
+                    raise IncusError(
+                        f"Timed out waiting for operation {operation_id}"
+                    )
+
+                if self._events is not None and self._events.connected:
+                    # Check once in case the operation finished before we
+                    # registered, then let events resolve the future.
+                    current = await self.get_operation(operation_id)
+                    if is_operation_final(current):
+                        return current
+                    if on_update is not None:
+                        on_update(current)
+                    step = _OPERATION_RECHECK_INTERVAL
+                    if remaining is not None:
+                        step = min(step, remaining)
+                    with suppress(TimeoutError):
+                        return await asyncio.wait_for(asyncio.shield(future), step)
+                    continue
+
+                step = (
+                    _OPERATION_PROGRESS_POLL_CHUNK
+                    if on_update is not None
+                    else _OPERATION_POLL_CHUNK
+                )
+                if remaining is not None:
+                    step = min(step, remaining)
+                current = await self._poll_operation(operation_id, step)
+                if is_operation_final(current):
+                    return current
+                if on_update is not None:
+                    on_update(current)
+        finally:
+            self._waiters.discard(operation_id, future)
+
+    async def _poll_operation(self, operation_id: str, seconds: float) -> Operation:
+        """Long-poll an operation for at most ``seconds``.
+
+        Returns:
+            The operation, final or not.
+        """
+        wait_seconds = max(1, int(seconds))
+        try:
+            return await self._request(
+                "GET",
+                f"/1.0/operations/{operation_id}/wait?timeout={wait_seconds}",
+                response_type=Operation,
+                timeout=wait_seconds + 10.0,
+            )
+        except (IncusError, httpx.TimeoutException):
+            # Incus reports a wait that ran out of time as an error;
+            # fetch the current state instead.
+            return await self.get_operation(operation_id)
 
     async def instance_exists(self, name: str) -> bool:
         """Check if an instance exists.
@@ -358,6 +904,7 @@ class IncusClient:
             response_type=AsyncOperationResponse,
             json=state.model_dump(exclude_none=True),
         )
+        self._cache.invalidate(name)
 
         operation = response.metadata
         if operation is None:
@@ -365,6 +912,7 @@ class IncusClient:
 
         if wait and operation.id:
             operation = await self.wait_operation(operation.id)
+            self._cache.invalidate(name)
 
         return operation
 
@@ -407,12 +955,26 @@ class IncusClient:
         )
         return await self.change_instance_state(name, state, wait=wait)
 
-    # -------------------------------------------------------------------------
-    # Instance deletion
-    # -------------------------------------------------------------------------
+    async def freeze_instance(self, name: str, wait: bool = False) -> Operation:
+        """Freeze (pause) all processes of a running instance.
 
-    async def delete_instance(self, name: str, wait: bool = False) -> Operation:
-        """Delete an instance.
+        Args:
+            name: Instance name.
+            wait: If True, wait for the operation to complete.
+
+        Returns:
+            Operation with status info.
+        """
+        state = InstanceStatePut(
+            action="freeze",
+            force=None,
+            stateful=None,
+            timeout=None,
+        )
+        return await self.change_instance_state(name, state, wait=wait)
+
+    async def unfreeze_instance(self, name: str, wait: bool = False) -> Operation:
+        """Resume a frozen instance.
 
         Args:
             name: Instance name.
@@ -421,10 +983,47 @@ class IncusClient:
         Returns:
             Operation with status info.
         """
+        state = InstanceStatePut(
+            action="unfreeze",
+            force=None,
+            stateful=None,
+            timeout=None,
+        )
+        return await self.change_instance_state(name, state, wait=wait)
+
+    async def rename_instance(
+        self, name: str, new_name: str, wait: bool = False
+    ) -> Operation:
+        """Rename an instance.
+
+        Args:
+            name: Current instance name.
+            new_name: New instance name.
+            wait: If True, wait for the operation to complete.
+
+        Returns:
+            Operation with status info.
+        """
+        request = InstancePost(
+            Config=None,
+            Devices=None,
+            Profiles=None,
+            allow_inconsistent=None,
+            instance_only=None,
+            live=None,
+            migration=None,
+            name=new_name,
+            pool=None,
+            project=None,
+            target=None,
+        )
         response = await self._request(
-            "DELETE", f"/1.0/instances/{name}",
+            "POST", f"/1.0/instances/{name}",
             response_type=AsyncOperationResponse,
+            json=request.model_dump(exclude_none=True),
         )
+        self._cache.invalidate(name)
+        self._cache.invalidate(new_name)
 
         operation = response.metadata
         if operation is None:
@@ -432,94 +1031,574 @@ class IncusClient:
 
         if wait and operation.id:
             operation = await self.wait_operation(operation.id)
+            self._cache.invalidate(name)
+            self._cache.invalidate(new_name)
 
         return operation
 
     # -------------------------------------------------------------------------
-    # File operations
+    # Snapshots
     # -------------------------------------------------------------------------
 
-    async def push_file(
-        self,
-        instance: str,
-        path: str,
-        content: str | bytes,
-        *,
-        uid: int = 0,
-        gid: int = 0,
-        mode: str = "0644",
-    ) -> None:
-        """Push a file to an instance.
+    async def create_snapshot(
+        self, name: str, snapshot: str, wait: bool = False
+    ) -> Operation:
+        """Take a (stateless) snapshot of an instance.
 
         Args:
-            instance: Instance name.
-            path: Absolute path inside the instance.
-            content: File content (str or bytes).
-            uid: File owner UID.
-            gid: File owner GID.
-            mode: File mode (octal string, e.g., "0644").
-        """
-        if isinstance(content, str):
-            content = content.encode("utf-8")
+            name: Instance name.
+            snapshot: Snapshot name.
+            wait: If True, wait for the operation to complete.
 
-        client = await self._get_client()
-        response = await client.post(
-            f"/1.0/instances/{instance}/files",
-            params={"path": path},
-            headers={
-                "X-Incus-uid": str(uid),
-                "X-Incus-gid": str(gid),
-                "X-Incus-mode": mode,
-                "X-Incus-type": "file",
-                "X-Incus-write": "overwrite",
-                "Content-Type": "application/octet-stream",
-            },
-            content=content,
+        Returns:
+            Operation with status info.
+        """
+        request = InstanceSnapshotsPost(
+            expires_at=None, name=snapshot, stateful=False
+        )
+        response = await self._request(
+            "POST", f"/1.0/instances/{name}/snapshots",
+            response_type=AsyncOperationResponse,
+            json=request.model_dump(exclude_none=True),
         )
 
-        if response.status_code >= 400:
-            error_msg = f"Failed to push file {path}: {response.text}"
-            raise IncusError(error_msg, response.status_code) from None
+        operation = response.metadata
+        if operation is None:
+            raise IncusError("No operation metadata in response")
 
-    async def create_symlink(
-        self,
-        instance: str,
-        path: str,
-        target: str,
-        *,
-        uid: int = 0,
-        gid: int = 0,
-    ) -> None:
-        """Create a symlink in an instance.
+        if wait and operation.id:
+            operation = await self.wait_operation(operation.id)
+
+        return operation
+
+    async def list_snapshots(self, name: str) -> list[InstanceSnapshot]:
+        """List an instance's snapshots.
 
         Args:
-            instance: Instance name.
-            path: Absolute path for the symlink.
-            target: Symlink target (what it points to).
-            uid: Symlink owner UID.
-            gid: Symlink owner GID.
+            name: Instance name.
+
+        Returns:
+            List of InstanceSnapshot objects, oldest first.
         """
-        client = await self._get_client()
-        response = await client.post(
-            f"/1.0/instances/{instance}/files",
-            params={"path": path},
-            headers={
-                "X-Incus-uid": str(uid),
-                "X-Incus-gid": str(gid),
-                "X-Incus-type": "symlink",
-            },
-            content=target.encode("utf-8"),
+        result = await self._request(
+            "GET", f"/1.0/instances/{name}/snapshots?recursion=1",
+            response_type=InstanceSnapshotList,
+        )
+        return sorted(
+            result.root,
+            key=lambda s: s.created_at.isoformat() if s.created_at else "",
         )
 
-        if response.status_code >= 400:
-            error_msg = f"Failed to create symlink {path}: {response.text}"
-            raise IncusError(error_msg, response.status_code) from None
+    async def restore_snapshot(
+        self, name: str, snapshot: str, wait: bool = False
+    ) -> Operation:
+        """Roll an instance back to one of its snapshots.
 
-    async def mkdir(
-        self,
-        instance: str,
-        path: str,
-        *,
+        A running container is stopped for the restore and started again.
+
+        Args:
+            name: Instance name.
+            snapshot: Snapshot name.
+            wait: If True, wait for the operation to complete.
+
+        Returns:
+            Operation with status info.
+        """
+        request = InstancePut(
+            architecture=None,
+            config=None,
+            description=None,
+            devices=None,
+            ephemeral=None,
+            profiles=None,
+            restore=snapshot,
+            stateful=None,
+        )
+        response = await self._request(
+            "PUT", f"/1.0/instances/{name}",
+            response_type=AsyncOperationResponse,
+            json=request.model_dump(exclude_none=True),
+        )
+        self._cache.invalidate(name)
+
+        operation = response.metadata
+        if operation is None:
+            raise IncusError("No operation metadata in response")
+
+        if wait and operation.id:
+            operation = await self.wait_operation(operation.id)
+            self._cache.invalidate(name)
+
+        return operation
+
+    async def delete_snapshot(
+        self, name: str, snapshot: str, wait: bool = False
+    ) -> Operation:
+        """Delete a snapshot of an instance.
+
+        Args:
+            name: Instance name.
+            snapshot: Snapshot name.
+            wait: If True, wait for the operation to complete.
+
+        Returns:
+            Operation with status info.
+        """
+        response = await self._request(
+            "DELETE", f"/1.0/instances/{name}/snapshots/{snapshot}",
+            response_type=AsyncOperationResponse,
+        )
+
+        operation = response.metadata
+        if operation is None:
+            raise IncusError("No operation metadata in response")
+
+        if wait and operation.id:
+            operation = await self.wait_operation(operation.id)
+
+        return operation
+
+    # -------------------------------------------------------------------------
+    # Backups
+    # -------------------------------------------------------------------------
+
+    async def create_backup(
+        self,
+        name: str,
+        backup: str,
+        *,
+        compression: str,
+        wait: bool = False,
+    ) -> Operation:
+        """Create a backup tarball of an instance, without its snapshots.
+
+        Incus writes the (compressed) tarball to its own backups directory;
+        export_backup() then streams it out.
+
+        Args:
+            name: Instance name.
+            backup: Backup name.
+            compression: Compression algorithm ("none", "gzip", "zstd", ...).
+            wait: If True, wait for the operation to complete.
+
+        Returns:
+            Operation with status info.
+        """
+        request = InstanceBackupsPost(
+            compression_algorithm=compression,
+            expires_at=None,
+            instance_only=True,
+            name=backup,
+            # A plain tarball can be imported on any storage driver
+            optimized_storage=False,
+            target=None,
+        )
+        response = await self._request(
+            "POST", f"/1.0/instances/{name}/backups",
+            response_type=AsyncOperationResponse,
+            json=request.model_dump(exclude_none=True),
+        )
+
+        operation = response.metadata
+        if operation is None:
+            raise IncusError("No operation metadata in response")
+
+        if wait and operation.id:
+            operation = await self.wait_operation(operation.id)
+
+        return operation
+
+    @asynccontextmanager
+    async def export_backup(
+        self, name: str, backup: str
+    ) -> AsyncIterator[BackupDownload]:
+        """Stream a backup tarball out of Incus.
+
+        Usage:
+            async with incus.export_backup(name, backup) as download:
+                async for chunk in download.chunks:
+                    ...
+
+        Args:
+            name: Instance name.
+            backup: Backup name.
+
+        Yields:
+            The archive size and an iterator over its bytes.
+
+        Raises:
+            IncusError: If Incus can't serve the backup.
+        """
+        client = await self._get_client()
+        async with client.stream(
+            "GET", f"/1.0/instances/{name}/backups/{backup}/export"
+        ) as response:
+            if response.status_code >= 400:
+                await response.aread()
+                _raise_for_status(response)
+            size = int(response.headers.get("Content-Length", "-1"))
+            yield BackupDownload(size=size, chunks=response.aiter_bytes())
+
+    async def delete_backup(
+        self, name: str, backup: str, wait: bool = False
+    ) -> Operation:
+        """Delete a backup of an instance.
+
+        Args:
+            name: Instance name.
+            backup: Backup name.
+            wait: If True, wait for the operation to complete.
+
+        Returns:
+            Operation with status info.
+        """
+        response = await self._request(
+            "DELETE", f"/1.0/instances/{name}/backups/{backup}",
+            response_type=AsyncOperationResponse,
+        )
+
+        operation = response.metadata
+        if operation is None:
+            raise IncusError("No operation metadata in response")
+
+        if wait and operation.id:
+            operation = await self.wait_operation(operation.id)
+
+        return operation
+
+    async def import_backup(
+        self,
+        name: str,
+        chunks: AsyncIterable[bytes],
+        wait: bool = False,
+    ) -> Operation:
+        """Create an instance from a backup tarball.
+
+        The tarball is streamed to Incus as chunks produces it; Incus
+        detects the compression itself.
+
+        Args:
+            name: Name of the new instance.
+            chunks: Tarball bytes.
+            wait: If True, wait for the operation to complete.
+
+        Returns:
+            Operation with status info.
+        """
+        response = await self._request(
+            "POST", "/1.0/instances",
+            response_type=AsyncOperationResponse,
+            content=chunks,
+            headers={
+                "Content-Type": "application/octet-stream",
+                "X-Incus-name": name,
+            },
+        )
+        self._cache.invalidate(name)
+
+        operation = response.metadata
+        if operation is None:
+            raise IncusError("No operation metadata in response")
+
+        if wait and operation.id:
+            operation = await self.wait_operation(operation.id)
+            self._cache.invalidate(name)
+
+        return operation
+
+    # -------------------------------------------------------------------------
+    # Instance deletion
+    # -------------------------------------------------------------------------
+
+    async def delete_instance(self, name: str, wait: bool = False) -> Operation:
+        """Delete an instance.
+
+        Args:
+            name: Instance name.
+            wait: If True, wait for the operation to complete.
+
+        Returns:
+            Operation with status info.
+        """
+        response = await self._request(
+            "DELETE", f"/1.0/instances/{name}",
+            response_type=AsyncOperationResponse,
+        )
+        self._cache.invalidate(name)
+
+        operation = response.metadata
+        if operation is None:
+            raise IncusError("No operation metadata in response")
+
+        if wait and operation.id:
+            operation = await self.wait_operation(operation.id)
+            self._cache.invalidate(name)
+
+        return operation
+
+    # -------------------------------------------------------------------------
+    # Command execution
+    # -------------------------------------------------------------------------
+
+    async def exec(
+        self,
+        instance: str,
+        command: list[str],
+        *,
+        user: int | None = None,
+        group: int | None = None,
+        cwd: str | None = None,
+        environment: dict[str, str] | None = None,
+        timeout: float | None = None,
+    ) -> ExecResult:
+        """Run a command in an instance and collect its output.
+
+        Uses the non-interactive ``record-output`` mode: Incus runs the
+        command without waiting for websockets, records stdout/stderr to
+        log files, and the result is read back once the operation is done.
+        Nothing is forked on the host and the event loop is never blocked.
+
+        Args:
+            instance: Instance name.
+            command: Command and its arguments.
+            user: UID to run the command as (default root).
+            group: GID to run the command as (default root).
+            cwd: Working directory inside the instance.
+            environment: Extra environment variables.
+            timeout: Deadline in seconds for the command to finish.
+
+        Returns:
+            Exit code and decoded output of the command.
+
+        Raises:
+            IncusError: If the command could not be run or timed out.
+        """
+        request = InstanceExecPost(
+            command=command,
+            cwd=cwd,
+            environment=environment,
+            group=group,
+            height=None,
+            interactive=False,
+            user=user,
+            width=None,
+            **{"record-output": True, "wait-for-websocket": False},
+        )
+        response = await self._request(
+            "POST", f"/1.0/instances/{instance}/exec",
+            response_type=AsyncOperationResponse,
+            json=request.model_dump(by_alias=True, exclude_none=True),
+        )
+        operation = response.metadata
+        if operation is None or not operation.id:
+            raise IncusError("No operation metadata in response")
+
+        operation = await self.wait_operation(operation.id, timeout=timeout)
+        if operation.status != "Success":
+            raise IncusError(
+                f"Failed to run {command[0]} in {instance}: "
+                f"{operation.err or operation.status}"
+            )
+
+        metadata = ExecOperationMetadata.model_validate(operation.metadata or {})
+        stdout, stderr = await asyncio.gather(
+            self._read_exec_log(metadata.output.get("1")),
+            self._read_exec_log(metadata.output.get("2")),
+        )
+        return ExecResult(exit_code=metadata.return_, stdout=stdout, stderr=stderr)
+
+    async def _read_exec_log(self, url: str | None) -> str:
+        """Fetch and delete one recorded exec output log.
+
+        Args:
+            url: Log URL from the exec operation metadata.
+
+        Returns:
+            The log content, or an empty string if there is none.
+        """
+        if not url:
+            return ""
+        client = await self._get_client()
+        response = await client.get(url)
+        if response.status_code >= 400:
+            raise IncusError(
+                f"Failed to read exec output {url}: {response.text}",
+                response.status_code,
+            ) from None
+        # Logs are kept by Incus until deleted; nothing else reads them
+        with suppress(httpx.HTTPError):
+            await client.delete(url)
+        return response.content.decode("utf-8", errors="replace")
+
+    # -------------------------------------------------------------------------
+    # File operations
+    # -------------------------------------------------------------------------
+
+    async def apply_file_tree(
+        self, instance: str, entries: list[FileTreeEntry]
+    ) -> list[FileTreeStatus]:
+        """Create a set of directories, files and symlinks in one round trip.
+
+        The entries are applied in order by a small shell script run with a
+        single exec, so parents must come before their children. If the
+        script can't be used (no shell in the instance, or file content
+        that can't be passed as an argument), the entries are applied one
+        by one through the file API instead.
+
+        Args:
+            instance: Instance name.
+            entries: Entries to apply, parents first.
+
+        Returns:
+            One status per entry, in the same order.
+        """
+        if not entries:
+            return []
+        if any("\x00" in e.content for e in entries):
+            return await self._apply_file_tree_slow(instance, entries)
+
+        args: list[str] = []
+        for entry in entries:
+            args += [
+                entry.type, entry.path, entry.content,
+                str(entry.uid), str(entry.gid), entry.mode,
+            ]
+        try:
+            result = await self.exec(
+                instance, ["sh", "-c", _FILE_TREE_SCRIPT, "kapsule-files", *args]
+            )
+        except IncusError as e:
+            logger.debug("File tree script failed in %s: %s", instance, e)
+            return await self._apply_file_tree_slow(instance, entries)
+
+        reported: dict[int, FileTreeStatus] = {}
+        for line in result.stdout.splitlines():
+            index, _, rest = line.partition(" ")
+            if not index.isdigit() or int(index) >= len(entries):
+                continue
+            state, _, error = rest.partition(" ")
+            reported[int(index)] = FileTreeStatus(
+                path=entries[int(index)].path, ok=state == "ok", error=error.strip()
+            )
+        if not reported and result.exit_code != 0:
+            # The shell itself could not run (e.g. distroless image)
+            return await self._apply_file_tree_slow(instance, entries)
+        return [
+            reported.get(i) or FileTreeStatus(
+                path=entry.path, ok=False, error=result.stderr.strip() or "not applied"
+            )
+            for i, entry in enumerate(entries)
+        ]
+
+    async def _apply_file_tree_slow(
+        self, instance: str, entries: list[FileTreeEntry]
+    ) -> list[FileTreeStatus]:
+        """Apply file tree entries one request at a time."""
+        statuses: list[FileTreeStatus] = []
+        for entry in entries:
+            try:
+                if entry.type == "directory":
+                    await self.mkdir(
+                        instance, entry.path, uid=entry.uid, gid=entry.gid,
+                        mode=entry.mode or "0755",
+                    )
+                elif entry.type == "file":
+                    await self.push_file(
+                        instance, entry.path, entry.content, uid=entry.uid,
+                        gid=entry.gid, mode=entry.mode or "0644",
+                    )
+                else:
+                    await self.create_symlink(
+                        instance, entry.path, entry.content, uid=entry.uid,
+                        gid=entry.gid,
+                    )
+            except IncusError as e:
+                statuses.append(FileTreeStatus(path=entry.path, ok=False, error=str(e)))
+            else:
+                statuses.append(FileTreeStatus(path=entry.path, ok=True))
+        return statuses
+
+    async def push_file(
+        self,
+        instance: str,
+        path: str,
+        content: str | bytes,
+        *,
+        uid: int = 0,
+        gid: int = 0,
+        mode: str = "0644",
+    ) -> None:
+        """Push a file to an instance.
+
+        Args:
+            instance: Instance name.
+            path: Absolute path inside the instance.
+            content: File content (str or bytes).
+            uid: File owner UID.
+            gid: File owner GID.
+            mode: File mode (octal string, e.g., "0644").
+        """
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+
+        client = await self._get_client()
+        response = await client.post(
+            f"/1.0/instances/{instance}/files",
+            params={"path": path},
+            headers={
+                "X-Incus-uid": str(uid),
+                "X-Incus-gid": str(gid),
+                "X-Incus-mode": mode,
+                "X-Incus-type": "file",
+                "X-Incus-write": "overwrite",
+                "Content-Type": "application/octet-stream",
+            },
+            content=content,
+        )
+
+        if response.status_code >= 400:
+            error_msg = f"Failed to push file {path}: {response.text}"
+            raise IncusError(error_msg, response.status_code) from None
+
+    async def create_symlink(
+        self,
+        instance: str,
+        path: str,
+        target: str,
+        *,
+        uid: int = 0,
+        gid: int = 0,
+    ) -> None:
+        """Create a symlink in an instance.
+
+        Args:
+            instance: Instance name.
+            path: Absolute path for the symlink.
+            target: Symlink target (what it points to).
+            uid: Symlink owner UID.
+            gid: Symlink owner GID.
+        """
+        client = await self._get_client()
+        response = await client.post(
+            f"/1.0/instances/{instance}/files",
+            params={"path": path},
+            headers={
+                "X-Incus-uid": str(uid),
+                "X-Incus-gid": str(gid),
+                "X-Incus-type": "symlink",
+            },
+            content=target.encode("utf-8"),
+        )
+
+        if response.status_code >= 400:
+            error_msg = f"Failed to create symlink {path}: {response.text}"
+            raise IncusError(error_msg, response.status_code) from None
+
+    async def mkdir(
+        self,
+        instance: str,
+        path: str,
+        *,
         uid: int = 0,
         gid: int = 0,
         mode: str = "0755",
@@ -554,42 +1633,130 @@ class IncusClient:
     # Instance configuration
     # -------------------------------------------------------------------------
 
-    async def patch_instance_config(
+    async def modify_instance(
         self,
         name: str,
-        config: dict[str, str],
+        *,
+        config: dict[str, str] | None = None,
+        devices: dict[str, dict[str, str]] | None = None,
     ) -> None:
-        """Patch instance configuration (merge with existing config).
+        """Merge config keys and devices into an instance in one request.
+
+        Uses ``PATCH /1.0/instances/{name}``, which merges the given keys
+        and devices into the instance server-side. Keys and devices not
+        named here are left alone, so no read or ETag is needed first.
 
         Args:
             name: Instance name.
             config: Config keys to add/update.
+            devices: Devices to add/replace, by device name.
+
+        Raises:
+            IncusError: If the update fails.
         """
-        # Get current instance to preserve all fields
-        instance = await self.get_instance(name)
-        current_config = instance.config or {}
-
-        # Merge new config into existing
-        merged_config = {**current_config, **config}
-
-        # Use PUT with merged config, preserving other fields
-        put_data = InstancePut(
-            architecture=instance.architecture,
-            config=merged_config,
-            description=instance.description,
-            devices=instance.devices,
-            ephemeral=instance.ephemeral,
-            profiles=instance.profiles,
+        if not config and not devices:
+            return
+        patch = InstancePut(
+            architecture=None,
+            config=config or None,
+            description=None,
+            devices=devices or None,
+            ephemeral=None,
+            profiles=None,
             restore=None,
-            stateful=instance.stateful,
+            stateful=None,
         )
+        try:
+            await self._request(
+                "PATCH",
+                f"/1.0/instances/{name}",
+                response_type=EmptyResponse,
+                json=patch.model_dump(exclude_none=True),
+            )
+        finally:
+            self._cache.invalidate(name)
 
-        await self._request(
-            "PUT",
-            f"/1.0/instances/{name}",
-            response_type=AsyncOperationResponse,
-            json=put_data.model_dump(exclude_none=True),
-        )
+    async def rewrite_instance(
+        self, name: str, rewrite: Callable[[Instance], InstancePut | None]
+    ) -> bool:
+        """Replace an instance's config, devices and profiles wholesale.
+
+        Unlike modify_instance(), this can drop config keys and devices.
+        The instance is read fresh, passed to ``rewrite`` and written back
+        with ``PUT /1.0/instances/{name}`` guarded by the ETag it was read
+        with; on a mismatch it is read and rewritten again.
+
+        Args:
+            name: Instance name.
+            rewrite: Builds the complete new instance from the current
+                one, or returns None to leave it alone.
+
+        Returns:
+            True if the instance was written.
+
+        Raises:
+            IncusError: If the update fails or keeps conflicting.
+        """
+        client = await self._get_client()
+        for attempt in range(_MODIFY_ATTEMPTS):
+            response = await client.get(f"/1.0/instances/{name}")
+            _raise_for_status(response)
+            put = rewrite(Instance.model_validate(response.json().get("metadata")))
+            if put is None:
+                return False
+            etag = response.headers.get("ETag")
+            try:
+                result = await self._request(
+                    "PUT",
+                    f"/1.0/instances/{name}",
+                    response_type=AsyncOperationResponse,
+                    json=put.model_dump(exclude_none=True),
+                    headers={"If-Match": etag} if etag else None,
+                )
+            except IncusError as e:
+                if e.code != 412 or attempt == _MODIFY_ATTEMPTS - 1:
+                    raise
+                logger.debug("Concurrent update of %s, retrying", name)
+                await asyncio.sleep(0.05 * (attempt + 1))
+                continue
+            finally:
+                self._cache.invalidate(name)
+
+            operation = result.metadata
+            if operation is not None and operation.id:
+                operation = await self.wait_operation(operation.id)
+                self._cache.invalidate(name)
+                if operation.status != "Success":
+                    raise IncusError(
+                        f"Update of {name} failed: {operation.err or operation.status}"
+                    )
+            return True
+        # The last attempt either returns or re-raises its conflict
+        raise AssertionError("unreachable")
+
+    def config_transaction(self, name: str) -> InstanceConfigTransaction:
+        """Start collecting config and device changes for an instance.
+
+        Args:
+            name: Instance name.
+
+        Returns:
+            Transaction to add changes to and flush() in one request.
+        """
+        return InstanceConfigTransaction(self, name)
+
+    async def patch_instance_config(
+        self,
+        name: str,
+        config: dict[str, str],
+    ) -> None:
+        """Patch instance configuration (merge with existing config).
+
+        Args:
+            name: Instance name.
+            config: Config keys to add/update.
+        """
+        await self.modify_instance(name, config=config)
 
     async def add_instance_device(
         self,
@@ -604,32 +1771,93 @@ class IncusClient:
             device_name: Name for the device.
             device_config: Device configuration (type, source, path, etc.).
         """
-        # Get current instance to preserve all fields
-        instance = await self.get_instance(name)
-        current_devices = instance.devices or {}
-
-        # Add/update the device
-        merged_devices = {**current_devices, device_name: device_config}
-
-        # Use PUT with merged devices, preserving other fields
-        put_data = InstancePut(
-            architecture=instance.architecture,
-            config=instance.config,
-            description=instance.description,
-            devices=merged_devices,
-            ephemeral=instance.ephemeral,
-            profiles=instance.profiles,
-            restore=None,
-            stateful=instance.stateful,
+        await self.modify_instance(name, devices={device_name: device_config})
+
+    # -------------------------------------------------------------------------
+    # Image operations
+    # -------------------------------------------------------------------------
+
+    async def list_images(self) -> list[Image]:
+        """List all images in the local image store.
+
+        Returns:
+            List of Image objects (including cached remote images).
+        """
+        result = await self._request(
+            "GET", "/1.0/images?recursion=1", response_type=ImageList
         )
+        return result.root
 
-        await self._request(
-            "PUT",
-            f"/1.0/instances/{name}",
+    async def pull_image(
+        self,
+        source: ImagesPostSource,
+        *,
+        auto_update: bool = True,
+        wait: bool = False,
+    ) -> Operation:
+        """Download a remote image into the local image store.
+
+        Args:
+            source: Remote image to pull (``type="image"``, ``mode="pull"``).
+            auto_update: Let Incus keep the image up to date.
+            wait: If True, wait for the operation to complete.
+
+        Returns:
+            Operation with status info.
+        """
+        request = ImagesPost(
+            aliases=None,
+            auto_update=auto_update,
+            compression_algorithm=None,
+            expires_at=None,
+            filename=None,
+            format=None,
+            profiles=None,
+            properties=None,
+            public=None,
+            source=source,
+        )
+        response = await self._request(
+            "POST", "/1.0/images",
             response_type=AsyncOperationResponse,
-            json=put_data.model_dump(exclude_none=True),
+            json=request.model_dump(exclude_none=True),
         )
 
+        operation = response.metadata
+        if operation is None:
+            raise IncusError("No operation metadata in response")
+
+        if wait and operation.id:
+            operation = await self.wait_operation(operation.id)
+
+        return operation
+
+    async def refresh_image(self, fingerprint: str, wait: bool = False) -> Operation:
+        """Ask Incus to check an auto-updating image for a newer build now.
+
+        A newer build replaces the local image in place.
+
+        Args:
+            fingerprint: Fingerprint of the local image.
+            wait: If True, wait for the operation to complete.
+
+        Returns:
+            Operation with status info.
+        """
+        response = await self._request(
+            "POST", f"/1.0/images/{fingerprint}/refresh",
+            response_type=AsyncOperationResponse,
+        )
+
+        operation = response.metadata
+        if operation is None:
+            raise IncusError("No operation metadata in response")
+
+        if wait and operation.id:
+            operation = await self.wait_operation(operation.id)
+
+        return operation
+
     # -------------------------------------------------------------------------
     # Storage pool operations
     # -------------------------------------------------------------------------
@@ -701,6 +1929,55 @@ class IncusClient:
             json=pool.model_dump(exclude_none=True),
         )
 
+    # -------------------------------------------------------------------------
+    # Profiles
+    # -------------------------------------------------------------------------
+
+    async def get_profile(self, name: str) -> Profile:
+        """Get a profile by name.
+
+        Args:
+            name: Profile name.
+
+        Returns:
+            Profile object.
+
+        Raises:
+            IncusError: If the profile does not exist (code 404).
+        """
+        return await self._request(
+            "GET", f"/1.0/profiles/{name}", response_type=Profile
+        )
+
+    async def create_profile(self, profile: ProfilesPost) -> None:
+        """Create a profile.
+
+        Args:
+            profile: Profile name, config and devices.
+        """
+        await self._request(
+            "POST", "/1.0/profiles",
+            response_type=EmptyResponse,
+            json=profile.model_dump(exclude_none=True),
+        )
+
+    async def update_profile(self, name: str, profile: ProfilePut) -> None:
+        """Replace a profile's config and devices.
+
+        Incus applies the change to every instance using the profile.
+
+        Args:
+            name: Profile name.
+            profile: New description, config and devices.
+        """
+        await self._request(
+            "PUT", f"/1.0/profiles/{name}",
+            response_type=EmptyResponse,
+            json=profile.model_dump(exclude_none=True),
+        )
+        # Expanded config of every instance using it changed
+        self._cache.invalidate_all()
+
     # -------------------------------------------------------------------------
     # Server configuration
     # -------------------------------------------------------------------------
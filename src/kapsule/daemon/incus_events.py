@@ -0,0 +1,335 @@
+# SPDX-FileCopyrightText: 2026 Lasath Fernando <devel@lasath.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Incus events stream over the Unix socket.
+
+Incus publishes lifecycle, operation and logging events on the
+``/1.0/events`` websocket. httpx has no websocket support, so this module
+carries a deliberately small RFC 6455 client: the daemon only ever needs
+to read text frames and answer pings on a single local connection.
+
+The IncusEventStream keeps one subscription open for the lifetime of
+the daemon, reconnecting with backoff when Incus restarts. Handlers are
+plain callables that receive each decoded Event; connect handlers run
+after every (re)connect so subscribers can resync state they may have
+missed while disconnected.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import contextlib
+import hashlib
+import logging
+import os
+import struct
+from collections.abc import Awaitable, Callable
+
+from pydantic import BaseModel, ValidationError
+
+from .models_generated import Event
+
+logger = logging.getLogger(__name__)
+
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+_OP_CONTINUATION = 0x0
+_OP_TEXT = 0x1
+_OP_BINARY = 0x2
+_OP_CLOSE = 0x8
+_OP_PING = 0x9
+_OP_PONG = 0xA
+
+EventHandler = Callable[[Event], None]
+ConnectHandler = Callable[[], Awaitable[None]]
+
+
+class WebSocketClosed(Exception):
+    """The websocket connection was closed."""
+
+    pass
+
+
+class LifecycleContext(BaseModel):
+    """Fields of a lifecycle event's context that Kapsule cares about."""
+
+    old_name: str | None = None
+
+
+class LifecycleEvent(BaseModel):
+    """Metadata of a ``lifecycle`` event."""
+
+    action: str = ""
+    source: str = ""
+    context: LifecycleContext | None = None
+
+
+class UnixWebSocket:
+    """Minimal client-side websocket over a Unix socket."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+
+    @classmethod
+    async def connect(cls, socket_path: str, path: str) -> UnixWebSocket:
+        """Open a websocket to ``path`` on the server behind ``socket_path``.
+
+        Args:
+            socket_path: Unix socket to connect to.
+            path: Request path including query string.
+
+        Returns:
+            Connected websocket.
+
+        Raises:
+            OSError: If the socket cannot be reached.
+            WebSocketClosed: If the server refuses the upgrade.
+        """
+        reader, writer = await asyncio.open_unix_connection(socket_path)
+        key = base64.b64encode(os.urandom(16)).decode("ascii")
+        request = (
+            f"GET {path} HTTP/1.1\r\n"
+            "Host: localhost\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\n"
+            "Sec-WebSocket-Version: 13\r\n"
+            "\r\n"
+        )
+        writer.write(request.encode("ascii"))
+        await writer.drain()
+
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError) as e:
+            writer.close()
+            raise WebSocketClosed("Connection closed during handshake") from e
+
+        lines = head.decode("latin-1").split("\r\n")
+        status = lines[0].split(" ", 2)
+        headers: dict[str, str] = {}
+        for line in lines[1:]:
+            if ":" in line:
+                hname, _, hvalue = line.partition(":")
+                headers[hname.strip().lower()] = hvalue.strip()
+
+        expected = base64.b64encode(
+            hashlib.sha1((key + _WS_GUID).encode("ascii")).digest()
+        ).decode("ascii")
+        if len(status) < 2 or status[1] != "101" or (
+            headers.get("sec-websocket-accept") != expected
+        ):
+            writer.close()
+            raise WebSocketClosed(f"Websocket upgrade refused: {lines[0]}")
+
+        return cls(reader, writer)
+
+    async def _send(self, opcode: int, payload: bytes = b"") -> None:
+        """Send a single masked frame (clients must mask)."""
+        header = bytearray([0x80 | opcode])
+        length = len(payload)
+        if length < 126:
+            header.append(0x80 | length)
+        elif length < 1 << 16:
+            header.append(0x80 | 126)
+            header += struct.pack("!H", length)
+        else:
+            header.append(0x80 | 127)
+            header += struct.pack("!Q", length)
+        mask = os.urandom(4)
+        masked = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        self._writer.write(bytes(header) + mask + masked)
+        await self._writer.drain()
+
+    async def _read_frame(self) -> tuple[bool, int, bytes]:
+        """Read one frame; returns (fin, opcode, payload)."""
+        first, second = await self._reader.readexactly(2)
+        fin = bool(first & 0x80)
+        opcode = first & 0x0F
+        length = second & 0x7F
+        if length == 126:
+            (length,) = struct.unpack("!H", await self._reader.readexactly(2))
+        elif length == 127:
+            (length,) = struct.unpack("!Q", await self._reader.readexactly(8))
+        mask = await self._reader.readexactly(4) if second & 0x80 else b""
+        payload = await self._reader.readexactly(length)
+        if mask:
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        return fin, opcode, payload
+
+    async def recv(self) -> bytes:
+        """Receive the next complete data message.
+
+        Control frames are handled transparently.
+
+        Raises:
+            WebSocketClosed: When the peer closes the connection.
+        """
+        message = bytearray()
+        while True:
+            try:
+                fin, opcode, payload = await self._read_frame()
+            except (asyncio.IncompleteReadError, ConnectionError) as e:
+                raise WebSocketClosed("Connection lost") from e
+
+            if opcode == _OP_PING:
+                try:
+                    await self._send(_OP_PONG, payload)
+                except ConnectionError as e:
+                    raise WebSocketClosed("Connection lost") from e
+                continue
+            if opcode == _OP_PONG:
+                continue
+            if opcode == _OP_CLOSE:
+                with contextlib.suppress(ConnectionError):
+                    await self._send(_OP_CLOSE, payload[:2])
+                raise WebSocketClosed("Closed by peer")
+            if opcode in (_OP_TEXT, _OP_BINARY, _OP_CONTINUATION):
+                message += payload
+                if fin:
+                    return bytes(message)
+
+    async def close(self) -> None:
+        """Close the connection."""
+        with contextlib.suppress(ConnectionError, RuntimeError):
+            await self._send(_OP_CLOSE, struct.pack("!H", 1000))
+        self._writer.close()
+        with contextlib.suppress(ConnectionError):
+            await self._writer.wait_closed()
+
+
+class IncusEventStream:
+    """Long-lived subscription to the Incus events websocket."""
+
+    def __init__(
+        self,
+        socket_path: str,
+        *,
+        event_types: tuple[str, ...] = ("lifecycle", "operation"),
+        max_backoff: float = 30.0,
+    ):
+        """Initialize the stream.
+
+        Args:
+            socket_path: Path to the Incus Unix socket.
+            event_types: Event types to subscribe to.
+            max_backoff: Upper bound for the reconnect delay in seconds.
+        """
+        self._socket_path = socket_path
+        self._path = f"/1.0/events?type={','.join(event_types)}"
+        self._max_backoff = max_backoff
+        self._handlers: list[EventHandler] = []
+        self._connect_handlers: list[ConnectHandler] = []
+        self._disconnect_handlers: list[Callable[[], None]] = []
+        self._task: asyncio.Task[None] | None = None
+        self._ws: UnixWebSocket | None = None
+        self._connected = asyncio.Event()
+
+    @property
+    def connected(self) -> bool:
+        """Whether the stream is currently connected."""
+        return self._connected.is_set()
+
+    async def wait_connected(self) -> None:
+        """Wait until the stream is connected and resync handlers ran."""
+        await self._connected.wait()
+
+    def add_handler(self, handler: EventHandler) -> None:
+        """Register a callable invoked for every event."""
+        self._handlers.append(handler)
+
+    def add_connect_handler(self, handler: ConnectHandler) -> None:
+        """Register a coroutine run after every (re)connect."""
+        self._connect_handlers.append(handler)
+
+    def add_disconnect_handler(self, handler: Callable[[], None]) -> None:
+        """Register a callable invoked whenever the connection drops."""
+        self._disconnect_handlers.append(handler)
+
+    def start(self) -> None:
+        """Start the background subscription task."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="incus-events")
+
+    async def stop(self) -> None:
+        """Stop the subscription and close the connection."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _run(self) -> None:
+        """Connect, dispatch events and reconnect on failure."""
+        backoff = 1.0
+        while True:
+            try:
+                self._ws = await UnixWebSocket.connect(self._socket_path, self._path)
+            except (OSError, WebSocketClosed) as e:
+                logger.warning("Incus events connection failed: %s", e)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self._max_backoff)
+                continue
+
+            logger.info("Subscribed to Incus events")
+            backoff = 1.0
+            reader = asyncio.create_task(self._read_loop(self._ws))
+            try:
+                for connect_handler in self._connect_handlers:
+                    try:
+                        await connect_handler()
+                    except Exception:
+                        logger.exception("Incus events connect handler failed")
+                self._connected.set()
+                await reader
+            except (WebSocketClosed, OSError) as e:
+                logger.warning("Incus events stream closed: %s", e)
+            except Exception:
+                logger.exception("Incus events stream failed")
+            finally:
+                reader.cancel()
+                with contextlib.suppress(asyncio.CancelledError, Exception):
+                    await reader
+                self._connected.clear()
+                for disconnect_handler in self._disconnect_handlers:
+                    disconnect_handler()
+                await self._ws.close()
+                self._ws = None
+
+            await asyncio.sleep(backoff)
+
+    async def _read_loop(self, ws: UnixWebSocket) -> None:
+        """Read and dispatch events until the connection closes."""
+        while True:
+            payload = await ws.recv()
+            try:
+                event = Event.model_validate_json(payload)
+            except ValidationError:
+                logger.debug("Ignoring malformed Incus event: %r", payload[:200])
+                continue
+            for handler in self._handlers:
+                try:
+                    handler(event)
+                except Exception:
+                    logger.exception("Incus event handler failed")
+
+
+def instance_name_from_url(url: str) -> str | None:
+    """Extract the instance name from an API URL.
+
+    Args:
+        url: URL such as ``/1.0/instances/foo`` or
+            ``/1.0/instances/foo/snapshots/snap0?project=default``.
+
+    Returns:
+        The instance name, or None if the URL is not an instance URL.
+    """
+    path = url.split("?", 1)[0]
+    prefix = "/1.0/instances/"
+    if not path.startswith(prefix):
+        return None
+    name = path[len(prefix):].split("/", 1)[0]
+    return name or None
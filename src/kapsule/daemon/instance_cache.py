@@ -0,0 +1,157 @@
+# SPDX-FileCopyrightText: 2026 Lasath Fernando <devel@lasath.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""In-memory index of Incus instances.
+
+The index is fed by the Incus events stream (see ``incus_events``) and
+lets the IncusClient answer instance queries without a round trip to
+Incus. It is only authoritative while the stream is connected: on
+disconnect every lookup falls back to the REST API until a full resync
+has completed.
+
+Entries touched by an event (or by one of our own writes) are marked
+dirty until they have been re-fetched, so readers never see data that
+is older than the last change Incus told us about.
+"""
+
+from __future__ import annotations
+
+from .models_generated import Instance
+
+
+class InstanceCache:
+    """Index of instances keyed by name."""
+
+    def __init__(self) -> None:
+        self._instances: dict[str, Instance] = {}
+        self._dirty: set[str] = set()
+        self._live = False
+        # Bumped on every invalidation so a fetch that raced with an
+        # event can tell that its result is already stale. Each name
+        # remembers the generation at which it was last invalidated.
+        self._generation = 0
+        self._name_generation: dict[str, int] = {}
+
+    # -------------------------------------------------------------------------
+    # State
+    # -------------------------------------------------------------------------
+
+    @property
+    def live(self) -> bool:
+        """Whether the index is in sync with Incus."""
+        return self._live
+
+    @property
+    def generation(self) -> int:
+        """Global invalidation counter."""
+        return self._generation
+
+    def name_generation(self, name: str) -> int:
+        """Generation at which ``name`` was last invalidated."""
+        return self._name_generation.get(name, 0)
+
+    def dirty_names(self) -> set[str]:
+        """Names whose entries are waiting to be re-fetched."""
+        return set(self._dirty)
+
+    def mark_stale(self) -> None:
+        """Stop serving from the index (e.g. the events stream dropped)."""
+        self._live = False
+
+    # -------------------------------------------------------------------------
+    # Lookups
+    # -------------------------------------------------------------------------
+
+    def is_authoritative(self, name: str) -> bool:
+        """Whether the index can answer for ``name`` without asking Incus.
+
+        This is also true for names that are not in the index at all: while
+        live, a missing entry means the instance does not exist.
+        """
+        return self._live and name not in self._dirty
+
+    def get(self, name: str) -> Instance | None:
+        """Get a cached instance, or None if it is not indexed."""
+        return self._instances.get(name)
+
+    def snapshot(self) -> list[Instance] | None:
+        """List all cached instances, or None if the index can't answer."""
+        if not self._live or self._dirty:
+            return None
+        return list(self._instances.values())
+
+    # -------------------------------------------------------------------------
+    # Updates
+    # -------------------------------------------------------------------------
+
+    def replace_all(self, instances: list[Instance], generation: int) -> set[str]:
+        """Replace the whole index after a full listing and go live.
+
+        Instances invalidated while the listing was in flight stay dirty
+        so they are re-fetched before being served.
+
+        Args:
+            instances: Result of a ``recursion=1`` listing.
+            generation: Value of ``generation`` when the listing started.
+
+        Returns:
+            Names that still need to be re-fetched.
+        """
+        self._instances = {i.name: i for i in instances if i.name}
+        self._dirty = {
+            name for name, gen in self._name_generation.items() if gen > generation
+        }
+        self._live = True
+        return set(self._dirty)
+
+    def store(self, instance: Instance, generation: int) -> bool:
+        """Store a freshly fetched instance.
+
+        Args:
+            instance: Instance fetched from Incus.
+            generation: Value of ``name_generation`` when the fetch started.
+
+        Returns:
+            True if the entry was updated.
+        """
+        name = instance.name
+        if not name or generation != self.name_generation(name):
+            return False
+        self._instances[name] = instance
+        self._dirty.discard(name)
+        return True
+
+    def invalidate(self, name: str) -> None:
+        """Mark an instance as changed; it must be re-fetched before use."""
+        self._generation += 1
+        self._name_generation[name] = self._generation
+        self._dirty.add(name)
+
+    def invalidate_all(self) -> None:
+        """Mark every indexed instance as changed (e.g. a profile was edited)."""
+        for name in list(self._instances):
+            self.invalidate(name)
+
+    def remove(self, name: str) -> None:
+        """Drop an instance that Incus reported as deleted."""
+        self._generation += 1
+        self._name_generation[name] = self._generation
+        self._instances.pop(name, None)
+        self._dirty.discard(name)
+
+    def forget(self, name: str, generation: int) -> bool:
+        """Record that a fetch found no such instance.
+
+        Args:
+            name: Instance name.
+            generation: Value of ``name_generation`` when the fetch started.
+
+        Returns:
+            True if the entry was dropped.
+        """
+        if generation != self.name_generation(name):
+            return False
+        self._instances.pop(name, None)
+        self._dirty.discard(name)
+        return True
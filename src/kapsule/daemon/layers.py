@@ -0,0 +1,348 @@
+# SPDX-FileCopyrightText: 2026 Lasath Fernando <devel@lasath.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Cached package-set layers.
+
+A create that asks for extra packages has to run the package manager,
+which usually takes far longer than the create itself. The same
+development setups get created over and over, so the daemon keeps the
+result: after such a create, a stopped container with the image's
+fixups and the packages installed is built in the background and
+snapshotted, exactly like a golden template. The next create with the
+same image build and package set copies that snapshot instead.
+
+Layers are keyed by the fingerprint of the image build they were made
+from and the sorted package list, and named ``kapsule-layer-<digest>``
+(hidden from listings). An updated image therefore simply stops
+matching its old layers. Every hit stamps the layer with the time it
+was used; after each build, least recently used layers are deleted
+until the disk space they use fits within the configured budget and
+their number within a hard cap.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import hashlib
+import logging
+import time
+
+from .images import copy_source, parse_image_source
+from .incus_client import IncusClient, IncusError
+from .models_generated import InstanceSource
+from .provisioning import install_packages
+from .templates import (
+    TEMPLATE_SNAPSHOT,
+    PrepareCallback,
+    TemplateManager,
+    build_golden,
+    discard_instance,
+)
+
+logger = logging.getLogger(__name__)
+
+LAYER_PREFIX = "kapsule-layer-"
+
+# Recorded on the layer after the snapshot is taken, so copies made from
+# the snapshot don't inherit them
+LAYER_IMAGE_KEY = "user.kapsule.layer.image"
+LAYER_FINGERPRINT_KEY = "user.kapsule.layer.fingerprint"
+LAYER_PACKAGES_KEY = "user.kapsule.layer.packages"
+LAYER_LAST_USED_KEY = "user.kapsule.layer.last-used"
+
+# Evict beyond this many layers even if the budget isn't reached (disk
+# usage isn't reported on every storage driver)
+_MAX_LAYERS = 16
+
+# Suffix of a layer that is being built
+_BUILDING_SUFFIX = "-next"
+
+
+def layer_name(fingerprint: str, packages: list[str]) -> str:
+    """Instance name of the layer for an image build and package set.
+
+    Args:
+        fingerprint: Fingerprint of the image build.
+        packages: Normalized (sorted, distinct) package names.
+
+    Returns:
+        A valid instance name, unique per key.
+    """
+    key = "\n".join([fingerprint, *packages])
+    return f"{LAYER_PREFIX}{hashlib.sha256(key.encode()).hexdigest()[:16]}"
+
+
+def is_layer(name: str) -> bool:
+    """Whether an instance is a package layer (or one being built)."""
+    return name.startswith(LAYER_PREFIX)
+
+
+class LayerManager:
+    """Builds, serves and evicts package-set layers."""
+
+    def __init__(
+        self,
+        incus: IncusClient,
+        templates: TemplateManager,
+        prepare: PrepareCallback,
+        *,
+        profiles: list[str],
+        budget_bytes: int,
+    ):
+        """Initialize the manager.
+
+        Args:
+            incus: Incus client.
+            templates: Template manager; layers are built on top of an
+                image's template when it has one, and only used where
+                templates are.
+            prepare: Applies image fixups to a container created straight
+                from an image.
+            profiles: Profiles layers are created with.
+            budget_bytes: Disk space layers may use (0 disables layers).
+        """
+        self._incus = incus
+        self._templates = templates
+        self._prepare = prepare
+        self._profiles = profiles
+        self._budget = budget_bytes
+        self._builds: dict[tuple[str, tuple[str, ...]], asyncio.Task[None]] = {}
+
+    async def stop(self) -> None:
+        """Stop any builds in progress."""
+        tasks = list(self._builds.values())
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    async def enabled(self) -> bool:
+        """Whether layers are used."""
+        return self._budget > 0 and await self._templates.enabled()
+
+    # -------------------------------------------------------------------------
+    # Serving
+    # -------------------------------------------------------------------------
+
+    async def source_for(
+        self, image: str, packages: list[str]
+    ) -> InstanceSource | None:
+        """Get a copy source for an image and package set if a layer is ready.
+
+        Args:
+            image: Image string.
+            packages: Normalized package names.
+
+        Returns:
+            InstanceSource copying the layer's golden snapshot, or None if
+            there is no layer for the image's current build (the caller
+            should install the packages itself and call schedule_build()).
+        """
+        if not packages or not await self.enabled():
+            return None
+        fingerprint = await self._current_fingerprint(image)
+        if not fingerprint:
+            return None
+        name = layer_name(fingerprint, packages)
+        try:
+            instance = await self._incus.get_instance(name)
+        except IncusError:
+            return None
+        if (instance.config or {}).get(LAYER_FINGERPRINT_KEY) != fingerprint:
+            # Only a complete layer carries its fingerprint key
+            return None
+
+        with contextlib.suppress(IncusError):
+            await self._incus.patch_instance_config(
+                name, {LAYER_LAST_USED_KEY: str(int(time.time()))}
+            )
+        return copy_source(f"{name}/{TEMPLATE_SNAPSHOT}")
+
+    async def _current_fingerprint(self, image: str) -> str:
+        """Fingerprint a create from this image would start from.
+
+        That is the newest cached build of the image, or, with no cached
+        build, whatever the image's template was built from.
+        """
+        source = parse_image_source(image)
+        if source is None:
+            return ""
+        newest = ("", "")
+        for cached in await self._incus.list_images():
+            update = cached.update_source
+            if (
+                update is None
+                or update.server != source.server
+                or update.alias != source.alias
+            ):
+                continue
+            stamp = cached.uploaded_at.isoformat() if cached.uploaded_at else ""
+            if stamp >= newest[0]:
+                newest = (stamp, cached.fingerprint or "")
+        if newest[1]:
+            return newest[1]
+
+        template = await self._templates.source_for(image)
+        if template is None or not template.source:
+            return ""
+        instance = await self._incus.get_instance(template.source.split("/")[0])
+        fingerprint: str = (instance.config or {}).get("volatile.base_image", "")
+        return fingerprint
+
+    # -------------------------------------------------------------------------
+    # Building
+    # -------------------------------------------------------------------------
+
+    def schedule_build(self, image: str, packages: list[str]) -> None:
+        """Build the layer for an image and package set in the background.
+
+        Does nothing if a build for the same key is already running.
+
+        Args:
+            image: Image string.
+            packages: Normalized package names.
+        """
+        key = (image, tuple(packages))
+        task = self._builds.get(key)
+        if task is not None and not task.done():
+            return
+        task = asyncio.create_task(self._build_logged(image, packages))
+        self._builds[key] = task
+        task.add_done_callback(lambda _t: self._builds.pop(key, None))
+
+    async def _build_logged(self, image: str, packages: list[str]) -> None:
+        """Build a layer, logging instead of raising on failure."""
+        if not packages or not await self.enabled():
+            return
+        try:
+            await self.build(image, packages)
+        except (IncusError, RuntimeError) as e:
+            logger.warning(
+                "Failed to build package layer for %s (%s): %s",
+                image, " ".join(packages), e,
+            )
+
+    async def build(self, image: str, packages: list[str]) -> None:
+        """Build the layer for an image and package set, then evict.
+
+        Args:
+            image: Image string.
+            packages: Normalized package names.
+
+        Raises:
+            IncusError: If an Incus call fails.
+            RuntimeError: If the image can't be resolved, the packages
+                can't be installed or an operation does not succeed.
+        """
+        source = await self._templates.source_for(image)
+        from_template = source is not None
+        if source is None:
+            source = parse_image_source(image)
+        if source is None:
+            raise RuntimeError(f"Invalid image format: {image}")
+
+        async def setup(name: str) -> None:
+            if not from_template:
+                await self._prepare(name)
+            result = await install_packages(self._incus, name, packages)
+            if result.exit_code != 0:
+                detail = result.stderr.strip().splitlines()[-1:] or [
+                    f"exit code {result.exit_code}"
+                ]
+                raise RuntimeError(f"Package install failed: {detail[0]}")
+
+        expected = layer_name(await self._current_fingerprint(image), packages)
+        building = f"{expected}{_BUILDING_SUFFIX}"
+        logger.info("Building package layer for %s: %s", image, " ".join(packages))
+
+        # Leftover from an interrupted build
+        await discard_instance(self._incus, building)
+
+        try:
+            fingerprint = await build_golden(
+                self._incus,
+                building,
+                source,
+                profiles=self._profiles,
+                description=f"Kapsule package layer for {image}",
+                setup=setup,
+            )
+            await self._incus.patch_instance_config(building, {
+                LAYER_IMAGE_KEY: image,
+                LAYER_FINGERPRINT_KEY: fingerprint,
+                LAYER_PACKAGES_KEY: " ".join(packages),
+                LAYER_LAST_USED_KEY: str(int(time.time())),
+            })
+
+            name = layer_name(fingerprint, packages)
+            await discard_instance(self._incus, name)
+            op = await self._incus.rename_instance(building, name, wait=True)
+            if op.status != "Success":
+                raise RuntimeError(f"Rename failed: {op.err or op.status}")
+        except (IncusError, RuntimeError, asyncio.CancelledError):
+            with contextlib.suppress(IncusError, RuntimeError):
+                await discard_instance(self._incus, building)
+            raise
+
+        logger.info("Package layer %s ready (image %s)", name, fingerprint[:12])
+        await self.evict(keep=name)
+
+    # -------------------------------------------------------------------------
+    # Eviction
+    # -------------------------------------------------------------------------
+
+    async def evict(self, keep: str = "") -> list[str]:
+        """Delete least recently used layers until the rest fit the budget.
+
+        Args:
+            keep: Layer that is never evicted (the one just built).
+
+        Returns:
+            Names of the deleted layers.
+
+        Raises:
+            IncusError: If an Incus call fails.
+            RuntimeError: If a delete does not succeed.
+        """
+        layers: list[tuple[int, str]] = []
+        for instance in await self._incus.list_instances():
+            config = instance.config or {}
+            name = instance.name or ""
+            if not is_layer(name) or LAYER_FINGERPRINT_KEY not in config:
+                # Not a layer, or one still being built
+                continue
+            try:
+                last_used = int(config.get(LAYER_LAST_USED_KEY, "0"))
+            except ValueError:
+                last_used = 0
+            layers.append((last_used, name))
+        layers.sort()
+
+        sizes = {name: await self._disk_usage(name) for _used, name in layers}
+        total = sum(sizes.values())
+        count = len(layers)
+
+        evicted: list[str] = []
+        for _used, name in layers:
+            if total <= self._budget and count <= _MAX_LAYERS:
+                break
+            if name == keep:
+                continue
+            logger.info("Evicting package layer %s", name)
+            await discard_instance(self._incus, name)
+            total -= sizes[name]
+            count -= 1
+            evicted.append(name)
+        return evicted
+
+    async def _disk_usage(self, name: str) -> int:
+        """Root disk usage of an instance in bytes (0 if not reported)."""
+        try:
+            state = await self._incus.get_instance_state(name)
+        except IncusError:
+            return 0
+        root = (state.disk or {}).get("root")
+        return (root.usage or 0) if root is not None else 0
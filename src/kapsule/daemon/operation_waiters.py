@@ -0,0 +1,100 @@
+# SPDX-FileCopyrightText: 2026 Lasath Fernando <devel@lasath.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Registry of callers waiting on Incus background operations.
+
+Instead of holding one ``/1.0/operations/{id}/wait`` long-poll open per
+operation, waiters register a future here and the single events stream
+resolves them as ``operation`` events arrive. Any number of operations
+can be in flight without tying up HTTP connections.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+
+from .models_generated import Operation
+
+OperationCallback = Callable[[Operation], None]
+
+# Incus status codes below 200 are pending/running states
+_FINAL_STATUS_CODE = 200
+
+
+def is_operation_final(op: Operation) -> bool:
+    """Whether an operation has reached a terminal state.
+
+    Args:
+        op: Operation as reported by Incus.
+
+    Returns:
+        True for success, failure and cancelled operations.
+    """
+    if op.status_code is not None:
+        return op.status_code.root >= _FINAL_STATUS_CODE
+    return op.status in ("Success", "Failure", "Cancelled")
+
+
+class _Waiter:
+    """A single registered waiter."""
+
+    def __init__(self, on_update: OperationCallback | None):
+        self.future: asyncio.Future[Operation] = (
+            asyncio.get_running_loop().create_future()
+        )
+        self.on_update = on_update
+
+
+class OperationWaiters:
+    """Futures for pending Incus operations, resolved from events."""
+
+    def __init__(self) -> None:
+        self._waiters: dict[str, list[_Waiter]] = {}
+
+    def register(
+        self,
+        operation_id: str,
+        on_update: OperationCallback | None = None,
+    ) -> asyncio.Future[Operation]:
+        """Register interest in an operation.
+
+        Args:
+            operation_id: Operation UUID.
+            on_update: Called with every non-final update of the operation.
+
+        Returns:
+            Future resolved with the operation once it is final.
+        """
+        waiter = _Waiter(on_update)
+        self._waiters.setdefault(operation_id, []).append(waiter)
+        return waiter.future
+
+    def discard(self, operation_id: str, future: asyncio.Future[Operation]) -> None:
+        """Remove a waiter (e.g. after it timed out)."""
+        waiters = self._waiters.get(operation_id)
+        if not waiters:
+            return
+        waiters[:] = [w for w in waiters if w.future is not future]
+        if not waiters:
+            del self._waiters[operation_id]
+
+    def pending(self) -> list[str]:
+        """IDs of operations that still have waiters."""
+        return list(self._waiters)
+
+    def dispatch(self, op: Operation) -> None:
+        """Deliver an operation update to its waiters."""
+        if not op.id or op.id not in self._waiters:
+            return
+        final = is_operation_final(op)
+        for waiter in list(self._waiters[op.id]):
+            if waiter.future.done():
+                continue
+            if final:
+                waiter.future.set_result(op)
+            elif waiter.on_update is not None:
+                waiter.on_update(op)
+        if final:
+            del self._waiters[op.id]
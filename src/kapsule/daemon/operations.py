@@ -571,8 +571,12 @@ def operation(
             # Build description from template
             desc = description.format(**kwargs)
 
-            # Get target from kwargs
-            target = str(kwargs.get(target_param, ""))
+            # Get target from kwargs; bulk operations target a list
+            target_value = kwargs.get(target_param, "")
+            if isinstance(target_value, list):
+                target = ",".join(str(t) for t in target_value)
+            else:
+                target = str(target_value)
 
             # Create the operation D-Bus interface
             op_interface = OperationInterface(op_id, operation_type, desc, target)
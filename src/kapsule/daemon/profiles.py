@@ -0,0 +1,361 @@
+# SPDX-FileCopyrightText: 2026 Lasath Fernando <devel@lasath.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Incus profiles carrying the settings shared by every Kapsule container.
+
+Rather than an inline copy of the base config and devices in every
+instance, containers reference the daemon-managed ``kapsule-base``
+profile, plus ``kapsule-session`` in session mode. Changing a base
+setting is then a single profile write that Incus applies to the whole
+fleet.
+
+The profiles record the version of their content (bump PROFILE_VERSION
+with every change to the code below). At startup the daemon rewrites
+any profile whose content differs from what this module and the daemon
+config produce, then migrates containers created before the profiles
+existed: the inline copies of the shared settings are dropped and the
+profiles referenced instead, which leaves each container's effective
+configuration unchanged.
+
+Because shared settings no longer live in ``Instance.config``, code
+reading them has to use effective_config().
+
+The host filesystem is exposed at ``/.kapsule/host``. In the default
+``full`` hostfs mode that is a recursive rslave bind of the host's
+``/``: every host mount is replicated into every container, so each
+one's mount table grows with the host's and every host mount or
+unmount has to propagate to all of them. The ``scoped`` mode only binds
+what Kapsule itself uses (``/run/user``, ``/tmp/.X11-unix`` and the
+kapsule-dbus-mux binary) plus the paths listed in ``hostfs_paths``, at
+the same locations under ``/.kapsule/host``. Changing the mode rewrites
+``kapsule-base`` on the next daemon start, which Incus applies to the
+running containers.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import re
+
+from .incus_client import IncusClient, IncusError
+from .models_generated import Instance, InstancePut, ProfilePut, ProfilesPost
+
+logger = logging.getLogger(__name__)
+
+BASE_PROFILE = "kapsule-base"
+SESSION_PROFILE = "kapsule-session"
+
+PROFILE_VERSION_KEY = "user.kapsule.profile-version"
+# Bump whenever the content of a profile below changes
+PROFILE_VERSION = 1
+
+SESSION_MODE_KEY = "user.kapsule.session-mode"
+
+HOSTFS_PATH = "/.kapsule/host"
+# Host paths Kapsule itself reaches through HOSTFS_PATH
+DBUS_MUX_HOST_BIN = "/usr/lib/kapsule/kapsule-dbus-mux"
+SCOPED_HOSTFS_DIRS = {
+    # Runtime dirs: D-Bus, Wayland, PipeWire, ... sockets
+    "hostfs-run-user": "/run/user",
+    "hostfs-x11": "/tmp/.X11-unix",
+}
+
+
+def base_config() -> dict[str, str]:
+    """Config shared by every Kapsule container."""
+    return {
+        # In a future version, we might investigate what
+        # we can do with unprivileged containers.
+        "security.privileged": "true",
+        "security.nesting": "true",
+        # Use host networking
+        "raw.lxc": "lxc.net.0.type=none\n",
+    }
+
+
+def _hostfs_bind(source: str, *, required: bool = True) -> dict[str, str]:
+    device = {
+        "type": "disk",
+        "source": source,
+        "path": HOSTFS_PATH + source,
+        "propagation": "rslave",
+        "recursive": "true",
+        "shift": "false",
+    }
+    if not required:
+        device["required"] = "false"
+    return device
+
+
+def _scoped_hostfs_devices(
+    extra_paths: tuple[str, ...],
+) -> dict[str, dict[str, str]]:
+    devices = {
+        name: _hostfs_bind(source, required=source != "/tmp/.X11-unix")
+        for name, source in SCOPED_HOSTFS_DIRS.items()
+    }
+    # A plain file bind; absent on hosts without the mux installed
+    devices["hostfs-dbus-mux"] = {
+        "type": "disk",
+        "source": DBUS_MUX_HOST_BIN,
+        "path": HOSTFS_PATH + DBUS_MUX_HOST_BIN,
+        "required": "false",
+        "shift": "false",
+    }
+    bound = {*SCOPED_HOSTFS_DIRS.values(), DBUS_MUX_HOST_BIN}
+    for source in extra_paths:
+        if source in bound:
+            continue
+        bound.add(source)
+        name = "hostfs-" + re.sub(r"[^A-Za-z0-9]+", "-", source).strip("-")
+        while name in devices:
+            name += "-"
+        devices[name] = _hostfs_bind(source)
+    return devices
+
+
+def base_devices(
+    hostfs_mode: str = "full", hostfs_paths: tuple[str, ...] = ()
+) -> dict[str, dict[str, str]]:
+    """Devices shared by every Kapsule container.
+
+    Args:
+        hostfs_mode: ``full`` to mount the host's whole ``/``, ``scoped``
+            for only the paths Kapsule needs.
+        hostfs_paths: Extra absolute host paths to bind in scoped mode.
+    """
+    devices: dict[str, dict[str, str]] = {
+        # Root disk - required for container storage
+        "root": {
+            "type": "disk",
+            "path": "/",
+            "pool": "default",
+        },
+        # GPU passthrough
+        "gpu": {
+            "type": "gpu",
+        },
+    }
+    if hostfs_mode == "scoped":
+        devices.update(_scoped_hostfs_devices(hostfs_paths))
+    else:
+        # Mount the host filesystem at /.kapsule/host
+        devices["hostfs"] = {
+            "type": "disk",
+            "source": "/",
+            "path": HOSTFS_PATH,
+            "propagation": "rslave",
+            "recursive": "true",
+            "shift": "false",
+        }
+    return devices
+
+
+def session_config() -> dict[str, str]:
+    """Config added by session mode."""
+    return {SESSION_MODE_KEY: "true"}
+
+
+def profile_contents(
+    hostfs_mode: str = "full", hostfs_paths: tuple[str, ...] = ()
+) -> dict[str, ProfilePut]:
+    """The managed profiles, by name, at PROFILE_VERSION.
+
+    Args:
+        hostfs_mode: Host filesystem mode, see base_devices().
+        hostfs_paths: Extra host paths for scoped mode.
+    """
+    version = {PROFILE_VERSION_KEY: str(PROFILE_VERSION)}
+    return {
+        BASE_PROFILE: ProfilePut(
+            config={**base_config(), **version},
+            description="Kapsule: settings shared by every container",
+            devices=base_devices(hostfs_mode, hostfs_paths),
+        ),
+        SESSION_PROFILE: ProfilePut(
+            config={**session_config(), **version},
+            description="Kapsule: session mode containers",
+            devices={},
+        ),
+    }
+
+
+def profiles_for(session_mode: bool) -> list[str]:
+    """Profiles a new container should reference."""
+    return [BASE_PROFILE, SESSION_PROFILE] if session_mode else [BASE_PROFILE]
+
+
+def effective_config(instance: Instance) -> dict[str, str]:
+    """An instance's config with its profiles applied."""
+    return instance.expanded_config or instance.config or {}
+
+
+def migrated(instance: Instance) -> InstancePut | None:
+    """Rewrite a pre-profile container to reference the managed profiles.
+
+    Only instances carrying the complete inline base config are touched.
+    Inline copies identical to the profiles' settings are dropped; local
+    changes to a shared setting stay inline and keep overriding it.
+
+    Args:
+        instance: Instance as returned by Incus.
+
+    Returns:
+        The complete replacement instance, or None if there's nothing
+        to migrate.
+    """
+    profiles = instance.profiles or []
+    config = instance.config or {}
+    shared = base_config()
+    if BASE_PROFILE in profiles or any(
+        config.get(key) != value for key, value in shared.items()
+    ):
+        return None
+
+    session = config.get(SESSION_MODE_KEY) == "true"
+    if session:
+        shared.update(session_config())
+    # Pre-profile containers always had the full hostfs mount inline
+    devices = base_devices("full")
+    return InstancePut(
+        architecture=instance.architecture,
+        config={k: v for k, v in config.items() if k not in shared},
+        description=instance.description,
+        devices={
+            name: device for name, device in (instance.devices or {}).items()
+            if devices.get(name) != device
+        },
+        ephemeral=instance.ephemeral,
+        # Later profiles override earlier ones; keep any existing ones
+        # (e.g. "default") below Kapsule's
+        profiles=[*profiles, *profiles_for(session)],
+        restore=None,
+        stateful=instance.stateful,
+    )
+
+
+class ProfileManager:
+    """Keeps the managed profiles current and migrates old containers."""
+
+    def __init__(
+        self,
+        incus: IncusClient,
+        *,
+        hostfs_mode: str = "full",
+        hostfs_paths: tuple[str, ...] = (),
+    ):
+        """Initialize the manager.
+
+        Args:
+            incus: Incus client.
+            hostfs_mode: Host filesystem mode, see base_devices().
+            hostfs_paths: Extra host paths for scoped mode.
+        """
+        self._incus = incus
+        self._hostfs_mode = hostfs_mode
+        self._hostfs_paths = hostfs_paths
+        self._task: asyncio.Task[None] | None = None
+
+    # -------------------------------------------------------------------------
+    # Lifecycle
+    # -------------------------------------------------------------------------
+
+    def start(self) -> None:
+        """Migrate pre-profile containers in the background."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(
+                self._migrate_logged(), name="kapsule-profile-migrate"
+            )
+
+    async def stop(self) -> None:
+        """Stop a migration in progress."""
+        task = self._task
+        self._task = None
+        if task is not None:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    # -------------------------------------------------------------------------
+    # Profiles
+    # -------------------------------------------------------------------------
+
+    async def ensure(self) -> list[str]:
+        """Create missing profiles and rewrite outdated ones.
+
+        A profile is outdated when its version differs or its config or
+        devices no longer match what the daemon is configured for (e.g.
+        the hostfs mode was changed).
+
+        Returns:
+            Names of the profiles that were written.
+
+        Raises:
+            IncusError: If a profile can't be read or written.
+        """
+        written: list[str] = []
+        contents = profile_contents(self._hostfs_mode, self._hostfs_paths)
+        for name, content in contents.items():
+            try:
+                current = await self._incus.get_profile(name)
+            except IncusError as e:
+                if e.code != 404:
+                    raise
+                await self._incus.create_profile(ProfilesPost(
+                    config=content.config,
+                    description=content.description,
+                    devices=content.devices,
+                    name=name,
+                ))
+                logger.info("Created profile %s (version %d)", name, PROFILE_VERSION)
+                written.append(name)
+                continue
+            if (
+                (current.config or {}) == content.config
+                and (current.devices or {}) == content.devices
+            ):
+                continue
+            await self._incus.update_profile(name, content)
+            logger.info("Updated profile %s to version %d", name, PROFILE_VERSION)
+            written.append(name)
+        return written
+
+    # -------------------------------------------------------------------------
+    # Migration
+    # -------------------------------------------------------------------------
+
+    async def _migrate_logged(self) -> None:
+        try:
+            migrated_names = await self.migrate()
+        except IncusError as e:
+            logger.warning("Profile migration failed: %s", e)
+            return
+        if migrated_names:
+            logger.info(
+                "Moved %d container(s) to shared profiles", len(migrated_names)
+            )
+
+    async def migrate(self) -> list[str]:
+        """Move every pre-profile container over to the managed profiles.
+
+        Returns:
+            Names of the containers that were rewritten.
+
+        Raises:
+            IncusError: If the containers can't be listed.
+        """
+        done: list[str] = []
+        for instance in await self._incus.list_instances():
+            name = instance.name
+            if not name or migrated(instance) is None:
+                continue
+            try:
+                if await self._incus.rewrite_instance(name, migrated):
+                    logger.info("Container %s now uses shared profiles", name)
+                    done.append(name)
+            except IncusError as e:
+                logger.warning("Could not move %s to shared profiles: %s", name, e)
+        return done
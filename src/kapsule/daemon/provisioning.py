@@ -0,0 +1,240 @@
+# SPDX-FileCopyrightText: 2026 Lasath Fernando <devel@lasath.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""In-container provisioning scripts.
+
+Setting up a host user inside a container used to take one exec per
+step (getent, groupadd, useradd, loginctl, ...) plus a file push for the
+sudoers entry. Each exec pays Incus' process-spawn cost, so a first
+``kapsule enter`` spent most of its time in round trips.
+
+Instead, the whole setup is a single idempotent POSIX shell script run
+with one exec. Parameters are passed as positional arguments so nothing
+is ever interpolated into the script text. The script reports what it
+did as ``key=value`` lines on stdout, which are parsed into a
+UserProvisionResult for the caller to report from.
+"""
+
+from __future__ import annotations
+
+import re
+
+from pydantic import BaseModel
+
+from .incus_client import ExecResult, IncusClient
+
+# Package installs download and unpack; give them far longer than a
+# normal exec
+_PACKAGES_TIMEOUT = 1800.0
+
+# Names, versions and repo qualifiers as the supported package managers
+# spell them ("gcc", "libfoo-dev=1.2", "python3.12", "extra/vim")
+_PACKAGE_NAME = re.compile(r"[A-Za-z0-9][A-Za-z0-9+._:@/=<>~-]*")
+
+# Runs as: sh -c SCRIPT kapsule-provision USER UID GID HOME LINGER
+_USER_SCRIPT = r"""
+set -u
+user="$1"; uid="$2"; gid="$3"; home="$4"; linger="$5"
+
+report() { printf '%s=%s\n' "$1" "$2"; }
+
+existing=$(getent passwd "$uid" | cut -d: -f1)
+if [ -n "$existing" ] && [ "$existing" != "$user" ]; then
+    report previous_user "$existing"
+    if usermod -l "$user" -d "$home" -m "$existing"; then
+        report user renamed
+    else
+        report user failed
+    fi
+    if groupmod -n "$user" "$existing"; then
+        report group renamed
+    else
+        report group failed
+    fi
+else
+    if getent group "$user" >/dev/null; then
+        report group exists
+    elif groupadd -o -g "$gid" "$user"; then
+        report group created
+    else
+        report group failed
+    fi
+    if [ "$existing" = "$user" ]; then
+        report user exists
+    elif useradd -o -M -u "$uid" -g "$gid" -d "$home" -s /bin/bash "$user"; then
+        report user created
+    else
+        report user failed
+    fi
+fi
+
+sudoers="/etc/sudoers.d/$user"
+if mkdir -p /etc/sudoers.d \
+    && printf '%s ALL=(ALL) NOPASSWD:ALL\n' "$user" > "$sudoers.kapsule" \
+    && chown 0:0 "$sudoers.kapsule" \
+    && chmod 0440 "$sudoers.kapsule" \
+    && mv -f "$sudoers.kapsule" "$sudoers"; then
+    report sudo configured
+else
+    rm -f "$sudoers.kapsule"
+    report sudo failed
+fi
+
+if [ "$linger" != "1" ]; then
+    report linger skipped
+elif loginctl enable-linger "$user"; then
+    report linger enabled
+else
+    report linger failed
+fi
+"""
+
+# Runs as: sh -c SCRIPT kapsule-packages PACKAGE...
+_PACKAGES_SCRIPT = r"""
+set -eu
+if command -v apt-get >/dev/null; then
+    export DEBIAN_FRONTEND=noninteractive
+    apt-get update -q
+    apt-get install -y -q --no-install-recommends "$@"
+elif command -v dnf >/dev/null; then
+    dnf install -y -q "$@"
+elif command -v pacman >/dev/null; then
+    pacman -Sy --noconfirm --needed "$@"
+elif command -v zypper >/dev/null; then
+    zypper --non-interactive install "$@"
+elif command -v apk >/dev/null; then
+    apk add --no-cache "$@"
+else
+    echo "no supported package manager found" >&2
+    exit 127
+fi
+"""
+
+
+class UserProvisionResult(BaseModel):
+    """What the user provisioning script did.
+
+    Each step is one of ``created``, ``renamed``, ``exists``,
+    ``configured``, ``enabled``, ``skipped`` or ``failed``.
+    """
+
+    user: str = "failed"
+    group: str = "failed"
+    sudo: str = "failed"
+    linger: str = "failed"
+    previous_user: str = ""
+    exit_code: int = 0
+    # Whatever the script's commands printed on stderr
+    errors: str = ""
+
+    @classmethod
+    def parse(cls, exit_code: int, stdout: str, stderr: str) -> UserProvisionResult:
+        """Build a result from the script's output.
+
+        Steps the script never reported (e.g. because it could not run at
+        all) stay ``failed``.
+
+        Args:
+            exit_code: Exit code of the script.
+            stdout: ``key=value`` report lines.
+            stderr: Error output of the script.
+
+        Returns:
+            The parsed result.
+        """
+        fields: dict[str, str] = {}
+        for line in stdout.splitlines():
+            key, sep, value = line.partition("=")
+            if sep and key in cls.model_fields:
+                fields[key] = value.strip()
+        return cls.model_validate(
+            {**fields, "exit_code": exit_code, "errors": stderr.strip()}
+        )
+
+
+async def provision_user(
+    incus: IncusClient,
+    container_name: str,
+    *,
+    uid: int,
+    gid: int,
+    username: str,
+    container_home: str,
+    linger: bool,
+) -> UserProvisionResult:
+    """Create (or adopt) a user account in a container with one exec.
+
+    Creates the user and its primary group, or renames an account that
+    already owns ``uid``, grants passwordless sudo and optionally enables
+    systemd linger. Running it again on a provisioned container is a
+    no-op apart from rewriting the sudoers entry.
+
+    Args:
+        incus: Incus client.
+        container_name: Container name.
+        uid: User ID.
+        gid: Group ID.
+        username: Username.
+        container_home: Home directory inside the container.
+        linger: Whether to enable linger (session mode containers).
+
+    Returns:
+        Per-step outcome of the provisioning.
+
+    Raises:
+        IncusError: If the script could not be run at all.
+    """
+    result = await incus.exec(
+        container_name,
+        [
+            "sh", "-c", _USER_SCRIPT, "kapsule-provision",
+            username, str(uid), str(gid), container_home,
+            "1" if linger else "0",
+        ],
+    )
+    return UserProvisionResult.parse(result.exit_code, result.stdout, result.stderr)
+
+
+def normalize_packages(packages: list[str]) -> list[str]:
+    """Validate a package list and put it in canonical order.
+
+    Args:
+        packages: Package names as given by the user.
+
+    Returns:
+        The distinct names, sorted.
+
+    Raises:
+        ValueError: If a name could be mistaken for an option or contains
+            characters no package manager accepts.
+    """
+    for package in packages:
+        if not _PACKAGE_NAME.fullmatch(package):
+            raise ValueError(f"Invalid package name: {package!r}")
+    return sorted(set(packages))
+
+
+async def install_packages(
+    incus: IncusClient,
+    container_name: str,
+    packages: list[str],
+) -> ExecResult:
+    """Install packages with whichever package manager the image has.
+
+    Args:
+        incus: Incus client.
+        container_name: Container name (must be running).
+        packages: Validated package names (see normalize_packages()).
+
+    Returns:
+        The package manager's exit code and output.
+
+    Raises:
+        IncusError: If the script could not be run or timed out.
+    """
+    return await incus.exec(
+        container_name,
+        ["sh", "-c", _PACKAGES_SCRIPT, "kapsule-packages", *packages],
+        timeout=_PACKAGES_TIMEOUT,
+    )
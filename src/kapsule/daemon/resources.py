@@ -0,0 +1,193 @@
+# SPDX-FileCopyrightText: 2026 Lasath Fernando <devel@lasath.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Resource profiles: named sets of CPU, memory, process and I/O limits.
+
+Without limits, one runaway build in a container competes with the host
+desktop on equal terms. A resource profile maps a name to Incus
+``limits.*`` keys, which Incus turns into cgroup settings:
+``limits.cpu.priority`` and ``limits.disk.priority`` become the CPU and
+I/O weights, so a lower priority container only gets what the host
+leaves over, while ``limits.cpu.allowance``, ``limits.memory`` and
+``limits.processes`` cap it outright.
+
+Three profiles are built in (plus ``none``, which sets no limits);
+``[resources.NAME]`` sections in the system config add profiles or
+replace built-in ones, using the short option names of LIMIT_KEYS::
+
+    [resources.build]
+    cpu_priority = 3
+    memory = 16GiB
+    processes = 8192
+
+The limits are written to the container's own config together with the
+profile's name, so Incus applies a change to a running container live.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Mapping
+
+from .models_generated import Instance, InstancePut
+
+logger = logging.getLogger(__name__)
+
+RESOURCE_PROFILE_KEY = "user.kapsule.resource-profile"
+
+# Option name -> Incus config key
+LIMIT_KEYS = {
+    "cpu": "limits.cpu",
+    "cpu_allowance": "limits.cpu.allowance",
+    "cpu_priority": "limits.cpu.priority",
+    "memory": "limits.memory",
+    "memory_enforce": "limits.memory.enforce",
+    "processes": "limits.processes",
+    "disk_priority": "limits.disk.priority",
+}
+
+# Limits that only accept an integer in a range
+_INTEGER_LIMITS = {
+    "cpu_priority": (0, 10),
+    "disk_priority": (0, 10),
+    "processes": (1, 2**31 - 1),
+}
+
+NO_LIMITS = "none"
+
+BUILTIN_PROFILES: dict[str, dict[str, str]] = {
+    NO_LIMITS: {},
+    # Shells and GUI apps: first in line for CPU and I/O
+    "interactive": {
+        "cpu_priority": "10",
+        "disk_priority": "10",
+    },
+    # Builds and tests: yield to interactive work, and give memory back
+    # under host memory pressure
+    "batch": {
+        "cpu_priority": "5",
+        "disk_priority": "5",
+        "memory": "75%",
+        "memory_enforce": "soft",
+    },
+    # Long-running jobs that must never make the desktop stutter
+    "background": {
+        "cpu_priority": "0",
+        "disk_priority": "0",
+        "cpu_allowance": "50%",
+        "memory": "50%",
+        "memory_enforce": "soft",
+        "processes": "4096",
+    },
+}
+
+
+def validate_limits(limits: Mapping[str, str]) -> dict[str, str]:
+    """Check limit options and translate them to Incus config keys.
+
+    Args:
+        limits: Option name -> value.
+
+    Returns:
+        Incus config key -> value.
+
+    Raises:
+        ValueError: For an unknown option or an out of range value.
+    """
+    config: dict[str, str] = {}
+    for option, value in limits.items():
+        key = LIMIT_KEYS.get(option)
+        if key is None:
+            known = ", ".join(LIMIT_KEYS)
+            raise ValueError(f"Unknown resource limit '{option}' (known: {known})")
+        value = value.strip()
+        if option in _INTEGER_LIMITS:
+            low, high = _INTEGER_LIMITS[option]
+            if not value.isdigit() or not low <= int(value) <= high:
+                raise ValueError(
+                    f"Resource limit '{option}' must be between {low} and {high}"
+                )
+        if option == "memory_enforce" and value not in ("hard", "soft"):
+            raise ValueError("Resource limit 'memory_enforce' must be hard or soft")
+        config[key] = value
+    return config
+
+
+def resolve_limits(
+    profile: str,
+    overrides: Mapping[str, str],
+    profiles: Mapping[str, Mapping[str, str]],
+) -> dict[str, str]:
+    """The Incus limits for a resource profile with overrides applied.
+
+    Args:
+        profile: Resource profile name.
+        overrides: Option name -> value, replacing the profile's.
+        profiles: Available resource profiles.
+
+    Returns:
+        Incus config key -> value.
+
+    Raises:
+        ValueError: For an unknown profile or invalid limits.
+    """
+    if profile not in profiles:
+        known = ", ".join(profiles)
+        raise ValueError(f"Unknown resource profile '{profile}' (known: {known})")
+    return validate_limits({**profiles[profile], **overrides})
+
+
+def available_profiles(
+    sections: Mapping[str, Mapping[str, str]],
+) -> dict[str, dict[str, str]]:
+    """Merge configured resource profiles over the built-in ones.
+
+    Args:
+        sections: Profile name -> options, from the config.
+
+    Returns:
+        Every available profile, by name. Configured profiles with
+        invalid limits are left out.
+    """
+    profiles = {name: dict(limits) for name, limits in BUILTIN_PROFILES.items()}
+    for name, limits in sections.items():
+        try:
+            validate_limits(limits)
+        except ValueError as e:
+            logger.warning("Ignoring resource profile %s: %s", name, e)
+            continue
+        profiles[name] = dict(limits)
+    return profiles
+
+
+def with_limits(
+    instance: Instance, profile: str, limits: Mapping[str, str]
+) -> InstancePut:
+    """Rewrite an instance to carry exactly the given limits.
+
+    Limits set before (by another profile, or by hand) are dropped.
+
+    Args:
+        instance: Instance as returned by Incus.
+        profile: Name of the resource profile, recorded on the instance.
+        limits: Incus config key -> value.
+
+    Returns:
+        The complete replacement instance.
+    """
+    managed = {*LIMIT_KEYS.values(), RESOURCE_PROFILE_KEY}
+    config = {
+        key: value for key, value in (instance.config or {}).items()
+        if key not in managed
+    }
+    return InstancePut(
+        architecture=instance.architecture,
+        config={**config, **limits, RESOURCE_PROFILE_KEY: profile},
+        description=instance.description,
+        devices=instance.devices or {},
+        ephemeral=instance.ephemeral,
+        profiles=instance.profiles or [],
+        restore=None,
+        stateful=instance.stateful,
+    )
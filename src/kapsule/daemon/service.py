@@ -22,21 +22,29 @@ from dbus_fast.annotations import (
     DBusSignature,
     DBusStr,
     DBusUInt32,
+    DBusUInt64,
+    DBusUnixFd,
 )
 from dbus_fast.constants import PropertyAccess
 from dbus_fast.service import ServiceInterface, dbus_method, dbus_property
 
 from . import __version__
+from .config import load_image_mirror_config
 from .container_service import ContainerService
 from .dbus_types import (
     DBusContainer,
     DBusContainerList,
+    DBusContainerStatsList,
     DBusEnterResult,
+    DBusRunResult,
     DBusStrArray,
     DBusStrDict,
+    DBusVariantDict,
 )
 
 # Re-export IncusClient for use in __main__ and CLI
+from .image_mirror import ImageMirror, MirrorStore
+from .images import SERVER_MAP
 from .incus_client import IncusClient, IncusError
 
 logger = logging.getLogger(__name__)
@@ -47,6 +55,14 @@ _current_sender: contextvars.ContextVar[str | None] = contextvars.ContextVar(
     "current_sender", default=None
 )
 
+# Options accepted by CreateContainerWithOptions, with their D-Bus signatures
+_CREATE_OPTIONS = {
+    "session_mode": "b",
+    "dbus_mux": "b",
+    "packages": "as",
+    "resources": "s",
+}
+
 
 class KapsuleManagerInterface(ServiceInterface):
     """org.frostyard.Kapsule.Manager D-Bus interface.
@@ -189,6 +205,11 @@ class KapsuleManagerInterface(ServiceInterface):
         """Daemon version."""
         return self._version
 
+    @dbus_property(access=PropertyAccess.READ)
+    def IdleReclaimedBytes(self) -> DBusUInt64:
+        """Memory given back by stopping idle containers since startup."""
+        return self._service.idle_scheduler.reclaimed_bytes
+
     # =========================================================================
     # Methods - Operations Query
     # =========================================================================
@@ -225,31 +246,110 @@ class KapsuleManagerInterface(ServiceInterface):
         Returns:
             D-Bus object path for tracking operation progress
         """
-        # If no image specified, look up default from caller's config
-        actual_image = image
-        if not image:
-            sender = _current_sender.get()
-            if not sender:
-                raise Exception(
-                    "No image specified and could not determine caller identity"
-                )
-
-            try:
-                uid, _gid, _pid = await self._get_caller_credentials(sender)
-                config = await self._service.get_config(uid)
-                actual_image = config.get("default_image", "")
-                if not actual_image:
-                    raise Exception("No image specified and no default_image in config")
-            except RuntimeError as e:
-                raise Exception(
-                    f"No image specified and failed to read config: {e}"
-                ) from e
-
         return await self._service.create_container(
             name=name,
-            image=actual_image,
+            image=await self._resolve_image(image),
             session_mode=session_mode,
             dbus_mux=dbus_mux,
+            resources=await self._resolve_resources(""),
+        )
+
+    @dbus_method()
+    async def CreateContainerWithOptions(
+        self,
+        name: DBusStr,
+        image: DBusStr,
+        options: DBusVariantDict,
+    ) -> DBusObjectPath:
+        """Create a new container with optional settings.
+
+        Options that are left out take their CreateContainer defaults, and
+        unknown ones are rejected. Further create options are added as keys
+        here rather than as new methods.
+
+        Args:
+            name: Container name
+            image: Image to use, empty for default from config
+            options: Any of
+                session_mode (b): Enable session mode with container D-Bus
+                dbus_mux (b): Enable D-Bus multiplexer (implies session_mode)
+                packages (as): Packages to install with the image's package
+                    manager, cached per image build and package set
+                resources (s): Resource profile (e.g. "batch"), empty for
+                    the caller's configured one
+
+        Returns:
+            D-Bus object path for tracking operation progress
+        """
+        for key, value in options.items():
+            if _CREATE_OPTIONS.get(key) != value.signature:
+                raise ValueError(f"Invalid create option: {key}")
+        values = {key: value.value for key, value in options.items()}
+        return await self._service.create_container(
+            name=name,
+            image=await self._resolve_image(image),
+            session_mode=values.get("session_mode", False),
+            dbus_mux=values.get("dbus_mux", False),
+            packages=list(values.get("packages", [])),
+            resources=await self._resolve_resources(values.get("resources", "")),
+        )
+
+    async def _resolve_resources(self, resources: str) -> str:
+        """Fall back to the caller's configured resource profile."""
+        if resources:
+            return resources
+        sender = _current_sender.get()
+        if not sender:
+            return ""
+        try:
+            uid, _gid, _pid = await self._get_caller_credentials(sender)
+        except RuntimeError:
+            return ""
+        config = await self._service.get_config(uid)
+        return config.get("resource_profile", "")
+
+    async def _resolve_image(self, image: str) -> str:
+        """Fall back to the caller's configured default image."""
+        if image:
+            return image
+        sender = _current_sender.get()
+        if not sender:
+            raise Exception(
+                "No image specified and could not determine caller identity"
+            )
+
+        try:
+            uid, _gid, _pid = await self._get_caller_credentials(sender)
+            config = await self._service.get_config(uid)
+            actual_image = config.get("default_image", "")
+            if not actual_image:
+                raise Exception("No image specified and no default_image in config")
+        except RuntimeError as e:
+            raise Exception(
+                f"No image specified and failed to read config: {e}"
+            ) from e
+        return actual_image
+
+    @dbus_method()
+    async def CloneContainer(
+        self,
+        source: DBusStr,
+        name: DBusStr,
+        snapshot: DBusStr,
+    ) -> DBusObjectPath:
+        """Create a container as a copy of an existing one.
+
+        Args:
+            source: Container to clone
+            name: Name of the new container
+            snapshot: If non-empty, snapshot the source under this name
+                first and clone from the snapshot
+
+        Returns:
+            D-Bus object path for tracking operation progress
+        """
+        return await self._service.clone_container(
+            source=source, name=name, snapshot=snapshot
         )
 
     @dbus_method()
@@ -290,6 +390,168 @@ class KapsuleManagerInterface(ServiceInterface):
         """
         return await self._service.stop_container(name=name, force=force)
 
+    @dbus_method()
+    async def DeleteContainers(
+        self, names: DBusStrArray, force: DBusBool
+    ) -> DBusObjectPath:
+        """Delete several containers in parallel under one operation.
+
+        Args:
+            names: Container names
+            force: Force removal of running containers
+
+        Returns:
+            D-Bus object path for tracking operation progress
+        """
+        return await self._service.delete_containers(names=list(names), force=force)
+
+    @dbus_method()
+    async def StartContainers(self, names: DBusStrArray) -> DBusObjectPath:
+        """Start several containers in parallel under one operation.
+
+        Args:
+            names: Container names
+
+        Returns:
+            D-Bus object path for tracking operation progress
+        """
+        return await self._service.start_containers(names=list(names))
+
+    @dbus_method()
+    async def StopContainers(
+        self, names: DBusStrArray, force: DBusBool
+    ) -> DBusObjectPath:
+        """Stop several containers in parallel under one operation.
+
+        Args:
+            names: Container names
+            force: Force stop
+
+        Returns:
+            D-Bus object path for tracking operation progress
+        """
+        return await self._service.stop_containers(names=list(names), force=force)
+
+    @dbus_method()
+    async def SetContainerLimits(
+        self, name: DBusStr, profile: DBusStr, limits: DBusStrDict
+    ) -> DBusObjectPath:
+        """Replace a container's resource limits, live if it is running.
+
+        Args:
+            name: Container name
+            profile: Resource profile, empty to keep the current one
+            limits: Limit options (e.g. {"memory": "8GiB"}) overriding
+                the profile's
+
+        Returns:
+            D-Bus object path for tracking operation progress
+        """
+        return await self._service.set_container_limits(
+            name=name, profile=profile, limits=dict(limits)
+        )
+
+    # =========================================================================
+    # Methods - Snapshots
+    # =========================================================================
+
+    @dbus_method()
+    async def SnapshotContainer(
+        self, name: DBusStr, snapshot: DBusStr
+    ) -> DBusObjectPath:
+        """Take a snapshot of a container.
+
+        Args:
+            name: Container name
+            snapshot: Snapshot name, empty to name it after the current
+                time (such snapshots are subject to retention)
+
+        Returns:
+            D-Bus object path for tracking operation progress
+        """
+        return await self._service.snapshot_container(name=name, snapshot=snapshot)
+
+    @dbus_method()
+    async def ListSnapshots(self, name: DBusStr) -> Annotated[
+        list[tuple[str, str, int]], DBusSignature("a(ssx)")
+    ]:
+        """List a container's snapshots.
+
+        Args:
+            name: Container name
+
+        Returns:
+            Array of (snapshot, created, size_bytes) tuples, oldest first
+        """
+        return await self._service.list_snapshots(name)
+
+    @dbus_method()
+    async def RestoreSnapshot(
+        self, name: DBusStr, snapshot: DBusStr
+    ) -> DBusObjectPath:
+        """Roll a container back to one of its snapshots.
+
+        Args:
+            name: Container name
+            snapshot: Snapshot to restore
+
+        Returns:
+            D-Bus object path for tracking operation progress
+        """
+        return await self._service.restore_snapshot(name=name, snapshot=snapshot)
+
+    @dbus_method()
+    async def DeleteSnapshot(
+        self, name: DBusStr, snapshot: DBusStr
+    ) -> DBusObjectPath:
+        """Delete a snapshot of a container.
+
+        Args:
+            name: Container name
+            snapshot: Snapshot to delete
+
+        Returns:
+            D-Bus object path for tracking operation progress
+        """
+        return await self._service.delete_snapshot(name=name, snapshot=snapshot)
+
+    # =========================================================================
+    # Methods - Export / Import
+    # =========================================================================
+
+    @dbus_method()
+    async def ExportContainer(
+        self, name: DBusStr, fd: DBusUnixFd, compression: DBusStr
+    ) -> DBusObjectPath:
+        """Stream a container's backup tarball to a file descriptor.
+
+        Args:
+            name: Container name
+            fd: Writable file or pipe; the daemon closes its copy when done
+            compression: "none", "gzip" or "zstd" (empty for the default)
+
+        Returns:
+            D-Bus object path for tracking operation progress
+        """
+        if not compression:
+            return await self._service.export_container(name=name, fd=fd)
+        return await self._service.export_container(
+            name=name, fd=fd, compression=compression
+        )
+
+    @dbus_method()
+    async def ImportContainer(self, name: DBusStr, fd: DBusUnixFd) -> DBusObjectPath:
+        """Create a container from a backup tarball read from a descriptor.
+
+        Args:
+            name: Name of the new container
+            fd: Readable file or pipe; the daemon closes its copy when done
+
+        Returns:
+            D-Bus object path for tracking operation progress
+        """
+        return await self._service.import_container(name=name, fd=fd)
+
     # =========================================================================
     # Methods - User Setup
     # =========================================================================
@@ -352,6 +614,26 @@ class KapsuleManagerInterface(ServiceInterface):
         """
         return await self._service.list_containers()
 
+    @dbus_method()
+    async def GetContainerStats(self) -> DBusContainerStatsList:
+        """Sample resource usage of all containers.
+
+        One call is one batched Incus request however many containers
+        there are; calls less than half a second apart share a sample.
+
+        Returns:
+            Array of (name, status, cpu_percent, memory, memory_limit,
+            disk, processes, cpu_history) tuples; CPU is a percentage of
+            one CPU, sizes are bytes, and 0 means not reported
+        """
+        return [
+            (
+                s.name, s.status, s.cpu_percent, s.memory, s.memory_limit,
+                s.disk, s.processes, s.cpu_history,
+            )
+            for s in await self._service.get_container_stats()
+        ]
+
     @dbus_method()
     async def GetContainerInfo(self, name: DBusStr) -> DBusContainer:
         """Get information about a container.
@@ -386,6 +668,37 @@ class KapsuleManagerInterface(ServiceInterface):
 
         return await self._service.get_config(uid)
 
+    @dbus_method()
+    async def ListImages(self, query: DBusStr) -> Annotated[
+        list[tuple[str, str, str, str, str, str]], DBusSignature("a(ssssss)")
+    ]:
+        """Search the images available on the configured image servers.
+
+        Served from the daemon's cached catalog, so results are instant
+        after the first call.
+
+        Args:
+            query: Search text (prefix/fuzzy over distro, release, arch,
+                variant and aliases); empty lists all images
+
+        Returns:
+            Array of (image, os, release, arch, variant, description)
+            tuples, best match first
+        """
+        return await self._service.list_images(query)
+
+    @dbus_method()
+    def GetImageCache(self) -> Annotated[
+        list[tuple[str, str, str, str, str]], DBusSignature("a(sssss)")
+    ]:
+        """Get the local cache state of the configured default images.
+
+        Returns:
+            Array of (image, state, fingerprint, refreshed_at, error) tuples,
+            where state is one of pending, pulling, cached or failed
+        """
+        return self._service.image_cache_state()
+
     # =========================================================================
     # Methods - Enter Container
     # =========================================================================
@@ -438,6 +751,57 @@ class KapsuleManagerInterface(ServiceInterface):
         )
         return (success, message, cmd)
 
+    @dbus_method()
+    async def PrepareRun(
+        self,
+        source: DBusStr,
+        command: DBusStrArray,
+    ) -> DBusRunResult:
+        """Create a throwaway container to run a command in.
+
+        The container is ephemeral and set up for the caller like on
+        PrepareEnter. The caller runs the returned command and then calls
+        FinishRun to destroy the container; a container left without an
+        exec session (e.g. the caller was killed) is removed by the daemon.
+
+        Args:
+            source: Container, container/snapshot or image to start from
+                (empty string for the caller's default image)
+            command: Command to run inside (empty array for shell)
+
+        Returns:
+            Tuple of (success, error_message, container_name, command_array)
+        """
+        sender = _current_sender.get()
+        if sender is None:
+            return (False, "Could not determine caller identity", "", [])
+
+        try:
+            uid, gid, pid = await self._get_caller_credentials(sender)
+        except RuntimeError as e:
+            return (False, f"Failed to get caller credentials: {e}", "", [])
+
+        env = self._get_process_environ(pid)
+        return await self._service.prepare_run(
+            uid=uid, gid=gid, source=source, command=list(command), env=env
+        )
+
+    @dbus_method()
+    async def FinishRun(self, name: DBusStr) -> DBusBool:
+        """Destroy a container created by PrepareRun.
+
+        Args:
+            name: Container name returned by PrepareRun
+
+        Returns:
+            True if it was destroyed, False if it was already gone
+        """
+        sender = _current_sender.get()
+        if sender is None:
+            raise Exception("Could not determine caller identity")
+        uid, _gid, _pid = await self._get_caller_credentials(sender)
+        return await self._service.finish_run(uid, name)
+
 
 class KapsuleService:
     """Main D-Bus service manager.
@@ -462,11 +826,14 @@ class KapsuleService:
         self._interface: KapsuleManagerInterface | None = None
         self._incus: IncusClient | None = None
         self._container_service: ContainerService | None = None
+        self._mirror: ImageMirror | None = None
 
     async def start(self) -> None:
         """Start the D-Bus service."""
         # Connect to D-Bus
-        self._bus = await MessageBus(bus_type=self._bus_type).connect()
+        self._bus = await MessageBus(
+            bus_type=self._bus_type, negotiate_unix_fd=True
+        ).connect()
 
         # Create Incus client
         self._incus = IncusClient(socket_path=self._socket_path)
@@ -474,6 +841,14 @@ class KapsuleService:
         # Ensure Incus is initialized with the storage pool we need
         await self._ensure_storage_pool()
 
+        # Keep an instance index fed by the Incus events stream so queries
+        # don't need a round trip to Incus
+        self._incus.start_events()
+
+        # Serve the caching image mirror if configured, before anything
+        # starts pulling images through it
+        await self._start_image_mirror()
+
         # Create the interface and container service
         # The interface needs the service, and the service needs the interface
         # So we use deferred initialization
@@ -483,6 +858,20 @@ class KapsuleService:
         self._container_service.set_bus(self._bus)  # Enable operation D-Bus objects
         temp_interface.set_service(self._container_service)
 
+        # Containers reference the shared profiles, so they must be current
+        # before anything is created; older containers move over to them
+        # in the background
+        await self._container_service.profiles.ensure()
+        self._container_service.profiles.start()
+
+        # Keep golden templates in step with updated images
+        self._container_service.templates.start()
+        self._container_service.warm_pool.start()
+        self._container_service.image_prefetcher.start()
+        self._container_service.snapshot_pruner.start()
+        self._container_service.idle_scheduler.start()
+        self._container_service.run_reaper.start()
+
         self._interface = temp_interface
 
         # Export the interface
@@ -513,6 +902,21 @@ class KapsuleService:
 
     async def stop(self) -> None:
         """Stop the D-Bus service."""
+        if self._container_service:
+            await self._container_service.image_prefetcher.stop()
+            await self._container_service.snapshot_pruner.stop()
+            await self._container_service.idle_scheduler.stop()
+            await self._container_service.run_reaper.stop()
+            await self._container_service.image_catalog.close()
+            await self._container_service.warm_pool.stop()
+            await self._container_service.package_layers.stop()
+            await self._container_service.templates.stop()
+            await self._container_service.profiles.stop()
+
+        if self._mirror:
+            await self._mirror.stop()
+            self._mirror = None
+
         if self._incus:
             await self._incus.close()
             self._incus = None
@@ -521,6 +925,20 @@ class KapsuleService:
             self._bus.disconnect()
             self._bus = None
 
+    async def _start_image_mirror(self) -> None:
+        """Start the caching image mirror if ``[image_mirror]`` is set."""
+        mirror_config = load_image_mirror_config()
+        if mirror_config is None:
+            return
+        try:
+            mirror = ImageMirror(MirrorStore(mirror_config.store), SERVER_MAP)
+            await mirror.start(mirror_config.host, mirror_config.port)
+        except OSError as e:
+            # The daemon is still useful without it; creates go upstream
+            logger.warning("Could not start image mirror: %s", e)
+            return
+        self._mirror = mirror
+
     async def _ensure_storage_pool(self) -> None:
         """Ensure the 'default' btrfs storage pool exists.
 
@@ -0,0 +1,253 @@
+# SPDX-FileCopyrightText: 2026 Lasath Fernando <devel@lasath.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Container snapshot naming and retention.
+
+On a copy-on-write pool a snapshot costs next to nothing to take, so the
+natural workflow is to take one before anything risky and roll back if
+it goes wrong. Snapshots taken without a name are named after the time
+they were taken (``snap-20260101-120000``). Only those automatically
+named snapshots are subject to retention; a snapshot that was given a
+name on purpose is kept until it is deleted by hand, even if its name
+looks like an automatic one.
+
+Incus can't attach metadata to a snapshot directly, but a snapshot keeps
+a copy of its instance's config. Kapsule sets ``user.kapsule.auto-snapshot``
+to the new snapshot's name just before taking it, so the snapshot itself
+records that it was named automatically.
+
+Retention is off unless ``snapshot_keep_last`` or
+``snapshot_max_age_days`` is set. The pruner then applies it after every
+snapshot Kapsule takes and on an hourly pass over all containers, leaving
+the daemon's internal instances alone.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+
+from .incus_client import IncusClient, IncusError
+from .models_generated import InstanceSnapshot, Operation
+
+logger = logging.getLogger(__name__)
+
+AUTO_SNAPSHOT_PREFIX = "snap-"
+
+# Instance config key naming the automatic snapshot being taken
+AUTO_SNAPSHOT_KEY = "user.kapsule.auto-snapshot"
+
+# Time between retention passes over all containers
+_PRUNE_INTERVAL = 3600.0
+
+
+def auto_snapshot_name(existing: list[str], now: datetime | None = None) -> str:
+    """Name a snapshot after the current time.
+
+    Args:
+        existing: Names of the container's existing snapshots.
+        now: Time to use instead of the current time.
+
+    Returns:
+        A name not in ``existing``.
+    """
+    now = now or datetime.now(UTC)
+    name = f"{AUTO_SNAPSHOT_PREFIX}{now:%Y%m%d-%H%M%S}"
+    candidate = name
+    suffix = 1
+    while candidate in existing:
+        suffix += 1
+        candidate = f"{name}-{suffix}"
+    return candidate
+
+
+def is_auto_snapshot(snapshot: InstanceSnapshot) -> bool:
+    """Whether a snapshot was taken by take_auto_snapshot()."""
+    config = snapshot.config or {}
+    return bool(snapshot.name) and config.get(AUTO_SNAPSHOT_KEY) == snapshot.name
+
+
+async def take_auto_snapshot(
+    incus: IncusClient, name: str, snapshot: str
+) -> Operation:
+    """Take a snapshot marked as automatically named.
+
+    Args:
+        incus: Incus client.
+        name: Instance name.
+        snapshot: Name from auto_snapshot_name().
+
+    Returns:
+        The finished snapshot operation.
+
+    Raises:
+        IncusError: If marking the instance or taking the snapshot fails.
+    """
+    await incus.patch_instance_config(name, {AUTO_SNAPSHOT_KEY: snapshot})
+    try:
+        return await incus.create_snapshot(name, snapshot, wait=True)
+    finally:
+        # An empty value unsets the key, so later snapshots aren't marked
+        try:
+            await incus.patch_instance_config(name, {AUTO_SNAPSHOT_KEY: ""})
+        except IncusError as e:
+            logger.warning("Could not clear %s on %s: %s", AUTO_SNAPSHOT_KEY, name, e)
+
+
+def select_expired(
+    snapshots: list[InstanceSnapshot],
+    *,
+    keep_last: int,
+    max_age: timedelta | None,
+    now: datetime | None = None,
+) -> list[str]:
+    """Pick the automatic snapshots that retention would delete.
+
+    Args:
+        snapshots: A container's snapshots, oldest first.
+        keep_last: Number of newest automatic snapshots to keep (0 keeps
+            all).
+        max_age: Age beyond which automatic snapshots go (None keeps all).
+        now: Time to measure ages against.
+
+    Returns:
+        Names of the snapshots to delete, oldest first.
+    """
+    now = now or datetime.now(UTC)
+    auto = [s for s in snapshots if is_auto_snapshot(s)]
+    expired: set[str] = set()
+    if keep_last > 0:
+        expired.update(s.name for s in auto[:-keep_last] if s.name)
+    if max_age is not None:
+        expired.update(
+            s.name for s in auto
+            if s.name and s.created_at and now - s.created_at > max_age
+        )
+    return [s.name for s in auto if s.name in expired]
+
+
+class SnapshotPruner:
+    """Applies the snapshot retention policy."""
+
+    def __init__(
+        self,
+        incus: IncusClient,
+        *,
+        keep_last: int,
+        max_age_days: int,
+        skip: Callable[[str], bool],
+    ):
+        """Initialize the pruner.
+
+        Args:
+            incus: Incus client.
+            keep_last: Automatic snapshots to keep per container (0: all).
+            max_age_days: Days to keep automatic snapshots for (0: forever).
+            skip: Whether an instance is internal to the daemon and must
+                be left alone.
+        """
+        self._incus = incus
+        self._skip = skip
+        self._keep_last = keep_last
+        self._max_age = timedelta(days=max_age_days) if max_age_days > 0 else None
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any retention limit is configured."""
+        return self._keep_last > 0 or self._max_age is not None
+
+    # -------------------------------------------------------------------------
+    # Lifecycle
+    # -------------------------------------------------------------------------
+
+    def start(self) -> None:
+        """Start the hourly retention pass."""
+        if not self.enabled:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(
+                self._prune_loop(), name="kapsule-snapshot-prune"
+            )
+
+    async def stop(self) -> None:
+        """Stop the retention pass."""
+        task = self._task
+        self._task = None
+        if task is not None:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    # -------------------------------------------------------------------------
+    # Pruning
+    # -------------------------------------------------------------------------
+
+    async def _prune_loop(self) -> None:
+        """Prune every container periodically until cancelled."""
+        while True:
+            try:
+                await self.prune_all()
+            except IncusError as e:
+                logger.warning("Snapshot retention pass failed: %s", e)
+            await asyncio.sleep(_PRUNE_INTERVAL)
+
+    async def prune_all(self) -> list[tuple[str, str]]:
+        """Apply retention to every container.
+
+        Returns:
+            (container, snapshot) pairs that were deleted.
+
+        Raises:
+            IncusError: If the containers can't be listed.
+        """
+        deleted: list[tuple[str, str]] = []
+        for instance in await self._incus.list_instances():
+            if not instance.name or self._skip(instance.name):
+                continue
+            try:
+                deleted += [
+                    (instance.name, snapshot)
+                    for snapshot in await self.prune(instance.name)
+                ]
+            except IncusError as e:
+                logger.warning(
+                    "Could not apply snapshot retention to %s: %s", instance.name, e
+                )
+        return deleted
+
+    async def prune(self, name: str) -> list[str]:
+        """Apply retention to one container.
+
+        Args:
+            name: Container name.
+
+        Returns:
+            Names of the deleted snapshots.
+
+        Raises:
+            IncusError: If an Incus call fails.
+        """
+        if not self.enabled:
+            return []
+        expired = select_expired(
+            await self._incus.list_snapshots(name),
+            keep_last=self._keep_last,
+            max_age=self._max_age,
+        )
+        deleted: list[str] = []
+        for snapshot in expired:
+            op = await self._incus.delete_snapshot(name, snapshot, wait=True)
+            if op.status != "Success":
+                logger.warning(
+                    "Could not delete snapshot %s/%s: %s",
+                    name, snapshot, op.err or op.status,
+                )
+                continue
+            logger.info("Pruned snapshot %s/%s", name, snapshot)
+            deleted.append(snapshot)
+        return deleted
@@ -0,0 +1,163 @@
+# SPDX-FileCopyrightText: 2026 Lasath Fernando <devel@lasath.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Per-container resource telemetry for ``kapsule top``.
+
+A sample is one ``/1.0/instances?recursion=2`` request, which carries
+the runtime state of every instance, so a refresh costs the same single
+Incus call however many containers there are. Requests arriving within
+MIN_SAMPLE_INTERVAL of the last sample (several ``kapsule top`` windows,
+say) are answered from it instead of sampling again.
+
+Incus reports cumulative CPU time; the CPU usage shown is the delta
+between a container's last two samples, as a percentage of one CPU.
+The last HISTORY_SIZE samples of each container are kept in a ring
+buffer, and a container's history is dropped once it is gone.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import Callable
+from itertools import pairwise
+from typing import NamedTuple
+
+from .incus_client import IncusClient
+from .models_generated import InstanceFull
+
+# Samples kept per container
+HISTORY_SIZE = 60
+
+# Requests closer together than this share one sample (seconds)
+MIN_SAMPLE_INTERVAL = 0.5
+
+
+class StatsSample(NamedTuple):
+    """Raw state of one container at one point in time."""
+
+    # Monotonic time of the sample, in seconds
+    taken: float
+    status: str
+    # Cumulative CPU time, in nanoseconds
+    cpu_ns: int
+    memory: int
+    memory_limit: int
+    disk: int
+    processes: int
+
+
+class ContainerStats(NamedTuple):
+    """A container's latest sample with rates derived from its history."""
+
+    name: str
+    status: str
+    # Percentage of one CPU over the last sample interval
+    cpu_percent: float
+    memory: int
+    memory_limit: int
+    disk: int
+    processes: int
+    # CPU percentages of the buffered samples, oldest first
+    cpu_history: list[float]
+
+
+def sample_from_state(instance: InstanceFull, taken: float) -> StatsSample:
+    """Extract the fields Kapsule shows from an instance's state.
+
+    Args:
+        instance: Instance listed with ``recursion=2``.
+        taken: Monotonic time of the listing.
+
+    Returns:
+        The sample; fields Incus didn't report are 0.
+    """
+    state = instance.state
+    status = instance.status or (state.status if state else None) or "Unknown"
+    if state is None:
+        return StatsSample(taken, status, 0, 0, 0, 0, 0)
+    root = (state.disk or {}).get("root")
+    return StatsSample(
+        taken=taken,
+        status=status,
+        cpu_ns=(state.cpu.usage or 0) if state.cpu else 0,
+        memory=(state.memory.usage or 0) if state.memory else 0,
+        memory_limit=(state.memory.total or 0) if state.memory else 0,
+        disk=(root.usage or 0) if root else 0,
+        processes=max(0, state.processes or 0),
+    )
+
+
+def cpu_percent(previous: StatsSample, current: StatsSample) -> float:
+    """CPU use between two samples, as a percentage of one CPU."""
+    elapsed = current.taken - previous.taken
+    used = current.cpu_ns - previous.cpu_ns
+    # A restart resets the counter
+    if elapsed <= 0 or used < 0:
+        return 0.0
+    return used / (elapsed * 1e9) * 100
+
+
+class StatsCollector:
+    """Samples container state and keeps a short history per container."""
+
+    def __init__(self, incus: IncusClient, *, skip: Callable[[str], bool]):
+        """Initialize the collector.
+
+        Args:
+            incus: Incus client.
+            skip: Whether an instance is internal to the daemon and must
+                be left out.
+        """
+        self._incus = incus
+        self._skip = skip
+        self._history: dict[str, deque[StatsSample]] = {}
+        self._last_sample = float("-inf")
+        self._lock = asyncio.Lock()
+
+    async def sample(self) -> None:
+        """Take one batched sample of every container."""
+        instances = await self._incus.list_instances_with_state()
+        taken = time.monotonic()
+        seen: set[str] = set()
+        for instance in instances:
+            name = instance.name
+            if not name or self._skip(name):
+                continue
+            seen.add(name)
+            history = self._history.setdefault(name, deque(maxlen=HISTORY_SIZE))
+            history.append(sample_from_state(instance, taken))
+        for name in self._history.keys() - seen:
+            del self._history[name]
+        self._last_sample = taken
+
+    async def stats(self) -> list[ContainerStats]:
+        """Current stats of every container, sampling if needed.
+
+        Returns:
+            Stats sorted by container name.
+
+        Raises:
+            IncusError: If the containers can't be listed.
+        """
+        async with self._lock:
+            if time.monotonic() - self._last_sample >= MIN_SAMPLE_INTERVAL:
+                await self.sample()
+        return [self._summarize(name) for name in sorted(self._history)]
+
+    def _summarize(self, name: str) -> ContainerStats:
+        samples = list(self._history[name])
+        rates = [cpu_percent(a, b) for a, b in pairwise(samples)]
+        latest = samples[-1]
+        return ContainerStats(
+            name=name,
+            status=latest.status,
+            cpu_percent=rates[-1] if rates else 0.0,
+            memory=latest.memory,
+            memory_limit=latest.memory_limit,
+            disk=latest.disk,
+            processes=latest.processes,
+            cpu_history=rates,
+        )
@@ -0,0 +1,372 @@
+# SPDX-FileCopyrightText: 2026 Lasath Fernando <devel@lasath.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Golden template containers.
+
+Creating a container from a remote image means downloading (or at least
+unpacking) the image and then re-applying the same image fixups every
+time. Instead, Kapsule keeps one provisioned, stopped template container
+per image with a ``golden`` snapshot. New containers are copied from that
+snapshot, which on a copy-on-write pool (btrfs, the default) is a
+near-instant subvolume snapshot.
+
+Templates are named ``kapsule-template-*`` and hidden from listings.
+They record the image they were built from and the fingerprint Incus
+resolved it to. A periodic check compares that fingerprint with the
+image in Incus' local cache (which Incus keeps refreshing from upstream)
+and rebuilds stale templates in the background, swapping the new one in
+only once it is complete.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from collections.abc import Awaitable, Callable
+
+from .images import copy_source, image_tag, parse_image_source
+from .incus_client import IncusClient, IncusError
+from .models_generated import InstanceSource, InstancesPost, Operation
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_PREFIX = "kapsule-template-"
+TEMPLATE_SNAPSHOT = "golden"
+
+# Recorded on the template after the snapshot is taken, so copies
+# made from the snapshot don't inherit them
+TEMPLATE_IMAGE_KEY = "user.kapsule.template.image"
+TEMPLATE_FINGERPRINT_KEY = "user.kapsule.template.fingerprint"
+
+# Storage drivers where copying a snapshot is cheap
+_COW_DRIVERS = frozenset({"btrfs", "zfs", "lvm", "ceph"})
+
+# How often to check templates against the local image cache
+_REFRESH_INTERVAL = 3600.0
+
+# Suffix of a template that is being (re)built
+_BUILDING_SUFFIX = "-next"
+
+PrepareCallback = Callable[[str], Awaitable[None]]
+
+
+def template_name(image: str) -> str:
+    """Instance name of the template for an image.
+
+    Args:
+        image: Image string like "images:ubuntu/24.04".
+
+    Returns:
+        A valid instance name, unique per image string.
+    """
+    return f"{TEMPLATE_PREFIX}{image_tag(image)}"
+
+
+def is_template(name: str) -> bool:
+    """Whether an instance is a Kapsule template (or one being built)."""
+    return name.startswith(TEMPLATE_PREFIX)
+
+
+class TemplateManager:
+    """Builds, serves and refreshes golden templates."""
+
+    def __init__(
+        self,
+        incus: IncusClient,
+        prepare: PrepareCallback,
+        *,
+        profiles: list[str],
+    ):
+        """Initialize the manager.
+
+        Args:
+            incus: Incus client.
+            prepare: Applies image fixups to a freshly created, running
+                container (the template being built).
+            profiles: Profiles templates are created with.
+        """
+        self._incus = incus
+        self._prepare = prepare
+        self._profiles = profiles
+        self._enabled: bool | None = None
+        self._builds: dict[str, asyncio.Task[None]] = {}
+        self._refresh_task: asyncio.Task[None] | None = None
+
+    # -------------------------------------------------------------------------
+    # Lifecycle
+    # -------------------------------------------------------------------------
+
+    def start(self) -> None:
+        """Start the periodic staleness check."""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(
+                self._refresh_loop(), name="kapsule-template-refresh"
+            )
+
+    async def stop(self) -> None:
+        """Stop the periodic check and any builds in progress."""
+        tasks = list(self._builds.values())
+        if self._refresh_task is not None:
+            tasks.append(self._refresh_task)
+            self._refresh_task = None
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    async def enabled(self) -> bool:
+        """Whether templates are used (the default pool is copy-on-write)."""
+        if self._enabled is None:
+            try:
+                pools = await self._incus.list_storage_pools()
+            except IncusError:
+                return False
+            driver = next((p.driver for p in pools if p.name == "default"), None)
+            self._enabled = driver in _COW_DRIVERS
+            if not self._enabled:
+                logger.info(
+                    "Storage driver %s is not copy-on-write; not using templates",
+                    driver,
+                )
+        return self._enabled
+
+    # -------------------------------------------------------------------------
+    # Serving
+    # -------------------------------------------------------------------------
+
+    async def source_for(self, image: str) -> InstanceSource | None:
+        """Get a copy source for an image if a template is ready.
+
+        Args:
+            image: Image string.
+
+        Returns:
+            InstanceSource copying the template's golden snapshot, or None
+            if there is no usable template (the caller should create from
+            the image and call schedule_build()).
+        """
+        if not await self.enabled():
+            return None
+        name = template_name(image)
+        try:
+            instance = await self._incus.get_instance(name)
+        except IncusError:
+            return None
+        config = instance.config or {}
+        if config.get(TEMPLATE_IMAGE_KEY) != image:
+            # Only a complete template carries its image key
+            return None
+        return copy_source(f"{name}/{TEMPLATE_SNAPSHOT}")
+
+    # -------------------------------------------------------------------------
+    # Building
+    # -------------------------------------------------------------------------
+
+    def schedule_build(self, image: str) -> None:
+        """Build (or rebuild) the template for an image in the background.
+
+        Does nothing if a build for the image is already running.
+
+        Args:
+            image: Image string.
+        """
+        task = self._builds.get(image)
+        if task is not None and not task.done():
+            return
+        task = asyncio.create_task(self._build_logged(image))
+        self._builds[image] = task
+        task.add_done_callback(lambda _t: self._builds.pop(image, None))
+
+    async def _build_logged(self, image: str) -> None:
+        """Build a template, logging instead of raising on failure."""
+        if not await self.enabled():
+            return
+        try:
+            await self.build(image)
+        except (IncusError, RuntimeError) as e:
+            logger.warning("Failed to build template for %s: %s", image, e)
+
+    async def build(self, image: str) -> None:
+        """Build the template for an image and swap it into place.
+
+        The new template is built under a temporary name, so an existing
+        template keeps serving creates until the new one is complete.
+
+        Args:
+            image: Image string.
+
+        Raises:
+            IncusError: If an Incus call fails.
+            RuntimeError: If the image can't be resolved or an operation
+                does not succeed.
+        """
+        source = parse_image_source(image)
+        if source is None:
+            raise RuntimeError(f"Invalid image format: {image}")
+
+        name = template_name(image)
+        building = f"{name}{_BUILDING_SUFFIX}"
+        logger.info("Building template %s for %s", name, image)
+
+        # Leftover from an interrupted build
+        await discard_instance(self._incus, building)
+
+        try:
+            fingerprint = await build_golden(
+                self._incus,
+                building,
+                source,
+                profiles=self._profiles,
+                description=f"Kapsule template for {image}",
+                setup=self._prepare,
+            )
+            await self._incus.patch_instance_config(building, {
+                TEMPLATE_IMAGE_KEY: image,
+                TEMPLATE_FINGERPRINT_KEY: fingerprint,
+            })
+
+            await discard_instance(self._incus, name)
+            _check(
+                await self._incus.rename_instance(building, name, wait=True),
+                "rename",
+            )
+        except (IncusError, RuntimeError, asyncio.CancelledError):
+            with contextlib.suppress(IncusError, RuntimeError):
+                await discard_instance(self._incus, building)
+            raise
+
+        logger.info("Template %s ready (image %s)", name, fingerprint[:12])
+
+    # -------------------------------------------------------------------------
+    # Refreshing
+    # -------------------------------------------------------------------------
+
+    async def _refresh_loop(self) -> None:
+        """Periodically rebuild templates whose image was updated."""
+        while True:
+            await asyncio.sleep(_REFRESH_INTERVAL)
+            try:
+                await self.refresh_stale()
+            except IncusError as e:
+                logger.warning("Template refresh check failed: %s", e)
+
+    async def refresh_stale(self) -> list[str]:
+        """Schedule rebuilds of templates whose image has a new fingerprint.
+
+        Incus keeps cached remote images up to date on its own; a template
+        is stale when the cached image for its source no longer matches the
+        fingerprint it was built from.
+
+        Returns:
+            Images whose templates are being rebuilt.
+        """
+        if not await self.enabled():
+            return []
+
+        latest: dict[tuple[str, str], tuple[str, str]] = {}
+        for image in await self._incus.list_images():
+            update = image.update_source
+            if update is None or not update.server or not update.alias:
+                continue
+            key = (update.server, update.alias)
+            stamp = image.uploaded_at.isoformat() if image.uploaded_at else ""
+            if key not in latest or stamp > latest[key][0]:
+                latest[key] = (stamp, image.fingerprint or "")
+
+        stale: list[str] = []
+        for instance in await self._incus.list_instances():
+            config = instance.config or {}
+            image_ref = config.get(TEMPLATE_IMAGE_KEY)
+            if not instance.name or not is_template(instance.name) or not image_ref:
+                continue
+            source = parse_image_source(image_ref)
+            if source is None or not source.server or not source.alias:
+                continue
+            current = latest.get((source.server, source.alias))
+            if current and current[1] != config.get(TEMPLATE_FINGERPRINT_KEY):
+                logger.info("Template for %s is stale, rebuilding", image_ref)
+                self.schedule_build(image_ref)
+                stale.append(image_ref)
+        return stale
+
+
+async def build_golden(
+    incus: IncusClient,
+    name: str,
+    source: InstanceSource,
+    *,
+    profiles: list[str],
+    description: str,
+    setup: PrepareCallback,
+) -> str:
+    """Create a container, set it up and take its golden snapshot.
+
+    The container is left stopped. Nothing marking it as complete is
+    recorded; callers do that after this returns, so that copies made
+    from the snapshot never carry those keys.
+
+    Args:
+        incus: Incus client.
+        name: Instance name to build under.
+        source: Where to create the container from.
+        profiles: Profiles to create the container with.
+        description: Instance description.
+        setup: Runs against the started container before the snapshot.
+
+    Returns:
+        Fingerprint of the image the container was created from.
+
+    Raises:
+        IncusError: If an Incus call fails.
+        RuntimeError: If an operation does not succeed.
+    """
+    request = InstancesPost(
+        name=name,
+        profiles=profiles,
+        source=source,
+        start=True,
+        architecture=None,
+        config=None,
+        description=description,
+        devices=None,
+        ephemeral=None,
+        instance_type=None,
+        restore=None,
+        stateful=None,
+        type=None,
+    )
+    _check(await incus.create_instance(request, wait=True), "create")
+    await setup(name)
+    _check(await incus.stop_instance(name, wait=True), "stop")
+    _check(
+        await incus.create_snapshot(name, TEMPLATE_SNAPSHOT, wait=True),
+        "snapshot",
+    )
+    instance = await incus.get_instance(name)
+    fingerprint: str = (instance.config or {}).get("volatile.base_image", "")
+    return fingerprint
+
+
+async def discard_instance(incus: IncusClient, name: str) -> None:
+    """Stop and delete an instance if it exists.
+
+    Raises:
+        IncusError: If an Incus call fails.
+        RuntimeError: If the delete does not succeed.
+    """
+    if not await incus.instance_exists(name):
+        return
+    with contextlib.suppress(IncusError):
+        await incus.stop_instance(name, force=True, wait=True)
+    _check(await incus.delete_instance(name, wait=True), "delete")
+
+
+def _check(operation: Operation, step: str) -> None:
+    """Raise if an Incus operation did not succeed."""
+    if operation.status != "Success":
+        raise RuntimeError(
+            f"Template {step} failed: {operation.err or operation.status}"
+        )
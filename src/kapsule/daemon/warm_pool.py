@@ -0,0 +1,210 @@
+# SPDX-FileCopyrightText: 2026 Lasath Fernando <devel@lasath.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""Warm pool of pre-created default containers.
+
+The first ``kapsule enter`` on a fresh machine has to create the default
+container, and the caller waits for the whole image download and
+create. With ``warm_pool_size`` set, the daemon keeps that many stopped,
+fully created containers of the default image in the background.
+Creating the default container then just claims one by renaming it, and
+the pool is topped up again afterwards.
+
+Pool members are named ``kapsule-pool-<image tag>-<random>`` and hidden
+from listings. The image tag in the name is what ties a member to an
+image, so nothing needs to be stripped from a member's config once it
+has been claimed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import secrets
+from collections.abc import Awaitable, Callable
+
+from .images import image_tag
+from .incus_client import IncusClient, IncusError
+from .operations import OperationError
+
+logger = logging.getLogger(__name__)
+
+POOL_PREFIX = "kapsule-pool-"
+
+CreateCallback = Callable[[str, str], Awaitable[None]]
+
+
+def is_pool_member(name: str) -> bool:
+    """Whether an instance is an unclaimed warm pool container."""
+    return name.startswith(POOL_PREFIX)
+
+
+def _member_prefix(image: str) -> str:
+    """Name prefix of pool containers for an image."""
+    return f"{POOL_PREFIX}{image_tag(image)}-"
+
+
+class WarmPool:
+    """Keeps stopped default containers ready to be claimed."""
+
+    def __init__(
+        self,
+        incus: IncusClient,
+        create: CreateCallback,
+        *,
+        size: int,
+        image: str,
+    ):
+        """Initialize the pool.
+
+        Args:
+            incus: Incus client.
+            create: Creates a container from an image, given its name and
+                the image, raising OperationError on failure. The container
+                may be left running.
+            size: Number of containers to keep ready (0 disables the pool).
+            image: Image pool containers are created from.
+        """
+        self._incus = incus
+        self._create = create
+        self._size = size
+        self._image = image
+        self._claim_lock = asyncio.Lock()
+        self._refill_task: asyncio.Task[None] | None = None
+
+    @property
+    def image(self) -> str:
+        """Image the pool serves."""
+        return self._image
+
+    # -------------------------------------------------------------------------
+    # Lifecycle
+    # -------------------------------------------------------------------------
+
+    def start(self) -> None:
+        """Bring the pool up to size in the background."""
+        self.schedule_refill()
+
+    async def stop(self) -> None:
+        """Stop any refill in progress."""
+        task = self._refill_task
+        self._refill_task = None
+        if task is not None:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    # -------------------------------------------------------------------------
+    # Claiming
+    # -------------------------------------------------------------------------
+
+    async def claim(self, name: str, image: str) -> bool:
+        """Turn a pool container into the named container.
+
+        Args:
+            name: Name the claimed container should get.
+            image: Image the caller wants the container created from.
+
+        Returns:
+            True if a pool container was renamed to ``name`` (it is left
+            stopped), False if the caller has to create it itself.
+        """
+        if self._size <= 0 or image != self._image:
+            return False
+
+        claimed = False
+        async with self._claim_lock:
+            for member in await self._members():
+                try:
+                    op = await self._incus.rename_instance(member, name, wait=True)
+                except IncusError as e:
+                    logger.warning("Could not claim %s: %s", member, e)
+                    continue
+                if op.status == "Success":
+                    logger.info("Claimed warm pool container %s as %s", member, name)
+                    claimed = True
+                    break
+                logger.warning("Could not claim %s: %s", member, op.err or op.status)
+
+        self.schedule_refill()
+        return claimed
+
+    async def _members(self) -> list[str]:
+        """Stopped pool containers for the pool's image."""
+        prefix = _member_prefix(self._image)
+        return sorted(
+            instance.name
+            for instance in await self._incus.list_instances()
+            if instance.name
+            and instance.name.startswith(prefix)
+            and (instance.status or "").lower() == "stopped"
+        )
+
+    # -------------------------------------------------------------------------
+    # Refilling
+    # -------------------------------------------------------------------------
+
+    def schedule_refill(self) -> None:
+        """Top the pool up in the background unless that is already running."""
+        if self._refill_task is not None and not self._refill_task.done():
+            return
+        self._refill_task = asyncio.create_task(
+            self._refill_logged(), name="kapsule-warm-pool"
+        )
+
+    async def _refill_logged(self) -> None:
+        """Refill, logging instead of raising on failure."""
+        try:
+            await self.refill()
+        except (IncusError, OperationError) as e:
+            logger.warning("Failed to refill warm pool: %s", e)
+
+    async def refill(self) -> None:
+        """Create missing pool containers and drop ones for other images.
+
+        Members are created one at a time so that the pool never competes
+        with a user's own create for more than one container's worth of
+        I/O.
+
+        Raises:
+            IncusError: If an Incus call fails.
+            OperationError: If creating or removing a member fails.
+        """
+        prefix = _member_prefix(self._image)
+        present: list[str] = []
+        for instance in await self._incus.list_instances():
+            name = instance.name or ""
+            if not is_pool_member(name):
+                continue
+            stopped = (instance.status or "").lower() == "stopped"
+            if name.startswith(prefix) and stopped and len(present) < self._size:
+                present.append(name)
+            else:
+                # Left over from another image, a larger pool or an
+                # interrupted create
+                await self._discard(name)
+
+        for _ in range(self._size - len(present)):
+            name = f"{prefix}{secrets.token_hex(3)}"
+            logger.info("Creating warm pool container %s", name)
+            try:
+                await self._create(name, self._image)
+                op = await self._incus.stop_instance(name, wait=True)
+                if op.status != "Success":
+                    raise OperationError(f"Stop failed: {op.err or op.status}")
+            except (IncusError, OperationError, asyncio.CancelledError):
+                with contextlib.suppress(IncusError, OperationError):
+                    await self._discard(name)
+                raise
+
+    async def _discard(self, name: str) -> None:
+        """Stop and delete a pool container if it exists."""
+        if not await self._incus.instance_exists(name):
+            return
+        with contextlib.suppress(IncusError):
+            await self._incus.stop_instance(name, force=True, wait=True)
+        op = await self._incus.delete_instance(name, wait=True)
+        if op.status != "Success":
+            raise OperationError(f"Delete failed: {op.err or op.status}")
@@ -0,0 +1,26 @@
+"""Shared fixtures for the daemon unit tests."""
+
+import inspect
+import typing
+from unittest.mock import create_autospec
+
+import pytest
+
+from kapsule.daemon.incus_client import IncusClient
+from kapsule.daemon.models_generated import Operation
+
+
+@pytest.fixture
+def ok_operation() -> Operation:
+    """A finished, successful Incus operation."""
+    return Operation.model_validate({"id": "op", "status": "Success"})
+
+
+@pytest.fixture
+def incus(ok_operation):
+    """IncusClient mock whose operation-returning methods all succeed."""
+    client = create_autospec(IncusClient, instance=True)
+    for name, method in inspect.getmembers(IncusClient, inspect.iscoroutinefunction):
+        if typing.get_type_hints(method).get("return") is Operation:
+            getattr(client, name).return_value = ok_operation
+    return client
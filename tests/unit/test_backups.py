@@ -0,0 +1,207 @@
+"""Tests for streaming container export and import."""
+
+import json
+import os
+from contextlib import asynccontextmanager
+from unittest.mock import MagicMock
+
+import httpx
+import pytest
+
+from kapsule.daemon.backups import fd_size, read_fd
+from kapsule.daemon.container_service import ContainerService
+from kapsule.daemon.incus_client import BackupDownload, IncusClient, IncusError
+from kapsule.daemon.models_generated import Instance
+from kapsule.daemon.operations import OperationError, OperationReporter
+
+ARCHIVE = os.urandom(3 * 1024 * 1024 + 17)
+
+
+def _async_op():
+    return {
+        "type": "async",
+        "status": "Operation created",
+        "status_code": 100,
+        "metadata": {"id": "op", "status": "Running"},
+    }
+
+
+class FakeBackupApi:
+    """Fake Incus backup endpoints."""
+
+    def __init__(self):
+        self.backups: dict[str, dict] = {}
+        self.imported = b""
+        self.import_headers: dict[str, str] = {}
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if request.method == "POST" and path == "/1.0/instances/dev/backups":
+            body = json.loads(request.content)
+            self.backups[body["name"]] = body
+            return httpx.Response(202, json=_async_op())
+        if request.method == "GET" and path.endswith("/export"):
+            return httpx.Response(200, content=ARCHIVE)
+        if request.method == "POST" and path == "/1.0/instances":
+            self.imported = request.content
+            self.import_headers = dict(request.headers)
+            return httpx.Response(202, json=_async_op())
+        return httpx.Response(404, json={"error": "not found", "error_code": 404})
+
+
+@pytest.mark.asyncio
+async def test_incus_client_streams_backups():
+    fake = FakeBackupApi()
+    client = IncusClient(transport=httpx.MockTransport(fake.handler))
+
+    await client.create_backup("dev", "b0", compression="zstd")
+    assert fake.backups["b0"]["compression_algorithm"] == "zstd"
+    assert fake.backups["b0"]["instance_only"] is True
+
+    async with client.export_backup("dev", "b0") as download:
+        assert download.size == len(ARCHIVE)
+        data = b"".join([chunk async for chunk in download.chunks])
+    assert data == ARCHIVE
+
+    async def chunks():
+        for i in range(0, len(ARCHIVE), 1024 * 1024):
+            yield ARCHIVE[i:i + 1024 * 1024]
+
+    await client.import_backup("dev2", chunks())
+    assert fake.imported == ARCHIVE
+    assert fake.import_headers["x-incus-name"] == "dev2"
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_export_backup_raises_incus_errors():
+    client = IncusClient(transport=httpx.MockTransport(
+        lambda _r: httpx.Response(404, json={"error": "not found", "error_code": 404})
+    ))
+    with pytest.raises(IncusError, match="not found"):
+        async with client.export_backup("dev", "gone"):
+            pass
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_read_fd_reads_to_end(tmp_path):
+    path = tmp_path / "archive"
+    path.write_bytes(ARCHIVE)
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        assert fd_size(fd) == len(ARCHIVE)
+        assert b"".join([c async for c in read_fd(fd)]) == ARCHIVE
+    finally:
+        os.close(fd)
+
+
+def _export_incus(incus, chunks):
+    incus.instance_exists.side_effect = lambda name: name == "dev"
+
+    @asynccontextmanager
+    async def export_backup(_name, _backup):
+        async def stream():
+            for chunk in chunks:
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+        yield BackupDownload(size=len(ARCHIVE), chunks=stream())
+
+    incus.export_backup.side_effect = export_backup
+    return incus
+
+
+def _reporter():
+    return OperationReporter(_operation=MagicMock())
+
+
+def _fd_closed(fd):
+    try:
+        os.fstat(fd)
+    except OSError:
+        return True
+    return False
+
+
+@pytest.mark.asyncio
+async def test_export_container_streams_to_fd_and_cleans_up(incus, tmp_path):
+    _export_incus(incus, [ARCHIVE[:1000], ARCHIVE[1000:]])
+    service = ContainerService(MagicMock(), incus)
+    path = tmp_path / "dev.tar.zst"
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT)
+
+    await ContainerService.export_container.__wrapped__(
+        service, _reporter(), name="dev", fd=fd, compression="gzip"
+    )
+
+    assert path.read_bytes() == ARCHIVE
+    assert _fd_closed(fd)
+    name, backup = incus.create_backup.call_args.args
+    assert name == "dev"
+    assert incus.create_backup.call_args.kwargs["compression"] == "gzip"
+    incus.delete_backup.assert_awaited_once_with("dev", backup, wait=True)
+
+
+@pytest.mark.asyncio
+async def test_failed_export_still_deletes_backup(incus, tmp_path):
+    _export_incus(incus, [ARCHIVE[:1000], IncusError("connection reset")])
+    service = ContainerService(MagicMock(), incus)
+    fd = os.open(tmp_path / "dev.tar", os.O_WRONLY | os.O_CREAT)
+
+    with pytest.raises(OperationError, match="connection reset"):
+        await ContainerService.export_container.__wrapped__(
+            service, _reporter(), name="dev", fd=fd
+        )
+
+    assert _fd_closed(fd)
+    incus.delete_backup.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("name", "compression"),
+    [("dev", "xz"), ("missing", "zstd"), ("kapsule-layer-0123", "zstd")],
+)
+async def test_export_container_rejects_bad_requests(
+    incus, tmp_path, name, compression
+):
+    _export_incus(incus, [])
+    service = ContainerService(MagicMock(), incus)
+    fd = os.open(tmp_path / "out", os.O_WRONLY | os.O_CREAT)
+
+    with pytest.raises(OperationError):
+        await ContainerService.export_container.__wrapped__(
+            service, _reporter(), name=name, fd=fd, compression=compression
+        )
+
+    assert _fd_closed(fd)
+    incus.create_backup.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_import_container_streams_from_fd(incus, ok_operation, tmp_path):
+    incus.instance_exists.return_value = False
+    received: list[bytes] = []
+
+    async def import_backup(_name, chunks, **_):
+        received.extend([chunk async for chunk in chunks])
+        return ok_operation
+
+    incus.import_backup.side_effect = import_backup
+    incus.get_instance.return_value = Instance.model_validate({
+        "name": "dev2", "config": {"user.kapsule.ptyxis-profile": "other-host"},
+    })
+    service = ContainerService(MagicMock(), incus)
+    path = tmp_path / "dev.tar.zst"
+    path.write_bytes(ARCHIVE)
+    fd = os.open(path, os.O_RDONLY)
+
+    await ContainerService.import_container.__wrapped__(
+        service, _reporter(), name="dev2", fd=fd
+    )
+
+    assert b"".join(received) == ARCHIVE
+    assert _fd_closed(fd)
+    assert incus.import_backup.call_args.args[0] == "dev2"
+    incus.start_instance.assert_awaited_once_with("dev2", wait=True)
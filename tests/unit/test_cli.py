@@ -5,6 +5,7 @@ from unittest.mock import AsyncMock, patch
 from typer.testing import CliRunner
 
 from kapsule.cli.app import app
+from kapsule.client import ContainerError
 
 
 runner = CliRunner()
@@ -35,6 +36,22 @@ def test_list_containers(mock_client):
     assert "Running" in result.output
 
 
+def test_top_once_prints_stats_table(mock_client):
+    mock_client.get_container_stats.return_value = [
+        {"name": "dev", "status": "Running", "cpu": 12.5, "memory": 512_000_000,
+         "memory_limit": 0, "disk": 2_000_000_000, "processes": 42,
+         "cpu_history": [0.0, 12.5]},
+    ]
+    mock_client.get_idle_reclaimed_bytes.return_value = 1_500_000_000
+
+    result = runner.invoke(app, ["top", "--once", "-n", "0.5"])
+    assert result.exit_code == 0
+    assert "dev" in result.output
+    assert "12.5%" in result.output
+    assert "1.5 GB reclaimed from idle containers" in result.output
+    assert mock_client.get_container_stats.await_count == 2
+
+
 def test_list_hides_stopped_by_default(mock_client):
     mock_client.list_containers.return_value = [
         {"name": "dev", "status": "Running", "image": "images:ubuntu/24.04",
@@ -69,6 +86,51 @@ def test_create_container(mock_client):
     result = runner.invoke(app, ["create", "my-dev", "--image", "images:ubuntu/24.04"])
     assert result.exit_code == 0
     mock_client.create_container.assert_called_once()
+    assert mock_client.wait_operation.call_args.args[0] == (
+        "/org/frostyard/Kapsule/operations/1"
+    )
+
+
+def test_create_container_with_packages(mock_client):
+    mock_client.create_container.return_value = "/org/frostyard/Kapsule/operations/1"
+
+    result = runner.invoke(app, ["create", "my-dev", "-p", "git", "--package", "gcc"])
+    assert result.exit_code == 0
+    assert mock_client.create_container.call_args.kwargs["packages"] == ["git", "gcc"]
+
+
+def test_limits_passes_profile_and_overrides(mock_client):
+    mock_client.set_container_limits.return_value = (
+        "/org/frostyard/Kapsule/operations/6"
+    )
+
+    result = runner.invoke(
+        app, ["limits", "dev", "-p", "batch", "--set", "memory=8GiB", "-s", "cpu=4"]
+    )
+    assert result.exit_code == 0
+    mock_client.set_container_limits.assert_called_once_with(
+        "dev", profile="batch", limits={"memory": "8GiB", "cpu": "4"}
+    )
+
+    result = runner.invoke(app, ["limits", "dev", "--set", "memory"])
+    assert result.exit_code == 2
+
+
+def test_create_container_failure(mock_client):
+    mock_client.create_container.return_value = "/org/frostyard/Kapsule/operations/1"
+    mock_client.wait_operation.side_effect = ContainerError("Creation failed")
+
+    result = runner.invoke(app, ["create", "my-dev"])
+    assert result.exit_code == 1
+    assert "created" not in result.output
+
+
+def test_clone_container(mock_client):
+    mock_client.clone_container.return_value = "/org/frostyard/Kapsule/operations/3"
+
+    result = runner.invoke(app, ["clone", "dev", "dev2", "--snapshot", "fork"])
+    assert result.exit_code == 0
+    mock_client.clone_container.assert_called_once_with("dev", "dev2", snapshot="fork")
 
 
 def test_rm_container(mock_client):
@@ -95,6 +157,52 @@ def test_stop_container(mock_client):
     mock_client.stop_container.assert_called_once()
 
 
+def test_stop_many_containers_uses_one_bulk_operation(mock_client):
+    mock_client.stop_containers.return_value = "/org/frostyard/Kapsule/operations/5"
+
+    result = runner.invoke(app, ["stop", "dev", "web", "-f"])
+    assert result.exit_code == 0
+    mock_client.stop_containers.assert_called_once_with(["dev", "web"], force=True)
+    mock_client.stop_container.assert_not_called()
+
+
+def test_rm_expands_globs_and_all(mock_client):
+    mock_client.list_containers.return_value = [
+        {"name": n, "status": "Stopped", "image": "", "created": "", "mode": ""}
+        for n in ("test-1", "test-2", "dev")
+    ]
+    mock_client.delete_containers.return_value = "/org/frostyard/Kapsule/operations/6"
+
+    result = runner.invoke(app, ["rm", "test-*"])
+    assert result.exit_code == 0
+    mock_client.delete_containers.assert_called_once_with(
+        ["test-1", "test-2"], force=False
+    )
+
+    result = runner.invoke(app, ["start", "--all"])
+    assert result.exit_code == 0
+    mock_client.start_containers.assert_called_once_with(["test-1", "test-2", "dev"])
+
+    result = runner.invoke(app, ["rm"])
+    assert result.exit_code == 2
+
+
+def test_rm_all_force_asks_first(mock_client):
+    mock_client.list_containers.return_value = [
+        {"name": n, "status": "Running", "image": "", "created": "", "mode": ""}
+        for n in ("dev", "web")
+    ]
+    mock_client.delete_containers.return_value = "/org/frostyard/Kapsule/operations/7"
+
+    result = runner.invoke(app, ["rm", "--all", "--force"], input="n\n")
+    assert result.exit_code == 1
+    mock_client.delete_containers.assert_not_called()
+
+    result = runner.invoke(app, ["rm", "--all", "--force", "--yes"])
+    assert result.exit_code == 0
+    mock_client.delete_containers.assert_called_once_with(["dev", "web"], force=True)
+
+
 def test_config_shows_all(mock_client):
     mock_client.get_config.return_value = {
         "default_container": "dev",
@@ -105,3 +213,93 @@ def test_config_shows_all(mock_client):
     assert result.exit_code == 0
     assert "default_container" in result.output
     assert "dev" in result.output
+
+
+def test_images_search(mock_client):
+    mock_client.list_images.return_value = [{
+        "image": "images:ubuntu/24.04/default",
+        "os": "Ubuntu",
+        "release": "noble",
+        "arch": "amd64",
+        "variant": "default",
+        "description": "Ubuntu noble amd64 (default)",
+    }]
+
+    result = runner.invoke(app, ["images", "ubuntu 24"])
+    assert result.exit_code == 0
+    mock_client.list_images.assert_called_once_with("ubuntu 24")
+    assert "images:ubuntu/24.04/default" in result.output
+
+
+def test_run_removes_container_and_exits_with_command_status(mock_client):
+    mock_client.prepare_run.return_value = (
+        True, "", "kapsule-run-0a1b2c3d", ["incus", "exec", "kapsule-run-0a1b2c3d"],
+    )
+
+    with patch("kapsule.cli.app.subprocess.run") as run:
+        run.return_value.returncode = 3
+        result = runner.invoke(app, ["run", "images:alpine/3.20", "--", "false"])
+
+    assert result.exit_code == 3
+    mock_client.prepare_run.assert_called_once_with("images:alpine/3.20", ["false"])
+    run.assert_called_once_with(["incus", "exec", "kapsule-run-0a1b2c3d"])
+    mock_client.finish_run.assert_called_once_with("kapsule-run-0a1b2c3d")
+
+
+def test_snapshot_list(mock_client):
+    mock_client.list_snapshots.return_value = [
+        {"name": "snap-20260101-120000", "created": "2026-01-01T12:00:00+00:00",
+         "size": 4096},
+    ]
+
+    result = runner.invoke(app, ["snapshot", "list", "dev"])
+    assert result.exit_code == 0
+    assert "snap-20260101-120000" in result.output
+    assert "2026-01-01 12:00:00" in result.output
+
+
+def test_snapshot_restore(mock_client):
+    mock_client.restore_snapshot.return_value = "/org/frostyard/Kapsule/operations/4"
+
+    result = runner.invoke(app, ["snapshot", "restore", "dev", "before-upgrade"])
+    assert result.exit_code == 0
+    mock_client.restore_snapshot.assert_called_once_with("dev", "before-upgrade")
+
+
+def test_export_passes_file_descriptor(mock_client, tmp_path):
+    mock_client.export_container.return_value = "/org/frostyard/Kapsule/operations/5"
+    archive = tmp_path / "dev.tar.gz"
+
+    result = runner.invoke(app, ["export", "dev", str(archive), "-c", "gzip"])
+    assert result.exit_code == 0
+    name, fd = mock_client.export_container.call_args.args
+    assert name == "dev"
+    assert isinstance(fd, int)
+    assert mock_client.export_container.call_args.kwargs == {"compression": "gzip"}
+    assert archive.exists()
+
+
+def test_export_rejects_unknown_compression(mock_client, tmp_path):
+    result = runner.invoke(app, ["export", "dev", str(tmp_path / "x"), "-c", "xz"])
+    assert result.exit_code == 2
+    mock_client.export_container.assert_not_called()
+
+
+def test_failed_export_removes_archive(mock_client, tmp_path):
+    mock_client.export_container.return_value = "/org/frostyard/Kapsule/operations/5"
+    mock_client.wait_operation.side_effect = ContainerError("Backup failed")
+    archive = tmp_path / "dev.tar.zst"
+
+    result = runner.invoke(app, ["export", "dev", str(archive)])
+    assert result.exit_code == 1
+    assert not archive.exists()
+
+
+def test_import(mock_client, tmp_path):
+    mock_client.import_container.return_value = "/org/frostyard/Kapsule/operations/6"
+    archive = tmp_path / "dev.tar.zst"
+    archive.write_bytes(b"archive")
+
+    result = runner.invoke(app, ["import", str(archive), "dev2"])
+    assert result.exit_code == 0
+    assert mock_client.import_container.call_args.args[0] == "dev2"
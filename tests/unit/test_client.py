@@ -1,6 +1,7 @@
 """Tests for the kapsule D-Bus client library."""
 
 import pytest
+from dbus_fast import Variant
 from unittest.mock import AsyncMock, MagicMock, patch
 
 from kapsule.client import KapsuleClient
@@ -77,6 +78,30 @@ async def test_create_container(mock_bus, mock_iface):
             assert op_path == "/org/frostyard/Kapsule/operations/1"
 
 
+@pytest.mark.asyncio
+async def test_create_container_with_options(mock_bus, mock_iface):
+    mock_iface.call_create_container_with_options = AsyncMock(
+        return_value="/org/frostyard/Kapsule/operations/1"
+    )
+
+    with patch("kapsule.client.client.MessageBus") as MockBus:
+        MockBus.return_value.connect = AsyncMock(return_value=mock_bus)
+
+        async with KapsuleClient() as client:
+            await client.create_container(
+                "dev", packages=["git"], resources="batch"
+            )
+
+    name, image, options = mock_iface.call_create_container_with_options.call_args.args
+    assert (name, image) == ("dev", "")
+    assert options == {
+        "session_mode": Variant("b", False),
+        "dbus_mux": Variant("b", False),
+        "packages": Variant("as", ["git"]),
+        "resources": Variant("s", "batch"),
+    }
+
+
 @pytest.mark.asyncio
 async def test_daemon_not_running():
     with patch("kapsule.client.client.MessageBus") as MockBus:
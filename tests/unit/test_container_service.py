@@ -0,0 +1,491 @@
+"""Tests for the daemon's container service query paths."""
+
+import asyncio
+import json
+import os
+from unittest.mock import AsyncMock, MagicMock, create_autospec
+
+import httpx
+import pytest
+from test_incus_events import FakeEventsServer
+
+from kapsule.daemon.container_service import (
+    ContainerService,
+    _OperationProgressRelay,
+)
+from kapsule.daemon.incus_client import IncusClient
+from kapsule.daemon.models_generated import Instance, Operation
+from kapsule.daemon.operations import OperationError, OperationReporter
+
+
+def _instance(name, status="Running", config=None):
+    return {
+        "name": name,
+        "status": status,
+        "created_at": "2026-01-01T00:00:00Z",
+        "config": {"image.description": "Ubuntu noble", **(config or {})},
+        "devices": {},
+    }
+
+
+def _sync(metadata):
+    return {
+        "type": "sync",
+        "status": "Success",
+        "status_code": 200,
+        "metadata": metadata,
+    }
+
+
+class RecordingIncus:
+    """Fake Incus API that records every request it receives."""
+
+    def __init__(self, instances):
+        self.instances = instances
+        self.requests: list[httpx.Request] = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        path = request.url.path
+        if path == "/1.0/instances":
+            return httpx.Response(200, content=json.dumps(_sync(self.instances)))
+        for inst in self.instances:
+            if path == f"/1.0/instances/{inst['name']}":
+                return httpx.Response(200, content=json.dumps(_sync(inst)))
+        return httpx.Response(404, json={"error": "not found", "error_code": 404})
+
+    def client(self) -> IncusClient:
+        return IncusClient(transport=httpx.MockTransport(self.handler))
+
+
+@pytest.mark.asyncio
+async def test_list_containers_uses_single_request():
+    fake = RecordingIncus([
+        _instance(f"c{i}", config={"user.kapsule.session-mode": "true"})
+        for i in range(40)
+    ])
+    service = ContainerService(MagicMock(), fake.client())
+
+    containers = await service.list_containers()
+
+    assert len(containers) == 40
+    assert len(fake.requests) == 1
+    assert fake.requests[0].url.params["recursion"] == "1"
+
+
+@pytest.mark.asyncio
+async def test_list_containers_computes_mode_from_listing():
+    fake = RecordingIncus([
+        _instance("plain"),
+        _instance("session", config={"user.kapsule.session-mode": "true"}),
+        _instance("mux", status="Stopped", config={
+            "user.kapsule.session-mode": "true",
+            "user.kapsule.dbus-mux": "true",
+        }),
+        _instance("kapsule-template-archlinux-0123abcd", status="Stopped"),
+    ])
+    service = ContainerService(MagicMock(), fake.client())
+
+    containers = await service.list_containers()
+
+    assert containers == [
+        ("plain", "Running", "Ubuntu noble", "2026-01-01T00:00:00+00:00", "Default"),
+        ("session", "Running", "Ubuntu noble", "2026-01-01T00:00:00+00:00", "Session"),
+        ("mux", "Stopped", "Ubuntu noble", "2026-01-01T00:00:00+00:00", "DbusMux"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_get_container_info_matches_listing():
+    fake = RecordingIncus([
+        _instance("session", config={"user.kapsule.session-mode": "true"}),
+    ])
+    service = ContainerService(MagicMock(), fake.client())
+
+    info = await service.get_container_info("session")
+    listed = await service.list_containers()
+
+    assert info == listed[0]
+
+
+def _progress_op(stage, percent=None, processed=None, speed=None):
+    progress = {"stage": stage}
+    if percent is not None:
+        progress["percent"] = str(percent)
+    if processed is not None:
+        progress["processed"] = str(processed)
+    if speed is not None:
+        progress["speed"] = str(speed)
+    return Operation.model_validate({
+        "id": "op",
+        "status": "Running",
+        "status_code": 103,
+        "metadata": {
+            "progress": progress,
+            f"{stage}_progress": f"rootfs: {percent}%",
+        },
+    })
+
+
+def test_progress_relay_starts_bar_per_stage():
+    reporter = MagicMock()
+    relay = _OperationProgressRelay(reporter, "dev")
+
+    relay.update(_progress_op("download", percent=10, speed=2_000_000))
+    relay.update(_progress_op("download", percent=60, speed=4_000_000))
+    relay.update(_progress_op("create_instance_from_image_unpack",
+                              processed=3 * 2**31))
+    relay.finish(True)
+
+    starts = reporter.start_progress.call_args_list
+    assert [c.kwargs["total"] for c in starts] == [100, -1]
+    assert starts[0].args[0] == "Downloading image (rootfs)"
+
+    bar = reporter.start_progress.return_value
+    assert bar.update.call_args_list[1].args == (60, 4_000_000.0)
+    # Byte counts are clamped to what ProgressUpdate's int32 can carry
+    assert bar.update.call_args_list[2].args[0] == 2**31 - 1
+    download_done = bar.complete.call_args_list[0]
+    assert download_done.kwargs["message"] == (
+        "Downloading image: average 3.0 MB/s"
+    )
+
+
+def test_progress_relay_ignores_operations_without_progress():
+    reporter = MagicMock()
+    relay = _OperationProgressRelay(reporter, "dev")
+
+    relay.update(Operation.model_validate({"id": "op", "metadata": {}}))
+    relay.finish(False)
+
+    reporter.start_progress.assert_not_called()
+
+
+def _enter_incus(generation=7):
+    incus = create_autospec(IncusClient, instance=True)
+    incus.instance_exists.return_value = True
+    incus.get_instance.return_value = Instance.model_validate(_instance(
+        "dev", config={f"user.kapsule.host-users.{os.getuid()}.mapped": "true"},
+    ))
+    incus.instance_generation.return_value = generation
+    return incus
+
+
+def _incus_calls(incus):
+    return [c for c in incus.mock_calls if c[0] != "instance_generation"]
+
+
+class EnterIncus:
+    """Fake Incus API for enter setup, reporting operations as events."""
+
+    def __init__(self, server):
+        self.server = server
+        self.instance = _instance(
+            "dev", config={f"user.kapsule.host-users.{os.getuid()}.mapped": "true"},
+        )
+        self.operations: dict[str, dict] = {}
+        self.requests: list[str] = []
+
+    def _exec_operation(self, op_id, status="Running", code=103):
+        return {
+            "id": op_id,
+            "class": "task",
+            "status": status,
+            "status_code": code,
+            "metadata": {"return": 0, "output": {}} if code == 200 else {},
+            "resources": {"instances": ["/1.0/instances/dev"]},
+        }
+
+    async def _finish(self, op_id):
+        self.operations[op_id] = self._exec_operation(op_id, "Success", 200)
+        await self.server.send(
+            {"type": "operation", "metadata": self.operations[op_id]}
+        )
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        self.requests.append(f"{request.method} {path}")
+        if path == "/1.0/instances":
+            return httpx.Response(200, json=_sync([self.instance]))
+        if path == "/1.0/instances/dev":
+            return httpx.Response(200, json=_sync(self.instance))
+        if path == "/1.0/instances/dev/exec":
+            op_id = f"exec{len(self.operations)}"
+            self.operations[op_id] = self._exec_operation(op_id)
+            return httpx.Response(202, json={
+                "type": "async",
+                "status": "Operation created",
+                "status_code": 100,
+                "operation": f"/1.0/operations/{op_id}",
+                "metadata": self.operations[op_id],
+            })
+        if path.startswith("/1.0/operations/"):
+            op_id = path.split("/")[3]
+            op = self.operations[op_id]
+            if op["status_code"] < 200:
+                # The waiter is registered by now; finish through an event
+                asyncio.get_running_loop().create_task(self._finish(op_id))
+            return httpx.Response(200, json=_sync(op))
+        return httpx.Response(404, json={"error": "not found", "error_code": 404})
+
+
+@pytest.mark.asyncio
+async def test_prepare_enter_warm_path_makes_no_incus_calls(tmp_path):
+    server = FakeEventsServer(str(tmp_path / "incus.socket"))
+    await server.start()
+    api = EnterIncus(server)
+    incus = IncusClient(server.path, transport=httpx.MockTransport(api.handler))
+    service = ContainerService(MagicMock(), incus)
+    env = {"WAYLAND_DISPLAY": "wayland-0", "TERM": "xterm"}
+    try:
+        incus.start_events()
+        await incus.events.wait_connected()
+
+        cold = await service.prepare_enter(os.getuid(), os.getgid(), "dev", [], env)
+        assert cold[0]
+        assert "POST /1.0/instances/dev/exec" in api.requests
+
+        # The setup exec finishing must not count as a change to the container
+        await asyncio.sleep(0.05)
+        api.requests.clear()
+        warm = await service.prepare_enter(os.getuid(), os.getgid(), "dev", [], env)
+
+        assert warm == cold
+        assert api.requests == []
+    finally:
+        await incus.close()
+        await server.stop()
+
+
+@pytest.mark.asyncio
+async def test_prepare_enter_redoes_setup_on_change():
+    incus = _enter_incus()
+    service = ContainerService(MagicMock(), incus)
+    env = {"WAYLAND_DISPLAY": "wayland-0"}
+    await service.prepare_enter(os.getuid(), os.getgid(), "dev", [], env)
+
+    # A different display needs different runtime links
+    incus.reset_mock()
+    env = {"WAYLAND_DISPLAY": "wayland-1"}
+    await service.prepare_enter(os.getuid(), os.getgid(), "dev", [], env)
+    assert _incus_calls(incus)
+
+    # An event for the container (e.g. a restart) bumps its generation
+    incus.reset_mock()
+    incus.instance_generation.return_value = 8
+    await service.prepare_enter(os.getuid(), os.getgid(), "dev", [], env)
+    assert _incus_calls(incus)
+
+    # Without the events stream there is nothing to vouch for the cache
+    incus.reset_mock()
+    incus.instance_generation.return_value = None
+    await service.prepare_enter(os.getuid(), os.getgid(), "dev", [], env)
+    await service.prepare_enter(os.getuid(), os.getgid(), "dev", [], env)
+    assert incus.instance_exists.await_count == 2
+
+
+def _clone_incus(existing):
+    incus = create_autospec(IncusClient, instance=True)
+    incus.instance_exists.side_effect = lambda name: name in existing
+    incus.get_instance.return_value = Instance.model_validate(
+        _instance("dev", config={"user.kapsule.ptyxis-profile": "old-uuid"})
+    )
+    incus.create_snapshot.return_value = Operation.model_validate({"status": "Success"})
+    incus.create_instance.return_value = Operation.model_validate({"status": "Success"})
+    return incus
+
+
+@pytest.mark.asyncio
+async def test_clone_container_copies_from_snapshot():
+    incus = _clone_incus({"dev"})
+    service = ContainerService(MagicMock(), incus)
+
+    await ContainerService.clone_container.__wrapped__(
+        service, MagicMock(), source="dev", name="dev2", snapshot="fork"
+    )
+
+    incus.create_snapshot.assert_awaited_once_with("dev", "fork", wait=True)
+    request = incus.create_instance.call_args.args[0]
+    assert request.name == "dev2"
+    assert request.source.type == "copy"
+    assert request.source.source == "dev/fork"
+    # The source's config is inherited, except its terminal profile
+    assert request.profiles is None
+    assert request.config == {"user.kapsule.ptyxis-profile": ""}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("source", "existing"),
+    [
+        ("missing", {"dev2"}),
+        ("dev", {"dev", "dev2"}),
+        ("kapsule-template-arch-0123abcd", {"kapsule-template-arch-0123abcd"}),
+    ],
+)
+async def test_clone_container_rejects_bad_names(source, existing):
+    incus = _clone_incus(existing)
+    service = ContainerService(MagicMock(), incus)
+
+    with pytest.raises(OperationError):
+        await ContainerService.clone_container.__wrapped__(
+            service, MagicMock(), source=source, name="dev2"
+        )
+    incus.create_instance.assert_not_awaited()
+
+
+def _run_service(max_parallel_runs=4):
+    incus = create_autospec(IncusClient, instance=True)
+    incus.instance_exists.side_effect = lambda name: name == "dev"
+    incus.create_instance.return_value = Operation.model_validate({"status": "Success"})
+    incus.stop_instance.return_value = Operation.model_validate({"status": "Success"})
+    service = ContainerService(MagicMock(), incus)
+    service._run_slots = asyncio.Semaphore(max_parallel_runs)
+    service._setup_user_sync = AsyncMock()
+    service._setup_runtime_symlinks = AsyncMock()
+    return incus, service
+
+
+@pytest.mark.asyncio
+async def test_prepare_run_creates_ephemeral_copy():
+    incus, service = _run_service()
+
+    ok, message, name, args = await service.prepare_run(
+        os.getuid(), os.getgid(), "dev/snap0", ["make", "test"], {}
+    )
+
+    assert ok, message
+    assert name.startswith("kapsule-run-")
+    request = incus.create_instance.call_args.args[0]
+    assert request.ephemeral is True
+    assert request.source.source == "dev/snap0"
+    assert request.config["user.kapsule.run.owner"] == str(os.getuid())
+    assert args[:3] == ["incus", "exec", name]
+    service._setup_user_sync.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_prepare_run_bounds_parallel_setups():
+    incus, service = _run_service(max_parallel_runs=2)
+    active = peak = 0
+
+    async def slow_setup(*_args):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+
+    service._setup_user_sync = slow_setup
+    results = await asyncio.gather(*(
+        service.prepare_run(os.getuid(), os.getgid(), "dev", [], {})
+        for _ in range(5)
+    ))
+
+    assert all(ok for ok, *_rest in results)
+    assert len({name for _ok, _msg, name, _args in results}) == 5
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_finish_run_checks_owner():
+    incus, service = _run_service()
+    incus.get_instance.return_value = Instance.model_validate(
+        _instance("kapsule-run-00", config={"user.kapsule.run.owner": "1000"})
+    )
+
+    with pytest.raises(OperationError):
+        await service.finish_run(1001, "kapsule-run-00")
+    with pytest.raises(OperationError):
+        await service.finish_run(1000, "dev")
+    incus.stop_instance.assert_not_awaited()
+
+    assert await service.finish_run(1000, "kapsule-run-00")
+    incus.stop_instance.assert_awaited_once_with(
+        "kapsule-run-00", force=True, wait=True
+    )
+
+
+def _bulk_service(instances, max_parallel_bulk_ops=2):
+    incus = create_autospec(IncusClient, instance=True)
+    incus.list_instances.return_value = [
+        Instance.model_validate(_instance(name, status=status))
+        for name, status in instances
+    ]
+    active = 0
+    peak = 0
+
+    async def slow_op(name, **_kwargs):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        if name == "broken":
+            return Operation.model_validate({"status": "Failure", "err": "boom"})
+        if name == "crash":
+            raise RuntimeError("connection reset")
+        return Operation.model_validate({"status": "Success"})
+
+    incus.stop_instance.side_effect = slow_op
+    incus.delete_instance.side_effect = slow_op
+    service = ContainerService(MagicMock(), incus)
+    service._bulk_slots = asyncio.Semaphore(max_parallel_bulk_ops)
+    return incus, service, lambda: peak
+
+
+@pytest.mark.asyncio
+async def test_delete_containers_runs_in_parallel_up_to_the_limit():
+    names = [f"c{i}" for i in range(6)]
+    incus, service, peak = _bulk_service(
+        [(n, "Running") for n in names] + [("off", "Stopped")]
+    )
+
+    await ContainerService.delete_containers.__wrapped__(
+        service, OperationReporter(_operation=MagicMock()),
+        names=[*names, "off"], force=True,
+    )
+
+    # One listing for all targets, not a lookup per container
+    incus.list_instances.assert_awaited_once()
+    incus.instance_exists.assert_not_awaited()
+    assert incus.stop_instance.await_count == 6
+    assert incus.delete_instance.await_count == 7
+    assert peak() == 2
+
+
+@pytest.mark.asyncio
+async def test_bulk_failures_are_reported_after_the_rest_finish():
+    incus, service, _peak = _bulk_service(
+        [("dev", "Running"), ("broken", "Running"),
+         ("kapsule-run-1", "Running")]
+    )
+    reporter = OperationReporter(_operation=MagicMock())
+
+    with pytest.raises(OperationError, match="3 of 4 containers failed"):
+        await ContainerService.stop_containers.__wrapped__(
+            service, reporter,
+            names=["dev", "broken", "missing", "kapsule-run-1"],
+        )
+
+    # Internal instances are off limits, like missing ones
+    stopped = [c.args[0] for c in incus.stop_instance.await_args_list]
+    assert sorted(stopped) == ["broken", "dev"]
+    messages = [c.args[1] for c in reporter._operation.Message.call_args_list]
+    assert "dev: stopped" in messages
+    assert "missing: does not exist" in messages
+
+
+@pytest.mark.asyncio
+async def test_bulk_unexpected_errors_count_as_failures():
+    incus, service, _peak = _bulk_service([("dev", "Running"), ("crash", "Running")])
+    reporter = OperationReporter(_operation=MagicMock())
+
+    with pytest.raises(OperationError, match="1 of 2 containers failed: crash"):
+        await ContainerService.stop_containers.__wrapped__(
+            service, reporter, names=["crash", "dev"],
+        )
+
+    messages = [c.args[1] for c in reporter._operation.Message.call_args_list]
+    assert "dev: stopped" in messages
+    assert "crash: connection reset" in messages
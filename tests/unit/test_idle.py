@@ -0,0 +1,126 @@
+"""Tests for freezing and stopping idle containers."""
+
+import pytest
+
+from kapsule.daemon.idle import IdleScheduler, RunReaper, exec_sessions
+from kapsule.daemon.models_generated import Instance, InstanceState
+
+
+def _proc(tmp_path, *cmdlines):
+    for pid, argv in enumerate(cmdlines, start=100):
+        (tmp_path / str(pid)).mkdir()
+        (tmp_path / str(pid) / "cmdline").write_bytes(
+            b"\0".join(a.encode() for a in argv) + b"\0"
+        )
+    (tmp_path / "self").mkdir()
+    return tmp_path
+
+
+def test_exec_sessions_counts_incus_exec_per_instance(tmp_path):
+    proc = _proc(
+        tmp_path,
+        ["incus", "exec", "dev", "--env", "A=b", "--", "su", "-l", "u"],
+        ["/usr/bin/incus", "exec", "dev", "--", "bash"],
+        ["incus", "exec", "--force-interactive", "local:web", "--", "sh"],
+        ["incus", "list"],
+        ["bash", "-c", "incus exec dev"],
+    )
+
+    assert exec_sessions(proc) == {"dev": 2, "web": 1}
+
+
+def _instance(name, status="Running", profiles=("kapsule-base",)):
+    return Instance.model_validate({
+        "name": name, "status": status, "profiles": list(profiles),
+    })
+
+
+@pytest.fixture
+def incus(incus):
+    incus.list_instances.return_value = []
+    incus.get_instance_state.return_value = InstanceState.model_validate({
+        "memory": {"usage": 512 * 1024**2},
+    })
+    return incus
+
+
+@pytest.mark.asyncio
+async def test_check_freezes_then_stops_idle_containers(incus, tmp_path):
+    proc = _proc(tmp_path, ["incus", "exec", "busy", "--", "bash"])
+    incus.list_instances.return_value = [
+        _instance("idle"), _instance("busy"),
+        _instance("kapsule-run-1"), _instance("other", profiles=()),
+        _instance("off", status="Stopped"),
+    ]
+    scheduler = IdleScheduler(
+        incus, freeze_minutes=10, stop_minutes=60,
+        skip=lambda name: name.startswith("kapsule-run-"), proc=proc,
+    )
+
+    # First sight only starts the clock
+    assert await scheduler.check(now=0) == []
+    assert await scheduler.check(now=9 * 60) == []
+    assert await scheduler.check(now=10 * 60) == [("idle", "freeze")]
+    incus.freeze_instance.assert_awaited_once_with("idle", wait=True)
+
+    incus.list_instances.return_value = [
+        _instance("idle", status="Frozen"), _instance("busy"),
+    ]
+    assert await scheduler.check(now=30 * 60) == []
+    assert await scheduler.check(now=60 * 60) == [("idle", "stop")]
+    # A frozen container is resumed so it can shut down cleanly
+    incus.unfreeze_instance.assert_awaited_once_with("idle", wait=True)
+    incus.stop_instance.assert_awaited_once_with("idle", wait=True)
+    assert scheduler.reclaimed_bytes == 512 * 1024**2
+
+
+@pytest.mark.asyncio
+async def test_touch_resets_the_idle_clock(incus, tmp_path):
+    incus.list_instances.return_value = [_instance("dev")]
+    scheduler = IdleScheduler(
+        incus, freeze_minutes=10, stop_minutes=0,
+        skip=lambda _name: False, proc=_proc(tmp_path),
+    )
+    scheduler.touch("dev", now=5 * 60)
+
+    assert await scheduler.check(now=14 * 60) == []
+    assert await scheduler.check(now=15 * 60) == [("dev", "freeze")]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("status", "resumed", "started"),
+    [("running", False, False), ("frozen", True, False), ("stopped", False, True)],
+)
+async def test_wake_resumes_or_starts(incus, status, resumed, started):
+    scheduler = IdleScheduler(
+        incus, freeze_minutes=0, stop_minutes=0, skip=lambda _name: False,
+    )
+
+    await scheduler.wake("dev", status)
+
+    assert incus.unfreeze_instance.await_count == int(resumed)
+    assert incus.start_instance.await_count == int(started)
+
+
+@pytest.mark.asyncio
+async def test_run_reaper_removes_runs_without_a_session(incus, tmp_path):
+    proc = _proc(tmp_path, ["incus", "exec", "kapsule-run-live", "--", "make"])
+    incus.list_instances.return_value = [
+        _instance("kapsule-run-live"), _instance("kapsule-run-gone"),
+        _instance("kapsule-run-new"), _instance("dev"),
+    ]
+    reaper = RunReaper(
+        incus,
+        is_run=lambda name: name.startswith("kapsule-run-"),
+        busy=lambda name: name == "kapsule-run-new",
+        grace=60, proc=proc,
+    )
+
+    # A run may briefly have no session before the client's exec starts
+    assert await reaper.check(now=0) == []
+    assert await reaper.check(now=59) == []
+    assert await reaper.check(now=60) == ["kapsule-run-gone"]
+    incus.stop_instance.assert_awaited_once_with(
+        "kapsule-run-gone", force=True, wait=True
+    )
@@ -0,0 +1,127 @@
+"""Tests for the searchable image catalog."""
+
+import json
+
+import httpx
+import pytest
+
+from kapsule.daemon import image_catalog
+from kapsule.daemon.image_catalog import (
+    ImageCatalog,
+    build_index,
+    parse_products,
+    search,
+)
+
+INDEX = {
+    "index": {
+        "images": {"datatype": "image-downloads", "path": "streams/v1/images.json"},
+        "other": {"datatype": "content-download", "path": "streams/v1/other.json"},
+    },
+}
+
+
+def _product(os_, release, arch, variant, aliases, ftype="squashfs"):
+    return {
+        "os": os_,
+        "release": release,
+        "arch": arch,
+        "variant": variant,
+        "aliases": aliases,
+        "versions": {"20260101": {"items": {"root": {"ftype": ftype}}}},
+    }
+
+
+PRODUCTS = {
+    "products": {
+        "ubuntu:noble:amd64:default": _product(
+            "Ubuntu", "noble", "amd64", "default",
+            "ubuntu/noble/default,ubuntu/24.04/default,ubuntu/24.04",
+        ),
+        "archlinux:current:amd64:default": _product(
+            "Archlinux", "current", "amd64", "default",
+            "archlinux/current/default,archlinux",
+        ),
+        "ubuntu:noble:amd64:desktop": _product(
+            "Ubuntu", "noble", "amd64", "desktop",
+            "ubuntu/noble/desktop", ftype="disk-kvm.img",
+        ),
+    },
+}
+
+
+class FakeImageServer:
+    def __init__(self):
+        self.requests: list[tuple[str, str]] = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        self.requests.append((path, request.headers.get("if-none-match", "")))
+        body = {
+            "/streams/v1/index.json": INDEX,
+            "/streams/v1/images.json": PRODUCTS,
+        }.get(path)
+        if body is None:
+            return httpx.Response(404)
+        etag = f'"{path}"'
+        if request.headers.get("if-none-match") == etag:
+            return httpx.Response(304)
+        return httpx.Response(200, content=json.dumps(body), headers={"ETag": etag})
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(
+        image_catalog, "image_servers", lambda: {"images": "https://img.test"}
+    )
+    return FakeImageServer()
+
+
+def test_parse_products_keeps_container_images():
+    images = parse_products("images", json.dumps(PRODUCTS).encode())
+    assert sorted(i.image for i in images) == [
+        "images:archlinux/current/default",
+        "images:ubuntu/noble/default",
+    ]
+
+
+def test_search_ranks_prefix_and_fuzzy_matches():
+    index = build_index(parse_products("images", json.dumps(PRODUCTS).encode()))
+
+    assert [i.image for i in search(index, "ubu 24")] == ["images:ubuntu/noble/default"]
+    assert [i.image for i in search(index, "arch")][0] == (
+        "images:archlinux/current/default"
+    )
+    assert [i.image for i in search(index, "archlnx")] == [
+        "images:archlinux/current/default"
+    ]
+    assert search(index, "fedora") == []
+    assert len(search(index, "")) == 2
+
+
+@pytest.mark.asyncio
+async def test_catalog_cached_on_disk_and_revalidated(server, tmp_path):
+    transport = httpx.MockTransport(server.handler)
+    catalog = ImageCatalog(tmp_path, transport=transport)
+    assert [i.image for i in await catalog.list_images("noble")] == [
+        "images:ubuntu/noble/default"
+    ]
+    assert [p for p, _ in server.requests] == [
+        "/streams/v1/index.json", "/streams/v1/images.json",
+    ]
+    await catalog.close()
+
+    # A fresh daemon answers from the disk cache without any request
+    server.requests.clear()
+    catalog = ImageCatalog(tmp_path, transport=transport)
+    assert len(await catalog.list_images("")) == 2
+    assert server.requests == []
+
+    # Once stale, files are revalidated with their ETags
+    await catalog.refresh("images", "https://img.test")
+    assert server.requests == [
+        ("/streams/v1/index.json", '"/streams/v1/index.json"'),
+        ("/streams/v1/images.json", '"/streams/v1/images.json"'),
+    ]
+    assert len(await catalog.list_images("")) == 2
+    await catalog.close()
@@ -0,0 +1,181 @@
+"""Tests for the caching simplestreams mirror, against a local upstream."""
+
+import asyncio
+import hashlib
+
+import httpx
+import pytest
+
+from kapsule.daemon.image_mirror import (
+    ImageMirror,
+    MirrorError,
+    MirrorStore,
+    parse_range,
+)
+
+ROOTFS = bytes(range(256)) * 1024
+
+
+class FixtureUpstream:
+    """Minimal HTTP server standing in for an image server."""
+
+    def __init__(self):
+        self.files = {
+            "/streams/v1/index.json": (b'{"index": {}}', '"v1"'),
+            "/images/arch/rootfs.squashfs": (ROOTFS, ""),
+        }
+        self.requests: list[tuple[str, str]] = []
+        self.online = True
+        self._server = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.sockets[0].getsockname()[1]}"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        path = (await reader.readline()).decode().split()[1]
+        headers = {}
+        while (line := await reader.readline()) not in (b"\r\n", b""):
+            key, _, value = line.decode().partition(":")
+            headers[key.strip().lower()] = value.strip()
+        self.requests.append((path, headers.get("if-none-match", "")))
+
+        if not self.online:
+            writer.close()
+            return
+        if path not in self.files:
+            status, body, etag = "404 Not Found", b"", ""
+        else:
+            body, etag = self.files[path]
+            status = "200 OK"
+            if etag and headers.get("if-none-match") == etag:
+                status, body = "304 Not Modified", b""
+        head = f"HTTP/1.1 {status}\r\nContent-Length: {len(body)}\r\n"
+        if etag:
+            head += f"ETag: {etag}\r\n"
+        writer.write((head + "Connection: close\r\n\r\n").encode() + body)
+        await writer.drain()
+        writer.close()
+
+
+@pytest.fixture
+async def mirror_env(tmp_path):
+    upstream = FixtureUpstream()
+    await upstream.start()
+    mirror = ImageMirror(
+        MirrorStore(tmp_path / "store"), {"images": upstream.url}, index_ttl=0
+    )
+    await mirror.start("127.0.0.1", 0)
+    client = httpx.AsyncClient(base_url=f"http://127.0.0.1:{mirror.port}/images")
+    yield upstream, mirror, client
+    await client.aclose()
+    await mirror.stop()
+    await upstream.stop()
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=50-500", 100) == (50, 99)
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    assert parse_range("items=0-1", 100) is None
+    with pytest.raises(MirrorError):
+        parse_range("bytes=100-", 100)
+
+
+@pytest.mark.asyncio
+async def test_files_fetched_once_and_served_from_store(mirror_env):
+    upstream, _mirror, client = mirror_env
+
+    responses = await asyncio.gather(*(
+        client.get("/images/arch/rootfs.squashfs") for _ in range(3)
+    ))
+
+    assert all(r.status_code == 200 and r.content == ROOTFS for r in responses)
+    assert upstream.requests == [("/images/arch/rootfs.squashfs", "")]
+
+
+@pytest.mark.asyncio
+async def test_range_requests(mirror_env):
+    _upstream, _mirror, client = mirror_env
+
+    response = await client.get(
+        "/images/arch/rootfs.squashfs", headers={"Range": "bytes=1000-1999"}
+    )
+    assert response.status_code == 206
+    assert response.content == ROOTFS[1000:2000]
+    assert response.headers["content-range"] == f"bytes 1000-1999/{len(ROOTFS)}"
+
+    response = await client.get(
+        "/images/arch/rootfs.squashfs", headers={"Range": f"bytes={len(ROOTFS)}-"}
+    )
+    assert response.status_code == 416
+
+
+@pytest.mark.asyncio
+async def test_index_revalidated_and_served_stale_when_offline(mirror_env):
+    upstream, _mirror, client = mirror_env
+
+    first = await client.get("/streams/v1/index.json")
+    second = await client.get("/streams/v1/index.json")
+    upstream.online = False
+    offline = await client.get("/streams/v1/index.json")
+
+    assert first.content == second.content == offline.content == b'{"index": {}}'
+    assert first.headers["content-type"] == "application/json"
+    assert upstream.requests[:2] == [
+        ("/streams/v1/index.json", ""),
+        ("/streams/v1/index.json", '"v1"'),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_unknown_paths(mirror_env):
+    _upstream, mirror, client = mirror_env
+
+    assert (await client.get("/images/missing")).status_code == 404
+    assert (await client.get("/images/../etc/passwd")).status_code == 404
+    async with httpx.AsyncClient() as other:
+        response = await other.get(f"http://127.0.0.1:{mirror.port}/nope/x")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_store_is_content_addressed_and_persistent(mirror_env, tmp_path):
+    upstream, _mirror, client = mirror_env
+    upstream.files["/images/arch/copy.squashfs"] = (ROOTFS, "")
+
+    await client.get("/images/arch/rootfs.squashfs")
+    await client.get("/images/arch/copy.squashfs")
+
+    blobs = list((tmp_path / "store" / "blobs").iterdir())
+    assert [b.name for b in blobs] == [hashlib.sha256(ROOTFS).hexdigest()]
+
+    reopened = MirrorStore(tmp_path / "store")
+    assert reopened.lookup("images/images/arch/copy.squashfs").size == len(ROOTFS)
+
+
+def test_image_servers_can_point_at_mirror(monkeypatch):
+    from kapsule.daemon import images
+
+    monkeypatch.setattr(
+        images, "load_image_servers",
+        lambda: {"images": "http://mirror:8765/images"},
+    )
+    assert images.parse_image_source("images:archlinux").server == (
+        "http://mirror:8765/images"
+    )
+    assert images.parse_image_source("archlinux").server == (
+        "http://mirror:8765/images"
+    )
+    assert images.parse_image_source("ubuntu:24.04").server == (
+        images.SERVER_MAP["ubuntu"]
+    )
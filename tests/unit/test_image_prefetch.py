@@ -0,0 +1,85 @@
+"""Tests for background prefetch of the default images."""
+
+import pytest
+
+from kapsule.daemon import image_prefetch
+from kapsule.daemon.config import configured_default_images
+from kapsule.daemon.image_prefetch import ImagePrefetcher
+from kapsule.daemon.models_generated import Image, Operation
+
+SERVER = "https://images.linuxcontainers.org"
+
+
+def _image(alias, fingerprint, auto_update=True):
+    return Image.model_validate({
+        "fingerprint": fingerprint,
+        "auto_update": auto_update,
+        "uploaded_at": "2026-01-01T00:00:00Z",
+        "update_source": {"server": SERVER, "alias": alias},
+    })
+
+
+@pytest.fixture
+def prefetcher(incus, monkeypatch):
+    monkeypatch.setattr(
+        image_prefetch, "configured_default_images",
+        lambda _homes: ["images:archlinux", "images:debian/13"],
+    )
+    return incus, ImagePrefetcher(incus)
+
+
+@pytest.mark.asyncio
+async def test_pulls_missing_and_refreshes_local_images(prefetcher):
+    incus, prefetch = prefetcher
+    local = [_image("archlinux", "aaa")]
+    incus.list_images.side_effect = [
+        local, local, [*local, _image("debian/13", "ddd")],
+    ]
+
+    await prefetch.refresh()
+
+    incus.refresh_image.assert_awaited_once_with("aaa", wait=True)
+    incus.pull_image.assert_awaited_once()
+    source = incus.pull_image.await_args.args[0]
+    assert (source.alias, source.mode, source.server) == ("debian/13", "pull", SERVER)
+    assert incus.pull_image.await_args.kwargs["wait"] is True
+
+    state = prefetch.cache_state()
+    assert [(e.image, e.state, e.fingerprint) for e in state] == [
+        ("images:archlinux", "cached", "aaa"),
+        ("images:debian/13", "cached", "ddd"),
+    ]
+    assert all(e.refreshed_at for e in state)
+
+
+@pytest.mark.asyncio
+async def test_failed_pull_is_reported(prefetcher):
+    incus, prefetch = prefetcher
+    incus.list_images.return_value = []
+    incus.pull_image.return_value = Operation.model_validate({
+        "id": "op", "status": "Failure", "err": "no such alias",
+    })
+
+    assert [e.state for e in prefetch.cache_state()] == ["pending", "pending"]
+    await prefetch.refresh()
+
+    state = prefetch.cache_state()
+    assert [e.state for e in state] == ["failed", "failed"]
+    assert state[0].error == "no such alias"
+
+
+def test_configured_default_images_reads_every_layer(tmp_path, monkeypatch):
+    system = tmp_path / "etc.conf"
+    system.write_text("[kapsule]\ndefault_image = images:fedora/41\n")
+    home = tmp_path / "home"
+    user = home / ".config" / "kapsule" / "kapsule.conf"
+    user.parent.mkdir(parents=True)
+    user.write_text("[kapsule]\ndefault_image = images:archlinux\n")
+    monkeypatch.setattr(
+        "kapsule.daemon.config.get_config_paths",
+        lambda **_: [tmp_path / "none.conf", system],
+    )
+
+    assert configured_default_images([str(home)]) == [
+        "images:fedora/41", "images:archlinux",
+    ]
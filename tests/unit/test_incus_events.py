@@ -0,0 +1,350 @@
+"""Tests for the Incus events stream and the instance index it feeds."""
+
+import asyncio
+import base64
+import hashlib
+import json
+import struct
+
+import httpx
+import pytest
+
+from kapsule.daemon.incus_client import IncusClient, IncusError
+from kapsule.daemon.incus_events import (
+    IncusEventStream,
+    UnixWebSocket,
+    instance_name_from_url,
+)
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+def _frame(opcode: int, payload: bytes) -> bytes:
+    header = bytearray([0x80 | opcode])
+    if len(payload) < 126:
+        header.append(len(payload))
+    else:
+        header.append(126)
+        header += struct.pack("!H", len(payload))
+    return bytes(header) + payload
+
+
+class FakeEventsServer:
+    """Websocket server on a Unix socket that speaks just enough RFC 6455."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.connections: list[asyncio.StreamWriter] = []
+        self.connected = asyncio.Event()
+        self.request_lines: list[str] = []
+        self._server: asyncio.AbstractServer | None = None
+
+    async def start(self):
+        self._server = await asyncio.start_unix_server(self._handle, self.path)
+
+    async def stop(self):
+        for writer in self.connections:
+            writer.close()
+        if self._server is not None:
+            self._server.close()
+
+    async def _handle(self, reader, writer):
+        head = (await reader.readuntil(b"\r\n\r\n")).decode()
+        lines = head.split("\r\n")
+        self.request_lines.append(lines[0])
+        key = next(
+            line.split(":", 1)[1].strip()
+            for line in lines
+            if line.lower().startswith("sec-websocket-key")
+        )
+        accept = base64.b64encode(
+            hashlib.sha1((key + WS_GUID).encode()).digest()
+        ).decode()
+        writer.write(
+            (
+                "HTTP/1.1 101 Switching Protocols\r\n"
+                "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+                f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+            ).encode()
+        )
+        await writer.drain()
+        self.connections.append(writer)
+        self.connected.set()
+
+    async def send(self, message: dict, opcode: int = 0x1):
+        writer = self.connections[-1]
+        writer.write(_frame(opcode, json.dumps(message).encode()))
+        await writer.drain()
+
+    async def drop(self):
+        self.connected.clear()
+        writer = self.connections.pop()
+        writer.close()
+
+
+def _sync(metadata):
+    return {"type": "sync", "status": "Success", "status_code": 200,
+            "metadata": metadata}
+
+
+class FakeIncusApi:
+    def __init__(self):
+        self.instances = {
+            "dev": {"name": "dev", "status": "Running", "config": {}},
+        }
+        self.operations: dict[str, dict] = {}
+        self.requests: list[str] = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request.url.path)
+        path = request.url.path
+        if path.startswith("/1.0/operations/"):
+            op_id = path.split("/")[3]
+            return httpx.Response(200, json=_sync(self.operations[op_id]))
+        if path == "/1.0/instances":
+            return httpx.Response(200, json=_sync(list(self.instances.values())))
+        name = path.rsplit("/", 1)[-1]
+        if name in self.instances:
+            return httpx.Response(200, json=_sync(self.instances[name]))
+        return httpx.Response(404, json={"error": "Instance not found",
+                                         "error_code": 404})
+
+
+def _lifecycle(action: str, name: str, **context):
+    return {
+        "type": "lifecycle",
+        "metadata": {
+            "action": action,
+            "source": f"/1.0/instances/{name}",
+            "context": context,
+        },
+    }
+
+
+async def _wait_for(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not reached")
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+async def events_env(tmp_path):
+    server = FakeEventsServer(str(tmp_path / "incus.socket"))
+    await server.start()
+    api = FakeIncusApi()
+    client = IncusClient(server.path, transport=httpx.MockTransport(api.handler))
+    yield server, api, client
+    await client.close()
+    await server.stop()
+
+
+def test_instance_name_from_url():
+    assert instance_name_from_url("/1.0/instances/dev") == "dev"
+    assert instance_name_from_url("/1.0/instances/dev?project=default") == "dev"
+    assert instance_name_from_url("/1.0/instances/dev/snapshots/s0") == "dev"
+    assert instance_name_from_url("/1.0/images/abc") is None
+
+
+@pytest.mark.asyncio
+async def test_websocket_receives_messages_and_answers_ping(tmp_path):
+    server = FakeEventsServer(str(tmp_path / "ws.socket"))
+    await server.start()
+    try:
+        ws = await UnixWebSocket.connect(server.path, "/1.0/events")
+        await server.connected.wait()
+        writer = server.connections[-1]
+        writer.write(_frame(0x9, b"hi"))
+        await server.send({"type": "lifecycle"})
+        assert json.loads(await ws.recv()) == {"type": "lifecycle"}
+        await ws.close()
+    finally:
+        await server.stop()
+
+    assert server.request_lines == ["GET /1.0/events HTTP/1.1"]
+
+
+@pytest.mark.asyncio
+async def test_queries_served_from_index(events_env):
+    server, api, client = events_env
+    client.start_events()
+    await client.events.wait_connected()
+    assert api.requests == ["/1.0/instances"]
+
+    instance = await client.get_instance("dev")
+    assert instance.status == "Running"
+    assert await client.instance_exists("dev")
+    assert not await client.instance_exists("missing")
+    assert len(await client.list_instances()) == 1
+    assert api.requests == ["/1.0/instances"]
+
+
+@pytest.mark.asyncio
+async def test_lifecycle_event_refreshes_entry(events_env):
+    server, api, client = events_env
+    client.start_events()
+    await client.events.wait_connected()
+
+    api.instances["dev"]["status"] = "Stopped"
+    await server.send(_lifecycle("instance-stopped", "dev"))
+    await _wait_for(lambda: "/1.0/instances/dev" in api.requests)
+    await _wait_for(lambda: not client._cache.dirty_names())
+
+    requests_before = len(api.requests)
+    assert (await client.get_instance("dev")).status == "Stopped"
+    assert len(api.requests) == requests_before
+
+
+@pytest.mark.asyncio
+async def test_deleted_and_renamed_events(events_env):
+    server, api, client = events_env
+    client.start_events()
+    await client.events.wait_connected()
+
+    api.instances["new"] = {**api.instances.pop("dev"), "name": "new"}
+    await server.send(_lifecycle("instance-renamed", "new", old_name="dev"))
+    await _wait_for(lambda: client._cache.get("new") is not None)
+    assert not await client.instance_exists("dev")
+    assert (await client.get_instance("new")).name == "new"
+
+    del api.instances["new"]
+    await server.send(_lifecycle("instance-deleted", "new"))
+    await _wait_for(lambda: client._cache.get("new") is None)
+    with pytest.raises(IncusError):
+        await client.get_instance("new")
+
+
+@pytest.mark.asyncio
+async def test_resync_after_reconnect(events_env):
+    server, api, client = events_env
+    client.start_events()
+    await client.events.wait_connected()
+
+    await server.drop()
+    await _wait_for(lambda: not client._cache.live)
+
+    # While disconnected, queries go straight to the API
+    api.instances["dev"]["status"] = "Frozen"
+    requests_before = len(api.requests)
+    assert (await client.get_instance("dev")).status == "Frozen"
+    assert len(api.requests) == requests_before + 1
+
+    await server.connected.wait()
+    await client.events.wait_connected()
+    await _wait_for(lambda: client._cache.live)
+    assert api.requests.count("/1.0/instances") == 2
+
+
+@pytest.mark.asyncio
+async def test_stream_reconnects_after_connection_reset(events_env, monkeypatch):
+    server, _api, _client = events_env
+    real_recv = UnixWebSocket.recv
+    resets = []
+
+    async def flaky_recv(self):
+        if not resets:
+            resets.append(self)
+            raise ConnectionResetError("reset by peer")
+        return await real_recv(self)
+
+    monkeypatch.setattr(UnixWebSocket, "recv", flaky_recv)
+    stream = IncusEventStream(server.path)
+    stream.start()
+    try:
+        await _wait_for(lambda: len(server.connections) == 2, timeout=3.0)
+        await stream.wait_connected()
+        assert len(resets) == 1
+    finally:
+        await stream.stop()
+
+
+@pytest.mark.asyncio
+async def test_instance_generation_tracks_events(events_env):
+    server, api, client = events_env
+    assert client.instance_generation("dev") is None
+
+    client.start_events()
+    await client.events.wait_connected()
+    before = client.instance_generation("dev")
+    assert before is not None
+
+    await server.send(_lifecycle("instance-restarted", "dev"))
+    await _wait_for(lambda: client.instance_generation("dev") not in (None, before))
+
+    await server.drop()
+    await _wait_for(lambda: not client.events.connected)
+    assert client.instance_generation("dev") is None
+
+
+def _operation(op_id: str, status: str = "Running", code: int = 103, **metadata):
+    return {
+        "id": op_id,
+        "class": "task",
+        "status": status,
+        "status_code": code,
+        "metadata": metadata,
+        "resources": {},
+    }
+
+
+@pytest.mark.asyncio
+async def test_operation_waits_resolved_from_events(events_env):
+    server, api, client = events_env
+    client.start_events()
+    await client.events.wait_connected()
+
+    ids = [f"op{i}" for i in range(25)]
+    for op_id in ids:
+        api.operations[op_id] = _operation(op_id)
+
+    waits = [asyncio.create_task(client.wait_operation(op_id)) for op_id in ids]
+    await _wait_for(lambda: len(client._waiters.pending()) == len(ids))
+
+    for op_id in ids:
+        await server.send({
+            "type": "operation",
+            "metadata": _operation(op_id, status="Success", code=200),
+        })
+
+    results = await asyncio.gather(*waits)
+    assert [op.status for op in results] == ["Success"] * len(ids)
+    assert not any(path.endswith("/wait") for path in api.requests)
+    assert client._waiters.pending() == []
+
+
+@pytest.mark.asyncio
+async def test_operation_wait_reports_updates_and_deadline(events_env):
+    server, api, client = events_env
+    client.start_events()
+    await client.events.wait_connected()
+
+    api.operations["slow"] = _operation("slow")
+    updates = []
+    wait = asyncio.create_task(
+        client.wait_operation("slow", timeout=0.5, on_update=updates.append)
+    )
+    await _wait_for(lambda: client._waiters.pending() == ["slow"])
+    await server.send({
+        "type": "operation",
+        "metadata": _operation("slow", download_progress="rootfs: 50% (1MB/s)"),
+    })
+
+    with pytest.raises(IncusError, match="Timed out"):
+        await wait
+    assert any(
+        (op.metadata or {}).get("download_progress") for op in updates
+    )
+
+
+@pytest.mark.asyncio
+async def test_operation_wait_without_events_long_polls():
+    api = FakeIncusApi()
+    api.operations["op"] = _operation("op", status="Success", code=200)
+    client = IncusClient(transport=httpx.MockTransport(api.handler))
+
+    op = await client.wait_operation("op")
+
+    assert op.status == "Success"
+    assert api.requests == ["/1.0/operations/op/wait"]
+    await client.close()
@@ -0,0 +1,163 @@
+"""Tests for running commands and file tree setup through the exec API."""
+
+import json
+import os
+import subprocess
+
+import httpx
+import pytest
+
+from kapsule.daemon.incus_client import FileTreeEntry, IncusClient, IncusError
+
+
+class FakeExecApi:
+    """Fake Incus API implementing the record-output exec flow."""
+
+    def __init__(self, exit_code=0, stdout=b"", stderr=b"", status="Success"):
+        self.exit_code = exit_code
+        self.logs = {
+            "/1.0/instances/dev/logs/exec-output/exec_1.stdout": stdout,
+            "/1.0/instances/dev/logs/exec-output/exec_1.stderr": stderr,
+        }
+        self.status = status
+        self.exec_body: dict | None = None
+        self.deleted: list[str] = []
+
+    def _operation(self):
+        return {
+            "id": "op1",
+            "class": "task",
+            "status": self.status,
+            "status_code": 200 if self.status == "Success" else 400,
+            "err": "" if self.status == "Success" else "Instance is not running",
+            "metadata": {
+                "return": self.exit_code,
+                "output": {
+                    "1": "/1.0/instances/dev/logs/exec-output/exec_1.stdout",
+                    "2": "/1.0/instances/dev/logs/exec-output/exec_1.stderr",
+                },
+            },
+        }
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if path == "/1.0/instances/dev/exec":
+            self.exec_body = json.loads(request.content)
+            return httpx.Response(202, json={
+                "type": "async",
+                "status": "Operation created",
+                "status_code": 100,
+                "operation": "/1.0/operations/op1",
+                "metadata": {**self._operation(), "status": "Running",
+                             "status_code": 103},
+            })
+        if path.startswith("/1.0/operations/op1"):
+            return httpx.Response(200, json={
+                "type": "sync", "status": "Success", "status_code": 200,
+                "metadata": self._operation(),
+            })
+        if path in self.logs:
+            if request.method == "DELETE":
+                self.deleted.append(path)
+                return httpx.Response(200, json={"type": "sync", "metadata": {}})
+            return httpx.Response(200, content=self.logs[path])
+        return httpx.Response(404, json={"error": "not found", "error_code": 404})
+
+
+@pytest.mark.asyncio
+async def test_exec_returns_exit_code_and_output():
+    fake = FakeExecApi(exit_code=3, stdout=b"hello\n", stderr=b"oops\n")
+    client = IncusClient(transport=httpx.MockTransport(fake.handler))
+
+    result = await client.exec(
+        "dev", ["sh", "-c", "echo hello"], user=1000, environment={"A": "b"}
+    )
+
+    assert (result.exit_code, result.stdout, result.stderr) == (
+        3, "hello\n", "oops\n"
+    )
+    assert fake.exec_body == {
+        "command": ["sh", "-c", "echo hello"],
+        "environment": {"A": "b"},
+        "interactive": False,
+        "user": 1000,
+        "record-output": True,
+        "wait-for-websocket": False,
+    }
+    assert sorted(fake.deleted) == sorted(fake.logs)
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_exec_raises_when_operation_fails():
+    fake = FakeExecApi(status="Failure")
+    client = IncusClient(transport=httpx.MockTransport(fake.handler))
+
+    with pytest.raises(IncusError, match="not running"):
+        await client.exec("dev", ["true"])
+    await client.close()
+
+
+class LocalExecApi(FakeExecApi):
+    """Fake exec API that really runs the command on the test host."""
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/1.0/instances/dev/exec":
+            command = json.loads(request.content)["command"]
+            proc = subprocess.run(command, capture_output=True)
+            self.exit_code = proc.returncode
+            self.logs[
+                "/1.0/instances/dev/logs/exec-output/exec_1.stdout"
+            ] = proc.stdout
+            self.logs[
+                "/1.0/instances/dev/logs/exec-output/exec_1.stderr"
+            ] = proc.stderr
+        return super().handler(request)
+
+
+@pytest.mark.asyncio
+async def test_apply_file_tree_in_one_exec(tmp_path):
+    fake = LocalExecApi()
+    client = IncusClient(transport=httpx.MockTransport(fake.handler))
+    uid, gid = os.getuid(), os.getgid()
+    root = tmp_path / "tree"
+
+    statuses = await client.apply_file_tree("dev", [
+        FileTreeEntry(path=str(root), type="directory", uid=uid, gid=gid,
+                      mode="0700"),
+        FileTreeEntry(path=str(root / "conf"), type="file", uid=uid, gid=gid,
+                      content="a = 'b'\n$HOME\n"),
+        FileTreeEntry(path=str(root / "bus"), type="symlink", uid=uid,
+                      gid=gid, content="/run/host/bus"),
+        FileTreeEntry(path=str(tmp_path / "missing" / "x"), type="file",
+                      uid=uid, gid=gid),
+    ])
+
+    assert [s.ok for s in statuses] == [True, True, True, False]
+    assert "missing" in statuses[3].error
+    assert (root.stat().st_mode & 0o777) == 0o700
+    assert (root / "conf").read_text() == "a = 'b'\n$HOME\n"
+    assert os.readlink(root / "bus") == "/run/host/bus"
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_apply_file_tree_falls_back_to_file_api():
+    fake = FakeExecApi(status="Failure")
+    pushed: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/1.0/instances/dev/files":
+            pushed.append(request.url.params["path"])
+            return httpx.Response(200, json={"type": "sync", "metadata": {}})
+        return fake.handler(request)
+
+    client = IncusClient(transport=httpx.MockTransport(handler))
+    statuses = await client.apply_file_tree("dev", [
+        FileTreeEntry(path="/etc/a", type="directory"),
+        FileTreeEntry(path="/etc/a/b", type="file", content="x"),
+    ])
+
+    assert [s.ok for s in statuses] == [True, True]
+    assert pushed == ["/etc/a", "/etc/a/b"]
+    await client.close()
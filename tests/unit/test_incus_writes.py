@@ -0,0 +1,82 @@
+"""Tests for merged instance config and device writes."""
+
+import json
+
+import httpx
+import pytest
+
+from kapsule.daemon.incus_client import IncusClient, IncusError
+
+
+class FakeInstanceApi:
+    """Fake Incus API recording instance PATCH requests."""
+
+    def __init__(self, status=200):
+        self.status = status
+        self.requests: list[str] = []
+        self.patches: list[dict] = []
+        self.if_match: list[str | None] = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        assert request.url.path == "/1.0/instances/dev"
+        self.requests.append(request.method)
+        if request.method != "PATCH":
+            return httpx.Response(405, json={
+                "type": "error", "error": "unexpected", "error_code": 405,
+            })
+        self.if_match.append(request.headers.get("If-Match"))
+        if self.status != 200:
+            return httpx.Response(self.status, json={
+                "type": "error", "error": "Instance busy", "error_code": self.status,
+            })
+        self.patches.append(json.loads(request.content))
+        return httpx.Response(200, json={"type": "sync", "metadata": {}})
+
+
+@pytest.mark.asyncio
+async def test_transaction_flushes_keys_and_devices_in_one_patch():
+    fake = FakeInstanceApi()
+    client = IncusClient(transport=httpx.MockTransport(fake.handler))
+
+    txn = client.config_transaction("dev")
+    txn.set_config("user.kapsule.a", "1")
+    txn.set_config("user.kapsule.b", "2")
+    txn.add_device("home", {"type": "disk", "source": "/home/u", "path": "/home/u"})
+    await txn.flush()
+    await txn.flush()
+
+    assert fake.patches == [{
+        "config": {"user.kapsule.a": "1", "user.kapsule.b": "2"},
+        "devices": {
+            "home": {"type": "disk", "source": "/home/u", "path": "/home/u"},
+        },
+    }]
+    assert fake.requests == ["PATCH"]
+    assert not txn.pending
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_modify_instance_patches_without_reading_first():
+    fake = FakeInstanceApi()
+    client = IncusClient(transport=httpx.MockTransport(fake.handler))
+
+    await client.patch_instance_config("dev", {"user.kapsule.x": "y"})
+
+    assert fake.requests == ["PATCH"]
+    assert fake.if_match == [None]
+    assert fake.patches == [{"config": {"user.kapsule.x": "y"}}]
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_modify_instance_raises_on_failure():
+    fake = FakeInstanceApi(status=500)
+    client = IncusClient(transport=httpx.MockTransport(fake.handler))
+
+    with pytest.raises(IncusError) as excinfo:
+        await client.add_instance_device("dev", "gpu", {"type": "gpu"})
+
+    assert excinfo.value.code == 500
+    assert fake.requests == ["PATCH"]
+    await client.close()
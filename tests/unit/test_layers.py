@@ -0,0 +1,162 @@
+"""Tests for cached package-set layers."""
+
+from unittest.mock import AsyncMock
+
+import pytest
+
+from kapsule.daemon.images import parse_image_source
+from kapsule.daemon.incus_client import ExecResult, IncusError
+from kapsule.daemon.layers import (
+    LAYER_FINGERPRINT_KEY,
+    LAYER_LAST_USED_KEY,
+    LayerManager,
+    is_layer,
+    layer_name,
+)
+from kapsule.daemon.models_generated import (
+    Image,
+    Instance,
+    InstanceState,
+    StoragePool,
+)
+from kapsule.daemon.templates import TemplateManager
+
+IMAGE = "images:archlinux"
+PACKAGES = ["gcc", "git"]
+GIB = 1024**3
+
+
+@pytest.fixture
+def incus(incus):
+    incus.list_storage_pools.return_value = [
+        StoragePool.model_validate({"name": "default", "driver": "btrfs"})
+    ]
+    source = parse_image_source(IMAGE)
+    incus.list_images.return_value = [
+        Image.model_validate({
+            "fingerprint": "aaa",
+            "uploaded_at": "2026-01-01T00:00:00Z",
+            "update_source": {"server": source.server, "alias": source.alias},
+        }),
+        Image.model_validate({
+            "fingerprint": "bbb",
+            "uploaded_at": "2026-02-01T00:00:00Z",
+            "update_source": {"server": source.server, "alias": source.alias},
+        }),
+    ]
+    return incus
+
+
+def _manager(incus, budget=20 * GIB):
+    templates = TemplateManager(incus, AsyncMock(), profiles=["kapsule-base"])
+    return LayerManager(
+        incus, templates, AsyncMock(), profiles=["kapsule-base"],
+        budget_bytes=budget,
+    )
+
+
+def test_layer_name_is_keyed_by_build_and_packages():
+    name = layer_name("bbb", PACKAGES)
+    assert is_layer(name)
+    assert layer_name("bbb", PACKAGES) == name
+    assert layer_name("aaa", PACKAGES) != name
+    assert layer_name("bbb", ["gcc"]) != name
+    assert len(name) <= 63
+
+
+@pytest.mark.asyncio
+async def test_source_for_uses_newest_image_build(incus):
+    manager = _manager(incus)
+    name = layer_name("bbb", PACKAGES)
+    incus.get_instance.return_value = Instance.model_validate({
+        "name": name, "config": {LAYER_FINGERPRINT_KEY: "bbb"},
+    })
+
+    source = await manager.source_for(IMAGE, PACKAGES)
+
+    assert source is not None
+    assert source.source == f"{name}/golden"
+    incus.get_instance.assert_awaited_once_with(name)
+    # A hit counts as a use for eviction
+    patched_name, patch = incus.patch_instance_config.call_args.args
+    assert patched_name == name
+    assert LAYER_LAST_USED_KEY in patch
+
+
+@pytest.mark.asyncio
+async def test_source_for_misses(incus):
+    manager = _manager(incus)
+
+    assert await manager.source_for(IMAGE, []) is None
+
+    incus.get_instance.side_effect = IncusError("not found", 404)
+    assert await manager.source_for(IMAGE, PACKAGES) is None
+
+    # Still being built
+    incus.get_instance.side_effect = None
+    incus.get_instance.return_value = Instance.model_validate({
+        "name": layer_name("bbb", PACKAGES), "config": {},
+    })
+    assert await manager.source_for(IMAGE, PACKAGES) is None
+
+    assert await _manager(incus, budget=0).source_for(IMAGE, PACKAGES) is None
+
+
+@pytest.mark.asyncio
+async def test_build_installs_packages_and_renames(incus):
+    manager = _manager(incus)
+    incus.get_instance.side_effect = [
+        IncusError("not found", 404),  # no template
+        Instance.model_validate({"config": {"volatile.base_image": "bbb"}}),
+    ]
+    incus.instance_exists.return_value = False
+    incus.exec.return_value = ExecResult(exit_code=0)
+    incus.list_instances.return_value = []
+
+    await manager.build(IMAGE, PACKAGES)
+
+    command = incus.exec.call_args.args[1]
+    assert command[-2:] == PACKAGES
+    building, name = incus.rename_instance.call_args.args
+    assert building == f"{layer_name('bbb', PACKAGES)}-next"
+    assert name == layer_name("bbb", PACKAGES)
+    patch = incus.patch_instance_config.call_args.args[1]
+    assert patch[LAYER_FINGERPRINT_KEY] == "bbb"
+
+
+@pytest.mark.asyncio
+async def test_failed_install_discards_build(incus):
+    manager = _manager(incus)
+    incus.get_instance.side_effect = IncusError("not found", 404)
+    incus.instance_exists.side_effect = [False, True]
+    incus.exec.return_value = ExecResult(exit_code=100, stderr="E: no such package")
+
+    with pytest.raises(RuntimeError, match="no such package"):
+        await manager.build(IMAGE, PACKAGES)
+
+    incus.rename_instance.assert_not_awaited()
+    incus.delete_instance.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_evict_drops_least_recently_used_over_budget(incus):
+    manager = _manager(incus, budget=10 * GIB)
+    incus.list_instances.return_value = [
+        Instance.model_validate({
+            "name": f"kapsule-layer-{n}",
+            "config": {LAYER_FINGERPRINT_KEY: "x", LAYER_LAST_USED_KEY: str(used)},
+        })
+        for n, used in (("new", 300), ("old", 100), ("mid", 200))
+    ] + [
+        # Being built
+        Instance.model_validate({"name": "kapsule-layer-x-next", "config": {}}),
+        Instance.model_validate({"name": "dev", "config": {}}),
+    ]
+    incus.get_instance_state.return_value = InstanceState.model_validate({
+        "disk": {"root": {"usage": 4 * GIB}},
+    })
+    incus.instance_exists.return_value = True
+
+    evicted = await manager.evict(keep="kapsule-layer-new")
+
+    assert evicted == ["kapsule-layer-old"]
@@ -0,0 +1,223 @@
+"""Tests for the shared Kapsule profiles and the migration to them."""
+
+import json
+from unittest.mock import create_autospec
+
+import httpx
+import pytest
+
+from kapsule.daemon.config import load_config
+from kapsule.daemon.incus_client import IncusClient, IncusError
+from kapsule.daemon.models_generated import Instance, Profile
+from kapsule.daemon.profiles import (
+    BASE_PROFILE,
+    PROFILE_VERSION,
+    PROFILE_VERSION_KEY,
+    SESSION_MODE_KEY,
+    SESSION_PROFILE,
+    ProfileManager,
+    base_config,
+    base_devices,
+    effective_config,
+    migrated,
+    profile_contents,
+)
+
+
+def _old_container(config=None, devices=None, profiles=None):
+    return Instance.model_validate({
+        "name": "dev",
+        "architecture": "x86_64",
+        "description": "",
+        "ephemeral": False,
+        "stateful": False,
+        "profiles": profiles or [],
+        "config": {
+            **base_config(),
+            "image.os": "Archlinux",
+            "volatile.base_image": "abc",
+            **(config or {}),
+        },
+        "devices": {**base_devices(), **(devices or {})},
+    })
+
+
+def test_migrated_drops_inline_copies():
+    home = {"type": "disk", "source": "/home/u", "path": "/home/u"}
+    put = migrated(_old_container(devices={"home": home}))
+
+    assert put is not None
+    assert put.profiles == [BASE_PROFILE]
+    assert put.config == {"image.os": "Archlinux", "volatile.base_image": "abc"}
+    assert put.devices == {"home": home}
+    assert put.architecture == "x86_64"
+
+
+def test_migrated_moves_session_mode_and_keeps_overrides():
+    gpu = {"type": "gpu", "id": "1"}
+    put = migrated(_old_container(
+        config={SESSION_MODE_KEY: "true"}, devices={"gpu": gpu},
+        profiles=["default"],
+    ))
+
+    assert put is not None
+    assert put.profiles == ["default", BASE_PROFILE, SESSION_PROFILE]
+    assert SESSION_MODE_KEY not in put.config
+    # A locally changed shared device stays inline
+    assert put.devices == {"gpu": gpu}
+
+
+def test_migrated_skips_other_instances():
+    assert migrated(_old_container(profiles=[BASE_PROFILE])) is None
+    assert migrated(Instance.model_validate({
+        "name": "web", "config": {"security.nesting": "true"}, "devices": {},
+    })) is None
+
+
+def test_effective_config_prefers_expanded():
+    instance = Instance.model_validate({
+        "config": {}, "expanded_config": {SESSION_MODE_KEY: "true"},
+    })
+    assert effective_config(instance)[SESSION_MODE_KEY] == "true"
+    assert effective_config(Instance.model_validate({"config": {"a": "b"}})) == {
+        "a": "b"
+    }
+
+
+@pytest.mark.asyncio
+async def test_ensure_creates_and_updates_profiles():
+    incus = create_autospec(IncusClient, instance=True)
+
+    async def get_profile(name):
+        if name != BASE_PROFILE:
+            raise IncusError("not found", 404)
+        return Profile.model_validate({
+            "name": BASE_PROFILE, "config": {PROFILE_VERSION_KEY: "0"},
+        })
+
+    incus.get_profile.side_effect = get_profile
+
+    written = await ProfileManager(incus).ensure()
+
+    assert written == [BASE_PROFILE, SESSION_PROFILE]
+    name, content = incus.update_profile.call_args.args
+    assert name == BASE_PROFILE
+    assert content.config[PROFILE_VERSION_KEY] == str(PROFILE_VERSION)
+    assert content.devices == base_devices()
+    created = incus.create_profile.call_args.args[0]
+    assert created.name == SESSION_PROFILE
+    assert created.config[SESSION_MODE_KEY] == "true"
+
+
+def _current_profiles(contents):
+    async def get_profile(name):
+        return Profile.model_validate(contents[name].model_dump())
+    return get_profile
+
+
+@pytest.mark.asyncio
+async def test_ensure_leaves_current_profiles_alone():
+    incus = create_autospec(IncusClient, instance=True)
+    incus.get_profile.side_effect = _current_profiles(profile_contents())
+
+    assert await ProfileManager(incus).ensure() == []
+    incus.update_profile.assert_not_awaited()
+    incus.create_profile.assert_not_awaited()
+
+
+def test_scoped_hostfs_binds_only_what_is_used():
+    devices = base_devices("scoped", ("/srv/data", "/run/user", "/srv/data"))
+
+    assert "hostfs" not in devices
+    sources = {d["source"]: d["path"] for d in devices.values() if "source" in d}
+    assert sources == {
+        "/run/user": "/.kapsule/host/run/user",
+        "/tmp/.X11-unix": "/.kapsule/host/tmp/.X11-unix",
+        "/usr/lib/kapsule/kapsule-dbus-mux":
+            "/.kapsule/host/usr/lib/kapsule/kapsule-dbus-mux",
+        "/srv/data": "/.kapsule/host/srv/data",
+    }
+    assert devices["hostfs-srv-data"]["propagation"] == "rslave"
+    assert devices["hostfs-x11"]["required"] == "false"
+    assert devices["root"] == base_devices()["root"]
+
+
+@pytest.mark.asyncio
+async def test_ensure_rewrites_base_profile_when_hostfs_mode_changes():
+    incus = create_autospec(IncusClient, instance=True)
+    incus.get_profile.side_effect = _current_profiles(profile_contents("full"))
+
+    manager = ProfileManager(incus, hostfs_mode="scoped", hostfs_paths=("/srv",))
+    assert await manager.ensure() == [BASE_PROFILE]
+
+    name, content = incus.update_profile.call_args.args
+    assert name == BASE_PROFILE
+    assert content.devices == base_devices("scoped", ("/srv",))
+
+
+class FakeInstanceApi:
+    """Fake instance endpoint with ETags, failing the first PUTs with 412."""
+
+    def __init__(self, instance, conflicts=0):
+        self.instance = instance
+        self.conflicts = conflicts
+        self.puts: list[dict] = []
+        self.if_match: list[str] = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if path.startswith("/1.0/operations/"):
+            return httpx.Response(200, json={
+                "type": "sync", "status": "Success", "status_code": 200,
+                "metadata": {"id": "op", "status": "Success"},
+            })
+        if request.method == "GET":
+            return httpx.Response(
+                200,
+                json={"type": "sync", "status": "Success", "status_code": 200,
+                      "metadata": self.instance},
+                headers={"ETag": f'"etag-{len(self.if_match)}"'},
+            )
+        self.if_match.append(request.headers.get("If-Match", ""))
+        if self.conflicts:
+            self.conflicts -= 1
+            return httpx.Response(
+                412, json={"error": "ETag mismatch", "error_code": 412}
+            )
+        self.puts.append(json.loads(request.content))
+        return httpx.Response(202, json={
+            "type": "async", "status": "Operation created", "status_code": 100,
+            "metadata": {"id": "op", "status": "Running"},
+        })
+
+
+@pytest.mark.asyncio
+async def test_migrate_rewrites_old_containers_with_etag():
+    old = _old_container().model_dump(mode="json", exclude_none=True)
+    fake = FakeInstanceApi(old, conflicts=1)
+    client = IncusClient(transport=httpx.MockTransport(fake.handler))
+
+    assert await client.rewrite_instance("dev", migrated)
+
+    assert fake.if_match == ['"etag-0"', '"etag-1"']
+    assert len(fake.puts) == 1
+    assert fake.puts[0]["profiles"] == [BASE_PROFILE]
+    assert "security.privileged" not in fake.puts[0]["config"]
+    await client.close()
+
+
+def test_hostfs_options_from_config(tmp_path, monkeypatch):
+    conf = tmp_path / "kapsule.conf"
+    conf.write_text(
+        "[kapsule]\nhostfs_mode = Scoped\n"
+        "hostfs_paths = /srv/data/, relative /, /opt\n"
+    )
+    monkeypatch.setattr(
+        "kapsule.daemon.config.get_config_paths", lambda **_: [conf]
+    )
+    config = load_config(home_dir=str(tmp_path))
+    assert config.hostfs_mode == "scoped"
+    assert config.hostfs_paths == ("/srv/data", "/opt")
+
+    conf.write_text("[kapsule]\nhostfs_mode = none\n")
+    assert load_config(home_dir=str(tmp_path)).hostfs_mode == "full"
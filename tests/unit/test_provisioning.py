@@ -0,0 +1,75 @@
+"""Tests for the in-container provisioning scripts."""
+
+from unittest.mock import AsyncMock
+
+import pytest
+
+from kapsule.daemon.incus_client import ExecResult
+from kapsule.daemon.provisioning import (
+    UserProvisionResult,
+    normalize_packages,
+    provision_user,
+)
+
+
+def test_parse_reports_each_step():
+    result = UserProvisionResult.parse(
+        0,
+        "previous_user=ubuntu\nuser=renamed\ngroup=renamed\n"
+        "sudo=configured\nlinger=skipped\nnoise\nunknown=1\n",
+        "usermod: warning\n",
+    )
+
+    assert result.user == "renamed"
+    assert result.group == "renamed"
+    assert result.previous_user == "ubuntu"
+    assert result.sudo == "configured"
+    assert result.linger == "skipped"
+    assert result.errors == "usermod: warning"
+
+
+def test_parse_marks_unreported_steps_failed():
+    result = UserProvisionResult.parse(127, "", "sh: not found")
+
+    assert (result.user, result.group, result.sudo, result.linger) == (
+        "failed", "failed", "failed", "failed"
+    )
+    assert result.exit_code == 127
+
+
+@pytest.mark.asyncio
+async def test_provision_user_runs_single_exec():
+    incus = AsyncMock()
+    incus.exec.return_value = ExecResult(
+        exit_code=0,
+        stdout="group=created\nuser=created\nsudo=configured\nlinger=enabled\n",
+    )
+
+    result = await provision_user(
+        incus, "dev", uid=1000, gid=1001, username="alice",
+        container_home="/home/alice", linger=True,
+    )
+
+    incus.exec.assert_awaited_once()
+    name, command = incus.exec.call_args.args
+    assert name == "dev"
+    assert command[:2] == ["sh", "-c"]
+    # Parameters are passed as arguments, never spliced into the script
+    assert command[3:] == [
+        "kapsule-provision", "alice", "1000", "1001", "/home/alice", "1"
+    ]
+    assert "alice" not in command[2]
+    assert result.user == "created"
+    assert result.linger == "enabled"
+
+
+def test_normalize_packages_sorts_and_dedupes():
+    assert normalize_packages(["git", "gcc", "git", "libfoo-dev=1.2"]) == [
+        "gcc", "git", "libfoo-dev=1.2"
+    ]
+
+
+@pytest.mark.parametrize("name", ["", "-y", "--force", "foo bar", "a;b"])
+def test_normalize_packages_rejects_unsafe_names(name):
+    with pytest.raises(ValueError):
+        normalize_packages([name])
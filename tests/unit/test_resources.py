@@ -0,0 +1,111 @@
+"""Tests for resource profiles and live limit changes."""
+
+from unittest.mock import MagicMock, create_autospec
+
+import pytest
+
+from kapsule.daemon.config import load_resource_profiles
+from kapsule.daemon.container_service import ContainerService
+from kapsule.daemon.incus_client import IncusClient
+from kapsule.daemon.models_generated import Instance
+from kapsule.daemon.operations import OperationError
+from kapsule.daemon.resources import (
+    BUILTIN_PROFILES,
+    RESOURCE_PROFILE_KEY,
+    available_profiles,
+    resolve_limits,
+    with_limits,
+)
+
+
+def test_resolve_limits_maps_to_incus_keys():
+    limits = resolve_limits("background", {"memory": "2GiB"}, BUILTIN_PROFILES)
+
+    assert limits["limits.cpu.priority"] == "0"
+    assert limits["limits.disk.priority"] == "0"
+    assert limits["limits.memory"] == "2GiB"
+    assert limits["limits.processes"] == "4096"
+    assert resolve_limits("none", {}, BUILTIN_PROFILES) == {}
+
+
+@pytest.mark.parametrize(
+    ("profile", "overrides"),
+    [
+        ("turbo", {}),
+        ("batch", {"swap": "1"}),
+        ("batch", {"cpu_priority": "11"}),
+        ("batch", {"memory_enforce": "maybe"}),
+    ],
+)
+def test_resolve_limits_rejects_bad_input(profile, overrides):
+    with pytest.raises(ValueError):
+        resolve_limits(profile, overrides, BUILTIN_PROFILES)
+
+
+def test_configured_profiles_extend_builtins(tmp_path, monkeypatch):
+    conf = tmp_path / "kapsule.conf"
+    conf.write_text(
+        "[resources.build]\ncpu_priority = 3\nmemory = 16GiB\n"
+        "[resources.broken]\nswap = 1\n"
+        "[resources.batch]\ncpu_priority = 4\n"
+    )
+    monkeypatch.setattr(
+        "kapsule.daemon.config.get_config_paths", lambda **_: [conf]
+    )
+
+    profiles = available_profiles(load_resource_profiles())
+
+    assert profiles["build"] == {"cpu_priority": "3", "memory": "16GiB"}
+    assert profiles["batch"] == {"cpu_priority": "4"}
+    assert "broken" not in profiles
+    assert "interactive" in profiles
+
+
+def test_with_limits_replaces_previous_limits():
+    instance = Instance.model_validate({
+        "name": "dev",
+        "profiles": ["kapsule-base"],
+        "config": {
+            "limits.memory": "1GiB",
+            "limits.cpu": "2",
+            RESOURCE_PROFILE_KEY: "batch",
+            "user.kapsule.ptyxis-profile": "abc",
+        },
+        "devices": {},
+    })
+
+    put = with_limits(instance, "interactive", {"limits.cpu.priority": "10"})
+
+    assert put.config == {
+        "limits.cpu.priority": "10",
+        RESOURCE_PROFILE_KEY: "interactive",
+        "user.kapsule.ptyxis-profile": "abc",
+    }
+    assert put.profiles == ["kapsule-base"]
+
+
+@pytest.mark.asyncio
+async def test_set_container_limits_keeps_current_profile():
+    incus = create_autospec(IncusClient, instance=True)
+    incus.instance_exists.return_value = True
+    current = Instance.model_validate({
+        "name": "dev", "config": {RESOURCE_PROFILE_KEY: "batch"}, "devices": {},
+    })
+    incus.get_instance.return_value = current
+    service = ContainerService(MagicMock(), incus)
+
+    await ContainerService.set_container_limits.__wrapped__(
+        service, MagicMock(), name="dev", profile="", limits={"memory": "4GiB"}
+    )
+
+    name, rewrite = incus.rewrite_instance.call_args.args
+    assert name == "dev"
+    config = rewrite(current).config
+    assert config[RESOURCE_PROFILE_KEY] == "batch"
+    assert config["limits.memory"] == "4GiB"
+    assert config["limits.cpu.priority"] == "5"
+
+    with pytest.raises(OperationError, match="Unknown resource profile"):
+        await ContainerService.set_container_limits.__wrapped__(
+            service, MagicMock(), name="dev", profile="turbo", limits={}
+        )
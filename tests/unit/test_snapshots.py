@@ -0,0 +1,147 @@
+"""Tests for snapshot naming and retention."""
+
+import json
+from datetime import UTC, datetime, timedelta
+
+import httpx
+import pytest
+
+from kapsule.daemon.incus_client import IncusClient
+from kapsule.daemon.models_generated import Instance, InstanceSnapshot
+from kapsule.daemon.snapshots import (
+    AUTO_SNAPSHOT_KEY,
+    SnapshotPruner,
+    auto_snapshot_name,
+    is_auto_snapshot,
+    select_expired,
+    take_auto_snapshot,
+)
+
+NOW = datetime(2026, 3, 10, 12, 0, 0, tzinfo=UTC)
+
+
+def _snapshot(name, days_old, auto=True):
+    return InstanceSnapshot.model_validate({
+        "name": name,
+        "created_at": (NOW - timedelta(days=days_old)).isoformat(),
+        "config": {AUTO_SNAPSHOT_KEY: name} if auto else {},
+    })
+
+
+def test_auto_snapshot_name_avoids_collisions():
+    name = auto_snapshot_name([], now=NOW)
+    assert name == "snap-20260310-120000"
+    second = auto_snapshot_name([name], now=NOW)
+    assert second == "snap-20260310-120000-2"
+
+
+def test_auto_snapshots_are_recognised_by_their_marker():
+    assert is_auto_snapshot(_snapshot("snap-20260310-120000", 0))
+    assert not is_auto_snapshot(_snapshot("snap-20260310-120000", 0, auto=False))
+    # Taken after a restore of an automatic snapshot, which left its marker
+    assert not is_auto_snapshot(InstanceSnapshot.model_validate({
+        "name": "before-upgrade",
+        "config": {AUTO_SNAPSHOT_KEY: "snap-20260310-120000"},
+    }))
+
+
+def test_select_expired_only_touches_automatic_snapshots():
+    snapshots = [
+        _snapshot("before-upgrade", 30, auto=False),
+        _snapshot("snap-20260208-120000", 30),
+        _snapshot("snap-20260209-120000", 29, auto=False),
+        _snapshot("snap-20260301-120000", 9),
+        _snapshot("snap-20260308-120000", 2),
+        _snapshot("snap-20260310-110000", 0),
+    ]
+
+    assert select_expired(snapshots, keep_last=0, max_age=None, now=NOW) == []
+    assert select_expired(snapshots, keep_last=2, max_age=None, now=NOW) == [
+        "snap-20260208-120000", "snap-20260301-120000",
+    ]
+    assert select_expired(
+        snapshots, keep_last=0, max_age=timedelta(days=7), now=NOW
+    ) == ["snap-20260208-120000", "snap-20260301-120000"]
+    assert select_expired(
+        snapshots, keep_last=3, max_age=timedelta(days=14), now=NOW
+    ) == ["snap-20260208-120000"]
+
+
+@pytest.mark.asyncio
+async def test_take_auto_snapshot_marks_then_clears(incus):
+    await take_auto_snapshot(incus, "dev", "snap-20260310-120000")
+
+    calls = [(c[0], c.args) for c in incus.mock_calls]
+    assert calls == [
+        ("patch_instance_config",
+         ("dev", {AUTO_SNAPSHOT_KEY: "snap-20260310-120000"})),
+        ("create_snapshot", ("dev", "snap-20260310-120000")),
+        ("patch_instance_config", ("dev", {AUTO_SNAPSHOT_KEY: ""})),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_pruner_deletes_expired_snapshots(incus):
+    incus.list_snapshots.return_value = [
+        _snapshot("snap-20260101-000000", 60),
+        _snapshot("snap-20260102-000000", 59),
+        _snapshot("keep-me", 90, auto=False),
+    ]
+    pruner = SnapshotPruner(
+        incus, keep_last=1, max_age_days=0, skip=lambda _name: False
+    )
+
+    assert await pruner.prune("dev") == ["snap-20260101-000000"]
+    incus.delete_snapshot.assert_awaited_once_with(
+        "dev", "snap-20260101-000000", wait=True
+    )
+
+
+@pytest.mark.asyncio
+async def test_prune_all_skips_internal_instances(incus):
+    incus.list_instances.return_value = [
+        Instance.model_validate({"name": name})
+        for name in ("dev", "kapsule-template-arch")
+    ]
+    incus.list_snapshots.return_value = [
+        _snapshot("snap-20260101-000000", 60),
+        _snapshot("snap-20260102-000000", 59),
+    ]
+    pruner = SnapshotPruner(
+        incus, keep_last=1, max_age_days=0,
+        skip=lambda name: name.startswith("kapsule-template-"),
+    )
+
+    assert await pruner.prune_all() == [("dev", "snap-20260101-000000")]
+    incus.list_snapshots.assert_awaited_once_with("dev")
+
+
+@pytest.mark.asyncio
+async def test_disabled_pruner_does_nothing(incus):
+    pruner = SnapshotPruner(
+        incus, keep_last=0, max_age_days=0, skip=lambda _name: False
+    )
+
+    assert not pruner.enabled
+    assert await pruner.prune("dev") == []
+    incus.list_snapshots.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_restore_snapshot_puts_restore_field():
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(202, json={
+            "type": "async", "status": "Operation created", "status_code": 100,
+            "metadata": {"id": "op1", "status": "Running"},
+        })
+
+    client = IncusClient(transport=httpx.MockTransport(handler))
+    await client.restore_snapshot("dev", "snap0")
+
+    assert requests[0].method == "PUT"
+    assert requests[0].url.path == "/1.0/instances/dev"
+    assert json.loads(requests[0].content) == {"restore": "snap0"}
+    await client.close()
@@ -0,0 +1,83 @@
+"""Tests for per-container resource telemetry."""
+
+from types import SimpleNamespace
+from unittest.mock import create_autospec
+
+import pytest
+
+from kapsule.daemon.incus_client import IncusClient
+from kapsule.daemon.models_generated import InstanceFull
+from kapsule.daemon.stats import HISTORY_SIZE, StatsCollector
+
+
+def _instance(name, cpu_ns, status="Running"):
+    return InstanceFull.model_validate({
+        "name": name,
+        "status": status,
+        "state": {
+            "cpu": {"usage": cpu_ns},
+            "memory": {"usage": 256 * 1024**2, "total": 1024**3},
+            "disk": {"root": {"usage": 5 * 1024**3}},
+            "processes": 17,
+        },
+    })
+
+
+@pytest.mark.asyncio
+async def test_stats_compute_cpu_rate_from_batched_samples(monkeypatch):
+    clock = iter([100.0, 100.0, 102.0, 102.0])
+    monkeypatch.setattr(
+        "kapsule.daemon.stats.time", SimpleNamespace(monotonic=lambda: next(clock))
+    )
+    incus = create_autospec(IncusClient, instance=True)
+    incus.list_instances_with_state.return_value = [
+        _instance("dev", 1_000_000_000), _instance("kapsule-run-x", 0),
+    ]
+    collector = StatsCollector(incus, skip=lambda n: n.startswith("kapsule-run-"))
+
+    first = await collector.stats()
+    assert [s.name for s in first] == ["dev"]
+    assert first[0].cpu_percent == 0.0
+
+    # One CPU-second over two seconds of wall time
+    incus.list_instances_with_state.return_value = [_instance("dev", 2_000_000_000)]
+    [dev] = await collector.stats()
+
+    assert dev.cpu_percent == pytest.approx(50.0)
+    assert dev.cpu_history == [pytest.approx(50.0)]
+    assert dev.memory_limit == 1024**3
+    assert dev.disk == 5 * 1024**3
+    assert dev.processes == 17
+    assert incus.list_instances_with_state.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_close_requests_share_a_sample(monkeypatch):
+    clock = iter([10.0, 10.0, 10.2])
+    monkeypatch.setattr(
+        "kapsule.daemon.stats.time", SimpleNamespace(monotonic=lambda: next(clock))
+    )
+    incus = create_autospec(IncusClient, instance=True)
+    incus.list_instances_with_state.return_value = [_instance("dev", 0)]
+    collector = StatsCollector(incus, skip=lambda _n: False)
+
+    await collector.stats()
+    await collector.stats()
+
+    assert incus.list_instances_with_state.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_history_is_bounded_and_dropped_with_the_container():
+    incus = create_autospec(IncusClient, instance=True)
+    collector = StatsCollector(incus, skip=lambda _n: False)
+
+    for i in range(HISTORY_SIZE + 5):
+        incus.list_instances_with_state.return_value = [_instance("dev", i)]
+        await collector.sample()
+    [dev] = await collector.stats()
+    assert len(dev.cpu_history) == HISTORY_SIZE - 1
+
+    incus.list_instances_with_state.return_value = []
+    await collector.sample()
+    assert await collector.stats() == []
@@ -0,0 +1,145 @@
+"""Tests for golden template containers."""
+
+from unittest.mock import AsyncMock
+
+import pytest
+
+from kapsule.daemon.incus_client import IncusError
+from kapsule.daemon.models_generated import Image, Instance, StoragePool
+from kapsule.daemon.templates import (
+    TEMPLATE_FINGERPRINT_KEY,
+    TEMPLATE_IMAGE_KEY,
+    TemplateManager,
+    is_template,
+    template_name,
+)
+
+IMAGE = "images:archlinux"
+
+
+@pytest.fixture
+def incus(incus):
+    incus.list_storage_pools.return_value = [
+        StoragePool.model_validate({"name": "default", "driver": "btrfs"})
+    ]
+    return incus
+
+
+def _manager(incus, prepare=None):
+    return TemplateManager(
+        incus, prepare or AsyncMock(), profiles=["kapsule-base"]
+    )
+
+
+def test_template_name_is_valid_and_unique():
+    name = template_name("ubuntu:24.04")
+    assert is_template(name)
+    assert name.startswith("kapsule-template-ubuntu-24-04-")
+    assert template_name("ubuntu:24.04") == name
+    assert template_name("ubuntu/24.04") != name
+    assert len(template_name("images:" + "x" * 200)) <= 63
+
+
+@pytest.mark.asyncio
+async def test_source_for_requires_complete_template(incus):
+    manager = _manager(incus)
+
+    incus.get_instance.side_effect = IncusError("not found", 404)
+    assert await manager.source_for(IMAGE) is None
+
+    incus.get_instance.side_effect = None
+    incus.get_instance.return_value = Instance.model_validate({
+        "name": template_name(IMAGE), "config": {},
+    })
+    assert await manager.source_for(IMAGE) is None
+
+    incus.get_instance.return_value = Instance.model_validate({
+        "name": template_name(IMAGE), "config": {TEMPLATE_IMAGE_KEY: IMAGE},
+    })
+    source = await manager.source_for(IMAGE)
+    assert source is not None
+    assert source.type == "copy"
+    assert source.source == f"{template_name(IMAGE)}/golden"
+
+
+@pytest.mark.asyncio
+async def test_templates_disabled_without_cow_pool(incus):
+    incus.list_storage_pools.return_value = [
+        StoragePool.model_validate({"name": "default", "driver": "dir"})
+    ]
+    manager = _manager(incus)
+
+    assert await manager.source_for(IMAGE) is None
+    assert await manager.refresh_stale() == []
+    incus.get_instance.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_build_snapshots_before_recording_and_swaps_in(incus):
+    incus.instance_exists.side_effect = [False, True]
+    incus.get_instance.return_value = Instance.model_validate({
+        "name": "x", "config": {"volatile.base_image": "abc123"},
+    })
+    prepare = AsyncMock()
+    name = template_name(IMAGE)
+
+    await _manager(incus, prepare).build(IMAGE)
+
+    prepare.assert_awaited_once_with(f"{name}-next")
+    request = incus.create_instance.call_args.args[0]
+    assert request.profiles == ["kapsule-base"]
+    assert request.config is None
+    calls = [c[0] for c in incus.mock_calls]
+    assert calls.index("create_snapshot") < calls.index("patch_instance_config")
+    incus.patch_instance_config.assert_awaited_once_with(f"{name}-next", {
+        TEMPLATE_IMAGE_KEY: IMAGE,
+        TEMPLATE_FINGERPRINT_KEY: "abc123",
+    })
+    incus.delete_instance.assert_awaited_once_with(name, wait=True)
+    incus.rename_instance.assert_awaited_once_with(f"{name}-next", name, wait=True)
+
+
+@pytest.mark.asyncio
+async def test_failed_build_removes_partial_template(incus):
+    incus.instance_exists.side_effect = [False, True]
+    prepare = AsyncMock(side_effect=IncusError("exec failed"))
+    name = template_name(IMAGE)
+
+    with pytest.raises(IncusError):
+        await _manager(incus, prepare).build(IMAGE)
+
+    incus.delete_instance.assert_awaited_once_with(f"{name}-next", wait=True)
+    incus.rename_instance.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_refresh_stale_rebuilds_outdated_templates(incus):
+    incus.list_images.return_value = [
+        Image.model_validate({
+            "fingerprint": fingerprint,
+            "uploaded_at": uploaded_at,
+            "update_source": {
+                "server": "https://images.linuxcontainers.org",
+                "alias": alias,
+            },
+        })
+        for fingerprint, uploaded_at, alias in [
+            ("old", "2026-01-01T00:00:00Z", "archlinux"),
+            ("new", "2026-02-01T00:00:00Z", "archlinux"),
+            ("deb", "2026-02-01T00:00:00Z", "debian/13"),
+        ]
+    ]
+    incus.list_instances.return_value = [
+        Instance.model_validate({"name": template_name(image), "config": {
+            TEMPLATE_IMAGE_KEY: image,
+            TEMPLATE_FINGERPRINT_KEY: fingerprint,
+        }})
+        for image, fingerprint in [
+            (IMAGE, "old"),
+            ("images:debian/13", "deb"),
+        ]
+    ]
+    manager = _manager(incus)
+    manager.schedule_build = lambda _image: None
+
+    assert await manager.refresh_stale() == [IMAGE]
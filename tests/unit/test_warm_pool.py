@@ -0,0 +1,112 @@
+"""Tests for the warm pool of default containers."""
+
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from kapsule.daemon.config import load_config
+from kapsule.daemon.models_generated import Instance
+from kapsule.daemon.warm_pool import WarmPool, _member_prefix, is_pool_member
+
+IMAGE = "images:archlinux"
+
+
+@pytest.fixture
+def incus(incus):
+    incus.instance_exists.return_value = True
+    return incus
+
+
+def _instances(instances):
+    return [
+        Instance.model_validate({"name": name, "status": status})
+        for name, status in instances
+    ]
+
+
+@pytest.mark.asyncio
+async def test_claim_renames_stopped_member(incus):
+    member = f"{_member_prefix(IMAGE)}aaaaaa"
+    incus.list_instances.return_value = _instances([
+        (f"{_member_prefix(IMAGE)}bbbbbb", "Running"),
+        (member, "Stopped"),
+        ("dev", "Stopped"),
+    ])
+    pool = WarmPool(incus, AsyncMock(), size=2, image=IMAGE)
+    pool.schedule_refill = lambda: None
+
+    assert await pool.claim("kapsule", IMAGE)
+    incus.rename_instance.assert_awaited_once_with(member, "kapsule", wait=True)
+
+
+@pytest.mark.asyncio
+async def test_claim_declines_other_image_or_empty_pool(incus):
+    incus.list_instances.return_value = _instances([
+        (f"{_member_prefix(IMAGE)}aaaaaa", "Stopped"),
+    ])
+
+    pool = WarmPool(incus, AsyncMock(), size=1, image=IMAGE)
+    pool.schedule_refill = lambda: None
+    assert not await pool.claim("kapsule", "images:debian/13")
+
+    disabled = WarmPool(incus, AsyncMock(), size=0, image=IMAGE)
+    assert not await disabled.claim("kapsule", IMAGE)
+    incus.rename_instance.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_refill_tops_up_and_drops_stale_members(incus):
+    stale = f"{_member_prefix('images:debian/13')}cccccc"
+    incus.list_instances.return_value = _instances([
+        (f"{_member_prefix(IMAGE)}aaaaaa", "Stopped"),
+        (stale, "Stopped"),
+    ])
+    create = AsyncMock()
+    pool = WarmPool(incus, create, size=3, image=IMAGE)
+
+    await pool.refill()
+
+    incus.delete_instance.assert_awaited_once_with(stale, wait=True)
+    assert create.await_count == 2
+    for call in create.await_args_list:
+        name, image = call.args
+        assert name.startswith(_member_prefix(IMAGE))
+        assert is_pool_member(name)
+        assert image == IMAGE
+        incus.stop_instance.assert_any_await(name, wait=True)
+
+
+@pytest.mark.asyncio
+async def test_refill_runs_once_at_a_time(incus):
+    incus.list_instances.return_value = []
+    gate = asyncio.Event()
+    created: list[str] = []
+
+    async def create(name, _image):
+        created.append(name)
+        await gate.wait()
+
+    pool = WarmPool(incus, create, size=1, image=IMAGE)
+
+    pool.start()
+    await asyncio.sleep(0)
+    pool.schedule_refill()
+    await asyncio.sleep(0)
+    gate.set()
+    await pool.stop()
+
+    assert len(created) == 1
+
+
+def test_warm_pool_size_from_config(tmp_path, monkeypatch):
+    conf = tmp_path / ".config" / "kapsule" / "kapsule.conf"
+    conf.parent.mkdir(parents=True)
+    conf.write_text("[kapsule]\nwarm_pool_size = 2\n")
+    monkeypatch.setattr(
+        "kapsule.daemon.config.get_config_paths", lambda **_: [conf]
+    )
+    assert load_config(home_dir=str(tmp_path)).warm_pool_size == 2
+
+    conf.write_text("[kapsule]\nwarm_pool_size = lots\n")
+    assert load_config(home_dir=str(tmp_path)).warm_pool_size == 0